@@ -0,0 +1,288 @@
+"""
+Static asset pipeline for the kiosk frontend.
+
+At startup the dashboard HTML is split into its inline stylesheet and
+script, each is minified and written under a content-hashed name, and
+gzip/brotli variants of every asset are precomputed in memory. Hashed
+assets are served with a one-year immutable Cache-Control, so the kiosk
+browser never revalidates them. The HTML itself is kept in memory and
+revalidated with an ETag.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import Request, Response
+
+from backend.compression import brotli_available, negotiate_encoding
+
+if brotli_available:
+    import brotli
+
+logger = logging.getLogger("pi_life_hub")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Starlette appends the charset to text/* types itself
+MEDIA_TYPES = {
+    ".css": "text/css",
+    ".js": "application/javascript; charset=utf-8",
+    ".html": "text/html"
+}
+
+INLINE_STYLE = re.compile(r"<style>(.*?)</style>", re.S)
+INLINE_SCRIPT = re.compile(r"<script>(.*?)</script>", re.S)
+
+
+# Quoted strings, unquoted url() arguments and comments in a stylesheet
+CSS_TOKENS = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\(\s*[^)'"\s]*\s*\)|/\*.*?\*/)""", re.S)
+# Tokens after which "/" starts a regular expression literal rather than a division
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw", "case", "do",
+                  "else", "yield", "await"}
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace from a stylesheet, leaving strings and url() untouched."""
+    parts, code = [], []
+    for index, part in enumerate(CSS_TOKENS.split(css)):
+        if not index % 2:
+            code.append(part)
+        elif not part.startswith("/*"):
+            parts += [_collapse_css("".join(code)), part]
+            code = []
+    parts.append(_collapse_css("".join(code)))
+    return "".join(parts).replace(";}", "}").strip()
+
+
+def _collapse_css(css: str) -> str:
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};])\s*", r"\1", css)
+
+
+def _js_line_states(js: str) -> List[str]:
+    """What each line of a script starts in: "code", "comment" (a block comment) or "text".
+
+    "text" is the inside of a template literal, where whitespace and "//"
+    are content. A scanner rather than a parser: it only follows quotes,
+    template literals with their ${} expressions, regex literals and
+    comments, which is all that decides this.
+    """
+    states = ["code"]
+    # One entry per open template literal: None while in its text, else the brace depth inside ${}
+    templates: List[Optional[int]] = []
+    state = "code"  # code, ', ", regex, line or block
+    last, word, in_class = "", "", False
+    i, n = 0, len(js)
+    while i < n:
+        c = js[i]
+        if c == "\n":
+            if state != "block":
+                state = "code"  # Line comments end here; strings and regexes can't span lines
+            in_text = bool(templates) and templates[-1] is None
+            states.append("text" if in_text else "comment" if state == "block" else "code")
+            i += 1
+            continue
+        if c == "\\" and (state in ("'", '"', "regex") or (templates and templates[-1] is None and state == "code")):
+            i += 1
+            if i < n and js[i] == "\n":
+                states.append("text")  # Line continuation
+            i += 1
+            continue
+
+        if templates and templates[-1] is None:
+            if c == "`":
+                templates.pop()
+                last, word = "`", ""
+            elif js.startswith("${", i):
+                templates[-1] = 0
+                last, word = "{", ""
+                i += 1
+        elif state == "line":
+            pass
+        elif state == "block":
+            if js.startswith("*/", i):
+                state = "code"
+                i += 1
+        elif state in ("'", '"'):
+            if c == state:
+                state, last, word = "code", c, ""
+        elif state == "regex":
+            if c == "[":
+                in_class = True
+            elif c == "]":
+                in_class = False
+            elif c == "/" and not in_class:
+                state, last, word = "code", "/", ""
+        elif c in "'\"":
+            state = c
+        elif c == "`":
+            templates.append(None)
+        elif c == "/" and js.startswith(("//", "/*"), i):
+            state = "line" if js[i + 1] == "/" else "block"
+            i += 1
+        elif c == "/" and (last in REGEX_PRECEDERS or not last or (word and word in REGEX_KEYWORDS)):
+            state, in_class = "regex", False
+        elif not c.isspace():
+            if c.isalnum() or c in "_$":
+                word = word + c if last.isalnum() or last in "_$" else c
+            else:
+                word = ""
+                if templates and c == "{":
+                    templates[-1] += 1
+                elif templates and c == "}":
+                    if templates[-1]:
+                        templates[-1] -= 1
+                    else:
+                        templates[-1] = None  # Back in the template text
+            last = c
+        i += 1
+    return states
+
+
+def minify_js(js: str) -> str:
+    """Conservative script minification: drop indentation, blank and comment-only lines.
+
+    Line breaks are kept so automatic semicolon insertion behaves exactly as
+    in the source, and lines inside template literals are left as they are.
+    """
+    lines = js.split("\n")
+    states = _js_line_states(js) + ["code"]
+    kept = []
+    for index, line in enumerate(lines):
+        if states[index] == "text":
+            kept.append(line.rstrip() if states[index + 1] != "text" else line)
+            continue
+        stripped = line.strip() if states[index + 1] != "text" else line.lstrip()
+        if stripped and not (states[index] == "code" and stripped.startswith("//")):
+            kept.append(stripped)
+    return "\n".join(kept)
+
+
+def minify_html(html: str) -> str:
+    """Drop comments, indentation and blank lines between tags."""
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.S)
+    return "\n".join(line.strip() for line in html.splitlines() if line.strip())
+
+
+@dataclass
+class Asset:
+    """One servable asset with its precompressed variants."""
+    body: bytes
+    media_type: str
+    etag: str
+    variants: Dict[str, bytes] = field(default_factory=dict)  # content-coding -> body
+
+    @classmethod
+    def build(cls, body: bytes, media_type: str, dynamic: bool = False) -> "Asset":
+        """Hash and precompress a body; dynamic bodies trade ratio for compression speed."""
+        asset = cls(body, media_type, '"' + hashlib.sha256(body).hexdigest()[:16] + '"')
+        asset.variants["gzip"] = gzip.compress(body, compresslevel=6 if dynamic else 9, mtime=0)
+        if brotli_available:
+            asset.variants["br"] = brotli.compress(body, quality=5 if dynamic else 11)
+        # Keep only encodings that actually save bytes
+        asset.variants = {coding: data for coding, data in asset.variants.items() if len(data) < len(body)}
+        return asset
+
+
+class AssetPipeline:
+    """Builds and serves the fingerprinted, precompressed frontend assets."""
+
+    def __init__(self, frontend_dir: Path, url_prefix: str = "/assets"):
+        self.frontend_dir = frontend_dir
+        self.url_prefix = url_prefix
+        self.assets: Dict[str, Asset] = {}  # hashed file name -> asset
+        self.pages: Dict[str, Asset] = {}  # page name -> rewritten HTML
+        self._rendered: Optional[Asset] = None  # Last page rendered with embedded state
+
+    def build(self) -> None:
+        """(Re)build every asset; falls back to the raw page if processing fails."""
+        assets: Dict[str, Asset] = {}
+        html = (self.frontend_dir / "index.html").read_text()
+        try:
+            page = self._extract_inline(assets, html)
+        except Exception as e:
+            logger.error(f"Asset pipeline failed, serving unprocessed dashboard: {e}")
+            page = html
+
+        self.assets = assets
+        self.pages = {"index": Asset.build(page.encode("utf-8"), MEDIA_TYPES[".html"])}
+        self._rendered = None
+
+        original = len(html.encode("utf-8"))
+        shipped = sum(len(asset.body) for asset in assets.values()) + len(self.pages["index"].body)
+        logger.info(f"Built {len(assets)} frontend assets ({original} -> {shipped} bytes before compression, "
+                    f"brotli {'on' if brotli_available else 'unavailable'})")
+
+    def _add_asset(self, assets: Dict[str, Asset], stem: str, suffix: str, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()[:10]
+        name = f"{stem}.{digest}{suffix}"
+        assets[name] = Asset.build(body, MEDIA_TYPES[suffix])
+        return name
+
+    def _extract_inline(self, assets: Dict[str, Asset], html: str) -> str:
+        """Move inline <style>/<script> blocks into hashed external files."""
+        def replace_style(match: re.Match) -> str:
+            name = self._add_asset(assets, "dashboard", ".css", minify_css(match.group(1)).encode("utf-8"))
+            return f'<link rel="stylesheet" href="{self.url_prefix}/{name}">'
+
+        def replace_script(match: re.Match) -> str:
+            name = self._add_asset(assets, "dashboard", ".js", minify_js(match.group(1)).encode("utf-8"))
+            return f'<script src="{self.url_prefix}/{name}"></script>'
+
+        html = INLINE_STYLE.sub(replace_style, html)
+        html = INLINE_SCRIPT.sub(replace_script, html)
+        return minify_html(html)
+
+    def _negotiate(self, request: Request, asset: Asset) -> Optional[str]:
+        available = [coding for coding in ("br", "gzip") if coding in asset.variants]
+        return negotiate_encoding(request.headers.get("accept-encoding", ""), available)
+
+    def _respond(self, request: Request, asset: Asset, cache_control: str) -> Response:
+        coding = self._negotiate(request, asset)
+        # Each encoding is a different representation, so it gets its own validator
+        etag = asset.etag if coding is None else f'{asset.etag[:-1]}-{coding}"'
+        headers = {"Cache-Control": cache_control, "ETag": etag, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+            return Response(content=asset.variants[coding], media_type=asset.media_type, headers=headers)
+        return Response(content=asset.body, media_type=asset.media_type, headers=headers)
+
+    def serve_asset(self, request: Request, name: str) -> Optional[Response]:
+        """Response for a hashed asset, or None if the name is unknown."""
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+        return self._respond(request, asset, IMMUTABLE)
+
+    async def serve_page(self, request: Request, page: str = "index", state: Optional[bytes] = None) -> Response:
+        """In-memory dashboard HTML; always revalidated so new asset hashes are picked up.
+        
+        When state is given (JSON bytes) it is embedded ahead of the first
+        script as <script id="initialState" type="application/json">.
+        """
+        if state is None:
+            return self._respond(request, self.pages[page], "no-cache")
+        return self._respond(request, await self._render(self.pages[page], state), "no-cache")
+
+    async def _render(self, template: Asset, state: bytes) -> Asset:
+        """Page with embedded state; recompressed in a worker thread, and only when the state changes."""
+        # "<" is escaped so no string in the state can close the script element
+        tag = b'<script id="initialState" type="application/json">' + state.replace(b"<", b"\\u003c") + b"</script>"
+        head, marker, tail = template.body.partition(b"<script")
+        body = head + tag + marker + tail if marker else template.body.replace(b"</body>", tag + b"</body>")
+
+        if self._rendered is None or self._rendered.body != body:
+            loop = asyncio.get_running_loop()
+            self._rendered = await loop.run_in_executor(None, Asset.build, body, template.media_type, True)
+        return self._rendered
@@ -0,0 +1,143 @@
+"""
+Response encoding for the API: fast JSON rendering and size-aware compression.
+
+JSON responses are rendered with orjson when it is installed (FastAPI's
+ORJSONResponse), and complete response bodies above a size threshold are
+compressed with brotli or gzip according to the client's Accept-Encoding.
+Large bodies are compressed in a worker thread rather than on the event
+loop. Streaming responses (server-sent events, photo files) and bodies
+that are already encoded pass through untouched.
+"""
+
+import asyncio
+import gzip
+import re
+from typing import Dict, Iterable, Optional, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson  # noqa: F401
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+try:
+    import brotli
+    brotli_available = True
+except ImportError:
+    brotli_available = False
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def default_response_class() -> Type[JSONResponse]:
+    """ORJSONResponse when orjson is installed, otherwise the stdlib-backed JSONResponse."""
+    return ORJSONResponse if orjson_available else JSONResponse
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    codings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if name:
+            codings[name.strip().lower()] = quality
+    return codings
+
+
+def negotiate_encoding(header: str, available: Iterable[str]) -> Optional[str]:
+    """Pick the first available coding (in preference order) the client accepts."""
+    accepted = accepted_encodings(header)
+    for coding in available:
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, coding: str, level: int) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress complete, compressible response bodies of at least minimum_size bytes."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 5, brotli_quality: int = 4,
+                 offload_size: int = 16 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        # Larger bodies (photo lists, forecasts) are compressed in a thread so the event loop keeps serving
+        self.offload_size = offload_size
+        # Low levels: most of the ratio for a fraction of the CPU, which matters on a Pi
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+        self.codings = ("br", "gzip") if brotli_available else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.codings)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = ("content-encoding" in headers
+                               or not content_type.startswith(COMPRESSIBLE_TYPES))
+                if passthrough:
+                    await send(message)
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or start is None:
+                # Streaming body: send as is rather than buffering it
+                passthrough = True
+                if start is not None:
+                    await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            if len(body) >= self.minimum_size:
+                if len(body) >= self.offload_size:
+                    body = await asyncio.get_running_loop().run_in_executor(
+                        None, compress, body, coding, self.levels[coding]
+                    )
+                else:
+                    body = compress(body, coding, self.levels[coding])
+                headers["Content-Encoding"] = coding
+                headers["Content-Length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The encoded bytes differ from the identity representation
+                    headers["ETag"] = "W/" + etag
+                message = {**message, "body": body}
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,90 @@
+"""
+Conditional GET support driven by module version tokens.
+
+For GET/HEAD requests on routes registered with modules.common.versioning,
+the ETag is derived from the route's version token and the request URL, so
+a matching If-None-Match is answered with 304 before the endpoint runs and
+without rendering the body. Responses that already carry an ETag (weather,
+frontend assets) are left alone.
+"""
+
+import hashlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from modules.common.versioning import VersionRegistry, versions
+
+# Headers a 304 must repeat from the full response (RFC 9110 15.4.5)
+NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "date", "etag", "expires", "vary")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()) == opaque
+               for tag in if_none_match.split(","))
+
+
+class ConditionalGetMiddleware:
+    """ETag/304 for registered read endpoints, computed from version tokens."""
+
+    def __init__(self, app: ASGIApp, registry: VersionRegistry = versions):
+        self.app = app
+        self.registry = registry
+
+    def _etag(self, scope: Scope, token: str) -> str:
+        key = f"{scope['path']}?{scope.get('query_string', b'').decode('latin-1')}|{token}"
+        return '"' + hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or scope["method"] not in ("GET", "HEAD")
+                or not self.registry.is_registered(scope["path"])):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        # Taken before the endpoint runs: a change while it renders must not
+        # let the new token vouch for a body built from the old state
+        before = self.registry.token_for(scope["path"])
+        if before is not None and if_none_match and etag_matches(if_none_match, self._etag(scope, before)):
+            await self._send_not_modified(send, {"etag": self._etag(scope, before), "cache-control": "no-cache"})
+            return
+
+        not_modified = False
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal not_modified
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if message["status"] == 200 and "etag" not in headers:
+                    etag = self._validated_etag(scope, before)
+                    if etag is not None:
+                        headers["ETag"] = etag
+                        headers.setdefault("Cache-Control", "no-cache")
+                        # The endpoint had to run (e.g. to refresh upstream data)
+                        # but produced what the client already has
+                        if if_none_match and etag_matches(if_none_match, etag):
+                            not_modified = True
+                            await self._send_not_modified(send, headers)
+                            return
+                await send(message)
+            elif not not_modified:
+                await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    def _validated_etag(self, scope: Scope, before: Optional[str]) -> Optional[str]:
+        after = self.registry.token_for(scope["path"])
+        if after is None or (before is not None and after != before):
+            return None
+        return self._etag(scope, after)
+
+    async def _send_not_modified(self, send: Send, headers) -> None:
+        raw = [(name.encode("latin-1"), value.encode("latin-1"))
+               for name, value in headers.items() if name.lower() in NOT_MODIFIED_HEADERS]
+        await send({"type": "http.response.start", "status": 304, "headers": raw})
+        await send({"type": "http.response.body", "body": b""})
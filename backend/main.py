@@ -2,13 +2,15 @@
 from config.env_config import Config
 from modules.calendar.service_secure import get_calendar_service
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 import asyncio
+import json
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import sqlite3
 import os
 import logging
@@ -22,6 +24,13 @@ import sys
 # Add modules to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from backend.compression import CompressionMiddleware, default_response_class
+from backend.conditional import ConditionalGetMiddleware
+from backend.route_cache import ResponseCacheMiddleware
+from backend.traffic_recorder import TrafficLog, TrafficRecorderMiddleware
+from modules.common.response_cache import response_cache
+from modules.common.versioning import database_token, versions
+
 # Configure logging with rotation
 log_dir = Path("/var/log/pi-life-hub")
 try:
@@ -60,10 +69,27 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Pi Life Hub...")
     init_db()
     
+    try:
+        asset_pipeline.build()
+    except Exception as e:
+        logger.error(f"Failed to build frontend assets: {e}")
+    
     # Initialize modules
     if voice_available:
         logger.info("Voice module available")
     
+    try:
+        from modules.weather.api import weather_service
+        weather_service.start_alerts()
+    except ImportError:
+        pass
+    
+    try:
+        from modules.photos.api import photo_service
+        photo_service.start_watching()
+    except ImportError:
+        pass
+    
     yield
     
     # Shutdown
@@ -72,13 +98,31 @@ async def lifespan(app: FastAPI):
     # Cleanup modules
     if voice_available:
         voice_service.cleanup()
+    
+    try:
+        from modules.weather.api import weather_service
+        await weather_service.close()
+    except ImportError:
+        pass
+    
+    try:
+        from modules.photos.api import photo_service
+        await photo_service.close()
+    except ImportError:
+        pass
 
 app = FastAPI(
     title="Pi Life Hub",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=default_response_class()
 )
 
+# Whole-response cache for registered slow-changing GET routes (innermost,
+# so CORS headers are added per request rather than replayed from the cache)
+response_cache.max_bytes = int(os.getenv("LIFEHUB_RESPONSE_CACHE_BYTES", str(4 * 1024 * 1024)))
+app.add_middleware(ResponseCacheMiddleware)
+
 # Add CORS middleware for local network access
 app.add_middleware(
     CORSMiddleware,
@@ -88,6 +132,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETag/304 for read endpoints from module version tokens (inside compression,
+# which weakens the ETag of encoded bodies)
+app.add_middleware(ConditionalGetMiddleware)
+
+# Compress large JSON/text responses (streams and pre-encoded assets pass through)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("LIFEHUB_COMPRESS_MIN_SIZE", "1024"))
+)
+
+# Opt-in request log for replaying real traffic against other builds
+# (outermost, so timings and sizes are what clients saw)
+if os.getenv("LIFEHUB_TRAFFIC_LOG"):
+    app.add_middleware(
+        TrafficRecorderMiddleware,
+        log=TrafficLog(os.getenv("LIFEHUB_TRAFFIC_LOG"),
+                       max_bytes=int(os.getenv("LIFEHUB_TRAFFIC_LOG_BYTES", str(8 * 1024 * 1024))))
+    )
+
 # Get the project root directory
 PROJECT_ROOT = Path(__file__).parent.parent
 FRONTEND_DIR = PROJECT_ROOT / "frontend"
@@ -95,11 +158,19 @@ FRONTEND_DIR = PROJECT_ROOT / "frontend"
 # Mount static files
 app.mount("/static", StaticFiles(directory=str(FRONTEND_DIR)), name="static")
 
+# Fingerprinted, precompressed dashboard assets (built at startup)
+from backend.assets import AssetPipeline
+asset_pipeline = AssetPipeline(FRONTEND_DIR)
+
 # Configuration from environment
 DB_PATH = os.getenv("LIFEHUB_DB_PATH", "lifehub.db")
 MAX_CPU_TEMP = int(os.getenv("LIFEHUB_MAX_CPU_TEMP", "70"))
 MAX_CPU_USAGE = int(os.getenv("LIFEHUB_MAX_CPU_USAGE", "50"))
 
+# Users and todos change only through commits to the database file
+versions.register("/api/users", lambda: database_token(DB_PATH))
+versions.register("/api/todos/{user_id}", lambda user_id: database_token(DB_PATH))
+
 def init_db():
     """Initialize SQLite database with basic tables"""
     try:
@@ -221,12 +292,70 @@ async def health_check():
     
     return health_status
 
+async def build_initial_state() -> Dict[str, Any]:
+    """Snapshot of already-cached module state for the first paint.
+    
+    Only reads in-memory caches (and the local todos table); anything not
+    cached yet is left out and the dashboard fetches it as usual. Timers
+    are left out too: their counters change every second, which would
+    make every page a new render to compress.
+    """
+    state: Dict[str, Any] = {}
+    
+    try:
+        from modules.weather.api import weather_service
+        state.update({key: value for key, value in weather_service.get_cached_state().items() if value is not None})
+    except Exception as e:
+        logger.warning(f"Initial state: weather unavailable: {e}")
+    
+    try:
+        from modules.calendar.api import calendar_service
+        summary = calendar_service.get_cached_summary()
+        if summary is not None:
+            state["calendar"] = summary
+    except Exception as e:
+        logger.warning(f"Initial state: calendar unavailable: {e}")
+    
+    try:
+        from modules.photos.api import photo_service
+        # Only once the catalog has photos; never trigger the initial scan here
+        if not photo_service.catalog.is_empty():
+            state["photos"] = await photo_service.get_slideshow_photos(50)
+    except Exception as e:
+        logger.warning(f"Initial state: photos unavailable: {e}")
+    
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        todos: Dict[str, List[Dict[str, Any]]] = {}
+        for user_id, todo_id, task, completed in conn.execute(
+            "SELECT user_id, id, task, completed FROM todos ORDER BY id"
+        ):
+            todos.setdefault(str(user_id), []).append({"id": todo_id, "task": task, "completed": bool(completed)})
+        conn.close()
+        state["todos"] = todos
+    except Exception as e:
+        logger.warning(f"Initial state: todos unavailable: {e}")
+    
+    return state
+
 @app.get("/", response_class=HTMLResponse)
-async def dashboard():
-    """Serve the main dashboard"""
+async def dashboard(request: Request):
+    """Serve the main dashboard with the cached module state embedded"""
+    if "index" in asset_pipeline.pages:
+        state = json.dumps(jsonable_encoder(await build_initial_state()), separators=(",", ":"))
+        return await asset_pipeline.serve_page(request, state=state.encode("utf-8"))
+    
     with open(FRONTEND_DIR / "index.html", "r") as f:
         return HTMLResponse(content=f.read())
 
+@app.get("/assets/{name}")
+async def frontend_asset(name: str, request: Request):
+    """Serve a content-hashed frontend asset"""
+    response = asset_pipeline.serve_asset(request, name)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return response
+
 @app.get("/api/time")
 async def get_time():
     """Get current time and date in Eastern Time (Medford, NJ)"""
@@ -246,6 +375,11 @@ async def get_time():
         logger.error(f"Error getting time: {e}")
         raise HTTPException(status_code=500, detail="Failed to get time")
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Response cache hit ratios, size and evictions"""
+    return response_cache.get_stats()
+
 @app.get("/api/users")
 async def get_users():
     """Get all users"""
@@ -408,4 +542,10 @@ except ImportError as e:
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    workers = int(os.getenv("LIFEHUB_WORKERS", "1"))
+    if workers > 1:
+        # Worker processes only agree on timers and caches through the shared store
+        os.environ.setdefault("LIFEHUB_SHARED_STATE", str(Path(DB_PATH).with_name("lifehub_state.db")))
+        uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, workers=workers, app_dir=str(PROJECT_ROOT))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
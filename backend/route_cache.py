@@ -0,0 +1,57 @@
+"""
+ASGI front end for modules.common.response_cache.
+
+GET requests on registered routes are answered from the cache when a fresh
+entry exists. Otherwise the response is passed through as it is produced
+and stored afterwards if it was a complete 200 and none of the route's
+scopes were bumped while the endpoint ran.
+"""
+
+from typing import List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from modules.common.response_cache import ResponseCache, response_cache
+
+
+class ResponseCacheMiddleware:
+    """Serve registered GET routes from the response cache."""
+
+    def __init__(self, app: ASGIApp, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        rule = self.cache.rule_for(scope["path"]) if scope["type"] == "http" else None
+        if rule is None or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        key = self.cache.key(path, scope.get("query_string", b""))
+        entry = self.cache.get(path, key)
+        if entry is not None:
+            await send({"type": "http.response.start", "status": entry.status, "headers": list(entry.headers)})
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        versions_before = self.cache.registry.snapshot(rule.scopes)
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        cacheable = True
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal start, cacheable
+            if message["type"] == "http.response.start":
+                start = message
+                cacheable = message["status"] == 200
+            elif message["type"] == "http.response.body" and cacheable:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    # Only a response computed from unchanged state may be stored
+                    if self.cache.registry.snapshot(rule.scopes) == versions_before:
+                        self.cache.put(path, key, start["status"], list(start["headers"]), b"".join(chunks),
+                                       versions_before)
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
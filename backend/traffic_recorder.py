@@ -0,0 +1,176 @@
+"""
+Opt-in recording of request metadata for replaying real traffic.
+
+With LIFEHUB_TRAFFIC_LOG set, every HTTP request is appended to a rolling
+JSON-lines log as one compact record:
+
+    {"t": 1760000000.123, "m": "GET", "r": "/api/photos/image/{photo_id}",
+     "p": "/api/photos/image/3f2a...", "q": "size=large", "s": 200, "d": 4.1, "b": 48211}
+
+t is the start time (epoch seconds), r the matched route template, p and q
+the path and query string needed to re-issue the request, s the status,
+d the time to the last body byte in ms and b the body bytes sent. Nothing
+else is kept: no client address, headers, cookies or request bodies, and
+the values of query parameters that look like credentials are redacted.
+
+benchmarks/replay_traffic.py re-issues a log against another instance and
+diffs the latency distributions of two runs.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "redacted"
+SENSITIVE_PARAM = re.compile(r"key|token|secret|pass|auth|code|session|email", re.IGNORECASE)
+
+
+def anonymize_query(query_string: bytes) -> str:
+    """Query string with credential-like parameter values replaced."""
+    if not query_string:
+        return ""
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode([(name, REDACTED if SENSITIVE_PARAM.search(name) else value) for name, value in params])
+
+
+class TrafficLog:
+    """Buffered JSON-lines writer that rolls over at max_bytes.
+
+    A "{pid}" in the path is replaced by the process id, which gives each
+    uvicorn worker its own log. Buffered records are appended to the file
+    by a writer thread, so requests never wait on the disk.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 8 * 1024 * 1024, backups: int = 3,
+                 flush_interval: float = 2.0, buffer_records: int = 256):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.buffer_records = buffer_records
+        self.records = 0
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._batches: "queue.Queue[Optional[List[str]]]" = queue.Queue()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_batches, name="traffic-log", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, separators=(",", ":")))
+        self.records += 1
+        if len(self._buffer) >= self.buffer_records or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the buffered records to the writer thread."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if lines:
+            self._batches.put(lines)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush and wait for the writer thread to finish."""
+        if not self._writer.is_alive():
+            return
+        self.flush()
+        self._batches.put(None)
+        self._writer.join(timeout)
+
+    def _write_batches(self) -> None:
+        while True:
+            lines = self._batches.get()
+            if lines is None:
+                return
+            try:
+                with open(self.path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                    size = f.tell()
+                if size >= self.max_bytes:
+                    self._roll()
+            except OSError as e:
+                logger.warning(f"Dropped {len(lines)} traffic records: {e}")
+
+    def _roll(self) -> None:
+        """traffic.log -> traffic.log.1 -> ... -> traffic.log.N (oldest dropped)."""
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class TrafficRecorderMiddleware:
+    """Append route, params, status, timing and size of each request to a TrafficLog."""
+
+    def __init__(self, app: ASGIApp, log: TrafficLog):
+        self.app = app
+        self.log = log
+        self._templates: Dict[Any, str] = {}
+
+    def _route_template(self, scope: Scope) -> Optional[str]:
+        """Path pattern of the route the router matched (None for 404s and mounts)."""
+        endpoint = scope.get("endpoint")
+        router = scope.get("router")
+        if endpoint is None or router is None:
+            return None
+        key = (endpoint, scope["method"])
+        if key not in self._templates:
+            for route in router.routes:
+                if getattr(route, "endpoint", None) is endpoint and route.matches(scope)[0] == Match.FULL:
+                    self._templates[key] = route.path
+                    break
+            else:
+                return None
+        return self._templates[key]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.time()
+        start = time.perf_counter()
+        status = 500
+        sent = 0
+
+        async def send_and_measure(message: Message) -> None:
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            self.log.write({
+                "t": round(started, 3),
+                "m": scope["method"],
+                "r": self._route_template(scope),
+                "p": scope["path"],
+                "q": anonymize_query(scope.get("query_string", b"")),
+                "s": status,
+                "d": round((time.perf_counter() - start) * 1000, 2),
+                "b": sent
+            })
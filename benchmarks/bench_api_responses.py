@@ -0,0 +1,140 @@
+"""
+Benchmark: bytes on the wire and CPU per request for the JSON API routers.
+
+Mounts the weather, photos, timer and (if its Google client libraries are
+installed) calendar routers in two apps:
+  - baseline: FastAPI's stdlib JSONResponse, no compression
+  - tuned:    the default response class and CompressionMiddleware from
+              backend/compression.py (orjson + size-aware gzip/brotli)
+and requests each endpoint through an in-process ASGI transport. CPU time is
+process time per request, including the in-process client, which is the
+same for both apps.
+
+Usage:
+    python benchmarks/bench_api_responses.py --requests 200 --photos 500
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from backend.compression import (  # noqa: E402
+    CompressionMiddleware, brotli_available, default_response_class, orjson_available
+)
+from fixtures.weather_server import start_fixture_server  # noqa: E402
+from modules.photos.models import PhotoInfo  # noqa: E402
+
+ACCEPT_ENCODING = "br, gzip" if brotli_available else "gzip"
+
+
+def build_app(tuned: bool, routers: list) -> FastAPI:
+    app = FastAPI(default_response_class=default_response_class() if tuned else JSONResponse)
+    if tuned:
+        app.add_middleware(CompressionMiddleware)
+    for router in routers:
+        app.include_router(router)
+    return app
+
+
+def seed_photos(photo_service, count: int, directory: Path) -> None:
+    """Point the photo service at a catalog of real (empty) files so slideshow filtering keeps them."""
+    photo_service.config = photo_service.config.copy(update={"photos_directory": str(directory)})
+    photo_service._open_catalog()
+    now = datetime.now()
+    photos = []
+    for i in range(count):
+        path = directory / f"IMG_{i:05d}.jpg"
+        path.touch()
+        photos.append(PhotoInfo(
+            id=f"photo-{i}", filename=path.name, file_path=str(path), file_size=2_400_000 + i,
+            width=4032, height=3024, format="JPEG", taken_date=now - timedelta(hours=i),
+            added_date=now - timedelta(minutes=i), tags=["family", "summer"],
+            camera_info={"make": "Google", "model": "Pixel 7"}
+        ))
+    photo_service.catalog.add_many(photos)
+
+
+async def measure(app: FastAPI, path: str, requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+        wire = response.num_bytes_downloaded
+
+        cpu = time.process_time()
+        for _ in range(requests):
+            await client.get(path, headers=headers)
+        cpu = time.process_time() - cpu
+
+    return {
+        "bytes": wire,
+        "raw": len(response.content),
+        "encoding": response.headers.get("content-encoding", "identity"),
+        "cpu_ms": cpu / requests * 1000
+    }
+
+
+async def main(requests: int, photo_count: int) -> None:
+    runner, base_url = await start_fixture_server()
+
+    from modules.weather import api as weather_api
+    from modules.photos import api as photos_api
+    from modules.timer import api as timer_api
+
+    service = weather_api.weather_service
+    service.config = service.config.copy(update={"api_key": "benchmark", "api_base_url": base_url})
+    service._init_locations()
+    service._init_providers()
+
+    routers = [weather_api.router, photos_api.router, timer_api.router]
+    paths = [
+        "/api/weather/current",
+        "/api/weather/forecast?days=5",
+        "/api/photos/slideshow?limit=50",
+        "/api/photos/list?limit=200",
+        "/api/timer/list"
+    ]
+    try:
+        from modules.calendar import api as calendar_api
+        routers.append(calendar_api.router)
+        paths.append("/api/calendar/events")
+    except ImportError as e:
+        print(f"Skipping calendar router: {e}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        seed_photos(photos_api.photo_service, photo_count, Path(directory))
+        # Warm the weather cache so every request is served from memory
+        await service.get_current_weather()
+        await service.get_forecast(5)
+
+        print(f"orjson: {'yes' if orjson_available else 'no'}  brotli: {'yes' if brotli_available else 'no'}  "
+              f"Accept-Encoding: {ACCEPT_ENCODING}\n")
+        print(f"{'endpoint':<34}{'baseline B':>11}{'tuned B':>9}{'enc':>10}{'base ms':>9}{'tuned ms':>9}")
+        for path in paths:
+            base = await measure(build_app(False, routers), path, requests)
+            tuned = await measure(build_app(True, routers), path, requests)
+            print(f"{path:<34}{base['bytes']:>11}{tuned['bytes']:>9}{tuned['encoding']:>10}"
+                  f"{base['cpu_ms']:>9.3f}{tuned['cpu_ms']:>9.3f}")
+
+    await service.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--photos", type=int, default=500, help="Photos seeded into the catalog")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.photos))
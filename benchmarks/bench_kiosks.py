@@ -0,0 +1,418 @@
+"""
+Benchmark: how many kiosk dashboards one server can keep up with.
+
+Simulates N browsers running frontend/index.html against a real API server
+(backend.main:app under uvicorn by default), with OpenWeatherMap, NWS alerts
+and Google Calendar replaced by the local fixture servers. Each kiosk
+replays the page's request pattern:
+
+  - on load: the dashboard HTML, current weather, 5-day forecast, slideshow,
+    calendar summary, sun schedule and timer list, plus the alert stream
+    held open for the whole run
+  - every 7 s: the next slideshow image (?size=large)
+  - every 10 min: weather, forecast, calendar and sun refresh
+  - every second while a timer runs: GET /api/timer/{id} (--timer-share of
+    the kiosks keep a kitchen timer going)
+  - now and then: someone taps their name and the todo list loads, sometimes
+    adding a todo first
+
+The 1 s clock is drawn client side and makes no requests. --time-scale
+compresses every client interval (and the timer length) so a short run
+covers several refresh cycles; kiosks boot spread over --ramp seconds.
+
+Reports requests/s and p50/p95/p99 latency per route, plus the server's
+CPU (100% = one core, summed over workers) and RSS while under load.
+
+Usage:
+    python benchmarks/bench_kiosks.py --kiosks 10 50 100 --duration 60 --time-scale 10
+    python benchmarks/bench_kiosks.py --app worker_app:app --app-dir benchmarks/fixtures
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+import psutil
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures.calendar_server import start_calendar_server, write_token  # noqa: E402
+from fixtures.weather_server import start_fixture_server  # noqa: E402
+
+REPO = Path(__file__).resolve().parent.parent
+FAMILY = ["Dave", "Ashley", "Charlotte", "Daisy"]
+ROUTE_PATTERNS = [
+    (re.compile(r"^/api/photos/image/[^/]+$"), "/api/photos/image/{id}"),
+    (re.compile(r"^/api/timer/(?!list$|create$|presets)[^/]+$"), "/api/timer/{id}"),
+    (re.compile(r"^/api/todos/\d+$"), "/api/todos/{user_id}"),
+]
+
+
+def route_name(method: str, path: str) -> str:
+    path = path.split("?")[0]
+    for pattern, name in ROUTE_PATTERNS:
+        if pattern.match(path):
+            path = name
+            break
+    return path if method == "GET" else f"{method} {path}"
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def seed_photos(directory: Path, count: int) -> None:
+    """Write real camera-sized JPEGs for the photo service to scan."""
+    for i in range(count):
+        image = Image.new("RGB", (1920, 1440), ((i * 37) % 256, (i * 91) % 256, (i * 53) % 256))
+        image.save(directory / f"IMG_{i:04d}.jpg", quality=85)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Recorder:
+    """Latencies and failures per route while the measurement window is open."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.recording = False
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        if ok:
+            self.latencies[route].append(seconds)
+        else:
+            self.errors[route] += 1
+
+
+class ServerMonitor:
+    """Samples CPU and RSS of the uvicorn process and its workers."""
+
+    def __init__(self, pid: int):
+        self.root = psutil.Process(pid)
+        self.processes: Dict[int, psutil.Process] = {}
+        self.cpu: List[float] = []
+        self.rss: List[float] = []
+
+    def _tree(self) -> List[psutil.Process]:
+        try:
+            current = [self.root] + self.root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+        for process in current:
+            if process.pid not in self.processes:
+                self.processes[process.pid] = process
+                process.cpu_percent(None)  # First call only sets the baseline
+        return current
+
+    async def run(self, interval: float = 1.0) -> None:
+        self._tree()
+        while True:
+            await asyncio.sleep(interval)
+            cpu = rss = 0.0
+            for process in self._tree():
+                try:
+                    cpu += self.processes[process.pid].cpu_percent(None)
+                    rss += process.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            self.cpu.append(cpu)
+            self.rss.append(rss / 1024 / 1024)
+
+
+class Kiosk:
+    """One dashboard browser following frontend/index.html's request pattern."""
+
+    def __init__(self, base: str, recorder: Recorder, args, user_ids: List[int]):
+        self.base = base
+        self.recorder = recorder
+        self.args = args
+        self.user_ids = user_ids
+        self.photo_ids: List[str] = []
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def interval(self, seconds: float) -> float:
+        return seconds / self.args.time_scale
+
+    async def request(self, method: str, path: str, **kwargs):
+        route = route_name(method, path)
+        start = time.perf_counter()
+        try:
+            async with self.session.request(method, self.base + path, **kwargs) as response:
+                body = await response.read()
+                ok = response.status < 400
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.recorder.record(route, 0, False)
+            return None
+        self.recorder.record(route, time.perf_counter() - start, ok)
+        if ok and response.content_type == "application/json":
+            return json.loads(body)
+        return body if ok else None
+
+    async def run(self, boot_delay: float) -> None:
+        await asyncio.sleep(boot_delay)
+        # Browsers allow six connections per host; the alert stream holds one
+        connector = aiohttp.TCPConnector(limit=6)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=30)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as self.session:
+            await self.request("GET", "/")
+            results = await asyncio.gather(
+                self.request("GET", "/api/weather/current"),
+                self.request("GET", "/api/weather/forecast?days=5"),
+                self.request("GET", "/api/photos/slideshow?limit=50"),
+                self.request("GET", "/api/calendar/summary"),
+                self.request("GET", "/api/weather/sun"),
+                self.request("GET", "/api/timer/list")
+            )
+            self.photo_ids = [photo["id"] for photo in results[2] or []]
+            loops = [self.alert_stream(), self.slideshow(), self.refresh(), self.todos()]
+            if random.random() < self.args.timer_share:
+                loops.append(self.kitchen_timer())
+            await asyncio.gather(*loops)
+
+    async def alert_stream(self) -> None:
+        route = "/api/weather/alerts/stream (first event)"
+        start = time.perf_counter()
+        try:
+            async with self.session.get(self.base + "/api/weather/alerts/stream") as response:
+                first = True
+                async for _ in response.content:
+                    if first:
+                        self.recorder.record(route, time.perf_counter() - start, response.status < 400)
+                        first = False
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.recorder.record(route, 0, False)
+
+    async def slideshow(self) -> None:
+        index = 0
+        while True:
+            await asyncio.sleep(self.interval(7))
+            if self.photo_ids:
+                await self.request("GET", f"/api/photos/image/{self.photo_ids[index % len(self.photo_ids)]}?size=large")
+                index += 1
+
+    async def refresh(self) -> None:
+        await asyncio.sleep(random.uniform(0, self.interval(600)))
+        while True:
+            await asyncio.gather(
+                self.request("GET", "/api/weather/current"),
+                self.request("GET", "/api/weather/forecast?days=5"),
+                self.request("GET", "/api/calendar/summary"),
+                self.request("GET", "/api/weather/sun")
+            )
+            await asyncio.sleep(self.interval(600))
+
+    async def todos(self) -> None:
+        if not self.user_ids:
+            return
+        while True:
+            await asyncio.sleep(random.expovariate(1 / self.interval(self.args.todo_interval)))
+            user_id = random.choice(self.user_ids)
+            if random.random() < 0.2:
+                await self.request("POST", f"/api/todos/{user_id}", json={"task": "Buy milk"})
+            await self.request("GET", f"/api/todos/{user_id}")
+
+    async def kitchen_timer(self) -> None:
+        while True:
+            await asyncio.sleep(random.uniform(0, self.interval(60)))
+            duration = max(5, round(self.interval(self.args.timer_seconds)))
+            timer = await self.request("POST", "/api/timer/create",
+                                       json={"name": "5 min timer", "duration_seconds": duration, "auto_start": True})
+            if not timer:
+                return
+            while True:
+                await asyncio.sleep(self.interval(1))
+                status = await self.request("GET", f"/api/timer/{timer['id']}")
+                if not status or status.get("status") == "completed":
+                    break
+
+
+async def wait_ready(base: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"API server exited with code {server.returncode}")
+            try:
+                async with session.get(f"{base}/api/timer/list") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("API did not start")
+
+
+async def create_users(base: str) -> List[int]:
+    """Family members for the todo lists; empty if the app has no user routes."""
+    user_ids = []
+    async with aiohttp.ClientSession() as session:
+        for name in FAMILY:
+            async with session.post(f"{base}/api/users", json={"name": name}) as response:
+                if response.status != 200:
+                    return []
+                user_ids.append((await response.json())["id"])
+    return user_ids
+
+
+async def upstream_calls(url: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url.rstrip('/')}/__stats") as response:
+            return sum((await response.json()).values())
+
+
+async def run(kiosks: int, args, weather_url: str, calendar_url: str) -> Dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as directory:
+        work = Path(directory)
+        photos_dir = work / "photos"
+        photos_dir.mkdir()
+        seed_photos(photos_dir, args.photos)
+        write_token(str(work / "token.json"))
+        env = {
+            **os.environ,
+            "WEATHER_API_BASE_URL": weather_url,
+            "WEATHER_ALERTS_BASE_URL": weather_url,
+            "OPENWEATHER_API_KEY": "benchmark",
+            "WEATHER_LOCATIONS": "Home=39.9009,-74.8234",
+            "WEATHER_BACKUP_PROVIDERS": "",
+            "WEATHER_HISTORY_DB": str(work / "weather_history.db"),
+            "GOOGLE_CALENDAR_API_URL": calendar_url,
+            "GOOGLE_TOKEN_FILE": str(work / "token.json"),
+            "PHOTOS_DIRECTORY": str(photos_dir),
+            "THUMBNAILS_DIRECTORY": str(photos_dir / "thumbnails"),
+            "LIFEHUB_DB_PATH": str(work / "lifehub.db")
+        }
+        if args.workers > 1:
+            env["LIFEHUB_SHARED_STATE"] = str(work / "state.db")
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", args.app, "--app-dir", str(Path(args.app_dir).resolve()),
+             "--port", str(port), "--workers", str(args.workers), "--log-level", "warning"],
+            env=env, cwd=str(work)
+        )
+        try:
+            await wait_ready(base, server)
+            user_ids = await create_users(base)
+            for url in (weather_url, calendar_url):
+                async with aiohttp.ClientSession() as session:
+                    await session.post(f"{url.rstrip('/')}/__reset")
+
+            recorder = Recorder()
+            monitor = ServerMonitor(server.pid)
+            tasks = [asyncio.create_task(Kiosk(base, recorder, args, user_ids).run(random.uniform(0, args.ramp)))
+                     for _ in range(kiosks)]
+            await asyncio.sleep(args.ramp)  # Let every kiosk boot before measuring
+            monitor_task = asyncio.create_task(monitor.run())
+            recorder.recording = True
+            await asyncio.sleep(args.duration)
+            recorder.recording = False
+
+            monitor_task.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, monitor_task, return_exceptions=True)
+            weather_calls = await upstream_calls(weather_url)
+            calendar_calls = await upstream_calls(calendar_url)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return {"recorder": recorder, "monitor": monitor, "users": bool(user_ids),
+            "weather_calls": weather_calls, "calendar_calls": calendar_calls}
+
+
+def report(kiosks: int, result: Dict, args) -> Dict[str, float]:
+    recorder, monitor = result["recorder"], result["monitor"]
+    print(f"\n{kiosks} kiosks, {args.duration:.0f}s at {args.time_scale:g}x, {args.workers} worker(s)")
+    print(f"{'route':<44}{'reqs':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    everything: List[float] = []
+    for route in sorted(set(recorder.latencies) | set(recorder.errors)):
+        ordered = sorted(recorder.latencies[route])
+        everything.extend(ordered)
+        if ordered:
+            print(f"{route:<44}{len(ordered):>7}{len(ordered) / args.duration:>8.1f}"
+                  f"{percentile(ordered, 0.5) * 1000:>9.1f}{percentile(ordered, 0.95) * 1000:>9.1f}"
+                  f"{percentile(ordered, 0.99) * 1000:>9.1f}{recorder.errors[route]:>8}")
+        else:
+            print(f"{route:<44}{0:>7}{0:>8.1f}{'-':>9}{'-':>9}{'-':>9}{recorder.errors[route]:>8}")
+
+    everything.sort()
+    errors = sum(recorder.errors.values())
+    summary = {
+        "rps": len(everything) / args.duration,
+        "p95": percentile(everything, 0.95) * 1000 if everything else 0.0,
+        "p99": percentile(everything, 0.99) * 1000 if everything else 0.0,
+        "errors": errors,
+        "cpu": statistics.mean(monitor.cpu) if monitor.cpu else 0.0,
+        "cpu_peak": max(monitor.cpu, default=0.0),
+        "rss_peak": max(monitor.rss, default=0.0)
+    }
+    print(f"{'all':<44}{len(everything):>7}{summary['rps']:>8.1f}"
+          f"{(percentile(everything, 0.5) * 1000 if everything else 0):>9.1f}{summary['p95']:>9.1f}"
+          f"{summary['p99']:>9.1f}{errors:>8}")
+    print(f"server CPU avg {summary['cpu']:.0f}% peak {summary['cpu_peak']:.0f}%, "
+          f"RSS peak {summary['rss_peak']:.0f} MB; upstream calls: weather {result['weather_calls']}, "
+          f"calendar {result['calendar_calls']}")
+    if not result["users"]:
+        print("(app has no /api/users route; todo traffic skipped)")
+    return summary
+
+
+async def main(args) -> None:
+    weather_runner, weather_url = await start_fixture_server(latency=args.upstream_latency)
+    calendar_runner, calendar_url = await start_calendar_server(latency=args.upstream_latency)
+    print(f"CPU cores: {os.cpu_count()}  app: {args.app}")
+    summaries = []
+    try:
+        for kiosks in args.kiosks:
+            result = await run(kiosks, args, weather_url, calendar_url)
+            summaries.append((kiosks, report(kiosks, result, args)))
+    finally:
+        await weather_runner.cleanup()
+        await calendar_runner.cleanup()
+
+    print(f"\n{'kiosks':>7}{'req/s':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'cpu %':>8}{'rss MB':>8}")
+    for kiosks, summary in summaries:
+        print(f"{kiosks:>7}{summary['rps']:>9.1f}{summary['p95']:>9.1f}{summary['p99']:>9.1f}"
+              f"{summary['errors']:>8}{summary['cpu']:>8.0f}{summary['rss_peak']:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--kiosks", type=int, nargs="+", default=[10, 50],
+                        help="Simulated dashboards; one run per value")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds per run")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which kiosks boot (not measured)")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Speed up client intervals, e.g. 10 makes the 10-minute refresh every minute")
+    parser.add_argument("--timer-share", type=float, default=0.2, help="Fraction of kiosks running timers")
+    parser.add_argument("--timer-seconds", type=float, default=300, help="Length of each kitchen timer")
+    parser.add_argument("--todo-interval", type=float, default=120, help="Mean seconds between todo list views")
+    parser.add_argument("--photos", type=int, default=20, help="JPEGs in the seeded photo directory")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--app", default="backend.main:app", help="ASGI app to serve")
+    parser.add_argument("--app-dir", default=str(REPO), help="Directory the app module is imported from")
+    parser.add_argument("--upstream-latency", type=float, default=0.2, help="Mock upstream delay (s)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+"""
+Benchmark: per-photo ingest cost (metadata, EXIF and resized renditions).
+
+Writes synthetic camera JPEGs (smooth gradients plus sensor-like noise, so
+they compress like real photos) and times, per image:
+
+  previous      open for size/EXIF, then open again per rendition and
+                Image.thumbnail() (which lets Pillow draft to 2x the box)
+  full decode   one open, full-resolution decode, resize per rendition
+  single decode modules.photos.ingest.process_image: one open, JPEG decoded
+                once at the power-of-two scale covering the largest
+                rendition, renditions chained largest first
+
+for the thumbnail alone and for thumbnail plus a screen-sized rendition.
+
+Usage:
+    python benchmarks/bench_photo_ingest.py --megapixels 12 48 --images 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.photos.ingest import extract_metadata, process_image  # noqa: E402
+
+Renditions = List[Tuple[str, Tuple[int, int]]]
+
+
+def camera_jpeg(path: str, megapixels: float, seed: int) -> None:
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5) // 16 * 16
+    height = width * 3 // 4
+    detail = Image.effect_noise((width // 8, height // 8), 60 + seed).resize((width, height), Image.Resampling.BICUBIC)
+    base = Image.merge("RGB", [Image.linear_gradient("L").resize((width, height)),
+                               Image.radial_gradient("L").resize((width, height)), detail])
+    Image.blend(base, Image.effect_noise((width, height), 12).convert("RGB"), 0.15).save(path, quality=90)
+
+
+def previous(file_path: str, renditions: Renditions) -> None:
+    with Image.open(file_path) as img:
+        img.size, img.format, extract_metadata(img)
+    for path, size in renditions:
+        with Image.open(file_path) as img:
+            img.thumbnail(size, Image.Resampling.LANCZOS)
+            img.save(path, "JPEG", quality=85)
+
+
+def full_decode(file_path: str, renditions: Renditions) -> None:
+    with Image.open(file_path) as img:
+        extract_metadata(img)
+        img.load()
+        for path, size in renditions:
+            rendition = img.copy()
+            rendition.thumbnail(size, Image.Resampling.LANCZOS)
+            rendition.save(path, "JPEG", quality=85)
+
+
+def single_decode(file_path: str, renditions: Renditions) -> None:
+    info = process_image(file_path, renditions)
+    assert not info["errors"], info["errors"]
+
+
+def per_image_ms(fn: Callable[[str, Renditions], None], files: List[str], renditions: Renditions,
+                 rounds: int) -> float:
+    """Median over rounds of the mean time per image."""
+    fn(files[0], renditions)  # Warm up
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for file_path in files:
+            fn(file_path, renditions)
+        samples.append((time.perf_counter() - start) / len(files) * 1000)
+    return statistics.median(samples)
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        out = Path(directory)
+        cases = {
+            "thumbnail": [(str(out / "thumb.jpg"), (200, 200))],
+            "screen + thumbnail": [(str(out / "screen.jpg"), (1920, 1080)), (str(out / "thumb.jpg"), (200, 200))]
+        }
+        print(f"{'photo':<8}{'renditions':<22}{'previous':>10}{'full':>10}{'single':>10}{'vs previous':>14}")
+        for megapixels in args.megapixels:
+            files = []
+            for i in range(args.images):
+                files.append(str(out / f"{megapixels}mp_{i}.jpg"))
+                camera_jpeg(files[-1], megapixels, i)
+            size_mb = sum(os.path.getsize(f) for f in files) / len(files) / 1e6
+            for name, renditions in cases.items():
+                timings = [per_image_ms(fn, files, renditions, args.rounds)
+                           for fn in (previous, full_decode, single_decode)]
+                print(f"{f'{megapixels:g} MP':<8}{name:<22}" + "".join(f"{ms:>8.0f}ms" for ms in timings)
+                      + f"{timings[0] / timings[2]:>13.1f}x")
+            print(f"  ({size_mb:.1f} MB per JPEG)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[12, 48])
+    parser.add_argument("--images", type=int, default=3, help="Distinct photos per size")
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,156 @@
+"""
+Benchmark: photo directory rescans on a large synthetic library.
+
+Builds a library of small real JPEGs spread over nested directories,
+catalogues it, and then times PhotoService.scan_directory:
+
+  - rescanning with nothing changed (the common periodic case)
+  - rescanning after some files were added, modified, renamed and deleted,
+    checking that each kind of change is detected
+
+For comparison it times the previous scan loop (glob of the top directory
+plus a linear search of the in-memory index per file) on a smaller flat
+library, since it grows quadratically with the number of photos.
+
+Usage:
+    python benchmarks/bench_photo_scan.py --photos 50000 --changes 100
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def jpeg_bytes(seed: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 12), (seed % 256, (seed * 7) % 256, (seed * 13) % 256)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def build_library(root: Path, count: int, per_dir: int) -> None:
+    """count JPEGs in year/month style subdirectories of per_dir files each."""
+    data = jpeg_bytes(0)
+    for i in range(count):
+        directory = root / f"{2000 + i // (per_dir * 12)}" / f"{(i // per_dir) % 12 + 1:02d}-{i // per_dir}"
+        if i % per_dir == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"IMG_{i:06d}.jpg").write_bytes(data)
+
+
+def catalogue(service, root: Path) -> None:
+    """Index the library as a completed earlier scan would have left it."""
+    from modules.photos.models import PhotoInfo
+    from modules.photos.scanner import walk_photos
+
+    now = datetime.now()
+    stats = {file.path: file for file in walk_photos(str(root), exclude=[service.config.thumbnails_directory])}
+    photos = [
+        PhotoInfo(id=f"photo-{i}", filename=os.path.basename(path), file_path=path, file_size=file.size,
+                  width=16, height=12, format="JPEG", added_date=now)
+        for i, (path, file) in enumerate(stats.items())
+    ]
+    service.catalog.add_many(photos, stats)
+
+
+def mutate(root: Path, changes: int) -> None:
+    """Add, modify, rename and delete `changes` files each."""
+    files = sorted(root.rglob("IMG_*.jpg"))
+    new_dir = root / "new"
+    new_dir.mkdir()
+    for i in range(changes):
+        (new_dir / f"NEW_{i:05d}.jpg").write_bytes(jpeg_bytes(i + 1))
+    for path in files[:changes]:
+        path.write_bytes(jpeg_bytes(999) + b"\0" * 16)  # New content and size
+    for path in files[changes:2 * changes]:
+        path.rename(path.with_name("renamed_" + path.name))
+    for path in files[2 * changes:3 * changes]:
+        path.unlink()
+
+
+def legacy_scan(directory: Path, photos_db: dict) -> int:
+    """The previous scan loop's bookkeeping: one linear search of the index per file."""
+    skipped = 0
+    for file_path in directory.glob("*"):
+        if file_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
+            if any(p.file_path == str(file_path) for p in photos_db.values()):
+                skipped += 1
+    return skipped
+
+
+def time_legacy(count: int) -> float:
+    from modules.photos.models import PhotoInfo
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        data = jpeg_bytes(0)
+        photos_db = {}
+        now = datetime.now()
+        for i in range(count):
+            path = root / f"IMG_{i:06d}.jpg"
+            path.write_bytes(data)
+            photos_db[f"photo-{i}"] = PhotoInfo(id=f"photo-{i}", filename=path.name, file_path=str(path),
+                                                file_size=len(data), width=16, height=12, format="JPEG",
+                                                added_date=now)
+        start = time.perf_counter()
+        legacy_scan(root, photos_db)
+        return time.perf_counter() - start
+
+
+async def main(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "photos"
+        root.mkdir()
+        os.environ["PHOTOS_DIRECTORY"] = str(root)
+        os.environ["THUMBNAILS_DIRECTORY"] = str(root / "thumbnails")
+        from modules.photos.service import PhotoService
+
+        start = time.perf_counter()
+        build_library(root, args.photos, args.per_dir)
+        print(f"Built {args.photos} JPEGs in {args.photos // args.per_dir} directories"
+              f" ({time.perf_counter() - start:.1f}s)")
+
+        service = PhotoService()
+        catalogue(service, root)
+
+        start = time.perf_counter()
+        result = await service.scan_directory()
+        unchanged_time = time.perf_counter() - start
+        assert result.unchanged == args.photos and result.added == result.removed == 0, result
+
+        mutate(root, args.changes)
+        start = time.perf_counter()
+        result = await service.scan_directory()
+        changed_time = time.perf_counter() - start
+        expected = {"added": args.changes, "updated": args.changes, "moved": args.changes, "removed": args.changes}
+        detected = {key: getattr(result, key) for key in expected}
+        assert detected == expected, f"expected {expected}, got {result}"
+
+        legacy = time_legacy(args.legacy_sample)
+        extrapolated = legacy * (args.photos / args.legacy_sample) ** 2
+
+    print(f"\n{'scan':<52}{'seconds':>10}")
+    print(f"{f'incremental, no changes ({args.photos} photos)':<52}{unchanged_time:>10.2f}")
+    print(f"{f'incremental, {args.changes} each added/modified/moved/deleted':<52}{changed_time:>10.2f}")
+    print(f"{f'previous loop, {args.legacy_sample} photos (measured)':<52}{legacy:>10.2f}")
+    print(f"{f'previous loop, {args.photos} photos (quadratic extrapolation)':<52}{extrapolated:>10.0f}")
+    print(f"\nChanges detected: {detected}")
+    print("(the previous loop also missed modified, moved and deleted files and subdirectories)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--photos", type=int, default=50000)
+    parser.add_argument("--per-dir", type=int, default=500, help="Files per subdirectory")
+    parser.add_argument("--changes", type=int, default=100, help="Files added, modified, moved and deleted each")
+    parser.add_argument("--legacy-sample", type=int, default=5000, help="Library size for timing the old loop")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,156 @@
+"""
+Benchmark: slideshow and random photo requests on large catalogs.
+
+Catalogues libraries of empty photo files (with spread-out taken dates)
+and times, per request:
+
+  - the original loop: os.path.exists on every photo, then a sort of the
+    whole library by date
+  - the previous catalog queries: slideshow order paged with OFFSET,
+    and a COUNT(*) plus OFFSET for each random photo
+  - PhotoService now: the cached, pre-sorted id list, rebuilt once per
+    catalog change (timed separately) and then read a slice at a time
+
+The cost of the last should not grow with the library. It also checks
+that a file deleted outside the app is skipped and that a catalog change
+is picked up.
+
+Usage:
+    python benchmarks/bench_slideshow.py --photos 5000,50000 --limit 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def catalogue(service, root: Path, count: int) -> None:
+    from modules.photos.models import PhotoInfo
+
+    rng = random.Random(count)
+    start = datetime(2000, 1, 1)
+    photos = []
+    for i in range(count):
+        path = root / f"IMG_{i:06d}.jpg"
+        path.touch()
+        photos.append(PhotoInfo(id=f"photo-{i:06d}", filename=path.name, file_path=str(path), file_size=0,
+                                width=16, height=12, format="JPEG", added_date=start,
+                                taken_date=start + timedelta(minutes=rng.randrange(20 * 365 * 24 * 60))))
+    service.catalog.add_many(photos)
+
+
+def per_request(fn, repeat: int) -> float:
+    """Mean milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def original_slideshow(photos, limit: int):
+    valid = [photo for photo in photos if os.path.exists(photo.file_path)]
+    valid.sort(key=lambda photo: photo.taken_date or photo.added_date, reverse=True)
+    return valid[:limit]
+
+
+def previous_slideshow(service, limit: int):
+    from modules.photos.catalog import SELECT, SHOWN, SHOWN_ORDER
+
+    conn = service.catalog._connect()
+    valid, offset = [], 0
+    batch = max(limit, 20)
+    while len(valid) < limit:
+        rows = conn.execute(f"{SELECT} WHERE {SHOWN} ORDER BY {SHOWN_ORDER} LIMIT ? OFFSET ?",
+                            (batch, offset)).fetchall()
+        valid.extend(photo for photo in map(service.catalog._photo, rows) if os.path.exists(photo.file_path))
+        if len(rows) < batch:
+            break
+        offset += batch
+    return valid[:limit]
+
+
+def previous_random(service):
+    from modules.photos.catalog import SELECT, SHOWN
+
+    conn = service.catalog._connect()
+    total = conn.execute(f"SELECT COUNT(*) FROM photos WHERE {SHOWN}").fetchone()[0]
+    row = conn.execute(f"{SELECT} WHERE {SHOWN} LIMIT 1 OFFSET ?", (random.randrange(total),)).fetchone()
+    return service.catalog._photo(row)
+
+
+async def bench(count: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "photos"
+        root.mkdir()
+        os.environ["PHOTOS_DIRECTORY"] = str(root)
+        os.environ["THUMBNAILS_DIRECTORY"] = str(root / "thumbnails")
+        from modules.common.versioning import versions
+        from modules.photos.service import PhotoService
+
+        service = PhotoService()
+        service._loaded = True
+        catalogue(service, root, count)
+        versions.bump("photos")
+
+        photos = service.catalog.get_many(service.catalog.shown_ids())
+        expected = [photo.id for photo in original_slideshow(photos, args.limit)]
+
+        timings = {}
+        timings["original loop"] = per_request(lambda: original_slideshow(photos, args.limit), 3)
+        timings["previous slideshow"] = per_request(lambda: previous_slideshow(service, args.limit), args.repeat)
+        timings["previous random"] = per_request(lambda: previous_random(service), args.repeat)
+
+        start = time.perf_counter()
+        first = await service.get_slideshow_photos(args.limit)
+        timings["cached index rebuild"] = (time.perf_counter() - start) * 1000
+        assert [photo.id for photo in first] == expected, "slideshow order differs from the original loop"
+
+        async def timed(coroutine_fn) -> float:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                await coroutine_fn()
+            return (time.perf_counter() - start) * 1000 / args.repeat
+
+        timings["cached slideshow"] = await timed(lambda: service.get_slideshow_photos(args.limit))
+        timings["cached random"] = await timed(service.get_random_photo)
+
+        # A file deleted outside the app is skipped; a catalog change is picked up
+        os.remove(first[0].file_path)
+        shown = [photo.id for photo in await service.get_slideshow_photos(args.limit)]
+        assert shown == expected[1:] + [shown[-1]] and first[0].id not in shown, shown
+        service.catalog.remove_many([first[1].id])
+        versions.bump("photos")
+        shown = [photo.id for photo in await service.get_slideshow_photos(args.limit)]
+        assert first[1].id not in shown and first[0].id not in shown, shown
+        await service.close()
+        return timings
+
+
+async def main(args) -> None:
+    sizes = [int(size) for size in args.photos.split(",")]
+    results = {}
+    for count in sizes:
+        start = time.perf_counter()
+        results[count] = await bench(count, args)
+        print(f"{count} photos done ({time.perf_counter() - start:.1f}s)")
+
+    print(f"\n{'ms per request':<28}" + "".join(f"{f'{count} photos':>16}" for count in sizes))
+    for name in results[sizes[0]]:
+        print(f"{name:<28}" + "".join(f"{results[count][name]:>16.3f}" for count in sizes))
+    print("\n(cached index rebuild happens once per catalog change, on the first request after it)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--photos", default="5000,50000", help="Comma-separated library sizes")
+    parser.add_argument("--limit", type=int, default=10, help="Photos per slideshow request")
+    parser.add_argument("--repeat", type=int, default=200, help="Requests timed per measurement")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""
+Benchmark: adaptive weather alert polling against a scripted fixture feed.
+
+Plays a compressed storm timeline (watch issued, warning issued, watch
+text updated, warning ends, watch cancelled) on the local NWS-style alert
+feed while WeatherAlertMonitor polls it with scaled-down intervals. Reports
+upstream polls, the events emitted and how long each change took to show
+up, next to the poll count a fixed-rate poller would need for the same
+worst-case latency.
+
+Usage:
+    python benchmarks/bench_weather_alerts.py --scale 0.001
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures.weather_server import nws_alert, start_fixture_server  # noqa: E402
+from modules.weather.alerts import WeatherAlertMonitor  # noqa: E402
+from modules.weather.models import WeatherConfig  # noqa: E402
+
+
+async def run(scale: float) -> None:
+    runner, base_url = await start_fixture_server()
+    # Production intervals (900/300/120s) shrunk by the scale factor
+    config = WeatherConfig(
+        alerts_base_url=base_url,
+        alerts_idle_interval=900,
+        alerts_active_interval=300,
+        alerts_severe_interval=120
+    )
+    config = config.copy(update={
+        key: getattr(config, key) * scale
+        for key in ("alerts_idle_interval", "alerts_active_interval", "alerts_severe_interval")
+    })
+    unit = 900 * scale  # One idle interval of simulated time
+    session = aiohttp.ClientSession()
+    monitor = WeatherAlertMonitor(config, lambda: session)
+    queue = monitor.subscribe()
+
+    start = time.time()
+    at = lambda offset: start + offset * unit  # noqa: E731
+    watch = nws_alert("Flood Watch", "Moderate", at(1), at(5))
+    warning = nws_alert("Severe Thunderstorm Warning", "Severe", at(2), at(3))
+    updated_watch = nws_alert("Flood Watch", "Moderate", at(1), at(5), description="Flood Watch extended.")
+    timeline = [
+        (1.0, [watch], "new watch"),
+        (2.0, [watch, warning], "new warning"),
+        (2.5, [updated_watch, warning], "watch updated"),
+        (3.0, [updated_watch, warning], "warning ends (still listed)"),
+        (4.0, [], "watch cancelled"),
+        (5.5, [], "end")
+    ]
+
+    async def drive_feed():
+        async with aiohttp.ClientSession() as control:
+            for offset, features, label in timeline:
+                await asyncio.sleep(max(0.0, at(offset) - time.time()))
+                async with control.post(f"{base_url}/__alerts", json=features):
+                    pass
+                print(f"{offset:>6.2f}  feed: {label}")
+
+    async def consume():
+        while True:
+            event = await queue.get()
+            alert = event["alert"]
+            print(f"{(time.time() - start) / unit:>6.2f}  {event['type']:<8} "
+                  f"{alert.title.split(' issued')[0]} ({alert.severity})")
+
+    print(f"{'t':>6}  (in idle intervals)")
+    consumer = asyncio.create_task(consume())
+    monitor.start()
+    await drive_feed()
+    await monitor.stop()
+    consumer.cancel()
+
+    elapsed = time.time() - start
+    fixed_polls = elapsed / config.alerts_severe_interval
+    print(f"\nadaptive polls: {monitor.polls}  "
+          f"fixed-rate polls at the severe interval: {fixed_polls:.0f}  "
+          f"({fixed_polls / max(monitor.polls, 1):.1f}x)")
+    print(f"worst-case detection delay while severe: {config.alerts_severe_interval:.2f}s (scaled)")
+
+    await session.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scale", type=float, default=0.001, help="Wall seconds per simulated second")
+    args = parser.parse_args()
+    asyncio.run(run(args.scale))
@@ -0,0 +1,82 @@
+"""
+Benchmark: weather refresh cost in split vs One Call fetch modes.
+
+Runs the local OpenWeatherMap fixture server in-process and measures, per
+dashboard refresh (current conditions + 5-day forecast):
+  - upstream requests issued
+  - wall time for the refresh
+
+Usage:
+    python benchmarks/bench_weather_fetch.py --iterations 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures.weather_server import start_fixture_server  # noqa: E402
+from modules.weather.service import WeatherService  # noqa: E402
+
+
+async def _fetch_stats(base_url: str, reset: bool = False) -> dict:
+    async with aiohttp.ClientSession() as session:
+        if reset:
+            async with session.post(f"{base_url}/__reset"):
+                return {}
+        async with session.get(f"{base_url}/__stats") as response:
+            return await response.json()
+
+
+async def run_mode(base_url: str, fetch_mode: str, iterations: int) -> dict:
+    service = WeatherService()
+    service.config = service.config.copy(update={
+        "api_key": "benchmark",
+        "api_base_url": base_url,
+        "fetch_mode": fetch_mode
+    })
+    await _fetch_stats(base_url, reset=True)
+
+    timings = []
+    for _ in range(iterations):
+        # Expire the cache so every iteration is a full dashboard refresh
+        service.last_update = None
+        start = time.perf_counter()
+        await asyncio.gather(service.get_current_weather(), service.get_forecast(5))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    stats = await _fetch_stats(base_url)
+    await service.close()
+    return {
+        "mode": fetch_mode,
+        "requests_per_refresh": sum(stats.values()) / iterations,
+        "p50_ms": statistics.median(timings),
+        "max_ms": max(timings)
+    }
+
+
+async def main(iterations: int, latency: float) -> None:
+    runner, base_url = await start_fixture_server(latency=latency)
+    try:
+        print(f"{'mode':<10}{'req/refresh':>14}{'p50 ms':>10}{'max ms':>10}")
+        for mode in ("split", "onecall"):
+            result = await run_mode(base_url, mode, iterations)
+            print(f"{result['mode']:<10}{result['requests_per_refresh']:>14.2f}"
+                  f"{result['p50_ms']:>10.2f}{result['max_ms']:>10.2f}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated upstream latency (s)")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.latency))
@@ -0,0 +1,70 @@
+"""
+Benchmark: cold batch refresh cost as the number of weather locations grows.
+
+For each location count, expires every location cache and times one
+/api/weather/batch-equivalent refresh against the local fixture server.
+With a shared session and bounded concurrency, wall time should grow in
+steps of ceil(N / max_concurrent_fetches) rather than linearly in N.
+
+Usage:
+    python benchmarks/bench_weather_locations.py --latency 0.1 --concurrency 3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures.weather_server import start_fixture_server  # noqa: E402
+from modules.weather.models import WeatherLocation  # noqa: E402
+from modules.weather.service import WeatherService  # noqa: E402
+
+
+async def run_batch(base_url: str, count: int, concurrency: int, rounds: int) -> float:
+    service = WeatherService()
+    service.config = service.config.copy(update={
+        "api_key": "benchmark",
+        "api_base_url": base_url,
+        "max_concurrent_fetches": concurrency,
+        "locations": [
+            WeatherLocation(name=f"Location {i}", lat=39.9 + i * 0.1, lon=-74.8 - i * 0.1)
+            for i in range(count)
+        ]
+    })
+    service._init_locations()
+
+    elapsed = 0.0
+    for _ in range(rounds):
+        for cache in service.location_caches.values():
+            cache.last_update = None
+        start = time.perf_counter()
+        result = await service.get_weather_batch()
+        elapsed += time.perf_counter() - start
+        assert all(entry["error"] is None for entry in result["locations"])
+
+    await service.close()
+    return elapsed / rounds * 1000
+
+
+async def main(latency: float, concurrency: int, rounds: int) -> None:
+    runner, base_url = await start_fixture_server(latency=latency)
+    try:
+        print(f"{'locations':<12}{'batch ms':>10}{'ms/location':>14}")
+        for count in (1, 2, 4, 8, 16):
+            ms = await run_batch(base_url, count, concurrency, rounds)
+            print(f"{count:<12}{ms:>10.1f}{ms / count:>14.1f}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--latency", type=float, default=0.1, help="Simulated upstream latency (s)")
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.concurrency, args.rounds))
@@ -0,0 +1,191 @@
+"""
+Benchmark: API throughput with 1 vs N uvicorn workers.
+
+Starts benchmarks/fixtures/worker_app.py under uvicorn with each requested
+worker count (sharing state through LIFEHUB_SHARED_STATE when N > 1),
+drives a mixed read workload of weather, photo and timer endpoints from
+concurrent clients, and reports requests/s and latency. It also checks
+what multi-worker mode must guarantee: every worker reports the same
+running timer, and the weather upstream is called once per refresh rather
+than once per worker.
+
+Usage:
+    python benchmarks/bench_workers.py --workers 1 4 --duration 10 --concurrency 32
+    python benchmarks/bench_workers.py --workers 1 --shared   # shared-store overhead alone
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import aiohttp
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures.weather_server import start_fixture_server  # noqa: E402
+from modules.photos.models import PhotoInfo  # noqa: E402
+
+PATHS = [
+    "/api/weather/current",
+    "/api/weather/forecast?days=5",
+    "/api/photos/slideshow?limit=50",
+    "/api/photos/list?limit=100",
+    "/api/timer/list",
+    "/api/timer/presets/list"
+]
+
+
+def seed_photos(directory: Path, count: int) -> None:
+    """Write a photos.json catalog pointing at real (empty) files."""
+    now = datetime.now()
+    catalog = {}
+    for i in range(count):
+        path = directory / f"IMG_{i:05d}.jpg"
+        path.touch()
+        catalog[f"photo-{i}"] = jsonable_encoder(PhotoInfo(
+            id=f"photo-{i}", filename=path.name, file_path=str(path), file_size=2_400_000 + i,
+            width=4032, height=3024, format="JPEG", taken_date=now - timedelta(hours=i),
+            added_date=now - timedelta(minutes=i), tags=["family", "summer"]
+        ))
+    (directory / "photos.json").write_text(json.dumps(catalog))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(session: aiohttp.ClientSession, base: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base}/api/timer/list") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("API did not start")
+
+
+async def drive(session: aiohttp.ClientSession, base: str, duration: float, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    stop = time.monotonic() + duration
+
+    async def client(offset: int) -> None:
+        i = offset
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            async with session.get(base + PATHS[i % len(PATHS)]) as response:
+                await response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"{PATHS[i % len(PATHS)]} returned {response.status}")
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies
+
+
+async def timer_views(session: aiohttp.ClientSession, base: str, timer_id: str, samples: int) -> int:
+    """Number of responses (across whichever workers answer) that don't show the timer running."""
+    missing = 0
+    for _ in range(samples):
+        async with session.get(f"{base}/api/timer/list", headers={"Connection": "close"}) as response:
+            timers = {timer["id"]: timer for timer in await response.json()}
+        if timers.get(timer_id, {}).get("status") != "running":
+            missing += 1
+    return missing
+
+
+async def run(workers: int, args, base_url: str, photos_dir: Path) -> Dict[str, float]:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "WEATHER_API_BASE_URL": base_url,
+        "WEATHER_ALERTS_BASE_URL": base_url,
+        "OPENWEATHER_API_KEY": "benchmark",
+        "WEATHER_LOCATIONS": "Home=39.9009,-74.8234",
+        "WEATHER_BACKUP_PROVIDERS": "",
+        "PHOTOS_DIRECTORY": str(photos_dir),
+        "THUMBNAILS_DIRECTORY": str(photos_dir / "thumbnails")
+    }
+    state_dir = tempfile.TemporaryDirectory()
+    if workers > 1 or args.shared:
+        env["LIFEHUB_SHARED_STATE"] = str(Path(state_dir.name) / "state.db")
+    else:
+        env.pop("LIFEHUB_SHARED_STATE", None)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "worker_app:app", "--app-dir", str(Path(__file__).parent / "fixtures"),
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env
+    )
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_ready(session, base)
+            async with session.post(f"{base_url}/__reset"):
+                pass
+            async with session.post(f"{base}/api/timer/create",
+                                    json={"name": "Bench", "duration_seconds": 3600, "auto_start": True}) as response:
+                timer_id = (await response.json())["id"]
+
+            await drive(session, base, 1.0, args.concurrency)  # Warm up every worker
+            latencies = await drive(session, base, args.duration, args.concurrency)
+            stale_timer_views = await timer_views(session, base, timer_id, samples=40)
+            async with session.get(f"{base_url}/__stats") as response:
+                upstream = sum((await response.json()).values())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        state_dir.cleanup()
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "upstream": upstream,
+        "stale": stale_timer_views
+    }
+
+
+async def main(args) -> None:
+    runner, base_url = await start_fixture_server(latency=args.upstream_latency)
+    with tempfile.TemporaryDirectory() as directory:
+        photos_dir = Path(directory)
+        seed_photos(photos_dir, args.photos)
+        print(f"CPU cores: {os.cpu_count()}  concurrency: {args.concurrency}  duration: {args.duration}s\n")
+        print(f"{'workers':>7}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'upstream':>10}{'stale timer':>13}")
+        for workers in args.workers:
+            result = await run(workers, args, base_url, photos_dir)
+            print(f"{workers:>7}{result['rps']:>10.0f}{result['p50']:>9.1f}{result['p95']:>9.1f}"
+                  f"{result['upstream']:>10}{result['stale']:>13}")
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--photos", type=int, default=500, help="Photos in the seeded catalog")
+    parser.add_argument("--shared", action="store_true",
+                        help="Use the shared store with one worker too, to isolate its overhead")
+    parser.add_argument("--upstream-latency", type=float, default=0.2, help="Fixture response delay (s)")
+    asyncio.run(main(parser.parse_args()))
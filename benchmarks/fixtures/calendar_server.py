@@ -0,0 +1,132 @@
+"""
+Local Google Calendar API (v3) fixture server for tests and benchmarks.
+
+Serves the two endpoints CalendarService calls, with a deterministic week
+of family events around the current time:
+  GET /calendar/v3/calendars/{calendarId}/events - events list
+  GET /calendar/v3/calendars/{calendarId}        - calendar metadata
+  GET /__stats                                   - request counts per path
+  POST /__reset                                  - reset request counts
+
+Point the service at it with GOOGLE_CALENDAR_API_URL and a token file that
+never needs refreshing (see write_token).
+
+Usage:
+    python benchmarks/fixtures/calendar_server.py --port 8766
+    GOOGLE_CALENDAR_API_URL=http://127.0.0.1:8766/ GOOGLE_TOKEN_FILE=/tmp/token.json ...
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from aiohttp import web
+
+EVENTS = [
+    ("School drop-off", 8, 0.5),
+    ("Soccer practice", 17, 1.5),
+    ("Dentist", 10, 1.0),
+    ("Family dinner", 18, 2.0),
+    ("Piano lesson", 16, 1.0),
+]
+
+
+def events_payload(calendar_id: str, days: int = 7, now: float = None) -> Dict[str, Any]:
+    """One or two events a day for the next `days` days, plus an all-day event."""
+    today = datetime.fromtimestamp(now or time.time(), tz=timezone.utc).replace(hour=0, minute=0, second=0,
+                                                                                microsecond=0)
+    items: List[Dict[str, Any]] = []
+    for day in range(days):
+        for slot in range(1 + day % 2):
+            title, hour, hours = EVENTS[(day + slot) % len(EVENTS)]
+            start = today + timedelta(days=day, hours=hour + 4)  # Eastern local hour in UTC
+            items.append({
+                "id": f"{calendar_id}-{day}-{slot}",
+                "status": "confirmed",
+                "summary": title,
+                "location": "Medford, NJ",
+                "start": {"dateTime": start.isoformat()},
+                "end": {"dateTime": (start + timedelta(hours=hours)).isoformat()},
+                "organizer": {"email": "family@example.com"}
+            })
+    items.append({
+        "id": f"{calendar_id}-trash",
+        "summary": "Trash day",
+        "start": {"date": (today + timedelta(days=2)).date().isoformat()},
+        "end": {"date": (today + timedelta(days=3)).date().isoformat()}
+    })
+    return {"kind": "calendar#events", "summary": "Family", "items": items}
+
+
+def write_token(path: str) -> None:
+    """Write an OAuth token file that google-auth treats as valid until 2099."""
+    with open(path, "w") as f:
+        json.dump({
+            "token": "fixture-token",
+            "refresh_token": "fixture-refresh-token",
+            "client_id": "fixture.apps.googleusercontent.com",
+            "client_secret": "fixture-secret",
+            "scopes": ["https://www.googleapis.com/auth/calendar.readonly"],
+            "expiry": "2099-01-01T00:00:00Z"
+        }, f)
+
+
+def create_app(latency: float = 0.0) -> web.Application:
+    """Create the fixture application.
+
+    Args:
+        latency: Artificial delay in seconds added to every upstream response
+    """
+    app = web.Application()
+    app["stats"] = Counter()
+
+    async def _delay(request: web.Request) -> None:
+        app["stats"][request.path] += 1
+        if latency:
+            await asyncio.sleep(latency)
+
+    async def events(request: web.Request) -> web.Response:
+        await _delay(request)
+        return web.json_response(events_payload(request.match_info["calendar_id"]))
+
+    async def calendar(request: web.Request) -> web.Response:
+        await _delay(request)
+        calendar_id = request.match_info["calendar_id"]
+        return web.json_response({"kind": "calendar#calendar", "id": calendar_id, "summary": "Family",
+                                  "timeZone": "America/New_York"})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(dict(app["stats"]))
+
+    async def reset(request: web.Request) -> web.Response:
+        app["stats"].clear()
+        return web.json_response({"status": "reset"})
+
+    app.router.add_get("/calendar/v3/calendars/{calendar_id}/events", events)
+    app.router.add_get("/calendar/v3/calendars/{calendar_id}", calendar)
+    app.router.add_get("/__stats", stats)
+    app.router.add_post("/__reset", reset)
+    return app
+
+
+async def start_calendar_server(port: int = 0, **kwargs) -> Tuple[web.AppRunner, str]:
+    """Start the fixture server in the running loop and return (runner, base_url)."""
+    runner = web.AppRunner(create_app(**kwargs))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{bound_port}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Google Calendar fixture server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay per response in seconds")
+    args = parser.parse_args()
+
+    web.run_app(create_app(latency=args.latency), host="127.0.0.1", port=args.port)
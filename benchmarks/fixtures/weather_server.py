@@ -0,0 +1,273 @@
+"""
+Local OpenWeatherMap fixture server for tests and benchmarks.
+
+Serves deterministic payloads for the endpoints WeatherService uses:
+  GET /data/2.5/weather    - current conditions
+  GET /data/2.5/forecast   - 3-hour forecast (cnt items)
+  GET /data/3.0/onecall    - combined current + hourly + daily
+  GET /v1/forecast         - Open-Meteo style current + hourly + daily
+  GET /alerts/active       - NWS style active alerts (GeoJSON)
+  GET /__stats             - request counts per path
+  POST /__reset            - reset request counts
+  POST /__alerts           - replace the active alert features (JSON list)
+
+Usage:
+    python benchmarks/fixtures/weather_server.py --port 8765
+    WEATHER_API_BASE_URL=http://127.0.0.1:8765 OPENWEATHER_API_KEY=test ...
+"""
+
+import argparse
+import asyncio
+import math
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from aiohttp import web
+
+CONDITIONS = [
+    ("Clear", "clear sky", "01d"),
+    ("Clouds", "scattered clouds", "03d"),
+    ("Rain", "light rain", "10d"),
+    ("Clouds", "overcast clouds", "04d"),
+]
+
+
+def _condition(index: int) -> Dict[str, Any]:
+    main, description, icon = CONDITIONS[index % len(CONDITIONS)]
+    return {"id": 800 + index, "main": main, "description": description, "icon": icon}
+
+
+def _temp(hour: int, base: float = 60.0) -> float:
+    # Simple diurnal wave so min/max aggregates are non-trivial
+    return round(base + 8 * math.sin((hour % 24 - 9) / 24 * 2 * math.pi), 2)
+
+
+def current_payload(lat: float, lon: float, now: Optional[int] = None) -> Dict[str, Any]:
+    now = now or int(time.time())
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "weather": [_condition(0)],
+        "main": {
+            "temp": 62.3, "feels_like": 61.0, "temp_min": 58.1, "temp_max": 66.4,
+            "pressure": 1016, "humidity": 55
+        },
+        "visibility": 10000,
+        "wind": {"speed": 4.6, "deg": 220},
+        "dt": now,
+        "sys": {"country": "US", "sunrise": now - 6 * 3600, "sunset": now + 6 * 3600},
+        "timezone": -14400,
+        "name": "Medford"
+    }
+
+
+def forecast_payload(lat: float, lon: float, cnt: int = 40, now: Optional[int] = None) -> Dict[str, Any]:
+    now = now or int(time.time())
+    items = []
+    for i in range(min(cnt, 40)):
+        items.append({
+            "dt": now + i * 3 * 3600,
+            "main": {"temp": _temp(i * 3), "feels_like": _temp(i * 3) - 1, "humidity": 50 + i % 30},
+            "weather": [_condition(i)],
+            "wind": {"speed": 3.0 + i % 5, "deg": 180},
+            "rain": {"3h": 0.4} if i % 4 == 2 else {}
+        })
+    return {
+        "cnt": len(items),
+        "list": items,
+        "city": {"name": "Medford", "country": "US", "coord": {"lat": lat, "lon": lon}}
+    }
+
+
+def onecall_payload(lat: float, lon: float, now: Optional[int] = None) -> Dict[str, Any]:
+    now = now or int(time.time())
+    hourly = [{
+        "dt": now + i * 3600,
+        "temp": _temp(i),
+        "feels_like": _temp(i) - 1,
+        "pressure": 1016,
+        "humidity": 50 + i % 30,
+        "wind_speed": 3.0 + i % 5,
+        "wind_deg": 180,
+        "weather": [_condition(i // 3)],
+        "pop": 0.2,
+        **({"rain": {"1h": 0.2}} if i % 12 == 6 else {})
+    } for i in range(48)]
+    daily = [{
+        "dt": now + i * 86400,
+        "sunrise": now + i * 86400 - 6 * 3600,
+        "sunset": now + i * 86400 + 6 * 3600,
+        "temp": {"day": 64.0 + i, "min": 52.0 + i, "max": 70.0 + i, "night": 55.0, "eve": 60.0, "morn": 53.0},
+        "feels_like": {"day": 63.0, "night": 54.0, "eve": 59.0, "morn": 52.0},
+        "pressure": 1015,
+        "humidity": 60,
+        "wind_speed": 5.1,
+        "wind_deg": 200,
+        "weather": [_condition(i)],
+        "pop": 0.3,
+        "uvi": 5.2,
+        **({"rain": 1.7} if i % 3 == 1 else {})
+    } for i in range(8)]
+    return {
+        "lat": lat,
+        "lon": lon,
+        "timezone": "America/New_York",
+        "timezone_offset": -14400,
+        "current": {
+            "dt": now, "sunrise": now - 6 * 3600, "sunset": now + 6 * 3600,
+            "temp": 62.3, "feels_like": 61.0, "pressure": 1016, "humidity": 55,
+            "uvi": 4.1, "clouds": 20, "visibility": 10000,
+            "wind_speed": 4.6, "wind_deg": 220, "weather": [_condition(0)]
+        },
+        "hourly": hourly,
+        "daily": daily
+    }
+
+
+def openmeteo_payload(lat: float, lon: float, now: Optional[int] = None) -> Dict[str, Any]:
+    now = now or int(time.time())
+    start = now - now % 3600
+    hours = range(6 * 24)
+    days = range(6)
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": "America/New_York",
+        "current": {
+            "time": now, "interval": 900, "temperature_2m": 62.3, "relative_humidity_2m": 55,
+            "apparent_temperature": 61.0, "weather_code": 1, "surface_pressure": 1016.2,
+            "wind_speed_10m": 4.6, "wind_direction_10m": 220
+        },
+        "hourly": {
+            "time": [start + i * 3600 for i in hours],
+            "temperature_2m": [_temp(i) for i in hours],
+            "apparent_temperature": [_temp(i) - 1 for i in hours],
+            "relative_humidity_2m": [50 + i % 30 for i in hours],
+            "weather_code": [(0, 2, 61, 3)[(i // 3) % 4] for i in hours],
+            "wind_speed_10m": [3.0 + i % 5 for i in hours],
+            "precipitation": [0.2 if i % 12 == 6 else 0.0 for i in hours]
+        },
+        "daily": {
+            "time": [start + i * 86400 for i in days],
+            "weather_code": [(0, 2, 61, 3)[i % 4] for i in days],
+            "temperature_2m_max": [70.0 + i for i in days],
+            "temperature_2m_min": [52.0 + i for i in days],
+            "precipitation_sum": [1.7 if i % 3 == 1 else 0.0 for i in days],
+            "relative_humidity_2m_mean": [60 for _ in days]
+        }
+    }
+
+
+def nws_alert(event: str, severity: str, onset: float, ends: float, description: str = "",
+              area: str = "Burlington, NJ", sender: str = "NWS Mount Holly NJ") -> Dict[str, Any]:
+    """Build one NWS alert feature; onset/ends are epoch seconds."""
+    def iso(ts: float) -> str:
+        return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+    return {
+        "id": f"urn:oid:2.49.0.1.840.0.{event.replace(' ', '')}.{int(onset)}",
+        "type": "Feature",
+        "properties": {
+            "event": event,
+            "headline": f"{event} issued by {sender}",
+            "description": description or f"{event} in effect.",
+            "severity": severity,
+            "onset": iso(onset),
+            "effective": iso(onset),
+            "ends": iso(ends),
+            "expires": iso(ends),
+            "areaDesc": area,
+            "senderName": sender
+        }
+    }
+
+
+def create_app(latency: float = 0.0, onecall: bool = True) -> web.Application:
+    """Create the fixture application.
+
+    Args:
+        latency: Artificial delay in seconds added to every upstream response
+        onecall: When False, /data/3.0/onecall answers 401 like an unsubscribed key
+            (kept in app["options"] so tests can change it while running)
+    """
+    app = web.Application()
+    app["options"] = {"onecall": onecall}
+    app["stats"] = Counter()
+    app["alerts"] = []
+
+    async def _delay(request: web.Request) -> Tuple[float, float]:
+        app["stats"][request.path] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        return float(request.query.get("lat", 39.9009)), float(request.query.get("lon", -74.8234))
+
+    async def weather(request: web.Request) -> web.Response:
+        lat, lon = await _delay(request)
+        return web.json_response(current_payload(lat, lon))
+
+    async def forecast(request: web.Request) -> web.Response:
+        lat, lon = await _delay(request)
+        return web.json_response(forecast_payload(lat, lon, int(request.query.get("cnt", 40))))
+
+    async def onecall_handler(request: web.Request) -> web.Response:
+        lat, lon = await _delay(request)
+        if not app["options"]["onecall"]:
+            return web.json_response({"cod": 401, "message": "Please note that using One Call 3.0 requires a separate subscription"}, status=401)
+        return web.json_response(onecall_payload(lat, lon))
+
+    async def openmeteo(request: web.Request) -> web.Response:
+        app["stats"][request.path] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        return web.json_response(openmeteo_payload(float(request.query["latitude"]),
+                                                   float(request.query["longitude"])))
+
+    async def alerts(request: web.Request) -> web.Response:
+        app["stats"][request.path] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        return web.json_response({"type": "FeatureCollection", "features": app["alerts"]},
+                                 content_type="application/geo+json")
+
+    async def set_alerts(request: web.Request) -> web.Response:
+        app["alerts"] = await request.json()
+        return web.json_response({"status": "ok", "count": len(app["alerts"])})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(dict(app["stats"]))
+
+    async def reset(request: web.Request) -> web.Response:
+        app["stats"].clear()
+        return web.json_response({"status": "reset"})
+
+    app.router.add_get("/data/2.5/weather", weather)
+    app.router.add_get("/data/2.5/forecast", forecast)
+    app.router.add_get("/data/3.0/onecall", onecall_handler)
+    app.router.add_get("/v1/forecast", openmeteo)
+    app.router.add_get("/alerts/active", alerts)
+    app.router.add_get("/__stats", stats)
+    app.router.add_post("/__reset", reset)
+    app.router.add_post("/__alerts", set_alerts)
+    return app
+
+
+async def start_fixture_server(port: int = 0, **kwargs) -> Tuple[web.AppRunner, str]:
+    """Start the fixture server in the running loop and return (runner, base_url)."""
+    runner = web.AppRunner(create_app(**kwargs))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenWeatherMap fixture server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay per response in seconds")
+    parser.add_argument("--no-onecall", action="store_true", help="Reject One Call requests with 401")
+    args = parser.parse_args()
+
+    web.run_app(create_app(latency=args.latency, onecall=not args.no_onecall),
+                host="127.0.0.1", port=args.port)
@@ -0,0 +1,48 @@
+"""
+Dashboard API without the Google/voice dependencies, for running under
+`uvicorn --workers N` in benchmarks.
+
+Mounts the weather, photos and timer routers behind the same middleware
+stack as backend/main.py. Configure it through the usual environment
+variables (WEATHER_API_BASE_URL, PHOTOS_DIRECTORY, LIFEHUB_SHARED_STATE,
+LIFEHUB_TRAFFIC_LOG, ...).
+
+Usage:
+    uvicorn worker_app:app --app-dir benchmarks/fixtures --workers 4
+"""
+
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from fastapi import FastAPI  # noqa: E402
+
+from backend.compression import CompressionMiddleware, default_response_class  # noqa: E402
+from backend.conditional import ConditionalGetMiddleware  # noqa: E402
+from backend.route_cache import ResponseCacheMiddleware  # noqa: E402
+from backend.traffic_recorder import TrafficLog, TrafficRecorderMiddleware  # noqa: E402
+from modules.photos.api import photo_service, router as photos_router  # noqa: E402
+from modules.timer.api import router as timer_router  # noqa: E402
+from modules.weather.api import router as weather_router, weather_service  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    weather_service.start_alerts()
+    photo_service.start_watching()
+    yield
+    await weather_service.close()
+    await photo_service.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=default_response_class())
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(ConditionalGetMiddleware)
+app.add_middleware(CompressionMiddleware)
+if os.getenv("LIFEHUB_TRAFFIC_LOG"):
+    app.add_middleware(TrafficRecorderMiddleware, log=TrafficLog(os.getenv("LIFEHUB_TRAFFIC_LOG")))
+for router in (weather_router, photos_router, timer_router):
+    app.include_router(router)
@@ -0,0 +1,220 @@
+"""
+Replay recorded dashboard traffic and compare latency between runs.
+
+Works on the JSON-lines logs written by backend/traffic_recorder.py
+(LIFEHUB_TRAFFIC_LOG). Replay output uses the same record format, so any
+two logs - a recording, or replays of it against two builds - can be
+diffed.
+
+  replay  re-issues the recorded GET/HEAD requests against a test instance
+          with the original spacing, sped up by --speed (0 = back to back,
+          bounded by --concurrency), and writes one record per response.
+          Writes are skipped because request bodies are never recorded, as
+          are requests with redacted parameters and long-lived streams.
+  diff    prints p50/p95/p99 and error rate per route for two logs and
+          flags routes whose p95 moved by more than --threshold percent.
+
+Usage:
+    python benchmarks/replay_traffic.py replay logs/traffic.*.jsonl --target http://127.0.0.1:8001 \\
+        --speed 10 --out before.jsonl
+    python benchmarks/replay_traffic.py diff before.jsonl after.jsonl --threshold 10 --fail
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.traffic_recorder import REDACTED  # noqa: E402
+
+Record = Dict[str, Any]
+
+
+def load_records(paths: List[str]) -> List[Record]:
+    """Records from every file, in start-time order (rotated files included by the caller)."""
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["t"])
+    return records
+
+
+def route_key(record: Record) -> str:
+    route = record.get("r") or record["p"]
+    return route if record["m"] == "GET" else f"{record['m']} {route}"
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(records: List[Record]) -> Dict[str, Dict[str, float]]:
+    """Per-route sample count, latency percentiles (ms) and 5xx/failure rate."""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    failures: Dict[str, int] = defaultdict(int)
+    for record in records:
+        key = route_key(record)
+        latencies[key].append(record["d"])
+        if record["s"] >= 500 or record["s"] == 0:
+            failures[key] += 1
+
+    summary = {}
+    for key, values in latencies.items():
+        values.sort()
+        summary[key] = {
+            "n": len(values),
+            "p50": percentile(values, 0.5),
+            "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99),
+            "errors": failures[key] / len(values)
+        }
+    return summary
+
+
+def replayable(record: Record, methods: List[str], skip: re.Pattern) -> bool:
+    return (record["m"] in methods
+            and f"={REDACTED}" not in record.get("q", "")
+            and not skip.search(record.get("r") or record["p"]))
+
+
+async def replay(args) -> None:
+    methods = [method.upper() for method in args.methods]
+    skip = re.compile(args.skip)
+    recorded = load_records(args.logs)
+    records = [record for record in recorded if replayable(record, methods, skip)]
+    if not records:
+        print("Nothing to replay")
+        return
+    print(f"Replaying {len(records)} of {len(recorded)} recorded requests against {args.target}"
+          f" at {'full speed' if args.speed == 0 else f'{args.speed:g}x'}")
+
+    target = args.target.rstrip("/")
+    results: List[Record] = []
+    behind: List[float] = []
+    slots = asyncio.Semaphore(args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+
+    async def issue(session: aiohttp.ClientSession, record: Record) -> None:
+        url = target + record["p"] + (f"?{record['q']}" if record.get("q") else "")
+        sent = time.time()
+        start = time.perf_counter()
+        status = size = 0
+        try:
+            async with session.request(record["m"], url) as response:
+                status = response.status
+                size = len(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        finally:
+            slots.release()
+        results.append({**record, "t": round(sent, 3), "s": status,
+                        "d": round((time.perf_counter() - start) * 1000, 2), "b": size})
+
+    first = records[0]["t"]
+    begin = time.monotonic()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = []
+        for record in records:
+            if args.speed:
+                due = begin + (record["t"] - first) / args.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await slots.acquire()
+            if args.speed:
+                behind.append(max(0.0, time.monotonic() - due))
+            tasks.append(asyncio.create_task(issue(session, record)))
+        await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - begin
+
+    results.sort(key=lambda record: record["t"])
+    with open(args.out, "w") as f:
+        for record in results:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    print(f"{len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.0f} req/s), written to {args.out}")
+    if behind:
+        behind.sort()
+        print(f"Send lag behind schedule: p95 {percentile(behind, 0.95) * 1000:.0f} ms,"
+              f" max {behind[-1] * 1000:.0f} ms (high values mean the target or client could not keep up)")
+    print_summary(summarize(results))
+
+
+def print_summary(summary: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{'route':<44}{'n':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for key in sorted(summary):
+        stats = summary[key]
+        print(f"{key:<44}{stats['n']:>7}{stats['p50']:>9.1f}{stats['p95']:>9.1f}{stats['p99']:>9.1f}"
+              f"{stats['errors']:>8.1%}")
+
+
+def diff(args) -> int:
+    baseline = summarize(load_records([args.baseline]))
+    candidate = summarize(load_records([args.candidate]))
+    print(f"baseline: {args.baseline}\ncandidate: {args.candidate}\n")
+    print(f"{'route':<44}{'n':>13}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}{'p95':>9}{'errors':>15}")
+
+    regressions = 0
+    for key in sorted(set(baseline) | set(candidate)):
+        a, b = baseline.get(key), candidate.get(key)
+        if a is None or b is None:
+            only = "baseline" if b is None else "candidate"
+            print(f"{key:<44}{(a or b)['n']:>13}  only in {only}")
+            continue
+
+        change = (b["p95"] - a["p95"]) / a["p95"] * 100 if a["p95"] else 0.0
+        verdict = ""
+        if min(a["n"], b["n"]) < args.min_samples:
+            verdict = "  (few samples)"
+        elif change > args.threshold or b["errors"] > a["errors"] + 0.01:
+            verdict = "  SLOWER" if change > args.threshold else "  MORE ERRORS"
+            regressions += 1
+        elif change < -args.threshold:
+            verdict = "  faster"
+        print(f"{key:<44}{a['n']:>5} / {b['n']:<5}"
+              f"{a['p50']:>7.1f} /{b['p50']:>7.1f}{a['p95']:>7.1f} /{b['p95']:>7.1f}"
+              f"{a['p99']:>7.1f} /{b['p99']:>7.1f}{change:>+8.0f}%"
+              f"{a['errors']:>7.1%} /{b['errors']:>6.1%}{verdict}")
+
+    print(f"\n{regressions} route(s) regressed by more than {args.threshold:g}% at p95")
+    return 1 if regressions and args.fail else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="Re-issue recorded requests against a server")
+    replay_parser.add_argument("logs", nargs="+", help="Traffic logs (rotated .1/.2 files too, if wanted)")
+    replay_parser.add_argument("--target", required=True, help="Base URL of the instance under test")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="Replay speed relative to the recording; 0 sends back to back")
+    replay_parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    replay_parser.add_argument("--methods", nargs="+", default=["GET", "HEAD"])
+    replay_parser.add_argument("--skip", default=r"/stream$", help="Regex of routes not to replay")
+    replay_parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s)")
+    replay_parser.add_argument("--out", required=True, help="Where to write the replay's records")
+
+    diff_parser = commands.add_parser("diff", help="Compare latency distributions of two logs")
+    diff_parser.add_argument("baseline")
+    diff_parser.add_argument("candidate")
+    diff_parser.add_argument("--threshold", type=float, default=10.0, help="p95 change (%%) worth flagging")
+    diff_parser.add_argument("--min-samples", type=int, default=20, help="Ignore routes with fewer requests")
+    diff_parser.add_argument("--fail", action="store_true", help="Exit 1 when any route regressed")
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        asyncio.run(replay(args))
+    else:
+        sys.exit(diff(args))
@@ -9,6 +9,8 @@ from datetime import datetime
 
 from .service import CalendarService
 from .models import CalendarEvent, CalendarSummary, CalendarStatus, CalendarConfig
+from ..common.response_cache import response_cache
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,11 @@ router = APIRouter(prefix="/api/calendar", tags=["calendar"])
 # Initialize calendar service
 calendar_service = CalendarService()
 
+# Conditional GET for the dashboard summary while the last sync is fresh
+versions.register("/api/calendar/summary", calendar_service.get_version_token)
+# Each miss syncs with the Calendar API; the TTL bounds how late remote edits show up
+response_cache.register("/api/calendar/summary", ttl=300, scopes=("calendar",))
+
 
 @router.get("/events", response_model=List[CalendarEvent])
 async def get_calendar_events(
@@ -43,7 +43,8 @@ class CalendarConfigManager:
             "days_ahead": int(os.getenv("CALENDAR_DAYS_AHEAD", 
                                       config_data.get("days_ahead", 7))),
             "timezone": os.getenv("CALENDAR_TIMEZONE", 
-                                config_data.get("timezone", "America/New_York"))
+                                config_data.get("timezone", "America/New_York")),
+            "api_base_url": os.getenv("GOOGLE_CALENDAR_API_URL", config_data.get("api_base_url"))
         }
         
         # Filter out None values and empty strings
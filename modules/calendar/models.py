@@ -108,4 +108,5 @@ class CalendarConfig(BaseModel):
     calendar_ids: List[str] = ["primary"]
     max_events: int = 10
     days_ahead: int = 7
-    timezone: str = "America/New_York"
\ No newline at end of file
+    timezone: str = "America/New_York"
+    api_base_url: Optional[str] = None  # Calendar API root, for pointing at a local fixture
\ No newline at end of file
@@ -9,6 +9,7 @@ import asyncio
 import pytz
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
+from fastapi.encoders import jsonable_encoder
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -17,9 +18,16 @@ from googleapiclient.errors import HttpError
 
 from .models import CalendarEvent, CalendarConfig, CalendarSummary, CalendarStatus
 from .config import CalendarConfigManager
+from ..common.shared_state import shared_state
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
+# How long a sync is trusted before reads go back to the Calendar API
+SYNC_INTERVAL = timedelta(minutes=30)
+# With several workers, a sync by any of them this recent is reused
+SHARED_SYNC_MAX_AGE = 60
+
 
 class CalendarService:
     """Google Calendar service for family dashboard."""
@@ -89,7 +97,8 @@ class CalendarService:
                 logger.info("Saved Google Calendar token")
             
             # Build the service
-            self.service = build('calendar', 'v3', credentials=creds)
+            client_options = {"api_endpoint": self.config.api_base_url} if self.config.api_base_url else None
+            self.service = build('calendar', 'v3', credentials=creds, client_options=client_options)
             self.error_message = None
             logger.info("Google Calendar service authenticated successfully")
             return True
@@ -109,63 +118,22 @@ class CalendarService:
         days_ahead = days_ahead or self.config.days_ahead
         
         try:
-            # Calculate time range
-            now = datetime.now(timezone.utc)
-            time_min = now.isoformat()
-            time_max = (now + timedelta(days=days_ahead)).isoformat()
-            
-            events = []
-            
-            # Fetch events from each configured calendar
-            for calendar_id in self.config.calendar_ids:
-                try:
-                    # Call the Calendar API
-                    events_result = self.service.events().list(
-                        calendarId=calendar_id,
-                        timeMin=time_min,
-                        timeMax=time_max,
-                        maxResults=self.config.max_events,
-                        singleEvents=True,
-                        orderBy='startTime'
-                    ).execute()
-                    
-                    calendar_events = events_result.get('items', [])
-                    self.api_calls_today += 1
-                    
-                    # Get calendar name
-                    calendar_name = "Calendar"
-                    try:
-                        calendar_info = self.service.calendars().get(calendarId=calendar_id).execute()
-                        calendar_name = calendar_info.get('summary', calendar_id)
-                        self.api_calls_today += 1
-                    except:
-                        pass
-                    
-                    # Convert to CalendarEvent objects
-                    for event in calendar_events:
-                        try:
-                            parsed_events = self._parse_event(event, calendar_id, calendar_name)
-                            if parsed_events:
-                                # _parse_event now returns a list of events (for multi-day expansion)
-                                if isinstance(parsed_events, list):
-                                    events.extend(parsed_events)
-                                else:
-                                    events.append(parsed_events)
-                        except Exception as e:
-                            logger.warning(f"Failed to parse event {event.get('id', 'unknown')}: {e}")
-                            
-                except HttpError as error:
-                    logger.error(f"Failed to fetch events from calendar {calendar_id}: {error}")
-                    if error.resp.status == 404:
-                        logger.warning(f"Calendar {calendar_id} not found or not accessible")
-                    continue
-            
-            # Sort all events by start time
-            events.sort(key=lambda e: e.start_time)
+            if shared_state:
+                data, updated, _ = await shared_state.single_flight(
+                    f"calendar:{days_ahead}", SHARED_SYNC_MAX_AGE,
+                    lambda: self._fetch_events_encoded(days_ahead)
+                )
+                events = [CalendarEvent(**event) for event in data]
+                synced = datetime.fromtimestamp(updated)
+            else:
+                events = await self._fetch_events(days_ahead)
+                synced = datetime.now()
             
             # Cache the events
+            if events != self.cached_events:
+                versions.bump("calendar")
             self.cached_events = events
-            self.last_sync = datetime.now()
+            self.last_sync = synced
             
             logger.info(f"Fetched {len(events)} events from {len(self.config.calendar_ids)} calendars")
             return events
@@ -175,6 +143,66 @@ class CalendarService:
             self.error_message = str(e)
             return self.cached_events  # Return cached events if available
     
+    async def _fetch_events_encoded(self, days_ahead: int) -> List[Dict[str, Any]]:
+        return jsonable_encoder(await self._fetch_events(days_ahead))
+    
+    async def _fetch_events(self, days_ahead: int) -> List[CalendarEvent]:
+        """Fetch and merge events from every configured calendar."""
+        # Calculate time range
+        now = datetime.now(timezone.utc)
+        time_min = now.isoformat()
+        time_max = (now + timedelta(days=days_ahead)).isoformat()
+        
+        events = []
+        
+        # Fetch events from each configured calendar
+        for calendar_id in self.config.calendar_ids:
+            try:
+                # Call the Calendar API
+                events_result = self.service.events().list(
+                    calendarId=calendar_id,
+                    timeMin=time_min,
+                    timeMax=time_max,
+                    maxResults=self.config.max_events,
+                    singleEvents=True,
+                    orderBy='startTime'
+                ).execute()
+                
+                calendar_events = events_result.get('items', [])
+                self.api_calls_today += 1
+                
+                # Get calendar name
+                calendar_name = "Calendar"
+                try:
+                    calendar_info = self.service.calendars().get(calendarId=calendar_id).execute()
+                    calendar_name = calendar_info.get('summary', calendar_id)
+                    self.api_calls_today += 1
+                except:
+                    pass
+                
+                # Convert to CalendarEvent objects
+                for event in calendar_events:
+                    try:
+                        parsed_events = self._parse_event(event, calendar_id, calendar_name)
+                        if parsed_events:
+                            # _parse_event now returns a list of events (for multi-day expansion)
+                            if isinstance(parsed_events, list):
+                                events.extend(parsed_events)
+                            else:
+                                events.append(parsed_events)
+                    except Exception as e:
+                        logger.warning(f"Failed to parse event {event.get('id', 'unknown')}: {e}")
+                        
+            except HttpError as error:
+                logger.error(f"Failed to fetch events from calendar {calendar_id}: {error}")
+                if error.resp.status == 404:
+                    logger.warning(f"Calendar {calendar_id} not found or not accessible")
+                continue
+        
+        # Sort all events by start time
+        events.sort(key=lambda e: e.start_time)
+        return events
+    
     def _parse_event(self, event: Dict[str, Any], calendar_id: str, calendar_name: str) -> Optional[List[CalendarEvent]]:
         """Parse a Google Calendar API event into CalendarEvent object(s). 
         Returns a list of events (for multi-day expansion) or a single event."""
@@ -274,7 +302,17 @@ class CalendarService:
     async def get_calendar_summary(self) -> CalendarSummary:
         """Get a summary of calendar events for dashboard display."""
         events = await self.get_events()
-        
+        # The sync time rather than now, so identical data renders identically
+        return self._summarize_events(events, self.last_sync or datetime.now())
+    
+    def get_cached_summary(self) -> Optional[CalendarSummary]:
+        """Summary built from the last synced events, without calling the API."""
+        if not self.last_sync:
+            return None
+        return self._summarize_events(self.cached_events, self.last_sync)
+    
+    def _summarize_events(self, events: List[CalendarEvent], last_updated: datetime) -> CalendarSummary:
+        """Group events into today/this week/next for the dashboard."""
         today = datetime.now().date()
         
         # Calculate current week (Sunday to Saturday)
@@ -307,16 +345,28 @@ class CalendarService:
             upcoming_events=upcoming_events,
             next_event=next_event,
             total_events=len(week_events),
-            last_updated=datetime.now()
+            last_updated=last_updated
         )
     
+    def get_version_token(self) -> Optional[str]:
+        """Version of the cached summary, or None once the last sync is stale.
+        
+        The summary also depends on the date and on which event is next, so
+        both are part of the token.
+        """
+        now = datetime.now()
+        if not self.last_sync or now - self.last_sync >= SYNC_INTERVAL:
+            return None
+        upcoming = next((event.id for event in self.cached_events if event.start_time > now), "")
+        return f"{versions.version('calendar')}.{now.date().isoformat()}.{upcoming}"
+    
     async def get_status(self) -> CalendarStatus:
         """Get calendar service status."""
         return CalendarStatus(
             authenticated=self.service is not None,
             calendars_count=len(self.config.calendar_ids),
             last_sync=self.last_sync,
-            next_sync=self.last_sync + timedelta(minutes=30) if self.last_sync else None,
+            next_sync=self.last_sync + SYNC_INTERVAL if self.last_sync else None,
             error_message=self.error_message,
             api_calls_today=self.api_calls_today,
             quota_remaining=1000 - self.api_calls_today  # Google Calendar free quota
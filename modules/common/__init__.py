@@ -0,0 +1,6 @@
+"""Infrastructure shared by the Pi Life Hub modules"""
+from .versioning import versions, database_token
+from .response_cache import response_cache
+from .shared_state import shared_state
+
+__all__ = ["versions", "database_token", "response_cache", "shared_state"]
@@ -0,0 +1,142 @@
+"""
+In-memory cache of complete responses for GET routes that are pure
+functions of slowly changing state.
+
+Modules register a route with a TTL and the version scopes it depends on;
+bumping any of those scopes (see versioning.py) drops the route's cached
+responses immediately, so the TTL only bounds staleness for state that
+changes without a bump (upstream calendars, files on disk). Entries are
+keyed by path and normalized query string and evicted least recently used
+once the byte budget is exceeded.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from .versioning import VersionRegistry, versions
+
+
+@dataclass
+class CacheRule:
+    """Caching policy and counters for one route."""
+    ttl: float
+    scopes: Tuple[str, ...]
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires: float
+    scopes: Tuple[str, ...]
+    versions: Tuple[int, ...]
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        self.size = len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+
+class ResponseCache:
+    """LRU response store with per-route TTLs and scope-based invalidation."""
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, registry: VersionRegistry = versions):
+        self.max_bytes = max_bytes
+        self.registry = registry
+        self.rules: Dict[str, CacheRule] = {}
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        self.invalidations = 0
+        registry.subscribe(self.invalidate)
+
+    def register(self, path: str, ttl: float, scopes: Tuple[str, ...] = ()) -> None:
+        """Cache GET responses for path for up to ttl seconds, dropped when any scope is bumped."""
+        self.rules[path] = CacheRule(ttl, tuple(scopes))
+
+    def rule_for(self, path: str) -> Optional[CacheRule]:
+        return self.rules.get(path)
+
+    @staticmethod
+    def key(path: str, query_string: bytes) -> str:
+        """Path plus the query parameters in a canonical order."""
+        params = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+        return f"{path}?{urlencode(params)}" if params else path
+
+    def get(self, path: str, key: str) -> Optional[CachedResponse]:
+        rule = self.rules[path]
+        entry = self.entries.get(key)
+        # Bumps in other worker processes don't reach the listener, so check the versions too
+        if entry is not None and (entry.expires <= time.monotonic()
+                                  or self.registry.snapshot(entry.scopes) != entry.versions):
+            self._remove(key)
+            entry = None
+
+        if entry is None:
+            rule.misses += 1
+            return None
+        rule.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, path: str, key: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes,
+            snapshot: Tuple[int, ...]) -> None:
+        """Store a response computed while the route's scopes were at snapshot."""
+        rule = self.rules[path]
+        entry = CachedResponse(status, headers, body, time.monotonic() + rule.ttl, rule.scopes, snapshot)
+        if entry.size > self.max_bytes // 4:
+            return  # One oversized response shouldn't flush everything else
+
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def invalidate(self, scopes: Tuple[str, ...]) -> None:
+        """Drop every entry that depends on one of the scopes."""
+        stale = [key for key, entry in self.entries.items() if set(entry.scopes) & set(scopes)]
+        for key in stale:
+            self._remove(key)
+        self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def _remove(self, key: str) -> None:
+        self.size -= self.entries.pop(key).size
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = sum(rule.hits for rule in self.rules.values())
+        lookups = hits + sum(rule.misses for rule in self.rules.values())
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "routes": {
+                path: {
+                    "ttl": rule.ttl,
+                    "scopes": list(rule.scopes),
+                    "hits": rule.hits,
+                    "misses": rule.misses,
+                    "hit_ratio": round(rule.hits / (rule.hits + rule.misses), 3) if rule.hits + rule.misses else None
+                }
+                for path, rule in self.rules.items()
+            }
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,223 @@
+"""
+State shared between worker processes.
+
+With a single uvicorn worker every service keeps its state in memory, as
+before. Setting LIFEHUB_SHARED_STATE to a file path (done automatically by
+`python backend/main.py` when LIFEHUB_WORKERS > 1) switches the services to
+an SQLite store in WAL mode that all workers open:
+
+  - kv:       JSON documents with a version number (timers, cached upstream
+              snapshots, alert state)
+  - counters: the version scopes behind ETags and the response cache
+  - leases:   time-limited leadership, so only one worker polls an upstream
+              feed or ticks the timers
+
+Short critical sections that read, modify and write a document take an
+flock on a lock file next to the database.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+
+from .versioning import versions
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    scope TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class SharedState:
+    """SQLite-backed documents, counters and leases shared by worker processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._local = threading.local()
+        with self.lock("schema"):
+            self._conn().executescript(SCHEMA)
+            self._conn().execute("INSERT OR IGNORE INTO kv VALUES ('boot', ?, 1, ?)",
+                                 (json.dumps(uuid.uuid4().hex[:8]), time.time()))
+        self.boot = self.get("boot")[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Documents
+
+    def get(self, key: str) -> Optional[Tuple[Any, int, float]]:
+        """(value, version, updated) for a document, or None if it was never set."""
+        row = self._conn().execute("SELECT value, version, updated FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def version(self, key: str) -> int:
+        """Document version without loading it (0 if missing)."""
+        row = self._conn().execute("SELECT version FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def set(self, key: str, value: Any) -> int:
+        """Store a JSON-serializable document and return its new version."""
+        return self._store(key, value)[0]
+
+    def _store(self, key: str, value: Any) -> Tuple[int, float]:
+        updated = time.time()
+        row = self._write_and_read(
+            "INSERT INTO kv VALUES (?, ?, 1, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, version = kv.version + 1, "
+            "updated = excluded.updated",
+            (key, json.dumps(value, separators=(",", ":")), updated),
+            "SELECT version FROM kv WHERE key = ?", (key,)
+        )
+        return row[0], updated
+
+    def _write_and_read(self, write: str, params: tuple, read: str, key: tuple) -> tuple:
+        """Run an upsert and read back the row it wrote, in one transaction.
+
+        Stands in for RETURNING, which needs SQLite 3.35 (Raspberry Pi OS
+        Bullseye ships 3.34).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(write, params)
+            row = conn.execute(read, key).fetchone()
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return row
+
+    # Counters
+
+    def counter(self, scope: str) -> int:
+        row = self._conn().execute("SELECT value FROM counters WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else 0
+
+    def increment(self, scope: str) -> int:
+        row = self._write_and_read(
+            "INSERT INTO counters VALUES (?, 1) ON CONFLICT(scope) DO UPDATE SET value = counters.value + 1",
+            (scope,),
+            "SELECT value FROM counters WHERE scope = ?", (scope,)
+        )
+        return row[0]
+
+    # Leadership
+
+    def acquire_lease(self, name: str, ttl: float) -> bool:
+        """Take or renew a lease; False while another live worker holds it."""
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT INTO leases VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+            "WHERE leases.expires < ? OR leases.owner = excluded.owner",
+            (name, self.owner, now + ttl, now)
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name: str) -> None:
+        self._conn().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    @contextmanager
+    def lock(self, name: str) -> Iterator[None]:
+        """Inter-process mutex for a short, synchronous read-modify-write."""
+        with open(f"{self.path}.{name}.lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def locked(self, name: str, poll: float = 0.005) -> AsyncIterator[None]:
+        """lock() for coroutines: waiting out another worker's hold doesn't block the event loop.
+
+        Don't await inside it unless every holder of the name in this process
+        uses locked(): a synchronous lock() of the same name taken meanwhile
+        would block the loop for good.
+        """
+        with open(f"{self.path}.{name}.lock", "a") as handle:
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(poll)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    async def run(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Call a store method in a thread (with its own connection), so a busy database doesn't block the loop."""
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    async def single_flight(self, key: str, max_age: float, fetch: Callable[[], Awaitable[Any]],
+                            wait: float = 15.0) -> Tuple[Any, float, bool]:
+        """Shared document younger than max_age, or fetch it with only one worker calling upstream.
+
+        Returns (value, updated, fetched_here). Workers that lose the race for
+        the lease wait for the winner's result; if it doesn't appear within
+        wait seconds they fetch themselves rather than fail.
+        """
+        lease = f"fetch:{key}"
+        deadline = time.monotonic() + wait
+        while True:
+            current = self.get(key)
+            if current is not None and time.time() - current[2] < max_age:
+                return current[0], current[2], False
+            if self.acquire_lease(lease, ttl=wait) or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(0.1)
+
+        try:
+            value = await fetch()
+            # The stored time, so this worker's Last-Modified matches what the others read
+            _, updated = self._store(key, value)
+            return value, updated, True
+        finally:
+            self.release_lease(lease)
+
+
+def _open_shared_state() -> Optional[SharedState]:
+    path = os.getenv("LIFEHUB_SHARED_STATE")
+    if not path:
+        return None
+    state = SharedState(path)
+    versions.attach(state)
+    logger.info(f"Using shared state at {path} (worker {state.owner})")
+    return state
+
+
+shared_state = _open_shared_state()
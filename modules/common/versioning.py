@@ -0,0 +1,129 @@
+"""
+Cheap version tokens for conditional GETs.
+
+Each module describes the state behind its read endpoints with a token
+that is cheap to compute: an in-memory generation counter bumped on every
+mutation, a database change counter, or a sync timestamp. Routes are
+registered against a token source, and the HTTP layer turns the token into
+an ETag without rendering the response body.
+"""
+
+import os
+import re
+import uuid
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+TokenSource = Union[str, Callable[..., Optional[str]]]
+
+
+def database_token(path: str) -> Optional[str]:
+    """Change token for an SQLite file, read from its header.
+
+    In rollback-journal mode the header's file change counter (offset 24)
+    is incremented by every committed write, including writes by other
+    processes. In WAL mode commits land in the -wal file first, so its size
+    and mtime are part of the token.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(24)
+            counter = f.read(4).hex()
+    except OSError:
+        return None
+
+    try:
+        wal = os.stat(path + "-wal")
+        return f"{counter}.{wal.st_size}.{wal.st_mtime_ns}"
+    except OSError:
+        return counter
+
+
+class VersionRegistry:
+    """Generation counters per scope plus the routes whose responses they describe."""
+
+    def __init__(self):
+        # Differs per process start, so tokens from a previous run never match
+        self.boot = uuid.uuid4().hex[:8]
+        self._counter = count(1)
+        self._versions: Dict[str, int] = {}
+        self._exact: Dict[str, TokenSource] = {}
+        self._patterns: List[Tuple[re.Pattern, TokenSource]] = []
+        self._listeners: List[Callable[[Tuple[str, ...]], None]] = []
+        self._shared = None
+
+    def attach(self, store) -> None:
+        """Keep the counters in a SharedState, so every worker process agrees on them."""
+        self._shared = store
+        self.boot = store.boot
+
+    def bump(self, *scopes: str) -> None:
+        """Mark the state behind one or more scopes as changed."""
+        for scope in scopes:
+            self._versions[scope] = self._shared.increment(scope) if self._shared else next(self._counter)
+        for listener in self._listeners:
+            listener(scopes)
+
+    async def bump_async(self, *scopes: str) -> None:
+        """bump() for hot loops: shared counters are incremented in a thread, off the event loop."""
+        if self._shared is None:
+            self.bump(*scopes)
+            return
+        for scope in scopes:
+            self._versions[scope] = await self._shared.run(self._shared.increment, scope)
+        for listener in self._listeners:
+            listener(scopes)
+
+    def subscribe(self, listener: Callable[[Tuple[str, ...]], None]) -> None:
+        """Call listener(scopes) on every bump, e.g. to drop cached responses."""
+        self._listeners.append(listener)
+
+    def _current(self, scope: str) -> int:
+        if self._shared:
+            return self._shared.counter(scope)
+        return self._versions.get(scope, 0)
+
+    def version(self, scope: str) -> str:
+        return f"{self.boot}.{self._current(scope)}"
+
+    def snapshot(self, scopes: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._current(scope) for scope in scopes)
+
+    def register(self, path: str, source: TokenSource) -> None:
+        """Describe a GET route by a scope name or a callable returning a token.
+
+        Path parameters are written as in FastAPI ("/api/todos/{user_id}") and
+        are passed to callables as keyword arguments. Literal paths win over
+        patterns, so "/api/timer/list" is not shadowed by "/api/timer/{timer_id}".
+        A callable may return None when it cannot vouch for the current state,
+        e.g. because the data is due for a refresh. Callables built on in-memory
+        counters should include version(scope), which carries the boot id.
+        """
+        if "{" not in path:
+            self._exact[path] = source
+            return
+        regex = re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(path))
+        self._patterns.append((re.compile(f"^{regex}$"), source))
+
+    def is_registered(self, path: str) -> bool:
+        return path in self._exact or any(pattern.match(path) for pattern, _ in self._patterns)
+
+    def token_for(self, path: str) -> Optional[str]:
+        """Current token for a request path, or None if unknown or unregistered."""
+        source = self._exact.get(path)
+        params: Dict[str, str] = {}
+        if source is None:
+            for pattern, candidate in self._patterns:
+                match = pattern.match(path)
+                if match:
+                    source, params = candidate, match.groupdict()
+                    break
+            else:
+                return None
+
+        if isinstance(source, str):
+            return self.version(source)
+        return source(**params)
+
+
+versions = VersionRegistry()
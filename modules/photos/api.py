@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import FileResponse
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 from .service import PhotoService
-from .models import PhotoInfo, PhotoUploadResponse, PhotoConfig
+from .models import PhotoInfo, PhotoUploadResponse, PhotoConfig, ScanJob
+from .upload import UploadTooLarge
+from ..common.response_cache import response_cache
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +15,12 @@ router = APIRouter(prefix="/api/photos", tags=["photos"])
 # Initialize photo service
 photo_service = PhotoService()
 
+# Conditional GET for the catalog listings (/random is deliberately uncached)
+for path in ("/api/photos/slideshow", "/api/photos/list", "/api/photos/status"):
+    versions.register(path, photo_service.get_version_token)
+# Short TTL: status also reports on the photo directory, which changes outside the app
+response_cache.register("/api/photos/status", ttl=30, scopes=("photos",))
+
 @router.get("/slideshow")
 async def get_slideshow_photos(limit: int = 10) -> List[PhotoInfo]:
     """Get photos for slideshow display."""
@@ -47,10 +56,31 @@ async def list_photos(offset: int = 0, limit: int = 20) -> Dict[str, Any]:
         logger.error(f"Failed to list photos: {e}")
         raise HTTPException(status_code=500, detail="Failed to list photos")
 
+def _hinted_width(request: Request) -> Optional[int]:
+    """Image width the browser asked for through client hints, in device pixels."""
+    for header in ("sec-ch-width", "width"):
+        try:
+            return min(max(int(float(request.headers[header])), 16), 4096)
+        except (KeyError, ValueError):
+            continue
+    return None
+
 @router.get("/image/{photo_id}")
-async def get_photo_image(photo_id: str, size: str = "medium"):
-    """Get photo image file."""
+async def get_photo_image(photo_id: str, request: Request, size: str = "medium",
+                          w: Optional[int] = Query(None, ge=16, le=4096),
+                          q: Optional[int] = Query(None, ge=30, le=95)):
+    """Get photo image file: size=thumbnail, size=original, or else the screen-sized display rendition.
+    
+    With a width (w, or a Sec-CH-Width/Width client hint) or quality (q),
+    returns a variant made on demand, as WebP when the Accept header allows.
+    """
     try:
+        width = w or _hinted_width(request)
+        if width or q:
+            webp = "image/webp" in request.headers.get("accept", "")
+            image_path, media_type = await photo_service.get_variant(photo_id, width, q, webp)
+            return FileResponse(image_path, media_type=media_type,
+                                headers={"Vary": "Accept, Sec-CH-Width, Width"})
         image_path = await photo_service.get_photo_path(photo_id, size)
         return FileResponse(image_path)
     except FileNotFoundError:
@@ -59,23 +89,48 @@ async def get_photo_image(photo_id: str, size: str = "medium"):
         logger.error(f"Failed to get photo image: {e}")
         raise HTTPException(status_code=500, detail="Failed to get photo image")
 
-@router.post("/upload")
-async def upload_photo(file: UploadFile = File(...)) -> PhotoUploadResponse:
-    """Upload a new photo."""
+def _upload_body(field: str, multiple: bool) -> Dict[str, Any]:
+    """OpenAPI request body for the upload routes, which parse multipart themselves."""
+    schema: Dict[str, Any] = {"type": "string", "format": "binary"}
+    if multiple:
+        schema = {"type": "array", "items": schema}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {
+        "schema": {"type": "object", "properties": {field: schema}, "required": [field]}
+    }}}}
+
+@router.post("/upload", status_code=202, openapi_extra=_upload_body("file", multiple=False))
+async def upload_photo(request: Request) -> PhotoUploadResponse:
+    """Upload a new photo; it is streamed to disk and processed in the background."""
     try:
-        if not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        photo_info = await photo_service.upload_photo(file)
-        return PhotoUploadResponse(
-            success=True,
-            photo_id=photo_info.id,
-            message="Photo uploaded successfully"
-        )
+        return await photo_service.upload_photo(request.headers, request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to upload photo: {e}")
         raise HTTPException(status_code=500, detail="Failed to upload photo")
 
+@router.post("/upload/batch", status_code=202, openapi_extra=_upload_body("files", multiple=True))
+async def upload_photos(request: Request) -> Dict[str, Any]:
+    """Upload several photos in one request, each streamed to disk in turn; reports on every file."""
+    try:
+        results = await photo_service.upload_photos(request.headers, request.stream())
+        accepted = sum(1 for result in results if result.success)
+        return {
+            "status": "accepted",
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "files": results
+        }
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to upload photos: {e}")
+        raise HTTPException(status_code=500, detail="Failed to upload photos")
+
 @router.delete("/{photo_id}")
 async def delete_photo(photo_id: str) -> Dict[str, str]:
     """Delete a photo."""
@@ -103,21 +158,46 @@ async def update_photo_config(config: PhotoConfig) -> Dict[str, str]:
         logger.error(f"Failed to update photo config: {e}")
         raise HTTPException(status_code=500, detail="Failed to update configuration")
 
-@router.post("/scan")
+@router.post("/scan", status_code=202)
 async def scan_photos() -> Dict[str, Any]:
-    """Scan photo directory for new photos."""
+    """Start scanning the photo directory in the background; follow it at /jobs/{job_id}."""
     try:
-        added, skipped = await photo_service.scan_directory()
+        job, started = photo_service.start_scan()
         return {
-            "status": "success",
-            "photos_added": added,
-            "photos_skipped": skipped,
-            "message": f"Scan complete: {added} added, {skipped} skipped"
+            "status": "accepted",
+            "job_id": job.id,
+            "job": job,
+            "message": "Scan started" if started else "Scan already running"
         }
     except Exception as e:
-        logger.error(f"Failed to scan photos: {e}")
+        logger.error(f"Failed to start photo scan: {e}")
         raise HTTPException(status_code=500, detail="Failed to scan photos")
 
+@router.get("/jobs")
+async def list_scan_jobs() -> Dict[str, Any]:
+    """Recent scan jobs and the state of the ingest pipeline."""
+    return {
+        "pipeline": photo_service.ingest.status(),
+        "jobs": photo_service.list_jobs()
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_scan_job(job_id: str) -> ScanJob:
+    """Progress of a scan job."""
+    job = photo_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/duplicates")
+async def get_duplicate_photos() -> Dict[str, Any]:
+    """Exact copies skipped by ingest and groups of near-duplicate photos."""
+    try:
+        return photo_service.get_duplicates()
+    except Exception as e:
+        logger.error(f"Failed to get duplicate photos: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get duplicate photos")
+
 @router.get("/status")
 async def get_photo_status() -> Dict[str, Any]:
     """Get photo service status."""
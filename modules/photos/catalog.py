@@ -0,0 +1,316 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from .models import PhotoInfo
+from .scanner import FileStat, IndexEntry
+
+logger = logging.getLogger(__name__)
+
+# Columns stored as-is; every other PhotoInfo field goes into the "extra" JSON
+COLUMNS = ("id", "file_path", "filename", "thumbnail_path", "file_size", "width", "height", "format",
+           "taken_date", "added_date", "tags", "display_path", "content_hash", "phash", "duplicate_of",
+           "similar_to")
+SELECT = f"SELECT {', '.join(COLUMNS)}, extra FROM photos"
+# Every stored column, in the order _row produces them
+INSERT_COLUMNS = f"{', '.join(COLUMNS)}, extra, inode, mtime"
+INSERT_VALUES = ', '.join('?' * (len(COLUMNS) + 3))
+# Slideshow order: newest first by when the photo was taken, else when it was added
+SHOWN_ORDER = "COALESCE(taken_date, added_date) DESC, id"
+# Exact copies of another photo are catalogued (so scans know them) but never shown
+SHOWN = "duplicate_of IS NULL"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS photos (
+    id TEXT PRIMARY KEY,
+    file_path TEXT NOT NULL UNIQUE,
+    filename TEXT NOT NULL,
+    thumbnail_path TEXT,
+    file_size INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    format TEXT NOT NULL,
+    taken_date TEXT,
+    added_date TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT '[]',
+    extra TEXT,
+    inode INTEGER,
+    mtime INTEGER,
+    display_path TEXT,
+    content_hash TEXT,
+    phash TEXT,
+    duplicate_of TEXT,
+    similar_to TEXT
+);
+CREATE INDEX IF NOT EXISTS photos_added ON photos (added_date DESC, id);
+-- Slideshow order of the shown photos only, so reading it never touches the table
+CREATE INDEX IF NOT EXISTS photos_shown_order ON photos (COALESCE(taken_date, added_date) DESC, id)
+    WHERE duplicate_of IS NULL;
+CREATE INDEX IF NOT EXISTS photos_content_hash ON photos (content_hash);
+CREATE INDEX IF NOT EXISTS photos_size ON photos (file_size);
+CREATE INDEX IF NOT EXISTS photos_duplicate_of ON photos (duplicate_of) WHERE duplicate_of IS NOT NULL;
+"""
+
+
+def _date(value: Optional[datetime]) -> Optional[str]:
+    # Fixed width so dates compare correctly as text
+    return value.isoformat(timespec="microseconds") if value else None
+
+
+class PhotoCatalog:
+    """Indexed SQLite catalog of the photo library.
+
+    Each change is a single-row statement, and reads fetch only the page
+    or photo they need, so neither cost grows with the size of the library.
+    WAL mode lets every uvicorn worker read while another writes, and the
+    UNIQUE file_path keeps concurrent scans from adding a file twice.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _row(self, photo: PhotoInfo, stat: Optional[FileStat] = None) -> tuple:
+        data = photo.dict()
+        extra = {key: value for key, value in data.items() if key not in COLUMNS and value not in (None, [], {})}
+        return (photo.id, photo.file_path, photo.filename, photo.thumbnail_path, photo.file_size,
+                photo.width, photo.height, photo.format, _date(photo.taken_date), _date(photo.added_date),
+                json.dumps(photo.tags), photo.display_path, photo.content_hash, photo.phash, photo.duplicate_of,
+                photo.similar_to, json.dumps(extra, default=str) if extra else None,
+                stat.inode if stat else None, stat.mtime if stat else None)
+
+    def _photo(self, row: tuple) -> PhotoInfo:
+        data: Dict[str, Any] = dict(zip(COLUMNS, row))
+        data["tags"] = json.loads(data["tags"])
+        if row[-1]:
+            data.update(json.loads(row[-1]))
+        return PhotoInfo(**data)
+
+    # Reads
+
+    def is_empty(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM photos LIMIT 1").fetchone() is None
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM photos").fetchone()[0]
+
+    def total_size(self) -> int:
+        return self._connect().execute("SELECT COALESCE(SUM(file_size), 0) FROM photos").fetchone()[0]
+
+    def get(self, photo_id: str) -> Optional[PhotoInfo]:
+        row = self._connect().execute(f"{SELECT} WHERE id = ?", (photo_id,)).fetchone()
+        return self._photo(row) if row else None
+
+    def file_index(self, paths: Optional[Iterable[str]] = None) -> Dict[str, IndexEntry]:
+        """path -> (id, inode, mtime, size) for scans (no PhotoInfo objects are built).
+
+        Every photo, or with paths only those at or under them.
+        """
+        query = "SELECT file_path, id, inode, mtime, file_size FROM photos"
+        conn = self._connect()
+        if paths is None:
+            return {row[0]: row[1:] for row in conn.execute(query)}
+        index = {}
+        for path in paths:
+            path = path.rstrip("/")
+            # A range on the file_path index: "/" sorts just before "0"
+            for row in conn.execute(f"{query} WHERE file_path = ? OR (file_path > ? AND file_path < ?)",
+                                    (path, path + "/", path + "0")):
+                index[row[0]] = row[1:]
+        return index
+
+    def newest_added(self, offset: int = 0, limit: int = 20) -> List[PhotoInfo]:
+        rows = self._connect().execute(
+            f"{SELECT} ORDER BY added_date DESC, id LIMIT ? OFFSET ?", (limit, offset)
+        ).fetchall()
+        return [self._photo(row) for row in rows]
+
+    def shown_ids(self) -> List[str]:
+        """Ids of every shown photo in slideshow order (read off the photos_shown_order index)."""
+        return [row[0] for row in self._connect().execute(
+            f"SELECT id FROM photos WHERE {SHOWN} ORDER BY {SHOWN_ORDER}"
+        )]
+
+    def get_many(self, photo_ids: List[str]) -> List[PhotoInfo]:
+        """Photos by id, in the order given; ids no longer catalogued are left out."""
+        photos = {}
+        for start in range(0, len(photo_ids), 500):
+            chunk = photo_ids[start:start + 500]
+            for row in self._connect().execute(
+                f"{SELECT} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ):
+                photos[row[0]] = self._photo(row)
+        return [photos[photo_id] for photo_id in photo_ids if photo_id in photos]
+
+    def find_by_hash(self, content_hash: str) -> Optional[str]:
+        """Id of the photo with this content hash (the original, if the match is itself a copy)."""
+        row = self._connect().execute(
+            "SELECT COALESCE(duplicate_of, id) FROM photos WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def unhashed_with_size(self, file_size: int) -> List[Tuple[str, str]]:
+        """(id, file path) of photos of this size catalogued before content hashes were recorded."""
+        return self._connect().execute(
+            "SELECT id, file_path FROM photos WHERE file_size = ? AND content_hash IS NULL", (file_size,)
+        ).fetchall()
+
+    def perceptual_hashes(self) -> List[Tuple[str, str, Optional[str]]]:
+        """(id, perceptual hash, similar_to) of every shown photo that has a perceptual hash."""
+        return self._connect().execute(
+            f"SELECT id, phash, similar_to FROM photos WHERE phash IS NOT NULL AND {SHOWN}"
+        ).fetchall()
+
+    def without_phash(self) -> List[Tuple[str, str]]:
+        """(id, thumbnail path) of shown photos catalogued before perceptual hashes were recorded."""
+        return self._connect().execute(
+            f"SELECT id, thumbnail_path FROM photos WHERE phash IS NULL AND thumbnail_path IS NOT NULL AND {SHOWN}"
+        ).fetchall()
+
+    def duplicates(self) -> List[Tuple[str, str]]:
+        """(original id, copy id) of every exact copy."""
+        return self._connect().execute(
+            "SELECT duplicate_of, id FROM photos WHERE duplicate_of IS NOT NULL ORDER BY duplicate_of, added_date"
+        ).fetchall()
+
+    def copy_paths(self, photo_id: str) -> List[str]:
+        """File paths of the exact copies of a photo."""
+        return [row[0] for row in self._connect().execute(
+            "SELECT file_path FROM photos WHERE duplicate_of = ?", (photo_id,)
+        )]
+
+    def similar_groups(self) -> List[Tuple[str, str]]:
+        """(group id, photo id) of photos flagged as near-duplicates; group id is the photo they resemble."""
+        return self._connect().execute(
+            f"SELECT similar_to, id FROM photos WHERE similar_to IS NOT NULL AND {SHOWN} "
+            "ORDER BY similar_to, added_date"
+        ).fetchall()
+
+    # Writes
+
+    def add(self, photo: PhotoInfo, stat: Optional[FileStat] = None) -> bool:
+        """Insert a photo; False if its file is already catalogued."""
+        return self.add_many([photo], {photo.file_path: stat} if stat else None) == 1
+
+    def add_many(self, photos: Iterable[PhotoInfo], stats: Optional[Dict[str, FileStat]] = None) -> int:
+        """Insert photos in one transaction, skipping files already catalogued; returns the number added."""
+        stats = stats or {}
+        conn = self._connect()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO photos ({INSERT_COLUMNS}) VALUES ({INSERT_VALUES})",
+                (self._row(photo, stats.get(photo.file_path)) for photo in photos)
+            )
+            return conn.total_changes - before
+
+    def replace(self, photo: PhotoInfo, stat: FileStat) -> None:
+        """Overwrite a photo re-read after its file changed."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO photos ({INSERT_COLUMNS}) VALUES ({INSERT_VALUES})",
+                self._row(photo, stat)
+            )
+
+    def update_files(self, files: Iterable[Tuple[str, FileStat]]) -> None:
+        """Record the current path and stat of photos whose content is unchanged (moved or adopted)."""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE photos SET file_path = ?, inode = ?, mtime = ?, file_size = ? WHERE id = ?",
+                ((file.path, file.inode, file.mtime, file.size, photo_id) for photo_id, file in files)
+            )
+
+    def remove(self, photo_id: str) -> bool:
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM photos WHERE id = ?", (photo_id,)).rowcount == 1
+
+    def remove_many(self, photo_ids: List[str]) -> List[str]:
+        """Delete photos in one transaction; returns their rendition paths for cleanup.
+
+        Entries for copies of a removed photo go too, so the next scan
+        takes one of those files on as the photo in its place.
+        """
+        conn = self._connect()
+        renditions = []
+        with conn:
+            for photo_id in photo_ids:
+                # Read first: DELETE ... RETURNING needs SQLite 3.35 (Bullseye has 3.34)
+                row = conn.execute("SELECT thumbnail_path, display_path FROM photos WHERE id = ?",
+                                   (photo_id,)).fetchone()
+                if row:
+                    renditions.extend(path for path in row if path)
+                    conn.execute("DELETE FROM photos WHERE id = ?", (photo_id,))
+                conn.execute("DELETE FROM photos WHERE duplicate_of = ?", (photo_id,))
+        return renditions
+
+    def without_display(self) -> List[Tuple[str, str]]:
+        """(id, file path) of shown photos that have no display rendition yet."""
+        return self._connect().execute(
+            f"SELECT id, file_path FROM photos WHERE display_path IS NULL AND {SHOWN}"
+        ).fetchall()
+
+    def set_display_paths(self, paths: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """Record (id, display rendition path) pairs."""
+        conn = self._connect()
+        with conn:
+            conn.executemany("UPDATE photos SET display_path = ? WHERE id = ?",
+                             ((path, photo_id) for photo_id, path in paths))
+
+    def set_content_hashes(self, hashes: Iterable[Tuple[str, str]]) -> None:
+        """Record (id, content hash) pairs."""
+        conn = self._connect()
+        with conn:
+            conn.executemany("UPDATE photos SET content_hash = ? WHERE id = ?",
+                             ((content_hash, photo_id) for photo_id, content_hash in hashes))
+
+    def set_phashes(self, phashes: Iterable[Tuple[str, str, Optional[str]]]) -> None:
+        """Record (id, perceptual hash, similar_to) triples."""
+        conn = self._connect()
+        with conn:
+            conn.executemany("UPDATE photos SET phash = ?, similar_to = ? WHERE id = ?",
+                             ((phash, similar_to, photo_id) for photo_id, phash, similar_to in phashes))
+
+    def clear_display_paths(self) -> None:
+        """Forget every display rendition, e.g. after the screen size changed."""
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE photos SET display_path = NULL")
+
+    def import_json(self, json_path: str) -> int:
+        """One-time import of a legacy photos.json, renamed to photos.json.imported afterwards."""
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        photos = []
+        for photo_id, photo_data in data.items():
+            try:
+                photos.append(PhotoInfo(**photo_data))
+            except Exception as e:
+                logger.warning(f"Skipping catalog entry {photo_id}: {e}")
+        added = self.add_many(photos)
+        try:
+            os.replace(json_path, json_path + ".imported")
+        except FileNotFoundError:
+            pass  # Another worker imported it at the same time
+        logger.info(f"Imported {added} of {len(data)} photos from {json_path}")
+        return added
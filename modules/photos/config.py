@@ -40,7 +40,19 @@ class PhotoConfigManager:
             "scan_interval": int(os.getenv("SCAN_INTERVAL", 
                                          config_data.get("scan_interval", 3600))),
             "show_metadata": os.getenv("SHOW_METADATA", "true").lower() == "true",
-            "shuffle_slideshow": os.getenv("SHUFFLE_SLIDESHOW", "true").lower() == "true"
+            "shuffle_slideshow": os.getenv("SHUFFLE_SLIDESHOW", "true").lower() == "true",
+            "include_subdirectories": os.getenv("INCLUDE_SUBDIRECTORIES",
+                                                str(config_data.get("include_subdirectories", True))).lower() == "true",
+            "ingest_workers": int(os.getenv("PHOTO_INGEST_WORKERS",
+                                            config_data.get("ingest_workers", 0))),
+            "ingest_throttle_temp": float(os.getenv("PHOTO_INGEST_THROTTLE_TEMP",
+                                                    config_data.get("ingest_throttle_temp", 70.0))),
+            "ingest_pause_temp": float(os.getenv("PHOTO_INGEST_PAUSE_TEMP",
+                                                 config_data.get("ingest_pause_temp", 80.0))),
+            "variant_cache_mb": int(os.getenv("PHOTO_VARIANT_CACHE_MB",
+                                              config_data.get("variant_cache_mb", 256))),
+            "near_duplicate_distance": int(os.getenv("PHOTO_NEAR_DUPLICATE_DISTANCE",
+                                                     config_data.get("near_duplicate_distance", 6)))
         }
         
         # Merge configs (env variables take precedence)
@@ -55,6 +67,17 @@ class PhotoConfigManager:
         if "thumbnail_size" not in config_data:
             config_data["thumbnail_size"] = (200, 200)
         
+        # Screen resolution as WIDTHxHEIGHT, e.g. 1280x720
+        display_size = os.getenv("DISPLAY_SIZE")
+        if display_size:
+            try:
+                width, height = (int(value) for value in display_size.lower().split("x"))
+                config_data["display_size"] = (width, height)
+            except ValueError:
+                logger.warning(f"Ignoring DISPLAY_SIZE '{display_size}', expected WIDTHxHEIGHT")
+        elif "display_size" not in config_data:
+            config_data["display_size"] = (1920, 1080)
+        
         return PhotoConfig(**config_data)
     
     def save_config(self, config: PhotoConfig) -> None:
@@ -0,0 +1,332 @@
+import os
+import time
+import hashlib
+import signal
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from PIL import Image, ImageOps, ExifTags
+
+logger = logging.getLogger(__name__)
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+# Degrees below pause_temp the CPU must cool to before work resumes
+RESUME_MARGIN = 5.0
+# (output path, bounding box) of a resized JPEG copy of a photo
+Rendition = Tuple[str, Tuple[int, int]]
+
+# EXIF orientations stored rotated a quarter turn (width and height swapped on display)
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+# Height bound for width-only resizes
+MAX_HEIGHT = 65535
+# Bytes read at a time when hashing a file
+HASH_CHUNK = 1024 * 1024
+
+
+def default_workers() -> int:
+    """One process per core, leaving a core for the web server."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def read_cpu_temperature() -> Optional[float]:
+    """SoC temperature in °C, or None where the platform doesn't report one."""
+    try:
+        with open(THERMAL_ZONE) as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, ValueError):
+        pass
+    try:
+        import psutil
+        for entries in psutil.sensors_temperatures().values():
+            if entries:
+                return entries[0].current
+    except (ImportError, AttributeError):
+        pass
+    return None
+
+
+def content_hasher() -> "hashlib.blake2b":
+    """Hasher for the content hash of a photo file (blake2b: fast on CPUs without SHA instructions)."""
+    return hashlib.blake2b(digest_size=16)
+
+
+# Image work, run in the worker processes (module-level so it can be pickled)
+
+def extract_metadata(img: Image.Image) -> Dict[str, Any]:
+    """Extract metadata from image EXIF data."""
+    metadata = {}
+
+    try:
+        exif = img._getexif()
+        if exif:
+            for tag_id, value in exif.items():
+                tag = ExifTags.TAGS.get(tag_id, tag_id)
+
+                if tag == 'DateTime':
+                    try:
+                        metadata['taken_date'] = datetime.strptime(str(value), '%Y:%m:%d %H:%M:%S')
+                    except:
+                        pass
+                elif tag == 'Make':
+                    metadata['camera_make'] = str(value)
+                elif tag == 'Model':
+                    metadata['camera_model'] = str(value)
+                elif tag == 'FocalLength':
+                    metadata['focal_length'] = float(value)
+                elif tag == 'FNumber':
+                    metadata['aperture'] = f"f/{float(value)}"
+                elif tag == 'ISOSpeedRatings':
+                    metadata['iso'] = int(value)
+    except Exception as e:
+        logger.debug(f"Could not extract EXIF data: {e}")
+
+    return metadata
+
+
+def process_image(file_path: str, renditions: List[Rendition]) -> Dict[str, Any]:
+    """Read a photo's dimensions, format and EXIF data and write its renditions from one decode.
+
+    EXIF comes from the file header, so only the pixels for the renditions
+    are decoded: JPEGs at the smallest power-of-two scale (1/2 to 1/8) that
+    still covers the largest rendition. Each smaller rendition is resized
+    from the one before it rather than from the decode. Renditions are
+    turned upright per the EXIF orientation and saved as optimized
+    progressive JPEGs.
+    """
+    info = {"written": [], "errors": {}}
+    with Image.open(file_path) as img:
+        info.update({
+            "width": img.size[0],
+            "height": img.size[1],
+            "format": img.format,
+            "metadata": extract_metadata(img),
+            "file_size": os.stat(file_path).st_size
+        })
+
+        ordered = sorted(renditions, key=lambda rendition: rendition[1][0] * rendition[1][1], reverse=True)
+        orientation = _draft_upright(img, ordered[0][1]) if ordered else 1
+
+        image = img
+        for path, size in ordered:
+            try:
+                if image is img and orientation != 1:
+                    image = ImageOps.exif_transpose(img)
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")  # JPEG has no alpha or palette
+                image.thumbnail(size, Image.Resampling.LANCZOS)
+                image.save(path, "JPEG", quality=85, optimize=True, progressive=True)
+                info["written"].append(path)
+            except Exception as e:
+                info["errors"][path] = str(e)
+
+        # From the smallest rendition, already decoded and upright
+        try:
+            info["phash"] = perceptual_hash(image)
+        except Exception as e:
+            logger.debug(f"Could not hash {file_path}: {e}")
+            info["phash"] = None
+    return info
+
+
+def hash_file(file_path: str) -> str:
+    """Content hash of a file, read a chunk at a time."""
+    hasher = content_hasher()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def perceptual_hash(image: Image.Image) -> str:
+    """64-bit difference hash, as 16 hex digits.
+
+    Each bit says whether a pixel of a 9x8 grayscale thumbnail is brighter
+    than its right neighbour, so it survives rescaling, recompression and
+    small edits; similar photos differ in only a few bits.
+    """
+    pixels = image.convert("L").resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+    bits = 0
+    for row in range(0, 72, 9):
+        for x in range(row, row + 8):
+            bits = bits << 1 | (pixels[x] > pixels[x + 1])
+    return f"{bits:016x}"
+
+
+def perceptual_hash_file(file_path: str) -> str:
+    """perceptual_hash of an image file (a thumbnail, for photos catalogued without one)."""
+    with Image.open(file_path) as img:
+        _draft_upright(img, (64, 64))
+        return perceptual_hash(ImageOps.exif_transpose(img))
+
+
+def make_variant(file_path: str, out_path: str, width: int, quality: int, fmt: str) -> None:
+    """Write a photo scaled down to width (never up), upright, as "JPEG" or "WEBP"."""
+    with Image.open(file_path) as img:
+        orientation = _draft_upright(img, (width, MAX_HEIGHT))
+        image = ImageOps.exif_transpose(img) if orientation != 1 else img
+        if image.mode not in ("RGB", "L") and not (fmt == "WEBP" and image.mode == "RGBA"):
+            image = image.convert("RGB")
+        image.thumbnail((width, MAX_HEIGHT), Image.Resampling.LANCZOS)
+        if fmt == "WEBP":
+            image.save(out_path, "WEBP", quality=quality, method=4)
+        else:
+            image.save(out_path, "JPEG", quality=quality, optimize=True, progressive=True)
+
+
+def fitted(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """size scaled down (never up) to fit within box, keeping its aspect ratio."""
+    scale = min(box[0] / size[0], box[1] / size[1], 1.0)
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def _draft_upright(img: Image.Image, box: Tuple[int, int]) -> int:
+    """Ask a JPEG to decode at the smallest scale that still fills box once turned upright.
+
+    Returns the EXIF orientation. libjpeg's scaled IDCT is a good downsample
+    in itself (47 dB PSNR against a full decode + LANCZOS for a 1920x1080
+    rendition of a 12 MP photo). No-op for other formats.
+    """
+    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    # Target size in the file's own (unrotated) orientation
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        height, width = fitted((img.size[1], img.size[0]), box)
+    else:
+        width, height = fitted(img.size, box)
+    img.draft("RGB", (width, height))
+    return orientation
+
+
+def _init_worker() -> None:
+    # Image work yields to the web server, and Ctrl+C is left to the parent
+    os.nice(10)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class IngestPipeline:
+    """Runs CPU-heavy image work in a bounded pool of worker processes.
+
+    Decoding, EXIF parsing and resizing happen outside the event loop, so
+    API routes keep answering during a large scan. At most `workers` jobs
+    are in flight; above throttle_temp only one runs, and at pause_temp
+    new work waits until the CPU has cooled RESUME_MARGIN degrees, before
+    the Pi's firmware starts throttling everything.
+    """
+
+    def __init__(self, workers: int = 0, throttle_temp: float = 70.0, pause_temp: float = 80.0,
+                 check_interval: float = 5.0,
+                 temperature: Callable[[], Optional[float]] = read_cpu_temperature):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.workers = 0
+        self.configure(workers, throttle_temp, pause_temp)
+        self.check_interval = check_interval
+        self._read_temperature = temperature
+        self.temperature: Optional[float] = None
+        self.paused = False
+        self._checked = 0.0
+        self._active = 0
+        self._slots: Optional[asyncio.Condition] = None
+        self.completed = 0
+        self.failed = 0
+
+    def configure(self, workers: int = 0, throttle_temp: float = 70.0, pause_temp: float = 80.0) -> None:
+        """Apply new limits; a resized pool is started on the next submission."""
+        workers = workers or default_workers()
+        if workers != self.workers and self._executor is not None:
+            self.shutdown(wait=False)
+        self.workers = workers
+        self.throttle_temp = throttle_temp
+        self.pause_temp = pause_temp
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            # Not fork: the server process has threads (SQLite, uvicorn) that a fork would copy mid-operation
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=_init_worker)
+            logger.info(f"Started photo ingest pool with {self.workers} worker(s)")
+        return self._executor
+
+    def limit(self) -> int:
+        """Jobs allowed in flight right now, from the (periodically re-read) CPU temperature."""
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            self.temperature = self._read_temperature()
+            if self.temperature is not None:
+                if self.temperature >= self.pause_temp and not self.paused:
+                    logger.warning(f"CPU at {self.temperature:.1f}°C, pausing photo ingestion")
+                    self.paused = True
+                elif self.paused and self.temperature < self.pause_temp - RESUME_MARGIN:
+                    logger.info(f"CPU at {self.temperature:.1f}°C, resuming photo ingestion")
+                    self.paused = False
+
+        if self.paused:
+            return 0
+        if self.temperature is not None and self.temperature >= self.throttle_temp:
+            return 1
+        return self.workers
+
+    async def _acquire(self, urgent: bool = False) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+        async with self._slots:
+            while self._active >= self.limit() + (1 if urgent else 0):
+                try:
+                    # Also wakes up to re-check the temperature while paused
+                    await asyncio.wait_for(self._slots.wait(), self.check_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._active += 1
+
+    async def _release(self) -> None:
+        async with self._slots:
+            self._active -= 1
+            self._slots.notify_all()  # Waiters differ in what they need (urgent or not)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, urgent: bool = False) -> Any:
+        """Run a picklable function in the pool once a slot is free.
+
+        Urgent work (a client waiting on the result) may take one slot
+        beyond the current limit, so it isn't queued behind a scan's backlog.
+        """
+        await self._acquire(urgent)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+            self.completed += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died (out of memory on a huge image?); start a fresh pool next time
+            logger.error("Photo ingest pool broke, restarting it")
+            self.shutdown(wait=False)
+            self.failed += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            await self._release()
+
+    def status(self) -> Dict[str, Any]:
+        throttle = "paused" if self.paused else "normal"
+        if not self.paused and self.temperature is not None and self.temperature >= self.throttle_temp:
+            throttle = "reduced"
+        return {
+            "workers": self.workers,
+            "active": self._active,
+            "throttle": throttle,
+            "cpu_temperature": self.temperature,
+            "throttle_temp": self.throttle_temp,
+            "pause_temp": self.pause_temp,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -10,6 +10,7 @@ class PhotoInfo(BaseModel):
     description: Optional[str] = None
     file_path: str
     thumbnail_path: Optional[str] = None
+    display_path: Optional[str] = None  # Screen-sized JPEG the slideshow shows
     file_size: int  # bytes
     width: int
     height: int
@@ -20,13 +21,21 @@ class PhotoInfo(BaseModel):
     people: List[str] = []
     location: Optional[str] = None
     camera_info: Optional[Dict[str, Any]] = None
+    content_hash: Optional[str] = None  # blake2b of the file
+    phash: Optional[str] = None  # 64-bit perceptual (difference) hash, as hex
+    duplicate_of: Optional[str] = None  # Photo this file is an exact copy of; copies aren't shown
+    similar_to: Optional[str] = None  # Photo this one looks almost the same as (burst shots, re-saves)
 
 class PhotoUploadResponse(BaseModel):
     """Response for photo upload."""
     success: bool
-    photo_id: str
+    photo_id: Optional[str] = None  # None if the file was rejected
     message: str
     error: Optional[str] = None
+    filename: Optional[str] = None
+    size: Optional[int] = None  # bytes
+    content_hash: Optional[str] = None
+    duplicate_of: Optional[str] = None  # Set (and photo_id is that photo) if the library already had it
 
 class PhotoConfig(BaseModel):
     """Photo service configuration."""
@@ -36,10 +45,42 @@ class PhotoConfig(BaseModel):
     max_photo_size: int = 10 * 1024 * 1024  # 10MB
     allowed_formats: List[str] = ["JPEG", "JPG", "PNG", "GIF", "BMP"]
     thumbnail_size: tuple = (200, 200)
+    display_size: tuple = (1920, 1080)  # Screen resolution the slideshow renditions are made for
     auto_scan: bool = True
     scan_interval: int = 3600  # seconds (1 hour)
     show_metadata: bool = True
     shuffle_slideshow: bool = True
+    include_subdirectories: bool = True
+    ingest_workers: int = 0  # Image processing processes; 0 = one per core, less one
+    ingest_throttle_temp: float = 70.0  # °C; one worker at a time above this
+    ingest_pause_temp: float = 80.0  # °C; no new image work until the CPU cools
+    variant_cache_mb: int = 256  # Disk space for on-demand resized/WebP variants
+    near_duplicate_distance: int = 6  # Max differing perceptual hash bits (of 64) to flag photos as similar; 0 = off
+
+class ScanResult(BaseModel):
+    """Outcome of an incremental directory scan."""
+    added: int = 0
+    updated: int = 0  # Files modified since they were catalogued, re-read
+    moved: int = 0  # Same file found at a new path
+    removed: int = 0  # Catalogued files no longer on disk
+    unchanged: int = 0
+    failed: int = 0
+    renditions: int = 0  # Display renditions made for photos catalogued without one
+    duplicates: int = 0  # New files that are exact copies of a catalogued photo (not decoded)
+    similar: int = 0  # Photos flagged as near-duplicates of another
+    deferred: List[str] = []  # Files still being written, left for the watcher to retry
+
+class ScanJob(BaseModel):
+    """Progress of a background directory scan."""
+    id: str
+    state: str = "queued"  # queued, running, completed, failed, cancelled
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    paths: Optional[int] = None  # Changed paths a watcher scan looked at; None for a full scan
+    total: int = 0  # New or modified files to read
+    processed: int = 0
+    result: ScanResult = Field(default_factory=ScanResult)
+    error: Optional[str] = None
 
 class PhotoMetadata(BaseModel):
     """Photo metadata extracted from EXIF."""
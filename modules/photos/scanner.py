@@ -0,0 +1,119 @@
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
+
+
+@dataclass
+class FileStat:
+    """Identity of a file on disk as the scanner sees it."""
+    path: str
+    inode: int
+    mtime: int  # ns
+    size: int
+
+
+# What the catalog knows about a path: (photo id, inode, mtime, size);
+# inode and mtime are None for photos imported before they were tracked
+IndexEntry = Tuple[str, Optional[int], Optional[int], int]
+
+
+@dataclass
+class ScanPlan:
+    """Differences between the catalog's file index and the directory."""
+    new: List[FileStat] = field(default_factory=list)
+    changed: List[Tuple[str, FileStat]] = field(default_factory=list)  # (photo id, file)
+    moved: List[Tuple[str, FileStat]] = field(default_factory=list)  # Same inode at a new path
+    adopted: List[Tuple[str, FileStat]] = field(default_factory=list)  # Untracked rows whose size matches
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def walk_photos(root: str, recursive: bool = True, exclude: Iterable[str] = ()) -> Iterator[FileStat]:
+    """Photo files under root via os.scandir, skipping hidden and excluded directories.
+
+    Directory symlinks are not followed, so links can't make the walk loop.
+    """
+    excluded = {os.path.realpath(path) for path in exclude}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logger.warning(f"Cannot scan {directory}: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and os.path.realpath(entry.path) not in excluded:
+                            pending.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in PHOTO_EXTENSIONS and entry.is_file():
+                        stat = entry.stat()
+                        yield FileStat(entry.path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                except OSError as e:
+                    logger.debug(f"Skipping {entry.path}: {e}")
+
+
+def stat_paths(paths: Iterable[str], recursive: bool = True, exclude: Iterable[str] = ()) -> Iterator[FileStat]:
+    """Photo files at the given paths: files as they are, directories walked. Missing paths are skipped."""
+    seen = set()
+    for path in paths:
+        try:
+            stat = os.stat(path, follow_symlinks=False)
+        except OSError:
+            continue  # Deleted or moved away
+        if os.path.isdir(path) and not os.path.islink(path):
+            files = walk_photos(path, recursive, exclude)
+        elif os.path.splitext(path)[1].lower() in PHOTO_EXTENSIONS and os.path.isfile(path):
+            files = [FileStat(path, stat.st_ino, stat.st_mtime_ns, stat.st_size)]
+        else:
+            continue
+        for file in files:
+            if file.path not in seen:
+                seen.add(file.path)
+                yield file
+
+
+def plan_scan(index: Dict[str, IndexEntry], files: Iterable[FileStat]) -> ScanPlan:
+    """Classify each file against the catalog without opening any of them."""
+    plan = ScanPlan()
+    missing = dict(index)  # Paths not seen (yet) on disk
+    unknown: List[FileStat] = []
+
+    for file in files:
+        entry = missing.pop(file.path, None)
+        if entry is None:
+            unknown.append(file)
+            continue
+        photo_id, inode, mtime, size = entry
+        if inode is None:
+            if size == file.size:
+                plan.adopted.append((photo_id, file))
+            else:
+                plan.changed.append((photo_id, file))
+        elif (inode, mtime, size) == (file.inode, file.mtime, file.size):
+            plan.unchanged += 1
+        else:
+            plan.changed.append((photo_id, file))
+
+    # A vanished path whose inode, mtime and size reappear elsewhere was moved or renamed
+    vanished = {(inode, mtime, size): photo_id
+                for photo_id, inode, mtime, size in missing.values() if inode is not None}
+    for file in unknown:
+        photo_id = vanished.pop((file.inode, file.mtime, file.size), None)
+        if photo_id is None:
+            plan.new.append(file)
+        else:
+            plan.moved.append((photo_id, file))
+
+    moved_ids = {photo_id for photo_id, _ in plan.moved}
+    plan.deleted = [entry[0] for entry in missing.values() if entry[0] not in moved_ids]
+    return plan
@@ -1,30 +1,73 @@
 import os
 import uuid
+import random
+import sqlite3
+import time
 import asyncio
 import logging
-from typing import List, Tuple, Optional, Dict, Any
+from collections import deque
+from itertools import islice
+from typing import List, Tuple, Optional, Dict, Any, AsyncIterator, Deque, Mapping, Set
 from datetime import datetime
-from pathlib import Path
-import json
-from PIL import Image, ExifTags
-from .models import PhotoInfo, PhotoConfig, PhotoMetadata
+from fastapi.encoders import jsonable_encoder
+from PIL import Image
+from .models import PhotoInfo, PhotoConfig, PhotoMetadata, PhotoUploadResponse, ScanJob, ScanResult
+from .catalog import PhotoCatalog
 from .config import PhotoConfigManager
+from .ingest import IngestPipeline, hash_file, make_variant, perceptual_hash_file, process_image
+from .scanner import FileStat, plan_scan, stat_paths, walk_photos
+from .similarity import HammingIndex
+from .upload import MAX_BATCH_FILES, ReceivedFile, receive_uploads
+from .variants import MEDIA_TYPES, VariantCache, variant_width
+from .watcher import SETTLE_SECONDS, PhotoWatcher
+from ..common.shared_state import shared_state
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
+# New photos processed per catalog transaction during a scan
+SCAN_BATCH = 100
+# Scan jobs kept for the jobs endpoint
+MAX_JOBS = 20
+# A running job in the shared store with no progress for this long is
+# taken to have died with its worker (a hot CPU can pause it for minutes)
+STALE_JOB_SECONDS = 600
+
 class PhotoService:
     """Photo service for managing family photos and slideshow."""
     
     def __init__(self):
         self.config_manager = PhotoConfigManager()
         self.config = self.config_manager.load_config()
-        self.photos_db: Dict[str, PhotoInfo] = {}
         self.last_scan: Optional[datetime] = None
+        self._loaded = False
+        self.ingest = IngestPipeline(self.config.ingest_workers, self.config.ingest_throttle_temp,
+                                     self.config.ingest_pause_temp)
+        self.jobs: Dict[str, ScanJob] = {}
+        self._scan_task: Optional[asyncio.Task] = None
+        self._scan_job: Optional[ScanJob] = None
+        self._published = 0.0
+        self._uploads: Set[asyncio.Task] = set()  # Uploaded photos waiting to be processed
+        self._upload_paths: Set[str] = set()  # Their files, which the watcher leaves to them
+        self._pending_hashes: Dict[str, str] = {}  # Content hash -> id of those photos
+        # Accepted uploads whose processing failed afterwards, for the status endpoint
+        self.failed_uploads: Deque[PhotoUploadResponse] = deque(maxlen=MAX_JOBS)
+        # Perceptual hashes of the catalog, built on first use
+        self._similar: Optional[HammingIndex] = None
+        self._similar_groups: Dict[str, str] = {}  # Photo id -> id of the photo its group resembles
+        self._similar_version: Optional[str] = None
+        self.watcher: Optional[PhotoWatcher] = None
+        # Shown photo ids in slideshow order, re-read when the catalog changes
+        self._shown: List[str] = []
+        self._shown_version: Optional[str] = None
+        self._missing: Set[str] = set()  # Of those, photos whose files were found gone since
         
         # Ensure directories exist
         self._ensure_directories()
+        self._open_catalog()
+        self._open_variants()
         
-        # Load existing photo database (will be loaded on first request)
+        # Legacy photos.json is imported (or the directory scanned) on first request
     
     def _ensure_directories(self):
         """Ensure photo and thumbnail directories exist."""
@@ -35,246 +78,717 @@ class PhotoService:
         except Exception as e:
             logger.error(f"Failed to create photo directories: {e}")
     
-    async def _load_photo_database(self):
-        """Load photo database from JSON file."""
-        db_path = os.path.join(self.config.photos_directory, "photos.json")
+    def _open_catalog(self):
+        """Open the SQLite catalog kept alongside the photos."""
         try:
-            if os.path.exists(db_path):
-                with open(db_path, 'r') as f:
-                    data = json.load(f)
-                    for photo_id, photo_data in data.items():
-                        self.photos_db[photo_id] = PhotoInfo(**photo_data)
-                logger.info(f"Loaded {len(self.photos_db)} photos from database")
-            else:
-                # Initialize with sample photos if directory has images
-                await self.scan_directory()
-        except Exception as e:
-            logger.error(f"Failed to load photo database: {e}")
+            self.catalog = PhotoCatalog(os.path.join(self.config.photos_directory, "photos.db"))
+        except sqlite3.Error as e:
+            # Keep serving (demo photos, uploads until restart) without the directory
+            logger.error(f"Failed to open photo catalog: {e}")
+            self.catalog = PhotoCatalog(":memory:")
+        self._loaded = False
+    
+    def _open_variants(self):
+        """Open the on-demand variant cache, inside the thumbnails directory."""
+        self.variants = VariantCache(os.path.join(self.config.thumbnails_directory, "variants"),
+                                     self.config.variant_cache_mb * 1024 * 1024)
     
-    async def _save_photo_database(self):
-        """Save photo database to JSON file."""
-        db_path = os.path.join(self.config.photos_directory, "photos.json")
+    async def _load_photo_database(self):
+        """Populate an empty catalog from a legacy photos.json, or by scanning the directory.
+        
+        The scan runs in the background; photos appear as each batch is read.
+        """
+        self._import_legacy_catalog()
+        if self.catalog.is_empty() and os.path.exists(self.config.photos_directory):
+            self.start_scan()
+    
+    def _import_legacy_catalog(self):
+        """Import photos.json into an empty catalog, once per catalog."""
+        self._loaded = True
+        if not self.catalog.is_empty():
+            return
+        json_path = os.path.join(self.config.photos_directory, "photos.json")
         try:
-            data = {photo_id: photo.dict() for photo_id, photo in self.photos_db.items()}
-            with open(db_path, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            if os.path.exists(json_path):
+                self.catalog.import_json(json_path)
+                versions.bump("photos")
         except Exception as e:
-            logger.error(f"Failed to save photo database: {e}")
+            logger.error(f"Failed to load photo database: {e}")
     
     async def get_slideshow_photos(self, limit: int = 10) -> List[PhotoInfo]:
         """Get photos for slideshow display."""
         # Load database on first request if not loaded
-        if not self.photos_db:
+        if not self._loaded:
             await self._load_photo_database()
         
-        if not self.photos_db:
+        if self.catalog.is_empty():
             return self._get_demo_photos()
         
-        photos = list(self.photos_db.values())
-        
-        # Filter for existing files
+        # Newest first (by date taken or added), skipping files removed outside the app
         valid_photos = []
-        for photo in photos:
-            if os.path.exists(photo.file_path):
-                valid_photos.append(photo)
+        candidates = (photo_id for photo_id in self._shown_ids() if photo_id not in self._missing)
+        while len(valid_photos) < limit:
+            batch = list(islice(candidates, limit - len(valid_photos)))
+            if not batch:
+                break
+            valid_photos.extend(self._existing(self.catalog.get_many(batch)))
         
-        # Sort by date taken or added date
-        valid_photos.sort(key=lambda p: p.taken_date or p.added_date, reverse=True)
-        
-        return valid_photos[:limit]
+        return valid_photos
     
     async def get_random_photo(self) -> PhotoInfo:
         """Get a random photo for display."""
-        if not self.photos_db:
-            return self._get_demo_photos()[0]
-        
-        import random
-        valid_photos = [p for p in self.photos_db.values() if os.path.exists(p.file_path)]
+        # A few draws rather than filtering the whole library for existing files
+        shown = self._shown_ids()
+        for _ in range(10):
+            if not shown:
+                break
+            photo_id = random.choice(shown)
+            if photo_id in self._missing:
+                continue
+            photo = self.catalog.get(photo_id)
+            if photo is not None and self._existing([photo]):
+                return photo
         
-        if not valid_photos:
-            return self._get_demo_photos()[0]
+        return self._get_demo_photos()[0]
+    
+    def _shown_ids(self) -> List[str]:
+        """Ids of the shown photos in slideshow order, re-read only after the catalog changed (in any worker).
         
-        return random.choice(valid_photos)
+        Scans and the watcher bump the photos version whenever photos are
+        added, moved or removed, so between changes a slideshow request
+        reads (and checks on disk) only the photos it returns, and a random
+        one a single photo, however large the library.
+        """
+        version = versions.version("photos")
+        if version != self._shown_version:
+            self._shown = self.catalog.shown_ids()
+            self._shown_version = version
+            self._missing = set()
+        return self._shown
+    
+    def _existing(self, photos: List[PhotoInfo]) -> List[PhotoInfo]:
+        """The photos whose files are still on disk; the others are skipped until the catalog next changes."""
+        existing = []
+        for photo in photos:
+            if os.path.exists(photo.file_path):
+                existing.append(photo)
+            else:
+                self._missing.add(photo.id)
+        return existing
     
     async def list_photos(self, offset: int = 0, limit: int = 20) -> Tuple[List[PhotoInfo], int]:
         """List photos with pagination."""
-        if not self.photos_db:
+        if self.catalog.is_empty():
             demo_photos = self._get_demo_photos()
             return demo_photos[offset:offset+limit], len(demo_photos)
         
-        photos = list(self.photos_db.values())
-        photos.sort(key=lambda p: p.added_date, reverse=True)
-        
-        total = len(photos)
-        return photos[offset:offset+limit], total
+        return self.catalog.newest_added(offset, limit), self.catalog.count()
     
     async def get_photo_path(self, photo_id: str, size: str = "medium") -> str:
         """Get photo file path by ID and size."""
-        if photo_id not in self.photos_db:
+        photo = self.catalog.get(photo_id)
+        if photo is None:
             # Return demo photo for testing
             return self._get_demo_photo_path()
         
-        photo = self.photos_db[photo_id]
+        if photo.duplicate_of:
+            # Copies have no renditions of their own
+            photo = self.catalog.get(photo.duplicate_of) or photo
         
         if size == "thumbnail" and photo.thumbnail_path:
             return photo.thumbnail_path
-        else:
-            return photo.file_path
+        if size != "original" and photo.display_path and os.path.exists(photo.display_path):
+            # Screen-sized, upright and progressive rather than the multi-megabyte original
+            return photo.display_path
+        return photo.file_path
     
-    async def upload_photo(self, file) -> PhotoInfo:
-        """Upload and process a new photo."""
-        # Generate unique ID and filename
-        photo_id = str(uuid.uuid4())
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        new_filename = f"{photo_id}{file_extension}"
-        file_path = os.path.join(self.config.photos_directory, new_filename)
+    async def get_variant(self, photo_id: str, width: Optional[int] = None, quality: Optional[int] = None,
+                          webp: bool = False) -> Tuple[str, str]:
+        """Path and media type of a photo resized to width, made in the ingest pool on first request.
         
-        # Save uploaded file
-        content = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        Widths are rounded up to a VARIANT_WIDTHS step (and never beyond the
+        photo) so similar requests share a cached file; width defaults to the
+        display width and quality to 80.
+        """
+        photo = self.catalog.get(photo_id)
+        if photo is None:
+            return await self.get_photo_path(photo_id), "image/jpeg"
         
-        # Process photo
-        photo_info = await self._process_photo(file_path, photo_id, file.filename)
+        width = variant_width(width or self.config.display_size[0], max(photo.width, photo.height))
+        quality = quality or 80
+        fmt = "WEBP" if webp else "JPEG"
+        name = VariantCache.name(photo_id, width, quality, fmt)
+        path = await self.variants.get(name, lambda temp_path: self.ingest.run(
+            make_variant, photo.file_path, temp_path, width, quality, fmt, urgent=True
+        ))
+        return path, MEDIA_TYPES[fmt]
+    
+    async def upload_photo(self, headers: Mapping[str, str], stream: AsyncIterator[bytes]) -> PhotoUploadResponse:
+        """Receive one uploaded photo; raises UploadTooLarge or ValueError if it is rejected."""
+        received = await self._receive(headers, stream, max_files=1)
+        if not received:
+            raise ValueError("No file in upload")
+        if received[0].error is not None:
+            raise received[0].error
+        return await self._accept_upload(received[0])
+    
+    async def upload_photos(self, headers: Mapping[str, str], stream: AsyncIterator[bytes],
+                            max_files: int = MAX_BATCH_FILES) -> List[PhotoUploadResponse]:
+        """Receive a batch of uploaded photos, with a response per file (rejected ones included)."""
+        responses = []
+        for upload in await self._receive(headers, stream, max_files):
+            if upload.error is not None:
+                responses.append(PhotoUploadResponse(success=False, message="Photo rejected", error=str(upload.error),
+                                                     filename=upload.filename, size=upload.size or None))
+            else:
+                responses.append(await self._accept_upload(upload))
+        return responses
+    
+    async def _receive(self, headers: Mapping[str, str], stream: AsyncIterator[bytes],
+                       max_files: int) -> List[ReceivedFile]:
+        """Stream a multipart request body straight into the photo directory, never whole in memory."""
+        return await receive_uploads(headers, stream, self.config.photos_directory, self.config.max_photo_size,
+                                     max_files)
+    
+    async def _accept_upload(self, upload: ReceivedFile) -> PhotoUploadResponse:
+        """Move a received file into place and queue it for processing, unless the library already has it."""
+        duplicate_of = (self._pending_hashes.get(upload.content_hash) or
+                        await self._find_duplicate(upload.content_hash, upload.size))
+        if duplicate_of:
+            os.remove(upload.temp_path)
+            return PhotoUploadResponse(
+                success=True,
+                photo_id=duplicate_of,
+                message="Photo already in library",
+                filename=upload.filename,
+                size=upload.size,
+                content_hash=upload.content_hash,
+                duplicate_of=duplicate_of
+            )
         
-        # Add to database
-        self.photos_db[photo_id] = photo_info
-        await self._save_photo_database()
+        photo_id = str(uuid.uuid4())
+        file_path = os.path.join(self.config.photos_directory, f"{photo_id}{upload.extension}")
+        os.replace(upload.temp_path, file_path)
+        
+        self._pending_hashes[upload.content_hash] = photo_id
+        self._upload_paths.add(file_path)
+        task = asyncio.create_task(self._ingest_upload(photo_id, file_path, upload))
+        self._uploads.add(task)
+        task.add_done_callback(self._uploads.discard)
+        
+        return PhotoUploadResponse(
+            success=True,
+            photo_id=photo_id,
+            message="Photo uploaded, processing",
+            filename=upload.filename,
+            size=upload.size,
+            content_hash=upload.content_hash
+        )
+    
+    async def _ingest_upload(self, photo_id: str, file_path: str, upload: ReceivedFile):
+        """Process an uploaded photo in the ingest pool and add it to the catalog.
         
-        logger.info(f"Uploaded photo: {file.filename}")
-        return photo_info
+        The upload was already answered, so a failure is logged and kept in
+        failed_uploads for the status endpoint.
+        """
+        photo_info = None
+        try:
+            try:
+                photo_info = await self._process_photo(file_path, photo_id, upload.filename)
+            except Exception:
+                # Not a readable image after all; removed so scans don't keep retrying it
+                self._remove_files(file_path)
+                raise
+            photo_info.content_hash = upload.content_hash
+            if photo_info.phash:
+                photo_info.similar_to = self._flag_similar([(photo_id, photo_info.phash)]).get(photo_id)
+            
+            # Add to database, with the stat the next scan will compare against
+            stat = os.stat(file_path)
+            if not self.catalog.add(photo_info, FileStat(file_path, stat.st_ino, stat.st_mtime_ns, stat.st_size)):
+                # A scan got to the file first and catalogued it under its own id
+                self._remove_files(photo_info.thumbnail_path, photo_info.display_path)
+                return
+            self._bump_version()
+            
+            logger.info(f"Uploaded photo: {upload.filename}")
+        except Exception as e:
+            logger.error(f"Failed to process uploaded photo {upload.filename}: {e}")
+            if photo_info is not None:
+                # The photo itself stays for the next scan, which catalogues it with renditions of its own
+                self._remove_files(photo_info.thumbnail_path, photo_info.display_path)
+            self.failed_uploads.append(PhotoUploadResponse(
+                success=False,
+                photo_id=photo_id,
+                message="Photo processing failed",
+                error=str(e),
+                filename=upload.filename,
+                size=upload.size,
+                content_hash=upload.content_hash
+            ))
+            versions.bump("photos")  # Status reports it
+        finally:
+            self._pending_hashes.pop(upload.content_hash, None)
+            self._upload_paths.discard(file_path)
+    
+    @staticmethod
+    def _remove_files(*paths: Optional[str]):
+        for path in paths:
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
     
     async def delete_photo(self, photo_id: str):
-        """Delete a photo and its files."""
-        if photo_id not in self.photos_db:
+        """Delete a photo and its files, including any exact copies of it."""
+        photo = self.catalog.get(photo_id)
+        if photo is None:
             raise FileNotFoundError("Photo not found")
         
-        photo = self.photos_db[photo_id]
+        # Delete files; a copy left on disk would come back as the photo on the next scan
+        for path in [photo.file_path, *self.catalog.copy_paths(photo_id)]:
+            if os.path.exists(path):
+                os.remove(path)
         
-        # Delete files
-        if os.path.exists(photo.file_path):
-            os.remove(photo.file_path)
+        for rendition in (photo.thumbnail_path, photo.display_path):
+            if rendition and os.path.exists(rendition):
+                os.remove(rendition)
         
-        if photo.thumbnail_path and os.path.exists(photo.thumbnail_path):
-            os.remove(photo.thumbnail_path)
+        self.variants.discard([photo_id])
         
-        # Remove from database
-        del self.photos_db[photo_id]
-        await self._save_photo_database()
+        # Remove from database, with the copies' entries
+        self.catalog.remove_many([photo_id])
+        versions.bump("photos")
         
         logger.info(f"Deleted photo: {photo_id}")
     
-    async def scan_directory(self) -> Tuple[int, int]:
-        """Scan photo directory for new photos."""
-        added = 0
-        skipped = 0
+    def start_scan(self, paths: Optional[List[str]] = None, settle: float = 0.0) -> Tuple[ScanJob, bool]:
+        """Scan the photo directory (or just paths in it) in the background, unless a scan is already running.
+        
+        Returns the job to follow and whether it was started by this call;
+        otherwise it is the scan already running in this or (with shared
+        state) another worker. paths and settle are passed to scan_directory.
+        """
+        if self._scan_task is not None and not self._scan_task.done():
+            return self._scan_job, False
+        running = self._shared_running_job()
+        if running is not None:
+            return running, False
+        
+        job = ScanJob(id=uuid.uuid4().hex[:12], paths=len(paths) if paths is not None else None)
+        self.jobs[job.id] = job
+        while len(self.jobs) > MAX_JOBS:
+            self.jobs.pop(next(iter(self.jobs)))
+        self._scan_job = job
+        self._scan_task = asyncio.create_task(self._run_scan(job, paths, settle))
+        self._publish(job, force=True)
+        return job, True
+    
+    async def _run_scan(self, job: ScanJob, paths: Optional[List[str]] = None, settle: float = 0.0):
+        job.state = "running"
+        job.started_at = datetime.now()
+        try:
+            await self.scan_directory(job, paths, settle)
+            job.state = "completed"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Photo scan {job.id} failed: {e}")
+            job.state = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now()
+            self._publish(job, force=True)
+    
+    def _publish(self, job: ScanJob, force: bool = False):
+        """Mirror job progress into the shared store (at most once a second) for other workers."""
+        if shared_state is None or (not force and time.monotonic() - self._published < 1.0):
+            return
+        self._published = time.monotonic()
+        try:
+            with shared_state.lock("photos.scan_jobs"):
+                entry = shared_state.get("photos.scan_jobs")
+                jobs = [other for other in (entry[0] if entry else []) if other["id"] != job.id]
+                jobs.append(jsonable_encoder(job))
+                shared_state.set("photos.scan_jobs", jobs[-MAX_JOBS:])
+        except Exception as e:
+            logger.warning(f"Failed to publish scan progress: {e}")
+    
+    def _shared_jobs(self) -> List[ScanJob]:
+        entry = shared_state.get("photos.scan_jobs") if shared_state else None
+        return [ScanJob(**job) for job in entry[0]] if entry else []
+    
+    def _shared_running_job(self) -> Optional[ScanJob]:
+        entry = shared_state.get("photos.scan_jobs") if shared_state else None
+        if entry is None or time.time() - entry[2] > STALE_JOB_SECONDS:
+            return None
+        running = [job for job in entry[0] if job["state"] in ("queued", "running")]
+        return ScanJob(**running[-1]) if running else None
+    
+    def get_job(self, job_id: str) -> Optional[ScanJob]:
+        """A scan job by id, from this worker or the shared store."""
+        if job_id in self.jobs:
+            return self.jobs[job_id]
+        return next((job for job in self._shared_jobs() if job.id == job_id), None)
+    
+    def list_jobs(self) -> List[ScanJob]:
+        """Recent scan jobs, newest first."""
+        jobs = {job.id: job for job in self._shared_jobs()}
+        jobs.update(self.jobs)
+        return sorted(jobs.values(), key=lambda job: job.started_at or datetime.max, reverse=True)
+    
+    def start_watching(self):
+        """Scan changes to the photo directory as they happen, if auto_scan; needs a running event loop."""
+        if not self.config.auto_scan or self.watcher is not None:
+            return
+        self.watcher = PhotoWatcher(self.config.photos_directory, self._scan_changes,
+                                    recursive=self.config.include_subdirectories,
+                                    exclude=[self.config.thumbnails_directory],
+                                    scan_interval=self.config.scan_interval)
+        self.watcher.start()
+    
+    async def _restart_watcher(self, watcher: PhotoWatcher):
+        await watcher.stop()
+        self.start_watching()
+    
+    async def _scan_changes(self, paths: Optional[List[str]]) -> List[str]:
+        """Watcher callback: scan the changed paths (everything if None) once no other scan is running.
+        
+        Returns the files left for later because they were still being written.
+        """
+        if paths is not None:
+            # Uploads in progress are catalogued by their own task
+            paths = [path for path in paths if path not in self._upload_paths]
+            if not paths:
+                return []
+        while True:
+            job, started = self.start_scan(paths, settle=SETTLE_SECONDS)
+            if started:
+                break
+            await asyncio.sleep(1.0)
+        # Shielded: stopping the watcher doesn't cut the scan short
+        await asyncio.shield(self._scan_task)
+        return job.result.deferred
+    
+    async def scan_directory(self, job: Optional[ScanJob] = None, paths: Optional[List[str]] = None,
+                             settle: float = 0.0) -> ScanResult:
+        """Bring the catalog in line with the photo directory.
+        
+        Walks the directory (recursively if include_subdirectories) and
+        compares each file's inode, mtime and size with the catalog, so only
+        new or modified files are opened, in the ingest process pool. Moved
+        files keep their entry and files gone from disk are dropped.
+        Progress is reported on job, if given.
+        
+        With paths (files or directories, from the watcher), only those are
+        looked at, and catalog backfills wait for the next full scan. With
+        settle, new or modified files written in the last settle seconds
+        may still be being copied in; they are left alone and listed in
+        the result's deferred.
+        """
+        result = job.result if job else ScanResult()
+        
+        if not self._loaded:
+            # Import a legacy photos.json first so its entries are matched, not re-added
+            self._import_legacy_catalog()
         
         if not os.path.exists(self.config.photos_directory):
-            return added, skipped
-        
-        for file_path in Path(self.config.photos_directory).glob("*"):
-            if file_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
-                # Check if already in database
-                existing = any(p.file_path == str(file_path) for p in self.photos_db.values())
-                
-                if not existing:
-                    try:
-                        photo_id = str(uuid.uuid4())
-                        photo_info = await self._process_photo(str(file_path), photo_id, file_path.name)
-                        self.photos_db[photo_id] = photo_info
-                        added += 1
-                    except Exception as e:
-                        logger.warning(f"Failed to process {file_path}: {e}")
-                        skipped += 1
-                else:
-                    skipped += 1
-        
-        if added > 0:
-            await self._save_photo_database()
+            return result
+        
+        if paths is None:
+            files = walk_photos(self.config.photos_directory, recursive=self.config.include_subdirectories,
+                                exclude=[self.config.thumbnails_directory])
+        else:
+            files = stat_paths(paths, recursive=self.config.include_subdirectories,
+                               exclude=[self.config.thumbnails_directory])
+        plan = plan_scan(self.catalog.file_index(paths), files)
+        if settle:
+            cutoff = time.time_ns() - int(settle * 1e9)
+            result.deferred = ([file.path for file in plan.new if file.mtime > cutoff] +
+                               [file.path for _, file in plan.changed if file.mtime > cutoff])
+            plan.new = [file for file in plan.new if file.mtime <= cutoff]
+            plan.changed = [(photo_id, file) for photo_id, file in plan.changed if file.mtime <= cutoff]
+        backfill, unhashed = [], []
+        if paths is None:
+            # Photos catalogued before display renditions existed, or before the screen size changed
+            skip = set(plan.deleted) | {photo_id for photo_id, _ in plan.changed}
+            backfill = [(photo_id, path) for photo_id, path in self.catalog.without_display() if photo_id not in skip]
+            # And before perceptual hashes were recorded (hashed from their thumbnails)
+            unhashed = [(photo_id, path) for photo_id, path in self.catalog.without_phash() if photo_id not in skip]
+        if job:
+            job.total = len(plan.changed) + len(plan.new) + len(backfill) + len(unhashed)
+            self._publish(job, force=True)
+        
+        # Same content at a new path, or imported entries seen on disk for the first time
+        self.catalog.update_files(plan.moved + plan.adopted)
+        result.moved = len(plan.moved)
+        result.unchanged = plan.unchanged + len(plan.adopted)
+        
+        async def read(file: FileStat, photo_id: str, filename: str) -> Optional[PhotoInfo]:
+            try:
+                return await self._process_photo(file.path, photo_id, filename)
+            except Exception as e:
+                logger.warning(f"Failed to process {file.path}: {e}")
+                result.failed += 1
+                return None
+            finally:
+                if job:
+                    job.processed += 1
+                    self._publish(job)
+        
+        # Files are read concurrently a batch at a time; the pool bounds how many run at once
+        for start in range(0, len(plan.changed), SCAN_BATCH):
+            pending = [(self.catalog.get(photo_id), file) for photo_id, file in plan.changed[start:start + SCAN_BATCH]]
+            pending = [(existing, file) for existing, file in pending if existing is not None]  # Not deleted meanwhile
+            hashes = await asyncio.gather(*(self._hash(file.path) for _, file in pending))
+            processed = await asyncio.gather(*(read(file, existing.id, existing.filename) for existing, file in pending))
+            for content_hash, photo in zip(hashes, processed):
+                if photo is not None:
+                    photo.content_hash = content_hash
+            # Re-indexed under the new hash
+            similar = self._flag_similar([(photo.id, photo.phash) for photo in processed if photo and photo.phash])
+            for (existing, file), photo in zip(pending, processed):
+                if photo is None:
+                    continue
+                photo.similar_to = similar.get(photo.id)
+                if photo.similar_to:
+                    result.similar += 1
+                # Keep what people added (title, tags, ...) and when it was first added
+                self.catalog.replace(existing.copy(update={
+                    key: getattr(photo, key)
+                    for key in ("file_path", "thumbnail_path", "display_path", "file_size", "width", "height",
+                                "format", "taken_date", "camera_info", "content_hash", "phash", "duplicate_of",
+                                "similar_to")
+                }), file)
+                result.updated += 1
+            self.variants.discard(existing.id for existing, _ in pending)
+        
+        # Inserted in batches so a long first scan shows up in the slideshow as it goes
+        for start in range(0, len(plan.new), SCAN_BATCH):
+            new_files = plan.new[start:start + SCAN_BATCH]
+            stats = {file.path: file for file in new_files}
+            
+            # Exact copies of a catalogued photo (or of one earlier in the batch) are recorded without decoding
+            hashes = await asyncio.gather(*(self._hash(file.path) for file in new_files))
+            originals, copies, seen = [], [], {}
+            for file, content_hash in zip(new_files, hashes):
+                duplicate_of = None
+                if content_hash:
+                    duplicate_of = seen.get(content_hash) or await self._find_duplicate(content_hash, file.size)
+                if duplicate_of:
+                    copies.append((file, content_hash, duplicate_of))
+                    continue
+                photo_id = str(uuid.uuid4())
+                if content_hash:
+                    seen[content_hash] = photo_id
+                originals.append((file, content_hash, photo_id))
+            
+            processed = await asyncio.gather(*(read(file, photo_id, os.path.basename(file.path))
+                                               for file, _, photo_id in originals))
+            batch = []
+            for (_, content_hash, _), photo in zip(originals, processed):
+                if photo is not None:
+                    photo.content_hash = content_hash
+                    batch.append(photo)
+            similar = self._flag_similar([(photo.id, photo.phash) for photo in batch if photo.phash])
+            for photo in batch:
+                photo.similar_to = similar.get(photo.id)
+            # Files another worker added meanwhile are skipped
+            added = self.catalog.add_many(batch, stats)
+            result.added += added
+            result.unchanged += len(batch) - added
+            result.similar += sum(1 for photo in batch if photo.similar_to)
+            
+            batch_photos = {photo.id: photo for photo in batch}
+            copied = []
+            for file, content_hash, duplicate_of in copies:
+                original = batch_photos.get(duplicate_of) or self.catalog.get(duplicate_of)
+                if original is not None:  # Else the original failed to process; both are retried next scan
+                    copied.append(self._copy_of(original, file, content_hash))
+            result.duplicates += self.catalog.add_many(copied, stats)
+            if job:
+                job.processed += len(copies)
+                self._publish(job)
+            if added:
+                self._bump_version()
+        
+        async def render_display(photo_id: str, file_path: str) -> Optional[str]:
+            display_path = self._display_path(photo_id)
+            try:
+                info = await self.ingest.run(process_image, file_path,
+                                             [(display_path, tuple(self.config.display_size))])
+                if display_path in info["written"]:
+                    return display_path
+                logger.warning(f"Failed to create display rendition for {file_path}: {info['errors'][display_path]}")
+            except Exception as e:
+                logger.warning(f"Failed to process {file_path}: {e}")
+            result.failed += 1
+            return None
+        
+        for start in range(0, len(backfill), SCAN_BATCH):
+            pending = backfill[start:start + SCAN_BATCH]
+            rendered = await asyncio.gather(*(render_display(photo_id, path) for photo_id, path in pending))
+            done = [(photo_id, path) for (photo_id, _), path in zip(pending, rendered) if path]
+            self.catalog.set_display_paths(done)
+            result.renditions += len(done)
+            if job:
+                job.processed += len(pending)
+                self._publish(job)
+        
+        async def thumbnail_hash(path: str) -> Optional[str]:
+            try:
+                return await self.ingest.run(perceptual_hash_file, path)
+            except Exception as e:
+                logger.warning(f"Failed to hash {path}: {e}")
+                return None
+        
+        for start in range(0, len(unhashed), SCAN_BATCH):
+            pending = unhashed[start:start + SCAN_BATCH]
+            phashes = await asyncio.gather(*(thumbnail_hash(path) for _, path in pending))
+            hashed = [(photo_id, phash) for (photo_id, _), phash in zip(pending, phashes) if phash]
+            similar = self._flag_similar(hashed)
+            self.catalog.set_phashes((photo_id, phash, similar.get(photo_id)) for photo_id, phash in hashed)
+            result.similar += sum(1 for similar_to in similar.values() if similar_to)
+            if job:
+                job.processed += len(pending)
+                self._publish(job)
+        
+        for rendition in self.catalog.remove_many(plan.deleted):
+            try:
+                os.remove(rendition)
+            except OSError:
+                pass
+        self.variants.discard(plan.deleted)
+        result.removed = len(plan.deleted)
         
         self.last_scan = datetime.now()
-        logger.info(f"Photo scan complete: {added} added, {skipped} skipped")
-        return added, skipped
+        if result.moved or result.updated or result.removed or result.renditions or unhashed:
+            versions.bump("photos")
+        logger.info(f"Photo scan complete: {result.added} added, {result.updated} updated, {result.moved} moved, "
+                    f"{result.removed} removed, {result.unchanged} unchanged, {result.failed} failed, "
+                    f"{result.renditions} display renditions made, {result.duplicates} exact duplicates skipped, "
+                    f"{result.similar} near-duplicates flagged")
+        return result
     
     async def _process_photo(self, file_path: str, photo_id: str, original_filename: str) -> PhotoInfo:
-        """Process a photo file and extract metadata."""
+        """Process a photo file, extract metadata and make its renditions (in the ingest process pool)."""
+        thumbnail_path = os.path.join(self.config.thumbnails_directory, f"{photo_id}_thumb.jpg")
+        display_path = self._display_path(photo_id)
         try:
-            with Image.open(file_path) as img:
-                width, height = img.size
-                format_name = img.format
-                
-                # Extract EXIF data
-                metadata = self._extract_metadata(img)
-                
-                # Create thumbnail
-                thumbnail_path = await self._create_thumbnail(file_path, photo_id)
-                
-                # Get file info
-                stat = os.stat(file_path)
-                file_size = stat.st_size
-                
-                return PhotoInfo(
-                    id=photo_id,
-                    filename=original_filename,
-                    file_path=file_path,
-                    thumbnail_path=thumbnail_path,
-                    file_size=file_size,
-                    width=width,
-                    height=height,
-                    format=format_name,
-                    taken_date=metadata.get('taken_date'),
-                    added_date=datetime.now(),
-                    camera_info=metadata
-                )
+            info = await self.ingest.run(process_image, file_path, [
+                (display_path, tuple(self.config.display_size)),
+                (thumbnail_path, tuple(self.config.thumbnail_size))
+            ])
         except Exception as e:
             logger.error(f"Failed to process photo {file_path}: {e}")
             raise
-    
-    def _extract_metadata(self, img: Image.Image) -> Dict[str, Any]:
-        """Extract metadata from image EXIF data."""
-        metadata = {}
         
-        try:
-            exif = img._getexif()
-            if exif:
-                for tag_id, value in exif.items():
-                    tag = ExifTags.TAGS.get(tag_id, tag_id)
-                    
-                    if tag == 'DateTime':
-                        try:
-                            metadata['taken_date'] = datetime.strptime(str(value), '%Y:%m:%d %H:%M:%S')
-                        except:
-                            pass
-                    elif tag == 'Make':
-                        metadata['camera_make'] = str(value)
-                    elif tag == 'Model':
-                        metadata['camera_model'] = str(value)
-                    elif tag == 'FocalLength':
-                        metadata['focal_length'] = float(value)
-                    elif tag == 'FNumber':
-                        metadata['aperture'] = f"f/{float(value)}"
-                    elif tag == 'ISOSpeedRatings':
-                        metadata['iso'] = int(value)
-        except Exception as e:
-            logger.debug(f"Could not extract EXIF data: {e}")
+        for path, error in info["errors"].items():
+            logger.warning(f"Failed to create {os.path.basename(path)} for {file_path}: {error}")
+        metadata = info["metadata"]
         
-        return metadata
+        return PhotoInfo(
+            id=photo_id,
+            filename=original_filename,
+            file_path=file_path,
+            thumbnail_path=thumbnail_path if thumbnail_path in info["written"] else None,
+            display_path=display_path if display_path in info["written"] else None,
+            file_size=info["file_size"],
+            width=info["width"],
+            height=info["height"],
+            format=info["format"],
+            taken_date=metadata.get('taken_date'),
+            added_date=datetime.now(),
+            camera_info=metadata,
+            phash=info["phash"]
+        )
     
-    async def _create_thumbnail(self, file_path: str, photo_id: str) -> str:
-        """Create thumbnail for photo."""
+    def _display_path(self, photo_id: str) -> str:
+        # Renditions all live in the thumbnails directory
+        return os.path.join(self.config.thumbnails_directory, f"{photo_id}_display.jpg")
+    
+    async def _hash(self, file_path: str) -> Optional[str]:
+        """Content hash of a file, computed in the ingest pool; None if it can't be read."""
         try:
-            thumbnail_filename = f"{photo_id}_thumb.jpg"
-            thumbnail_path = os.path.join(self.config.thumbnails_directory, thumbnail_filename)
-            
-            with Image.open(file_path) as img:
-                img.thumbnail(self.config.thumbnail_size, Image.Resampling.LANCZOS)
-                img.save(thumbnail_path, "JPEG", quality=85)
-            
-            return thumbnail_path
+            return await self.ingest.run(hash_file, file_path)
         except Exception as e:
-            logger.warning(f"Failed to create thumbnail for {file_path}: {e}")
+            logger.warning(f"Failed to hash {file_path}: {e}")
             return None
     
+    async def _find_duplicate(self, content_hash: str, file_size: int) -> Optional[str]:
+        """Id of the catalogued photo with exactly this content, if any.
+        
+        Photos catalogued before content hashes were recorded are hashed
+        now, but only those of the same size, which few are.
+        """
+        photo_id = self.catalog.find_by_hash(content_hash)
+        if photo_id is not None:
+            return photo_id
+        for other_id, file_path in self.catalog.unhashed_with_size(file_size):
+            other_hash = await self._hash(file_path)
+            if other_hash is None:
+                continue
+            self.catalog.set_content_hashes([(other_id, other_hash)])
+            if other_hash == content_hash:
+                return self.catalog.find_by_hash(content_hash)
+        return None
+    
+    def _copy_of(self, original: PhotoInfo, file: FileStat, content_hash: str) -> PhotoInfo:
+        """Catalog entry for an exact copy of a photo: no renditions, not shown."""
+        return PhotoInfo(
+            id=str(uuid.uuid4()),
+            filename=os.path.basename(file.path),
+            file_path=file.path,
+            file_size=file.size,
+            width=original.width,
+            height=original.height,
+            format=original.format,
+            taken_date=original.taken_date,
+            added_date=datetime.now(),
+            camera_info=original.camera_info,
+            content_hash=content_hash,
+            duplicate_of=original.id
+        )
+    
+    def _similar_index(self) -> HammingIndex:
+        """Index of the catalog's perceptual hashes, rebuilt when the catalog changed elsewhere."""
+        version = versions.version("photos")
+        distance = self.config.near_duplicate_distance
+        if self._similar is None or version != self._similar_version or self._similar.radius != distance:
+            rows = self.catalog.perceptual_hashes()
+            self._similar = HammingIndex(distance, ((int(phash, 16), photo_id) for photo_id, phash, _ in rows))
+            self._similar_groups = {photo_id: similar_to or photo_id for photo_id, _, similar_to in rows}
+            self._similar_version = version
+        return self._similar
+    
+    def _flag_similar(self, phashes: List[Tuple[str, str]]) -> Dict[str, Optional[str]]:
+        """For (id, perceptual hash) pairs, the group each photo joins as a near-duplicate (or None).
+        
+        A photo within near_duplicate_distance bits of a catalogued one
+        joins that photo's group; the photos are added to the index either way.
+        """
+        if self.config.near_duplicate_distance <= 0 or not phashes:
+            return {}
+        index = self._similar_index()
+        flags = {}
+        for photo_id, phash in phashes:
+            value = int(phash, 16)
+            matches = [key for _, key in index.search(value) if key != photo_id]
+            flags[photo_id] = self._similar_groups.get(matches[0], matches[0]) if matches else None
+            self._similar_groups[photo_id] = flags[photo_id] or photo_id
+            index.add(value, photo_id)
+        return flags
+    
+    def _bump_version(self):
+        """Bump the photos version after adding photos that are already in the similarity index."""
+        current = self._similar is not None and self._similar_version == versions.version("photos")
+        versions.bump("photos")
+        if current:
+            # Otherwise this worker's own change would force a rebuild
+            self._similar_version = versions.version("photos")
+    
     def _get_demo_photos(self) -> List[PhotoInfo]:
         """Return demo photos for testing."""
         # Create demo images first
@@ -332,20 +846,81 @@ class PhotoService:
     
     def update_config(self, new_config: PhotoConfig):
         """Update photo configuration."""
+        resized = tuple(new_config.display_size) != tuple(self.config.display_size)
         self.config = new_config
         self.config_manager.save_config(new_config)
         self._ensure_directories()
+        self._open_catalog()
+        self._open_variants()
+        if resized:
+            # Remade at the new screen size by the next scan (the originals are shown until then)
+            self.catalog.clear_display_paths()
+        self.ingest.configure(new_config.ingest_workers, new_config.ingest_throttle_temp,
+                              new_config.ingest_pause_temp)
+        if self.watcher is not None:
+            # Restarted on the new directory and settings (or stopped, if auto_scan was turned off)
+            asyncio.create_task(self._restart_watcher(self.watcher))
+            self.watcher = None
+        versions.bump("photos")
         logger.info("Photo configuration updated")
     
+    def get_version_token(self) -> Optional[str]:
+        """Version of the photo listings, or None while serving demo photos.
+        
+        Includes the photo directory's mtime, since the slideshow drops
+        photos whose files were removed outside the app.
+        """
+        if self.catalog.is_empty():
+            return None
+        try:
+            mtime = os.stat(self.config.photos_directory).st_mtime_ns
+        except OSError:
+            mtime = 0
+        return f"{versions.version('photos')}.{mtime}"
+    
+    def get_duplicates(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Exact copies (not shown) and near-duplicate groups (flagged only), by the photo they match."""
+        exact: Dict[str, List[str]] = {}
+        for original, copy in self.catalog.duplicates():
+            exact.setdefault(original, []).append(copy)
+        similar: Dict[str, List[str]] = {}
+        for group, photo_id in self.catalog.similar_groups():
+            similar.setdefault(group, []).append(photo_id)
+        return {
+            "exact": [{"photo_id": photo_id, "copies": copies} for photo_id, copies in exact.items()],
+            "similar": [{"photo_id": photo_id, "similar": photo_ids} for photo_id, photo_ids in similar.items()]
+        }
+    
     async def get_status(self) -> Dict[str, Any]:
         """Get photo service status."""
         return {
-            "photos_count": len(self.photos_db),
+            "photos_count": self.catalog.count(),
             "photos_directory": self.config.photos_directory,
             "thumbnails_directory": self.config.thumbnails_directory,
             "last_scan": self.last_scan.isoformat() if self.last_scan else None,
             "auto_scan": self.config.auto_scan,
             "slideshow_interval": self.config.slideshow_interval,
             "directory_exists": os.path.exists(self.config.photos_directory),
-            "total_size": sum(p.file_size for p in self.photos_db.values())
-        }
\ No newline at end of file
+            "total_size": self.catalog.total_size(),
+            "uploads_processing": len(self._uploads),
+            "failed_uploads": [upload.dict() for upload in self.failed_uploads],
+            "watcher": self.watcher.status() if self.watcher else None,
+            "variant_cache": self.variants.stats()
+        }
+    
+    async def close(self):
+        """Stop the watcher, a running scan, pending upload processing and the ingest worker processes.
+        
+        Uploaded files are already in the photo directory, so the next scan
+        catalogues any whose processing was cut short.
+        """
+        if self.watcher is not None:
+            await self.watcher.stop()
+            self.watcher = None
+        tasks = list(self._uploads)
+        if self._scan_task is not None and not self._scan_task.done():
+            tasks.append(self._scan_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.ingest.shutdown()
\ No newline at end of file
@@ -0,0 +1,204 @@
+import os
+import uuid
+import asyncio
+import logging
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+import multipart
+from multipart.multipart import parse_options_header
+from .ingest import content_hasher
+from .scanner import PHOTO_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Request bytes allowed per file beyond max_photo_size, for boundaries and part headers
+MULTIPART_OVERHEAD = 64 * 1024
+# Files accepted in one batch upload
+MAX_BATCH_FILES = 100
+
+
+class UploadTooLarge(ValueError):
+    """An upload is over the configured max_photo_size."""
+
+
+@dataclass
+class ReceivedFile:
+    """A file from a multipart upload, written to a temp file in the photo directory."""
+    filename: str
+    content_type: str
+    temp_path: Optional[str] = None  # Removed again if the file is rejected
+    size: int = 0
+    content_hash: Optional[str] = None  # Set once the whole file has arrived
+    error: Optional[ValueError] = None
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.filename)[1].lower()
+
+
+class _MultipartReceiver:
+    """python-multipart callbacks that route each file part to its own temp file.
+
+    The parser calls back synchronously, so the callbacks only queue
+    events; drain() then hashes and writes the queued data in a thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_files: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.files: List[ReceivedFile] = []
+        self._part: Optional[ReceivedFile] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._events: List[Tuple[ReceivedFile, Optional[bytes]]] = []  # Data, or None at the end of a part
+        self._open: Dict[str, Tuple[Any, Any]] = {}  # temp path -> (file, hasher)
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished
+        }
+
+    def on_part_begin(self) -> None:
+        self._part = None
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"filename" not in options:
+            return  # A plain form field; its data is dropped
+        if len(self.files) >= self.max_files:
+            raise ValueError(f"At most {self.max_files} file(s) per upload")
+
+        part = ReceivedFile(filename=os.path.basename(options[b"filename"].decode("utf-8", "replace")),
+                            content_type=self._headers.get(b"content-type", b"").decode("latin-1"))
+        self.files.append(part)
+        if not part.content_type.startswith("image/"):
+            part.error = ValueError("File must be an image")
+        elif part.extension not in PHOTO_EXTENSIONS:
+            part.error = ValueError(f"Unsupported photo type {part.extension or '(none)'}")
+        else:
+            # Dot-prefixed so scans skip it; same directory, so the final rename is atomic
+            part.temp_path = os.path.join(self.directory, f".upload-{uuid.uuid4().hex}.tmp")
+            self._open[part.temp_path] = (open(part.temp_path, "xb"), content_hasher())
+            self._part = part
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part is not None:
+            self._events.append((self._part, data[start:end]))
+
+    def on_part_end(self) -> None:
+        if self._part is not None:
+            self._events.append((self._part, None))
+            self._part = None
+
+    async def drain(self) -> None:
+        """Write out what the parser has queued, a part at a time."""
+        events, self._events = self._events, []
+        loop = asyncio.get_running_loop()
+        for part, group in groupby(events, key=lambda event: event[0]):
+            chunks = [chunk for _, chunk in group]
+            data = b"".join(chunk for chunk in chunks if chunk)
+            if part.error is not None:
+                continue
+            if data:
+                part.size += len(data)
+                if part.size > self.max_bytes:
+                    part.error = UploadTooLarge(f"Photo is over the {self.max_bytes / (1024 * 1024):.3g} MB limit")
+                    await loop.run_in_executor(None, self._discard, part)
+                    continue
+                await loop.run_in_executor(None, self._write, part, data)
+            if chunks[-1] is None:
+                await loop.run_in_executor(None, self._finish, part)
+
+    def _write(self, part: ReceivedFile, data: bytes) -> None:
+        file, hasher = self._open[part.temp_path]
+        hasher.update(data)
+        file.write(data)
+
+    def _finish(self, part: ReceivedFile) -> None:
+        file, hasher = self._open.pop(part.temp_path)
+        file.flush()
+        os.fsync(file.fileno())  # On disk before it is renamed into place
+        file.close()
+        part.content_hash = hasher.hexdigest()
+
+    def _discard(self, part: ReceivedFile) -> None:
+        file, _ = self._open.pop(part.temp_path)
+        file.close()
+        try:
+            os.remove(part.temp_path)
+        except FileNotFoundError:
+            pass
+        part.temp_path = None
+
+    def discard_unfinished(self) -> None:
+        """Remove the temp files of parts that never completed (or of all files, after an error)."""
+        for part in self.files:
+            if part.temp_path in self._open:
+                self._discard(part)
+                part.error = part.error or ValueError("Upload incomplete")
+
+
+async def receive_uploads(headers: Mapping[str, str], stream: AsyncIterator[bytes], directory: str,
+                          max_bytes: int, max_files: int = 1) -> List[ReceivedFile]:
+    """Stream the files of a multipart/form-data request body into temp files in directory.
+
+    Only a chunk of the body is in memory at a time. Each file is hashed
+    as it is written, and one that goes over max_bytes is cut off and
+    marked with UploadTooLarge while the rest of the request is still
+    read. A request whose Content-Length already rules it out is
+    rejected before any of the body is read. Callers rename the temp
+    files of accepted files into place; on any error all of them are
+    removed.
+    """
+    try:
+        content_length = int(headers.get("content-length") or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > max_files * (max_bytes + MULTIPART_OVERHEAD):
+        raise UploadTooLarge(f"Upload is over the {max_bytes / (1024 * 1024):.3g} MB per photo limit")
+
+    content_type, params = parse_options_header(headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise ValueError("Expected a multipart/form-data upload")
+
+    receiver = _MultipartReceiver(directory, max_bytes, max_files)
+    parser = multipart.MultipartParser(params[b"boundary"], receiver.callbacks())
+    try:
+        async for chunk in stream:
+            parser.write(chunk)
+            await receiver.drain()
+        parser.finalize()
+        await receiver.drain()
+    except BaseException:
+        # Client gone, malformed body, too many files, disk full...
+        receiver.discard_unfinished()
+        for part in receiver.files:
+            if part.temp_path:
+                try:
+                    os.remove(part.temp_path)
+                except FileNotFoundError:
+                    pass
+        raise
+    receiver.discard_unfinished()
+    return receiver.files
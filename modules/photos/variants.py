@@ -0,0 +1,179 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Requested widths are rounded up to one of these, so clients asking for
+# slightly different sizes share cached variants
+VARIANT_WIDTHS = (160, 320, 480, 640, 800, 1024, 1280, 1600, 1920, 2560, 3840)
+MEDIA_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+# A hit refreshes the file's mtime (the LRU clock) at most this often
+TOUCH_INTERVAL = 60.0
+# Eviction trims the cache to this fraction of its limit, so it doesn't run on every miss
+LOW_WATER = 0.9
+
+
+def variant_width(requested: int, largest: int) -> int:
+    """The VARIANT_WIDTHS step at or above requested, but no wider than the photo."""
+    step = next((width for width in VARIANT_WIDTHS if width >= requested), VARIANT_WIDTHS[-1])
+    return max(1, min(step, largest))
+
+
+class VariantCache:
+    """Size-bounded on-disk LRU of photo variants, keyed by photo, width, quality and format.
+
+    Every uvicorn worker keeps its own index of the shared directory. File
+    mtimes serve as the recency clock they all see, and eviction re-reads
+    the directory first, so the bound holds for the directory as a whole.
+    Concurrent requests for a variant that is still being made wait for
+    the same result instead of making it again.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, least recent first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0  # Requests that waited for a variant another request was making
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._pending: Dict[str, asyncio.Task] = {}
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self._resync()
+        except OSError as e:
+            logger.error(f"Failed to open variant cache {directory}: {e}")
+
+    @staticmethod
+    def name(photo_id: str, width: int, quality: int, fmt: str) -> str:
+        return f"{photo_id}_w{width}_q{quality}.{EXTENSIONS[fmt]}"
+
+    def _resync(self) -> None:
+        """Rebuild the index from the directory, which other workers add to and evict from."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue  # Still being written
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        files.sort()
+        self.entries = OrderedDict((name, size) for _, name, size in files)
+        self.bytes = sum(self.entries.values())
+
+    def _lookup(self, name: str) -> Optional[str]:
+        path = os.path.join(self.directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if name in self.entries:
+                self.bytes -= self.entries.pop(name)  # Evicted by another worker
+            return None
+        if time.time() - stat.st_mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        if name in self.entries:
+            self.entries.move_to_end(name)
+        else:
+            self._add(name, stat.st_size)  # Made by another worker
+        return path
+
+    def _add(self, name: str, size: int) -> None:
+        self.entries[name] = size
+        self.bytes += size
+        if self.bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        self._resync()
+        target = self.max_bytes * LOW_WATER
+        evicted = 0
+        while self.bytes > target and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            self.bytes -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+            evicted += 1
+        logger.info(f"Evicted {evicted} photo variants, {self.bytes // 1024} KB cached")
+
+    async def get(self, name: str, make: Callable[[str], Awaitable[Any]]) -> str:
+        """Path of a cached variant; on a miss, make(temp_path) writes it first."""
+        path = self._lookup(name)
+        if path is not None:
+            self.hits += 1
+            return path
+
+        task = self._pending.get(name)
+        if task is None:
+            self.misses += 1
+            # A task of its own, so a client hanging up doesn't cancel it for the others waiting
+            task = asyncio.create_task(self._make(name, make))
+            self._pending[name] = task
+            task.add_done_callback(lambda _: self._pending.pop(name, None))
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    async def _make(self, name: str, make: Callable[[str], Awaitable[Any]]) -> str:
+        # Dot-prefixed so other workers' scans skip it; renamed into place when complete
+        temp_path = os.path.join(self.directory, f".{name}.{os.getpid()}.tmp")
+        try:
+            await make(temp_path)
+            path = os.path.join(self.directory, name)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self._add(name, os.path.getsize(path))
+        return path
+
+    def discard(self, photo_ids: Iterable[str]) -> None:
+        """Delete the variants of photos that changed or were removed."""
+        photo_ids = set(photo_ids)
+        if not photo_ids:
+            return
+        try:
+            with os.scandir(self.directory) as entries:
+                names = [entry.name for entry in entries if entry.name.rsplit("_w", 1)[0] in photo_ids]
+        except OSError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            if name in self.entries:
+                self.bytes -= self.entries.pop(name)
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses + self.joined
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "joined": self.joined,
+            "hit_rate": round((self.hits + self.joined) / requests, 3) if requests else None,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes
+        }
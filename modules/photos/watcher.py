@@ -0,0 +1,358 @@
+import os
+import time
+import errno
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .scanner import PHOTO_EXTENSIONS
+from ..common.shared_state import SharedState, shared_state
+
+logger = logging.getLogger(__name__)
+
+# Seconds a path must go without events before it is scanned, so copies in progress aren't read half-written
+SETTLE_SECONDS = 2.0
+# Polling fallback: seconds between checks of the directory mtimes (and lease renewals)
+POLL_INTERVAL = 10.0
+# With shared state, only the worker holding this lease watches
+LEASE = "photos-watcher"
+LEASE_TTL = 60.0
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT = struct.Struct("iIII")  # struct inotify_event: wd, mask, cookie, len (then the name)
+
+# on_change(paths) scans the paths (everything if None) and returns those to retry later
+ChangeHandler = Callable[[Optional[List[str]]], Awaitable[List[str]]]
+
+
+class Inotify:
+    """Non-blocking inotify instance through libc (Linux only; OSError elsewhere)."""
+
+    def __init__(self):
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise OSError(errno.ENOSYS, f"inotify not available: {e}")
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            code = ctypes.get_errno()  # ENOSPC: fs.inotify.max_user_watches reached
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self) -> List[Tuple[int, int, str]]:
+        """(watch descriptor, mask, name) of queued events; empty once drained."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT.size <= len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            events.append((wd, mask, os.fsdecode(data[offset:offset + length].rstrip(b"\0"))))
+            offset += length
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PhotoWatcher:
+    """Turns changes in the photo directory into scans of just the paths that changed.
+
+    On Linux, inotify reports changes as they happen and an idle library
+    costs nothing. Elsewhere, or once the kernel's watch limit is reached,
+    directory mtimes are polled every POLL_INTERVAL seconds, with a full
+    scan every scan_interval for photos edited in place. A changed path is
+    handed to on_change once it has gone `settle` seconds without events;
+    paths on_change returns (still being written) are retried later. Full
+    scans are also requested on start, to catch up on changes made while
+    nothing was watching, and when the kernel's event queue overflowed.
+
+    With shared state, only the worker holding the "photos-watcher" lease
+    watches; the others take over if it stops renewing the lease.
+    """
+
+    def __init__(self, root: str, on_change: ChangeHandler, recursive: bool = True, exclude: Iterable[str] = (),
+                 scan_interval: float = 3600.0, settle: float = SETTLE_SECONDS,
+                 shared: Optional[SharedState] = shared_state):
+        self.root = root.rstrip("/") or "/"
+        self.on_change = on_change
+        self.recursive = recursive
+        self.excluded = {os.path.realpath(path) for path in exclude}
+        self.scan_interval = scan_interval
+        self.settle = settle
+        self.shared = shared
+        self.backend: Optional[str] = None  # "inotify" or "polling" while this worker watches
+        self.events = 0
+        self.scans = 0
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, str] = {}  # inotify: watch descriptor -> directory
+        self._mtimes: Dict[str, int] = {}  # polling: directory -> mtime
+        self._pending: Dict[str, float] = {}  # Changed path -> time of its last event (monotonic)
+        self._full_scan = False
+        self._last_full = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start watching; needs a running event loop."""
+        if not self._tasks:
+            self._wakeup = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._dispatch_loop())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._end()
+        if self.shared is not None:
+            self.shared.release_lease(LEASE)
+
+    async def _run(self) -> None:
+        while True:
+            if self.shared is None or self.shared.acquire_lease(LEASE, ttl=LEASE_TTL):
+                if self.backend is None:
+                    self._begin()
+                elif self.backend == "polling":
+                    self._poll()
+                if (self.backend == "polling" and self.scan_interval and
+                        time.monotonic() - self._last_full >= self.scan_interval):
+                    self._request_full_scan()
+            elif self.backend is not None:
+                logger.info("Another worker is watching the photo directory now")
+                self._end()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def _begin(self) -> None:
+        if not os.path.isdir(self.root):
+            return  # Tried again on the next tick
+        try:
+            self._inotify = Inotify()
+            for directory in self._directories(self.root):
+                self._watch(directory)
+            asyncio.get_running_loop().add_reader(self._inotify.fd, self._read_events)
+            self.backend = "inotify"
+            logger.info(f"Watching {len(self._watches)} photo directories with inotify")
+        except OSError as e:
+            logger.warning(f"Cannot watch the photo directory with inotify ({e}); "
+                           f"polling it every {POLL_INTERVAL:g}s instead")
+            self._start_polling()
+        self._request_full_scan()
+
+    def _start_polling(self) -> None:
+        self._close_inotify()
+        self._mtimes = {}
+        self._record_mtimes(self.root)
+        self.backend = "polling"
+
+    def _end(self) -> None:
+        self._close_inotify()
+        self._mtimes = {}
+        self._pending.clear()
+        self.backend = None
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            except RuntimeError:
+                pass  # No loop any more (interpreter shutdown)
+            self._inotify.close()
+            self._inotify = None
+        self._watches = {}
+
+    def _directories(self, top: str) -> Iterator[str]:
+        """top and, if recursive, the directories under it that are watched (not hidden, excluded or links)."""
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            yield directory
+            if not self.recursive:
+                return
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if (not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False) and
+                                os.path.realpath(entry.path) not in self.excluded):
+                            pending.append(entry.path)
+            except OSError:
+                continue
+
+    def _watched(self, path: str) -> bool:
+        return not os.path.basename(path).startswith('.') and os.path.realpath(path) not in self.excluded
+
+    # inotify
+
+    def _watch(self, directory: str) -> None:
+        self._watches[self._inotify.add_watch(directory, WATCH_MASK)] = directory
+
+    def _unwatch(self, directory: str) -> None:
+        for wd, path in list(self._watches.items()):
+            if path == directory or path.startswith(directory + "/"):
+                self._inotify.rm_watch(wd)
+                del self._watches[wd]
+
+    def _read_events(self) -> None:
+        now = time.monotonic()
+        overflowed = False
+        while self._inotify is not None:
+            events = self._inotify.read()
+            if not events:
+                break
+            for wd, mask, name in events:
+                self.events += 1
+                if mask & IN_Q_OVERFLOW:
+                    # The full scan covers every path, so queued events only keep the watches up to date
+                    logger.warning("Photo directory events overflowed, rescanning")
+                    overflowed = True
+                    self._pending.clear()
+                    self._request_full_scan()
+                    if not self._rewatch():
+                        return
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)  # Its directory was deleted or unwatched
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    if directory == self.root:
+                        self._request_full_scan()
+                    continue
+
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if not self.recursive or not self._watched(path):
+                        continue
+                    if mask & IN_MOVED_FROM:
+                        self._unwatch(path)
+                    elif mask & (IN_CREATE | IN_MOVED_TO):
+                        if not self._rewatch(path):
+                            return
+                    if not overflowed:
+                        self._pending[path] = now  # The scan walks it for the photos inside
+                elif (not overflowed and not name.startswith('.') and
+                      os.path.splitext(name)[1].lower() in PHOTO_EXTENSIONS):
+                    self._pending[path] = now
+        self._wakeup.set()
+
+    def _rewatch(self, top: Optional[str] = None) -> bool:
+        """Watch the directories under top (default: all) not watched yet; False if it fell back to polling."""
+        top = top or self.root
+        try:
+            watched = set(self._watches.values())
+            for directory in self._directories(top):
+                if directory not in watched:
+                    self._watch(directory)
+        except OSError as e:
+            logger.warning(f"Cannot watch {top} ({e}); polling the photo directory instead")
+            self._start_polling()
+            self._request_full_scan()
+            return False
+        return True
+
+    # Polling
+
+    def _record_mtimes(self, top: str) -> None:
+        for directory in self._directories(top):
+            try:
+                self._mtimes[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                pass
+
+    def _poll(self) -> None:
+        """Mark directories whose entries changed (files added, removed or renamed) since the last poll."""
+        changed = []
+        for directory, mtime in self._mtimes.items():
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                changed.append(directory)
+        now = time.monotonic()
+        for directory in changed:
+            # Re-read the subtree: subdirectories may have come or gone (the scan walks all of it)
+            for path in [path for path in self._mtimes if path == directory or path.startswith(directory + "/")]:
+                del self._mtimes[path]
+            if os.path.isdir(directory):
+                self._record_mtimes(directory)
+            self._pending[directory] = now
+        if changed:
+            self._wakeup.set()
+
+    # Dispatch
+
+    def _request_full_scan(self) -> None:
+        self._full_scan = True
+        self._wakeup.set()
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._full_scan or self._pending:
+                if self._full_scan:
+                    self._full_scan = False
+                    self._pending.clear()
+                    self._last_full = time.monotonic()
+                    retry = await self._dispatch(None)
+                else:
+                    quiet_since = time.monotonic() - self.settle
+                    ready = [path for path, changed in self._pending.items() if changed <= quiet_since]
+                    if not ready:
+                        await asyncio.sleep(min(self._pending.values()) - quiet_since + 0.05)
+                        continue
+                    for path in ready:
+                        del self._pending[path]
+                    retry = await self._dispatch(ready)
+                now = time.monotonic()
+                for path in retry:
+                    self._pending.setdefault(path, now)
+
+    async def _dispatch(self, paths: Optional[List[str]]) -> List[str]:
+        self.scans += 1
+        try:
+            return await self.on_change(paths) or []
+        except Exception as e:
+            logger.error(f"Failed to scan photo directory changes: {e}")
+            return []
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "backend": self.backend,  # None: not watching here (another worker is, with shared state)
+            "directories": len(self._watches) if self.backend == "inotify" else len(self._mtimes),
+            "pending": len(self._pending),
+            "events": self.events,
+            "scans": self.scans
+        }
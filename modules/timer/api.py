@@ -3,6 +3,8 @@ from typing import Dict, Any, List
 import logging
 from .service import TimerService
 from .models import TimerInfo, TimerCreateRequest, TimerUpdateRequest, TimerPreset
+from ..common.response_cache import response_cache
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +13,13 @@ router = APIRouter(prefix="/api/timer", tags=["timer"])
 # Initialize timer service
 timer_service = TimerService()
 
+# Conditional GET: timer reads change with every tick while a timer runs
+versions.register("/api/timer/list", "timers")
+versions.register("/api/timer/status", "timers")
+versions.register("/api/timer/presets/list", "timer_presets")
+versions.register("/api/timer/{timer_id}", "timers")
+response_cache.register("/api/timer/presets/list", ttl=3600, scopes=("timer_presets",))
+
 @router.get("/list")
 async def list_timers() -> List[TimerInfo]:
     """Get all active timers."""
@@ -39,7 +48,7 @@ async def get_timer(timer_id: str) -> TimerInfo:
 async def create_timer(request: TimerCreateRequest) -> TimerInfo:
     """Create a new timer."""
     try:
-        timer = timer_service.create_timer(
+        timer = await timer_service.create_timer(
             name=request.name,
             duration_seconds=request.duration_seconds,
             auto_start=request.auto_start
@@ -53,7 +62,7 @@ async def create_timer(request: TimerCreateRequest) -> TimerInfo:
 async def start_timer(timer_id: str) -> Dict[str, str]:
     """Start a timer."""
     try:
-        timer_service.start_timer(timer_id)
+        await timer_service.start_timer(timer_id)
         return {"status": "started", "timer_id": timer_id}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -65,7 +74,7 @@ async def start_timer(timer_id: str) -> Dict[str, str]:
 async def pause_timer(timer_id: str) -> Dict[str, str]:
     """Pause a timer."""
     try:
-        timer_service.pause_timer(timer_id)
+        await timer_service.pause_timer(timer_id)
         return {"status": "paused", "timer_id": timer_id}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -77,7 +86,7 @@ async def pause_timer(timer_id: str) -> Dict[str, str]:
 async def resume_timer(timer_id: str) -> Dict[str, str]:
     """Resume a paused timer."""
     try:
-        timer_service.resume_timer(timer_id)
+        await timer_service.resume_timer(timer_id)
         return {"status": "resumed", "timer_id": timer_id}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -89,7 +98,7 @@ async def resume_timer(timer_id: str) -> Dict[str, str]:
 async def stop_timer(timer_id: str) -> Dict[str, str]:
     """Stop and reset a timer."""
     try:
-        timer_service.stop_timer(timer_id)
+        await timer_service.stop_timer(timer_id)
         return {"status": "stopped", "timer_id": timer_id}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -101,7 +110,7 @@ async def stop_timer(timer_id: str) -> Dict[str, str]:
 async def delete_timer(timer_id: str) -> Dict[str, str]:
     """Delete a timer."""
     try:
-        timer_service.delete_timer(timer_id)
+        await timer_service.delete_timer(timer_id)
         return {"status": "deleted", "timer_id": timer_id}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -113,7 +122,7 @@ async def delete_timer(timer_id: str) -> Dict[str, str]:
 async def update_timer(timer_id: str, request: TimerUpdateRequest) -> TimerInfo:
     """Update timer settings."""
     try:
-        timer = timer_service.update_timer(timer_id, request.dict(exclude_unset=True))
+        timer = await timer_service.update_timer(timer_id, request.dict(exclude_unset=True))
         return timer
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -145,7 +154,7 @@ async def create_preset(preset: TimerPreset) -> TimerPreset:
 async def start_preset_timer(preset_id: str) -> TimerInfo:
     """Start a timer from a preset."""
     try:
-        timer = timer_service.start_from_preset(preset_id)
+        timer = await timer_service.start_from_preset(preset_id)
         return timer
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -2,11 +2,15 @@ import asyncio
 import uuid
 import time
 import logging
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import json
 import os
+from contextlib import asynccontextmanager, contextmanager
+from fastapi.encoders import jsonable_encoder
 from .models import TimerInfo, TimerStatus, TimerType, TimerPreset, PomodoroConfig
+from ..common.shared_state import shared_state
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
@@ -19,24 +23,67 @@ class TimerService:
         self.pomodoro_config = PomodoroConfig()
         self.running_tasks: Dict[str, asyncio.Task] = {}
         
+        # With several workers, timers live in the shared store and one
+        # leader worker ticks all of them
+        self._shared_version = 0
+        self._presets_mtime: Optional[int] = None
+        
         # Load presets and configuration
         self._load_presets()
         self._create_default_presets()
         
         # Start background task for timer updates
         asyncio.create_task(self._timer_update_loop())
+        if shared_state:
+            self._sync()
+            asyncio.create_task(self._shared_tick_loop())
+    
+    def _sync(self) -> None:
+        """Reload the timers if another worker changed them."""
+        if shared_state is None or shared_state.version("timers") == self._shared_version:
+            return
+        document = shared_state.get("timers")
+        if document is not None:
+            data, self._shared_version, _ = document
+            self.timers = {timer_id: TimerInfo(**timer) for timer_id, timer in data.items()}
+    
+    @asynccontextmanager
+    async def _update(self) -> AsyncIterator[None]:
+        """Read-modify-write of the timers, serialized across workers when state is shared.
+        
+        Waiting for the lock, and the store read and write, stay off the event
+        loop. The body must not await: it runs between that read and write.
+        """
+        if shared_state is None:
+            yield
+            versions.bump("timers")
+            return
+        
+        # Every holder of the "timers" lock in this process goes through locked(), so awaiting in it is safe
+        async with shared_state.locked("timers"):
+            await shared_state.run(self._sync)
+            yield
+            self._shared_version = await shared_state.run(shared_state.set, "timers", jsonable_encoder(self.timers))
+        await versions.bump_async("timers")
+    
+    def _get_or_raise(self, timer_id: str) -> TimerInfo:
+        if timer_id not in self.timers:
+            raise ValueError(f"Timer {timer_id} not found")
+        return self.timers[timer_id]
     
     def get_all_timers(self) -> List[TimerInfo]:
         """Get all timers."""
+        self._sync()
         return list(self.timers.values())
     
     def get_timer(self, timer_id: str) -> Optional[TimerInfo]:
         """Get specific timer by ID."""
+        self._sync()
         return self.timers.get(timer_id)
     
-    def create_timer(self, name: str, duration_seconds: int, 
-                    timer_type: TimerType = TimerType.COUNTDOWN,
-                    auto_start: bool = False, **kwargs) -> TimerInfo:
+    async def create_timer(self, name: str, duration_seconds: int, 
+                           timer_type: TimerType = TimerType.COUNTDOWN,
+                           auto_start: bool = False, **kwargs) -> TimerInfo:
         """Create a new timer."""
         timer_id = str(uuid.uuid4())
         
@@ -52,59 +99,70 @@ class TimerService:
             **kwargs
         )
         
-        self.timers[timer_id] = timer
-        
-        if auto_start:
-            self.start_timer(timer_id)
+        async with self._update():
+            self.timers[timer_id] = timer
+            if auto_start:
+                self._start(timer)
         
         logger.info(f"Created timer: {name} ({duration_seconds}s)")
+        if auto_start:
+            self._run_locally(timer_id)
         return timer
     
-    def start_timer(self, timer_id: str) -> None:
+    async def start_timer(self, timer_id: str) -> None:
         """Start a timer."""
-        if timer_id not in self.timers:
-            raise ValueError(f"Timer {timer_id} not found")
-        
-        timer = self.timers[timer_id]
+        async with self._update():
+            timer = self._get_or_raise(timer_id)
+            if not self._start(timer):
+                return  # Already running
         
+        logger.info(f"Started timer: {timer.name}")
+        self._run_locally(timer_id)
+    
+    def _start(self, timer: TimerInfo) -> bool:
+        """Mark a timer running (inside _update); False if it already was."""
         if timer.status == TimerStatus.RUNNING:
-            return  # Already running
-        
+            return False
         timer.status = TimerStatus.RUNNING
         timer.started_at = datetime.now()
+        return True
+    
+    def _run_locally(self, timer_id: str) -> None:
+        """Start the background task for a started timer."""
+        if shared_state:
+            return  # The leader worker's tick loop picks it up
         
-        # Start background task for this timer
         if timer_id in self.running_tasks:
             self.running_tasks[timer_id].cancel()
         
         self.running_tasks[timer_id] = asyncio.create_task(
             self._run_timer(timer_id)
         )
-        
-        logger.info(f"Started timer: {timer.name}")
     
-    def pause_timer(self, timer_id: str) -> None:
-        """Pause a timer."""
-        if timer_id not in self.timers:
-            raise ValueError(f"Timer {timer_id} not found")
-        
-        timer = self.timers[timer_id]
-        
-        if timer.status != TimerStatus.RUNNING:
-            return  # Not running
-        
-        timer.status = TimerStatus.PAUSED
-        timer.paused_at = datetime.now()
-        
-        # Cancel background task
+    def _cancel_task(self, timer_id: str) -> None:
         if timer_id in self.running_tasks:
             self.running_tasks[timer_id].cancel()
             del self.running_tasks[timer_id]
+    
+    async def pause_timer(self, timer_id: str) -> None:
+        """Pause a timer."""
+        async with self._update():
+            timer = self._get_or_raise(timer_id)
+            
+            if timer.status != TimerStatus.RUNNING:
+                return  # Not running
+            
+            timer.status = TimerStatus.PAUSED
+            timer.paused_at = datetime.now()
+        
+        # Cancel background task
+        self._cancel_task(timer_id)
         
         logger.info(f"Paused timer: {timer.name}")
     
-    def resume_timer(self, timer_id: str) -> None:
+    async def resume_timer(self, timer_id: str) -> None:
         """Resume a paused timer."""
+        self._sync()
         if timer_id not in self.timers:
             raise ValueError(f"Timer {timer_id} not found")
         
@@ -113,55 +171,46 @@ class TimerService:
         if timer.status != TimerStatus.PAUSED:
             return  # Not paused
         
-        self.start_timer(timer_id)  # Reuse start logic
+        await self.start_timer(timer_id)  # Reuse start logic
     
-    def stop_timer(self, timer_id: str) -> None:
+    async def stop_timer(self, timer_id: str) -> None:
         """Stop and reset a timer."""
-        if timer_id not in self.timers:
-            raise ValueError(f"Timer {timer_id} not found")
-        
-        timer = self.timers[timer_id]
-        timer.status = TimerStatus.STOPPED
-        
-        # Reset timer state
-        if timer.timer_type == TimerType.COUNTDOWN:
-            timer.remaining_seconds = timer.duration_seconds
-            timer.elapsed_seconds = 0
-        else:  # STOPWATCH
-            timer.elapsed_seconds = 0
-            timer.remaining_seconds = 0
+        async with self._update():
+            timer = self._get_or_raise(timer_id)
+            timer.status = TimerStatus.STOPPED
+            
+            # Reset timer state
+            if timer.timer_type == TimerType.COUNTDOWN:
+                timer.remaining_seconds = timer.duration_seconds
+                timer.elapsed_seconds = 0
+            else:  # STOPWATCH
+                timer.elapsed_seconds = 0
+                timer.remaining_seconds = 0
         
         # Cancel background task
-        if timer_id in self.running_tasks:
-            self.running_tasks[timer_id].cancel()
-            del self.running_tasks[timer_id]
+        self._cancel_task(timer_id)
         
         logger.info(f"Stopped timer: {timer.name}")
     
-    def delete_timer(self, timer_id: str) -> None:
+    async def delete_timer(self, timer_id: str) -> None:
         """Delete a timer."""
-        if timer_id not in self.timers:
-            raise ValueError(f"Timer {timer_id} not found")
-        
-        # Stop timer first
-        self.stop_timer(timer_id)
+        async with self._update():
+            timer_name = self._get_or_raise(timer_id).name
+            del self.timers[timer_id]
         
-        # Remove from timers
-        timer_name = self.timers[timer_id].name
-        del self.timers[timer_id]
+        # Stop its background task
+        self._cancel_task(timer_id)
         
         logger.info(f"Deleted timer: {timer_name}")
     
-    def update_timer(self, timer_id: str, updates: Dict[str, Any]) -> TimerInfo:
+    async def update_timer(self, timer_id: str, updates: Dict[str, Any]) -> TimerInfo:
         """Update timer settings."""
-        if timer_id not in self.timers:
-            raise ValueError(f"Timer {timer_id} not found")
-        
-        timer = self.timers[timer_id]
-        
-        for key, value in updates.items():
-            if hasattr(timer, key):
-                setattr(timer, key, value)
+        async with self._update():
+            timer = self._get_or_raise(timer_id)
+            
+            for key, value in updates.items():
+                if hasattr(timer, key):
+                    setattr(timer, key, value)
         
         logger.info(f"Updated timer: {timer.name}")
         return timer
@@ -173,40 +222,76 @@ class TimerService:
             
             while timer.status == TimerStatus.RUNNING:
                 await asyncio.sleep(1)  # Update every second
+                # Every tick changes what the timer endpoints return
+                versions.bump("timers")
                 
-                if timer.timer_type == TimerType.COUNTDOWN:
-                    timer.remaining_seconds -= 1
-                    timer.elapsed_seconds += 1
-                    
-                    if timer.remaining_seconds <= 0:
-                        timer.remaining_seconds = 0
-                        timer.status = TimerStatus.COMPLETED
-                        timer.completed_at = datetime.now()
-                        
-                        # Handle completion
-                        await self._handle_timer_completion(timer_id)
-                        break
-                
-                elif timer.timer_type == TimerType.STOPWATCH:
-                    timer.elapsed_seconds += 1
-                    timer.remaining_seconds = timer.elapsed_seconds
-                
-                elif timer.timer_type == TimerType.POMODORO:
-                    # Pomodoro logic would go here
-                    timer.remaining_seconds -= 1
-                    timer.elapsed_seconds += 1
-                    
-                    if timer.remaining_seconds <= 0:
-                        timer.status = TimerStatus.COMPLETED
-                        timer.completed_at = datetime.now()
-                        await self._handle_pomodoro_completion(timer_id)
-                        break
+                if self._advance(timer):
+                    await self._handle_completion(timer)
+                    break
         
         except asyncio.CancelledError:
             logger.debug(f"Timer task cancelled for {timer_id}")
         except Exception as e:
             logger.error(f"Error in timer task {timer_id}: {e}")
     
+    def _advance(self, timer: TimerInfo) -> bool:
+        """Advance a running timer by one second; True if it just completed."""
+        if timer.timer_type == TimerType.COUNTDOWN:
+            timer.remaining_seconds -= 1
+            timer.elapsed_seconds += 1
+            
+            if timer.remaining_seconds <= 0:
+                timer.remaining_seconds = 0
+                timer.status = TimerStatus.COMPLETED
+                timer.completed_at = datetime.now()
+                return True
+        
+        elif timer.timer_type == TimerType.STOPWATCH:
+            timer.elapsed_seconds += 1
+            timer.remaining_seconds = timer.elapsed_seconds
+        
+        elif timer.timer_type == TimerType.POMODORO:
+            # Pomodoro logic would go here
+            timer.remaining_seconds -= 1
+            timer.elapsed_seconds += 1
+            
+            if timer.remaining_seconds <= 0:
+                timer.status = TimerStatus.COMPLETED
+                timer.completed_at = datetime.now()
+                return True
+        
+        return False
+    
+    async def _handle_completion(self, timer: TimerInfo):
+        if timer.timer_type == TimerType.POMODORO:
+            await self._handle_pomodoro_completion(timer.id)
+        else:
+            await self._handle_timer_completion(timer.id)
+    
+    async def _shared_tick_loop(self):
+        """With shared state, the worker holding the "timers" lease ticks every running timer."""
+        while True:
+            await asyncio.sleep(1)
+            try:
+                # Store writes and lock waits stay off the event loop, which serves requests meanwhile
+                if not await shared_state.run(shared_state.acquire_lease, "timers", 5):
+                    continue
+                
+                self._sync()
+                if not any(t.status == TimerStatus.RUNNING for t in self.timers.values()):
+                    continue
+                
+                async with self._update():
+                    completed = [
+                        timer for timer in self.timers.values()
+                        if timer.status == TimerStatus.RUNNING and self._advance(timer)
+                    ]
+                
+                for timer in completed:
+                    asyncio.create_task(self._handle_completion(timer))
+            except Exception as e:
+                logger.error(f"Error in shared timer tick: {e}")
+    
     async def _handle_timer_completion(self, timer_id: str):
         """Handle timer completion."""
         timer = self.timers[timer_id]
@@ -224,10 +309,19 @@ class TimerService:
         # Auto-restart if enabled
         if timer.auto_restart:
             await asyncio.sleep(2)  # Brief pause
+            await self._restart_timer(timer_id)
+    
+    async def _restart_timer(self, timer_id: str):
+        """Reset a completed timer and run it again."""
+        async with self._update():
+            timer = self.timers.get(timer_id)
+            if timer is None:
+                return  # Deleted during the pause
             timer.remaining_seconds = timer.duration_seconds
             timer.elapsed_seconds = 0
             timer.status = TimerStatus.CREATED
-            self.start_timer(timer_id)
+            self._start(timer)
+        self._run_locally(timer_id)
     
     async def _handle_pomodoro_completion(self, timer_id: str):
         """Handle pomodoro session completion."""
@@ -255,6 +349,11 @@ class TimerService:
             while True:
                 await asyncio.sleep(30)  # Update every 30 seconds
                 
+                # With shared state only the ticking worker cleans up
+                if shared_state and not await shared_state.run(shared_state.acquire_lease, "timers", 5):
+                    continue
+                self._sync()
+                
                 # Clean up completed timers older than 1 hour
                 current_time = datetime.now()
                 to_remove = []
@@ -265,46 +364,79 @@ class TimerService:
                         current_time - timer.completed_at > timedelta(hours=1)):
                         to_remove.append(timer_id)
                 
-                for timer_id in to_remove:
-                    self.delete_timer(timer_id)
+                if to_remove:
+                    async with self._update():
+                        for timer_id in to_remove:
+                            self.timers.pop(timer_id, None)
+                    for timer_id in to_remove:
+                        self._cancel_task(timer_id)
                     
         except Exception as e:
             logger.error(f"Error in timer update loop: {e}")
     
     def get_presets(self) -> List[TimerPreset]:
         """Get all timer presets."""
+        self._sync_presets()
         return list(self.presets.values())
     
+    def _sync_presets(self) -> None:
+        """Reload presets another worker saved to presets.json."""
+        if shared_state is None:
+            return
+        try:
+            mtime = os.stat(os.path.join(os.path.dirname(__file__), "presets.json")).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._presets_mtime:
+            self.presets = {}
+            self._load_presets()
+            self._presets_mtime = mtime
+    
     def create_preset(self, preset: TimerPreset) -> TimerPreset:
         """Create a new timer preset."""
         if not preset.id:
             preset.id = str(uuid.uuid4())
         
-        self.presets[preset.id] = preset
-        self._save_presets()
+        with self._presets_update():
+            self.presets[preset.id] = preset
+            self._save_presets()
+            versions.bump("timer_presets")
         
         logger.info(f"Created preset: {preset.name}")
         return preset
     
     def delete_preset(self, preset_id: str) -> None:
         """Delete a timer preset."""
-        if preset_id not in self.presets:
-            raise ValueError(f"Preset {preset_id} not found")
-        
-        preset_name = self.presets[preset_id].name
-        del self.presets[preset_id]
-        self._save_presets()
+        with self._presets_update():
+            if preset_id not in self.presets:
+                raise ValueError(f"Preset {preset_id} not found")
+            
+            preset_name = self.presets[preset_id].name
+            del self.presets[preset_id]
+            self._save_presets()
+            versions.bump("timer_presets")
         
         logger.info(f"Deleted preset: {preset_name}")
     
-    def start_from_preset(self, preset_id: str) -> TimerInfo:
+    @contextmanager
+    def _presets_update(self):
+        """Serialize preset file writes across workers when state is shared."""
+        if shared_state is None:
+            yield
+            return
+        with shared_state.lock("timer_presets"):
+            self._sync_presets()
+            yield
+    
+    async def start_from_preset(self, preset_id: str) -> TimerInfo:
         """Start a timer from a preset."""
+        self._sync_presets()
         if preset_id not in self.presets:
             raise ValueError(f"Preset {preset_id} not found")
         
         preset = self.presets[preset_id]
         
-        timer = self.create_timer(
+        timer = await self.create_timer(
             name=preset.name,
             duration_seconds=preset.duration_seconds,
             timer_type=preset.timer_type,
@@ -401,6 +533,8 @@ class TimerService:
     
     def get_status(self) -> Dict[str, Any]:
         """Get timer service status."""
+        self._sync()
+        self._sync_presets()
         running_timers = [t for t in self.timers.values() if t.status == TimerStatus.RUNNING]
         paused_timers = [t for t in self.timers.values() if t.status == TimerStatus.PAUSED]
         completed_timers = [t for t in self.timers.values() if t.status == TimerStatus.COMPLETED]
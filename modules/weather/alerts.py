@@ -0,0 +1,401 @@
+import asyncio
+import aiohttp
+import hashlib
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Any, List, Optional, Set
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from .models import WeatherAlert, WeatherConfig, WeatherLocation
+from ..common.shared_state import SharedState, shared_state
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("minor", "moderate", "severe", "extreme")
+
+# How often workers that don't poll pick up the polling worker's results
+FOLLOWER_SYNC_INTERVAL = 5
+# Events buffered per stream subscriber; one that falls this far behind is dropped and reconnects
+SUBSCRIBER_QUEUE_SIZE = 50
+
+
+def _alert_key(*parts: Any) -> str:
+    """Stable identity for an alert across feed updates (text and end time may change)."""
+    return hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _fingerprint(alert: WeatherAlert) -> tuple:
+    """Fields whose change is reported as an update."""
+    return (alert.title, alert.description, alert.severity, alert.end_time)
+
+
+class AlertSource:
+    """Base class for upstream alert feeds."""
+
+    name = "base"
+
+    def __init__(self, config: WeatherConfig, get_session: Callable[[], aiohttp.ClientSession]):
+        self.config = config
+        self._get_session = get_session
+
+    def supports(self, location: WeatherLocation) -> bool:
+        return location.lat is not None and location.lon is not None
+
+    async def fetch_alerts(self, location: WeatherLocation) -> List[WeatherAlert]:
+        raise NotImplementedError
+
+
+class NWSAlertSource(AlertSource):
+    """US National Weather Service active alerts (free, no API key, US only)."""
+
+    name = "nws"
+
+    async def fetch_alerts(self, location: WeatherLocation) -> List[WeatherAlert]:
+        url = f"{self.config.alerts_base_url.rstrip('/')}/alerts/active"
+        headers = {
+            # api.weather.gov rejects requests without a User-Agent identifying the app
+            "User-Agent": "pi-life-hub (family dashboard)",
+            "Accept": "application/geo+json"
+        }
+        params = {"point": f"{location.lat:.4f},{location.lon:.4f}"}
+
+        async with self._get_session().get(url, params=params, headers=headers) as response:
+            if response.status != 200:
+                raise ValueError(f"Alert feed request failed with status {response.status}")
+            data = await response.json(content_type=None)
+
+        alerts = []
+        for feature in data.get("features", []):
+            props = feature.get("properties", {})
+            start = props.get("onset") or props.get("effective") or props.get("sent")
+            end = props.get("ends") or props.get("expires")
+            if not start or not end:
+                continue
+
+            severity = (props.get("severity") or "").lower()
+            alerts.append(WeatherAlert(
+                id=_alert_key(props.get("senderName"), props.get("event"), start),
+                title=props.get("headline") or props.get("event", "Weather alert"),
+                description=props.get("description") or "",
+                severity=severity if severity in SEVERITIES else "minor",
+                start_time=datetime.fromisoformat(start),
+                end_time=datetime.fromisoformat(end),
+                areas=[area.strip() for area in (props.get("areaDesc") or "").split(";") if area.strip()],
+                sender=props.get("senderName")
+            ))
+        return alerts
+
+
+class OpenWeatherMapAlertSource(AlertSource):
+    """Alerts from One Call 3.0 with every other section excluded."""
+
+    name = "openweathermap"
+
+    # OpenWeatherMap has no severity field; infer it from the event name
+    SEVERITY_WORDS = {
+        "extreme": ("tornado warning", "hurricane warning", "extreme"),
+        "severe": ("warning",),
+        "moderate": ("watch",)
+    }
+
+    def _severity(self, event: str) -> str:
+        event = event.lower()
+        for severity, words in self.SEVERITY_WORDS.items():
+            if any(word in event for word in words):
+                return severity
+        return "minor"
+
+    async def fetch_alerts(self, location: WeatherLocation) -> List[WeatherAlert]:
+        if not self.config.api_key:
+            raise ValueError("OpenWeatherMap API key not configured")
+
+        url = f"{self.config.api_base_url.rstrip('/')}/data/3.0/onecall"
+        params = {
+            "lat": location.lat,
+            "lon": location.lon,
+            "appid": self.config.api_key,
+            "exclude": "current,minutely,hourly,daily"
+        }
+        async with self._get_session().get(url, params=params) as response:
+            if response.status != 200:
+                raise ValueError(f"Alert feed request failed with status {response.status}")
+            data = await response.json()
+
+        return [
+            WeatherAlert(
+                id=_alert_key(item.get("sender_name"), item.get("event"), item["start"]),
+                title=item.get("event", "Weather alert"),
+                description=item.get("description", ""),
+                severity=self._severity(item.get("event", "")),
+                start_time=datetime.fromtimestamp(item["start"], tz=timezone.utc),
+                end_time=datetime.fromtimestamp(item["end"], tz=timezone.utc),
+                areas=item.get("tags", []),
+                sender=item.get("sender_name")
+            )
+            for item in data.get("alerts", [])
+        ]
+
+
+ALERT_SOURCES = {
+    NWSAlertSource.name: NWSAlertSource,
+    OpenWeatherMapAlertSource.name: OpenWeatherMapAlertSource
+}
+
+
+class WeatherAlertMonitor:
+    """Polls an alert feed at an adaptive rate and publishes only the differences.
+
+    The active alert set per location is diffed by stable key against the
+    previous poll, producing "new", "changed" and "expired" events. Events are
+    numbered so streaming clients can resume after a reconnect. Polling is
+    slow while the sky is quiet and speeds up while alerts are active.
+
+    With shared state, only the worker holding the "weather-alerts" lease
+    polls; the others mirror its active set and events from the store and
+    forward new events to their own stream subscribers.
+    """
+
+    def __init__(self, config: WeatherConfig, get_session: Callable[[], aiohttp.ClientSession],
+                 history_size: int = 200, shared: Optional[SharedState] = shared_state):
+        self._get_session = get_session
+        self.active: Dict[str, Dict[str, WeatherAlert]] = {}  # location -> key -> alert
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.sequence = 0
+        self.polls = 0
+        self.consecutive_errors = 0
+        self.last_poll: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop_errors = 0  # Consecutive failed loop iterations (shared store trouble, bugs)
+        self._task: Optional[asyncio.Task] = None
+        self.shared = shared
+        self._shared_version = 0
+        self.polling = shared is None  # False while another worker holds the polling lease
+        self.configure(config)
+
+    def configure(self, config: WeatherConfig) -> None:
+        """Apply a new configuration in place, keeping subscribers and event numbering.
+
+        A running loop is restarted so the new locations are polled right away.
+        """
+        if config.alerts_provider not in ALERT_SOURCES:
+            raise ValueError(f"Unknown alerts provider '{config.alerts_provider}'")
+        self.config = config
+        self.source = ALERT_SOURCES[config.alerts_provider](config, self._get_session)
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            self._task = asyncio.create_task(self._poll_loop())
+
+    def start(self) -> None:
+        """Start the background polling loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        """Stop the background polling loop and end every subscriber's stream."""
+        for queue in list(self._subscribers):
+            self._drop(queue)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                interval = await self._poll_step()
+                self._loop_errors = 0
+            except Exception as e:
+                # E.g. a busy shared store; alerts must not stop for good
+                self._loop_errors += 1
+                self.last_error = str(e)
+                interval = min(FOLLOWER_SYNC_INTERVAL * 2 ** (self._loop_errors - 1), self.config.alerts_idle_interval)
+                logger.error(f"Weather alert loop failed, retrying in {interval}s: {e}")
+            await asyncio.sleep(interval)
+
+    async def _poll_step(self) -> float:
+        """One pass of the loop; returns the seconds to wait before the next."""
+        if self.shared is None:
+            await self.poll()
+            return self.next_interval()
+        if self.shared.acquire_lease("weather-alerts", ttl=self.config.alerts_idle_interval + 60):
+            self.polling = True
+            # Continue from the previous leader's state and event numbering
+            self._import_shared()
+            await self.poll()
+            self._export_shared()
+            return self.next_interval()
+        self.polling = False
+        self._import_shared()
+        return FOLLOWER_SYNC_INTERVAL
+
+    def _export_shared(self) -> None:
+        self._shared_version = self.shared.set("weather-alerts", jsonable_encoder({
+            "sequence": self.sequence,
+            "polls": self.polls,
+            "last_poll": self.last_poll,
+            "consecutive_errors": self.consecutive_errors,
+            "last_error": self.last_error,
+            "active": {location: list(alerts.values()) for location, alerts in self.active.items()},
+            "events": list(self.events)
+        }))
+
+    def _import_shared(self) -> None:
+        document = self.shared.get("weather-alerts")
+        if document is None or document[1] == self._shared_version:
+            return
+        state, self._shared_version, _ = document
+
+        for event in state["events"]:
+            if event["id"] > self.sequence:
+                event = {**event, "alert": WeatherAlert(**event["alert"])}
+                self.events.append(event)
+                self._notify(event)
+        self.active = {
+            location: {alert["id"]: WeatherAlert(**alert) for alert in alerts}
+            for location, alerts in state["active"].items()
+        }
+        self.sequence = state["sequence"]
+        self.polls = state["polls"]
+        self.last_poll = datetime.fromisoformat(state["last_poll"]) if state["last_poll"] else None
+        self.consecutive_errors = state["consecutive_errors"]
+        self.last_error = state["last_error"]
+
+    async def poll(self) -> List[Dict[str, Any]]:
+        """Poll every supported location once and publish the resulting events."""
+        self.polls += 1
+        self.last_poll = datetime.now()
+        events = []
+        failed = False
+
+        for location in self.config.locations:
+            if not self.source.supports(location):
+                continue
+            try:
+                alerts = await self.source.fetch_alerts(location)
+            except Exception as e:
+                failed = True
+                self.last_error = str(e)
+                logger.error(f"Failed to poll weather alerts for {location.name}: {e}")
+                continue
+            events.extend(self._diff(location.name, alerts))
+
+        # Locations removed from the configuration take their alerts with them
+        polled = {location.name for location in self.config.locations if self.source.supports(location)}
+        for location in self.active.keys() - polled:
+            events.extend(self._event("expired", location, alert) for alert in self.active.pop(location).values())
+
+        # Expire alerts whose end time passed even if the feed still lists them
+        now = datetime.now(timezone.utc)
+        for location, alerts in self.active.items():
+            for key in [key for key, alert in alerts.items() if alert.end_time <= now]:
+                events.append(self._event("expired", location, alerts.pop(key)))
+
+        self.consecutive_errors = self.consecutive_errors + 1 if failed else 0
+        for event in events:
+            self._publish(event)
+        return events
+
+    def _diff(self, location: str, alerts: List[WeatherAlert]) -> List[Dict[str, Any]]:
+        """Diff a fresh alert list against the previously seen set for a location."""
+        now = datetime.now(timezone.utc)
+        previous = self.active.get(location, {})
+        current = {alert.id: alert for alert in alerts if alert.end_time > now}
+
+        events = []
+        for key, alert in current.items():
+            if key not in previous:
+                events.append(self._event("new", location, alert))
+            elif _fingerprint(alert) != _fingerprint(previous[key]):
+                events.append(self._event("changed", location, alert))
+        for key in previous.keys() - current.keys():
+            events.append(self._event("expired", location, previous[key]))
+
+        self.active[location] = current
+        return events
+
+    def _event(self, kind: str, location: str, alert: WeatherAlert) -> Dict[str, Any]:
+        self.sequence += 1
+        return {"id": self.sequence, "type": kind, "location": location, "alert": alert}
+
+    def _publish(self, event: Dict[str, Any]) -> None:
+        logger.info(f"Weather alert {event['type']}: {event['alert'].title} ({event['location']})")
+        self.events.append(event)
+        self._notify(event)
+
+    def _notify(self, event: Dict[str, Any]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled client: its backlog is dropped and None ends its stream; on reconnect
+                # Last-Event-ID replays what it missed from the event history
+                self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def next_interval(self) -> float:
+        """Seconds until the next poll, based on what is currently active."""
+        if self.consecutive_errors:
+            # Back off on a failing feed, but never slower than the idle rate
+            return min(self.config.alerts_active_interval * 2 ** (self.consecutive_errors - 1),
+                       self.config.alerts_idle_interval)
+
+        alerts = self.get_active_alerts()
+        if any(alert.severity in ("severe", "extreme") for alert in alerts):
+            interval = self.config.alerts_severe_interval
+        elif alerts:
+            interval = self.config.alerts_active_interval
+        else:
+            interval = self.config.alerts_idle_interval
+
+        # Wake up in time to report the next expiry promptly
+        if alerts:
+            now = datetime.now(timezone.utc)
+            soonest = min((alert.end_time - now).total_seconds() for alert in alerts)
+            interval = min(interval, max(soonest, 30))
+        return interval
+
+    def get_active_alerts(self, location: Optional[str] = None) -> List[WeatherAlert]:
+        """Currently active alerts, most severe first."""
+        if location is not None:
+            alerts = list(self.active.get(location, {}).values())
+        else:
+            alerts = [alert for location_alerts in self.active.values() for alert in location_alerts.values()]
+        return sorted(alerts, key=lambda alert: (-SEVERITIES.index(alert.severity), alert.start_time))
+
+    def get_events_since(self, sequence: int) -> Optional[List[Dict[str, Any]]]:
+        """Events after a sequence number, or None if they are no longer retained."""
+        if sequence > self.sequence or (self.events and sequence < self.events[0]["id"] - 1):
+            return None
+        return [event for event in self.events if event["id"] > sequence]
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue of new events for a stream; None means the subscriber fell behind and was dropped."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "provider": self.source.name,
+            "running": self._task is not None and not self._task.done(),
+            "polling": self.polling,
+            "polls": self.polls,
+            "last_poll": self.last_poll.isoformat() if self.last_poll else None,
+            "next_interval": self.next_interval(),
+            "active": len(self.get_active_alerts()),
+            "consecutive_errors": self.consecutive_errors,
+            "last_error": self.last_error,
+            "sequence": self.sequence
+        }
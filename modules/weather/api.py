@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Any, List, Optional
+from email.utils import parsedate_to_datetime
+import asyncio
+import json
 import logging
-from .service import WeatherService
-from .models import WeatherResponse, WeatherConfig
+from .service import EncodedPayload, WeatherService
+from .models import WeatherResponse, WeatherConfig, WeatherLocation
+from .history import MAX_TREND_DAYS
+from ..common.response_cache import response_cache
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
@@ -11,26 +19,182 @@ router = APIRouter(prefix="/api/weather", tags=["weather"])
 # Initialize weather service
 weather_service = WeatherService()
 
+def _alerts_version() -> Optional[str]:
+    monitor = weather_service.alerts
+    if not monitor:
+        return None
+    # Every poll updates last_poll; every event bumps the sequence
+    return f"{versions.version('weather_config')}.{monitor.polls}.{monitor.sequence}"
+
+# Conditional GET for reads without their own ETag (/current and /forecast have one)
+versions.register("/api/weather/config", "weather_config")
+versions.register("/api/weather/locations", "weather_config")
+versions.register("/api/weather/alerts", _alerts_version)
+response_cache.register("/api/weather/config", ttl=3600, scopes=("weather_config",))
+
+def _check_location(location: Optional[str]) -> None:
+    if location is not None and not weather_service.has_location(location):
+        raise HTTPException(status_code=404, detail=f"Unknown location '{location}'")
+
+def _not_modified(request: Request, payload: EncodedPayload) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: compression middleware marks encoded ETags as W/
+        tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        return if_none_match.strip() == "*" or payload.etag in tags
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(payload.last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _encoded_response(request: Request, payload: EncodedPayload) -> Response:
+    """Serve pre-serialized JSON, or 304 when the client's copy is current."""
+    headers = {
+        "ETag": payload.etag,
+        "Last-Modified": payload.last_modified,
+        "Cache-Control": "no-cache"  # Always revalidate; the 304 is cheap
+    }
+    if _not_modified(request, payload):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
 @router.get("/current", response_model=WeatherResponse)
-async def get_current_weather() -> WeatherResponse:
+async def get_current_weather(request: Request, location: Optional[str] = None) -> Response:
     """Get current weather data."""
+    _check_location(location)
     try:
-        weather_data = await weather_service.get_current_weather()
-        return weather_data
+        payload = await weather_service.get_current_weather_encoded(location)
+        return _encoded_response(request, payload)
     except Exception as e:
         logger.error(f"Failed to get current weather: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch weather data")
 
 @router.get("/forecast")
-async def get_weather_forecast(days: int = 3) -> Dict[str, Any]:
+async def get_weather_forecast(request: Request, days: int = 3, location: Optional[str] = None) -> Response:
     """Get weather forecast for upcoming days."""
+    _check_location(location)
     try:
-        forecast_data = await weather_service.get_forecast(days)
-        return forecast_data
+        payload = await weather_service.get_forecast_encoded(days, location)
+        return _encoded_response(request, payload)
     except Exception as e:
         logger.error(f"Failed to get weather forecast: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch forecast data")
 
+@router.get("/batch")
+async def get_weather_batch() -> Dict[str, Any]:
+    """Get current weather for all configured locations."""
+    try:
+        return await weather_service.get_weather_batch()
+    except Exception as e:
+        logger.error(f"Failed to get weather batch: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch weather data")
+
+@router.get("/trends")
+async def get_weather_trends(days: int = Query(7, ge=1, le=MAX_TREND_DAYS), resolution: str = "hourly",
+                             location: Optional[str] = None) -> Dict[str, Any]:
+    """Get min/max/mean temperature trends from recorded observations."""
+    _check_location(location)
+    if resolution not in ("hourly", "daily"):
+        raise HTTPException(status_code=400, detail="Resolution must be 'hourly' or 'daily'")
+    try:
+        return await weather_service.get_trends(days, resolution, location)
+    except Exception as e:
+        logger.error(f"Failed to get weather trends: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get weather trends")
+
+@router.get("/sun")
+async def get_sun_schedule(days: int = 1, location: Optional[str] = None) -> Dict[str, Any]:
+    """Get sunrise/sunset/twilight times and the night-mode window (computed offline)."""
+    _check_location(location)
+    if not 1 <= days <= 366:
+        raise HTTPException(status_code=400, detail="Days must be between 1 and 366")
+    try:
+        return weather_service.get_sun_schedule(days, location)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to get sun schedule: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute sun schedule")
+
+def _require_alerts():
+    if not weather_service.alerts:
+        raise HTTPException(status_code=503, detail="Weather alerts are disabled")
+    return weather_service.alerts
+
+@router.get("/alerts")
+async def get_weather_alerts(location: Optional[str] = None) -> Dict[str, Any]:
+    """Get currently active weather alerts, most severe first."""
+    _check_location(location)
+    monitor = _require_alerts()
+    return {
+        "alerts": monitor.get_active_alerts(location),
+        "sequence": monitor.sequence,
+        "last_poll": monitor.last_poll.isoformat() if monitor.last_poll else None
+    }
+
+@router.get("/alerts/events")
+async def get_weather_alert_events(since: int = 0) -> Dict[str, Any]:
+    """Get new/changed/expired alert events after a sequence number."""
+    monitor = _require_alerts()
+    events = monitor.get_events_since(since)
+    return {
+        "events": events if events is not None else [],
+        "resync": events is None,  # Missed events were dropped; re-read /alerts
+        "sequence": monitor.sequence
+    }
+
+def _sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/alerts/stream")
+async def stream_weather_alerts(request: Request) -> StreamingResponse:
+    """Server-sent events stream of alert changes.
+    
+    Starts with a snapshot of the active alerts (or, when reconnecting with
+    Last-Event-ID, the missed events) and then pushes each change as it is seen.
+    """
+    monitor = _require_alerts()
+    
+    async def event_stream() -> AsyncIterator[str]:
+        queue = monitor.subscribe()
+        try:
+            missed = None
+            last_event_id = request.headers.get("last-event-id")
+            if last_event_id and last_event_id.isdigit():
+                missed = monitor.get_events_since(int(last_event_id))
+            
+            if missed is None:
+                yield _sse("snapshot", {"alerts": monitor.get_active_alerts()}, monitor.sequence)
+            else:
+                for event in missed:
+                    yield _sse("alert", event, event["id"])
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=30)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break  # Fell behind; the client reconnects with Last-Event-ID
+                yield _sse("alert", event, event["id"])
+        finally:
+            monitor.unsubscribe(queue)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/locations")
+async def get_weather_locations() -> List[WeatherLocation]:
+    """Get configured weather locations."""
+    return weather_service.get_locations()
+
 @router.get("/config")
 async def get_weather_config() -> WeatherConfig:
     """Get current weather configuration."""
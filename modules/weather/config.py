@@ -1,11 +1,18 @@
 import os
 import json
 import logging
-from typing import Optional
+from typing import List, Optional
 from .models import WeatherConfig
 
 logger = logging.getLogger(__name__)
 
+def _place_key(name: str) -> List[str]:
+    """Comparable form of a place name: Medford,NJ,US and "Medford, NJ" give the same key."""
+    parts = [part.strip().lower() for part in name.split(",") if part.strip()]
+    if len(parts) > 2 and parts[-1] in ("us", "usa"):
+        parts = parts[:-1]
+    return parts
+
 class WeatherConfigManager:
     """Manages weather service configuration."""
     
@@ -29,11 +36,23 @@ class WeatherConfigManager:
         # Override with environment variables if available
         env_config = {
             "api_key": os.getenv("OPENWEATHER_API_KEY"),
-            "location": os.getenv("WEATHER_LOCATION", config_data.get("location", "London,UK")),
             "units": os.getenv("WEATHER_UNITS", config_data.get("units", "imperial")),
             "update_interval": int(os.getenv("WEATHER_UPDATE_INTERVAL", 
                                           config_data.get("update_interval", 900))),  # 15 minutes = ~96 calls/day
-            "provider": os.getenv("WEATHER_PROVIDER", config_data.get("provider", "openweathermap"))
+            "provider": os.getenv("WEATHER_PROVIDER", config_data.get("provider", "openweathermap")),
+            "fetch_mode": os.getenv("WEATHER_FETCH_MODE", config_data.get("fetch_mode", "onecall")),
+            "api_base_url": os.getenv("WEATHER_API_BASE_URL",
+                                      config_data.get("api_base_url", "https://api.openweathermap.org")),
+            "max_concurrent_fetches": int(os.getenv("WEATHER_MAX_CONCURRENT_FETCHES",
+                                                    config_data.get("max_concurrent_fetches", 3))),
+            "backup_providers": [name.strip() for name in os.getenv("WEATHER_BACKUP_PROVIDERS").split(",") if name.strip()]
+                                if os.getenv("WEATHER_BACKUP_PROVIDERS") is not None
+                                else config_data.get("backup_providers", ["openmeteo"]),
+            "openmeteo_base_url": os.getenv("OPENMETEO_BASE_URL",
+                                            config_data.get("openmeteo_base_url", "https://api.open-meteo.com")),
+            "alerts_provider": os.getenv("WEATHER_ALERTS_PROVIDER", config_data.get("alerts_provider", "nws")),
+            "alerts_base_url": os.getenv("WEATHER_ALERTS_BASE_URL",
+                                         config_data.get("alerts_base_url", "https://api.weather.gov"))
         }
         
         # Merge configs (env variables take precedence)
@@ -41,8 +60,59 @@ class WeatherConfigManager:
             if value is not None:
                 config_data[key] = value
         
+        # A single place (WEATHER_LOCATION, or "location" in an older config file) is a one-entry list
+        single = os.getenv("WEATHER_LOCATION") or config_data.pop("location", None)
+        env_locations = self._parse_locations(os.getenv("WEATHER_LOCATIONS"))
+        if env_locations:
+            config_data["locations"] = env_locations
+        elif "locations" not in config_data and single:
+            config_data["locations"] = [self._single_location(single)]
+        
         return WeatherConfig(**config_data)
     
+    def _single_location(self, name: str) -> dict:
+        """Location for a place given only by name; the default place keeps its coordinates.
+        
+        Any other name is used as a city query, which turns off One Call, the
+        Open-Meteo backup, sun times and alerts, as those need coordinates.
+        """
+        default = WeatherConfig().locations[0]
+        if _place_key(name) == _place_key(default.name):
+            return default.model_dump()
+        logger.warning(f"WEATHER_LOCATION={name} has no coordinates, so sun times, alerts and the backup "
+                       f"provider are off; set WEATHER_LOCATIONS=\"Home=<lat>,<lon>\" to turn them on")
+        return {"name": name}
+    
+    def _parse_locations(self, value: Optional[str]) -> List[dict]:
+        """Parse WEATHER_LOCATIONS, e.g. "Home=39.9009,-74.8234;School=39.91,-74.80;Boston,MA"."""
+        locations = []
+        if not value:
+            return locations
+        
+        for entry in value.split(";"):
+            entry = entry.strip()
+            if not entry:
+                continue
+            
+            if "=" in entry:
+                name, coords = entry.split("=", 1)
+                try:
+                    lat, lon = (float(part) for part in coords.split(","))
+                    locations.append({"name": name.strip(), "lat": lat, "lon": lon})
+                except ValueError:
+                    logger.warning(f"Ignoring weather location with invalid coordinates: {entry}")
+            else:
+                locations.append({"name": entry})
+        
+        # Names key the per-location caches; a repeated one would fail validation at startup
+        unique = {}
+        for location in locations:
+            if location["name"] in unique:
+                logger.warning(f"Ignoring repeated weather location: {location['name']}")
+            else:
+                unique[location["name"]] = location
+        return list(unique.values())
+    
     def save_config(self, config: WeatherConfig) -> None:
         """Save weather configuration to file."""
         try:
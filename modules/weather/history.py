@@ -0,0 +1,222 @@
+import os
+import sqlite3
+import logging
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+import numpy as np
+from .models import WeatherResponse
+
+logger = logging.getLogger(__name__)
+
+# Retention per resolution (seconds)
+RAW_RETENTION = 2 * 24 * 3600  # 2 days of individual observations
+HOURLY_RETENTION = 35 * 24 * 3600  # 5 weeks of hourly rollups
+DAILY_RETENTION = 2 * 365 * 24 * 3600  # 2 years of daily rollups
+PRUNE_INTERVAL = 3600  # Prune at most once an hour
+MAX_TREND_DAYS = DAILY_RETENTION // (24 * 3600)  # Nothing older is kept
+
+ROLLUP_TABLES = {"hourly": "weather_hourly", "daily": "weather_daily"}
+
+
+class WeatherHistoryStore:
+    """Compact time-series store for weather observations.
+
+    Observations are kept as small fixed-width rows (integer location id,
+    epoch seconds, values in tenths) in WITHOUT ROWID tables. Every append
+    also folds the observation into hourly and daily rollups, so trend
+    queries never scan raw history and raw rows can be pruned early.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("WEATHER_HISTORY_DB", "weather_history.db")
+        self._location_ids: Dict[str, int] = {}
+        self._last_prune = 0.0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self) -> None:
+        """Create history tables if needed."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS weather_locations (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS weather_raw (
+                    location_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    temp INTEGER NOT NULL,
+                    humidity INTEGER NOT NULL,
+                    pressure INTEGER NOT NULL,
+                    wind_speed INTEGER NOT NULL,
+                    PRIMARY KEY (location_id, ts)
+                ) WITHOUT ROWID
+            """)
+            for table in ROLLUP_TABLES.values():
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        location_id INTEGER NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        count INTEGER NOT NULL,
+                        temp_sum INTEGER NOT NULL,
+                        temp_min INTEGER NOT NULL,
+                        temp_max INTEGER NOT NULL,
+                        humidity_sum INTEGER NOT NULL,
+                        PRIMARY KEY (location_id, bucket)
+                    ) WITHOUT ROWID
+                """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _location_id(self, cursor: sqlite3.Cursor, name: str) -> int:
+        if name not in self._location_ids:
+            cursor.execute("INSERT OR IGNORE INTO weather_locations (name) VALUES (?)", (name,))
+            cursor.execute("SELECT id FROM weather_locations WHERE name = ?", (name,))
+            self._location_ids[name] = cursor.fetchone()[0]
+        return self._location_ids[name]
+
+    def record(self, location: str, weather: WeatherResponse) -> None:
+        """Append an observation and update its hourly/daily rollups.
+        
+        An observation already recorded (the same location and timestamp,
+        e.g. from a refresh race or another worker) is ignored, so it is
+        never counted twice.
+        """
+        observed = weather.timestamp
+        ts = int(observed.timestamp())
+        temp = round(weather.temperature.current * 10)
+        humidity = int(weather.humidity)
+        buckets = {
+            "hourly": ts - ts % 3600,
+            "daily": int(datetime.combine(observed.date(), datetime.min.time()).timestamp())
+        }
+
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            location_id = self._location_id(cursor, location)
+            cursor.execute(
+                "INSERT OR IGNORE INTO weather_raw VALUES (?, ?, ?, ?, ?, ?)",
+                (location_id, ts, temp, humidity,
+                 round(weather.pressure * 10), round(weather.wind_speed * 10))
+            )
+            if cursor.rowcount != 1:
+                return
+            for resolution, table in ROLLUP_TABLES.items():
+                cursor.execute(f"""
+                    INSERT INTO {table} VALUES (?, ?, 1, ?, ?, ?, ?)
+                    ON CONFLICT (location_id, bucket) DO UPDATE SET
+                        count = count + 1,
+                        temp_sum = temp_sum + excluded.temp_sum,
+                        temp_min = MIN(temp_min, excluded.temp_min),
+                        temp_max = MAX(temp_max, excluded.temp_max),
+                        humidity_sum = humidity_sum + excluded.humidity_sum
+                """, (location_id, buckets[resolution], temp, temp, temp, humidity))
+
+            if ts - self._last_prune >= PRUNE_INTERVAL:
+                self._prune(cursor, ts)
+                self._last_prune = ts
+
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _prune(self, cursor: sqlite3.Cursor, now: int) -> None:
+        """Drop rows past their retention window."""
+        cursor.execute("DELETE FROM weather_raw WHERE ts < ?", (now - RAW_RETENTION,))
+        cursor.execute("DELETE FROM weather_hourly WHERE bucket < ?", (now - HOURLY_RETENTION,))
+        cursor.execute("DELETE FROM weather_daily WHERE bucket < ?", (now - DAILY_RETENTION,))
+
+    def _load_rollups(self, location: str, resolution: str, since: int) -> np.ndarray:
+        """Load rollup rows as an (n, 6) array: bucket, count, sum, min, max, humidity_sum."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(f"""
+                SELECT r.bucket, r.count, r.temp_sum, r.temp_min, r.temp_max, r.humidity_sum
+                FROM {ROLLUP_TABLES[resolution]} r
+                JOIN weather_locations l ON l.id = r.location_id
+                WHERE l.name = ? AND r.bucket >= ?
+                ORDER BY r.bucket
+            """, (location, since)).fetchall()
+        finally:
+            conn.close()
+        return np.array(rows, dtype=np.float64).reshape(-1, 6)
+
+    def get_trends(self, location: str, days: int = 7, resolution: str = "hourly") -> Dict[str, Any]:
+        """Compute min/max/mean temperature trends from the rollup tables."""
+        if resolution not in ROLLUP_TABLES:
+            raise ValueError(f"Unknown resolution '{resolution}'")
+
+        since = int((datetime.now() - timedelta(days=days)).timestamp())
+        data = self._load_rollups(location, resolution, since)
+
+        series: List[Dict[str, Any]] = []
+        summary = None
+        if len(data):
+            buckets, counts, sums, mins, maxs, humidity = data.T
+            means = sums / counts / 10
+            series = [
+                {
+                    "time": datetime.fromtimestamp(bucket).isoformat(),
+                    "min": round(low, 1),
+                    "max": round(high, 1),
+                    "mean": round(mean, 1),
+                    "humidity": round(hum, 1),
+                    "samples": int(count)
+                }
+                for bucket, low, high, mean, hum, count in zip(
+                    buckets.tolist(), (mins / 10).tolist(), (maxs / 10).tolist(),
+                    means.tolist(), (humidity / counts).tolist(), counts.tolist()
+                )
+            ]
+            summary = {
+                "min": round(float(mins.min()) / 10, 1),
+                "max": round(float(maxs.max()) / 10, 1),
+                "mean": round(float(sums.sum() / counts.sum()) / 10, 1),
+                "samples": int(counts.sum())
+            }
+
+        return {
+            "location": location,
+            "resolution": resolution,
+            "days": days,
+            "summary": summary,
+            "series": series,
+            "compared_to_yesterday": self._compare_to_yesterday(location)
+        }
+
+    def _compare_to_yesterday(self, location: str) -> Optional[Dict[str, Any]]:
+        """Today's mean temperature versus yesterday's, from the daily rollup."""
+        today = datetime.now().date()
+        today_bucket = int(datetime.combine(today, datetime.min.time()).timestamp())
+        yesterday_bucket = int(datetime.combine(today - timedelta(days=1), datetime.min.time()).timestamp())
+        data = self._load_rollups(location, "daily", yesterday_bucket)
+        if len(data) < 2 or data[-2, 0] != yesterday_bucket or data[-1, 0] != today_bucket:
+            return None
+
+        means = data[-2:, 2] / data[-2:, 1] / 10
+        difference = round(float(means[1] - means[0]), 1)
+        return {
+            "today_mean": round(float(means[1]), 1),
+            "yesterday_mean": round(float(means[0]), 1),
+            "difference": difference,
+            "trend": "warmer" if difference > 0 else "cooler" if difference < 0 else "same"
+        }
+
+    def get_stats(self) -> Dict[str, int]:
+        """Row counts per table."""
+        conn = self._connect()
+        try:
+            return {
+                table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("weather_raw", "weather_hourly", "weather_daily")
+            }
+        finally:
+            conn.close()
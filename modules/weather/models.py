@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -16,6 +16,18 @@ class Temperature(BaseModel):
     max: float
     unit: str = "°C"
 
+class SunTimes(BaseModel):
+    """Computed sun events for one day (UTC); None when the sun never crosses that altitude."""
+    date: str
+    civil_dawn: Optional[datetime] = None
+    sunrise: Optional[datetime] = None
+    solar_noon: datetime
+    sunset: Optional[datetime] = None
+    civil_dusk: Optional[datetime] = None
+    day_length: int  # seconds
+    polar_day: bool = False
+    polar_night: bool = False
+
 class WeatherResponse(BaseModel):
     """Current weather response model."""
     location: str
@@ -28,6 +40,7 @@ class WeatherResponse(BaseModel):
     wind_direction: int  # degrees
     visibility: Optional[float] = None  # km
     uv_index: Optional[float] = None
+    sun: Optional[SunTimes] = None  # Computed locally, only for locations with coordinates
 
 class ForecastDay(BaseModel):
     """Single day forecast."""
@@ -39,22 +52,60 @@ class ForecastDay(BaseModel):
     humidity: int
     wind_speed: float
 
+class WeatherLocation(BaseModel):
+    """Named location shown on the dashboard."""
+    name: str  # e.g., "Home", "Grandparents"
+    lat: Optional[float] = None
+    lon: Optional[float] = None  # Without coordinates the name is used as a city query
+
 class WeatherConfig(BaseModel):
     """Weather service configuration."""
     api_key: Optional[str] = None
-    location: str = "London,UK"  # Default location
+    # Medford, NJ coordinates avoid confusion with Medford, OR; first entry is the primary location
+    locations: List[WeatherLocation] = [WeatherLocation(name="Medford, NJ", lat=39.9009, lon=-74.8234)]
+    max_concurrent_fetches: int = 3  # Upstream requests in flight across all locations
     units: str = "metric"  # metric, imperial, standard
     update_interval: int = 300  # seconds (5 minutes)
     provider: str = "openweathermap"  # weather service provider
+    backup_providers: List[str] = ["openmeteo"]  # hedged/failover providers, in order
+    hedge_delay: float = 2.0  # seconds before hedging until enough latency samples exist
+    hedge_percentile: float = 95  # primary latency percentile that triggers a hedge
+    circuit_failure_threshold: int = 3  # consecutive failures before a provider is skipped
+    circuit_reset_timeout: int = 300  # seconds a failing provider is skipped
+    openmeteo_base_url: str = "https://api.open-meteo.com"
+    fetch_mode: str = "onecall"  # onecall (single combined request) or split (current + forecast)
+    api_base_url: str = "https://api.openweathermap.org"
+    night_mode: bool = True  # Dim the kiosk between civil dusk and dawn
+    night_brightness: float = 0.35  # Display brightness while dimmed (0-1)
+    alerts_enabled: bool = True
+    alerts_provider: str = "nws"  # nws (US, free) or openweathermap (One Call 3.0)
+    alerts_base_url: str = "https://api.weather.gov"
+    alerts_idle_interval: int = 900  # seconds between polls with no active alerts
+    alerts_active_interval: int = 300  # with active alerts
+    alerts_severe_interval: int = 120  # with severe/extreme alerts
+
+    @field_validator("locations")
+    @classmethod
+    def _locations_named_once(cls, locations: List[WeatherLocation]) -> List[WeatherLocation]:
+        # The first location is the primary one, and each name keys its own cache
+        if not locations:
+            raise ValueError("at least one location is required")
+        names = [location.name for location in locations]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"location names must be unique: {', '.join(duplicates)}")
+        return locations
 
 class WeatherAlert(BaseModel):
     """Weather alert/warning."""
+    id: str = ""  # Stable key across feed updates of the same alert
     title: str
     description: str
     severity: str  # minor, moderate, severe, extreme
     start_time: datetime
     end_time: datetime
     areas: List[str]
+    sender: Optional[str] = None
 
 class WeatherStatus(BaseModel):
     """Weather service status."""
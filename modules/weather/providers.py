@@ -0,0 +1,584 @@
+import asyncio
+import aiohttp
+import logging
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from .models import WeatherResponse, WeatherConfig, WeatherCondition, WeatherLocation, Temperature
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Tuple[WeatherResponse, Optional[Dict[str, Any]]]
+
+# How long to use split requests after One Call rejects the key before trying it again
+ONECALL_RETRY_SECONDS = 3600
+
+
+class OneCallUnavailableError(ValueError):
+    """Raised when the One Call endpoint rejects the request (e.g. no subscription)."""
+
+
+class WeatherProvider:
+    """Base class for upstream weather providers.
+    
+    fetch_current returns the current conditions and, for providers that get
+    both from one request, the forecast payload in the same shape as
+    OpenWeatherMapProvider._parse_forecast_data (otherwise None).
+    """
+    
+    name = "base"
+    
+    def __init__(self, config: WeatherConfig, get_session: Callable[[], aiohttp.ClientSession]):
+        self.config = config
+        self._get_session = get_session
+    
+    def supports(self, location: WeatherLocation) -> bool:
+        """Check if this provider can serve a location."""
+        return True
+    
+    def includes_forecast(self, location: WeatherLocation) -> bool:
+        """Check if fetch_current also returns the forecast."""
+        return False
+    
+    async def fetch_current(self, location: WeatherLocation) -> Snapshot:
+        raise NotImplementedError
+    
+    async def fetch_forecast(self, location: WeatherLocation, days: int) -> Dict[str, Any]:
+        raise NotImplementedError
+    
+    def _temperature_unit(self) -> str:
+        return "F" if self.config.units == "imperial" else "C"
+
+
+class OpenWeatherMapProvider(WeatherProvider):
+    """OpenWeatherMap provider using One Call with a split-request fallback."""
+    
+    name = "openweathermap"
+    
+    def __init__(self, config: WeatherConfig, get_session: Callable[[], aiohttp.ClientSession]):
+        super().__init__(config, get_session)
+        self._onecall_retry_at = 0.0  # time.monotonic() before which One Call is skipped
+    
+    @property
+    def onecall_available(self) -> bool:
+        return time.monotonic() >= self._onecall_retry_at
+    
+    def includes_forecast(self, location: WeatherLocation) -> bool:
+        return self._use_onecall(location)
+    
+    def _use_onecall(self, location: WeatherLocation) -> bool:
+        """Check if the combined One Call request should be used."""
+        # One Call only accepts coordinates, name-only locations use split requests
+        return (self.config.fetch_mode == "onecall" and self.onecall_available
+                and location.lat is not None and location.lon is not None)
+    
+    async def fetch_current(self, location: WeatherLocation) -> Snapshot:
+        if self._use_onecall(location):
+            try:
+                return await self._fetch_onecall_data(location)
+            except OneCallUnavailableError as e:
+                logger.warning(f"One Call API unavailable ({e}), using split requests "
+                               f"for the next {ONECALL_RETRY_SECONDS}s")
+                self._onecall_retry_at = time.monotonic() + ONECALL_RETRY_SECONDS
+        
+        return await self._fetch_weather_data(location), None
+    
+    async def fetch_forecast(self, location: WeatherLocation, days: int) -> Dict[str, Any]:
+        return await self._fetch_forecast_data(location, days)
+    
+    async def _request_json(self, path: str, location: WeatherLocation, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Issue a GET request against the weather API and return the decoded body."""
+        url = f"{self.config.api_base_url.rstrip('/')}{path}"
+        if location.lat is not None and location.lon is not None:
+            location_params = {"lat": location.lat, "lon": location.lon}
+        else:
+            location_params = {"q": location.name}
+        
+        request_params = {
+            **location_params,
+            "appid": self.config.api_key,
+            "units": self.config.units,
+            **params
+        }
+        
+        async with self._get_session().get(url, params=request_params) as response:
+            if response.status == 401:
+                raise ValueError("Invalid API key")
+            elif response.status == 404:
+                raise ValueError(f"Location '{location.name}' not found")
+            elif response.status != 200:
+                raise ValueError(f"API request failed with status {response.status}")
+            
+            return await response.json()
+    
+    async def _fetch_weather_data(self, location: WeatherLocation) -> WeatherResponse:
+        """Fetch weather data from OpenWeatherMap API."""
+        if not self.config.api_key:
+            raise ValueError("OpenWeatherMap API key not configured")
+        
+        data = await self._request_json("/data/2.5/weather", location, {})
+        return self._parse_weather_data(data, location.name)
+    
+    async def _fetch_forecast_data(self, location: WeatherLocation, days: int) -> Dict[str, Any]:
+        """Fetch 3-hour forecast data from OpenWeatherMap API."""
+        if not self.config.api_key:
+            raise ValueError("OpenWeatherMap API key not configured")
+        
+        data = await self._request_json("/data/2.5/forecast", location, {
+            "cnt": min(days * 8, 40)  # 8 forecasts per day (3-hour intervals), max 40
+        })
+        return self._parse_forecast_data(data, location.name)
+    
+    async def _fetch_onecall_data(self, location: WeatherLocation) -> Tuple[WeatherResponse, Dict[str, Any]]:
+        """Fetch current, hourly and daily weather in a single One Call request."""
+        if not self.config.api_key:
+            raise ValueError("OpenWeatherMap API key not configured")
+        
+        try:
+            data = await self._request_json("/data/3.0/onecall", location, {"exclude": "minutely"})
+        except ValueError as e:
+            # One Call 3.0 needs its own subscription; 401 here doesn't imply a bad key
+            if str(e) == "Invalid API key" or "status 403" in str(e):
+                raise OneCallUnavailableError(str(e))
+            raise
+        
+        return self._parse_onecall_current(data, location.name), self._parse_onecall_forecast(data, location.name)
+    
+    def _parse_weather_data(self, data: Dict[str, Any], location_name: Optional[str] = None) -> WeatherResponse:
+        """Parse OpenWeatherMap API response into WeatherResponse model."""
+        try:
+            # Extract temperature data
+            temp_data = data["main"]
+            temperature = Temperature(
+                current=round(temp_data["temp"], 1),
+                feels_like=round(temp_data["feels_like"], 1),
+                min=round(temp_data["temp_min"], 1),
+                max=round(temp_data["temp_max"], 1),
+                unit=self._temperature_unit()
+            )
+            
+            # Extract weather condition
+            weather_info = data["weather"][0]
+            condition = WeatherCondition(
+                main=weather_info["main"],
+                description=weather_info["description"].title(),
+                icon=weather_info["icon"]
+            )
+            
+            # Extract other data
+            wind_data = data.get("wind", {})
+            
+            return WeatherResponse(
+                location=location_name or f"{data['name']}, {data['sys']['country']}",
+                timestamp=datetime.now(),
+                temperature=temperature,
+                condition=condition,
+                humidity=temp_data["humidity"],
+                pressure=temp_data["pressure"],
+                wind_speed=round(wind_data.get("speed", 0), 1),
+                wind_direction=wind_data.get("deg", 0),
+                visibility=round(data.get("visibility", 0) / 1000, 1),  # Convert m to km
+                uv_index=None  # Would need separate UV API call
+            )
+            
+        except KeyError as e:
+            raise ValueError(f"Unexpected API response format: missing {e}")
+    
+    def _parse_forecast_data(self, data: Dict[str, Any], location_name: Optional[str] = None) -> Dict[str, Any]:
+        """Parse OpenWeatherMap forecast API response."""
+        try:
+            forecasts = []
+            daily_forecasts = {}
+            
+            for item in data["list"]:
+                # Parse each 3-hour forecast item
+                dt = datetime.fromtimestamp(item["dt"])
+                date_key = dt.strftime("%Y-%m-%d")
+                
+                forecast_item = {
+                    "datetime": dt.isoformat(),
+                    "date": date_key,
+                    "time": dt.strftime("%H:%M"),
+                    "temperature": round(item["main"]["temp"], 1),
+                    "feels_like": round(item["main"]["feels_like"], 1),
+                    "humidity": item["main"]["humidity"],
+                    "condition": item["weather"][0]["main"],
+                    "description": item["weather"][0]["description"].title(),
+                    "icon": item["weather"][0]["icon"],
+                    "wind_speed": item.get("wind", {}).get("speed", 0),
+                    "precipitation": item.get("rain", {}).get("3h", 0) + item.get("snow", {}).get("3h", 0)
+                }
+                
+                forecasts.append(forecast_item)
+                
+                # Group by day for daily summaries
+                if date_key not in daily_forecasts:
+                    daily_forecasts[date_key] = {
+                        "date": date_key,
+                        "day_name": dt.strftime("%A"),
+                        "temps": [],
+                        "conditions": [],
+                        "precipitation": 0,
+                        "humidity": []
+                    }
+                
+                daily_forecasts[date_key]["temps"].append(item["main"]["temp"])
+                daily_forecasts[date_key]["conditions"].append(item["weather"][0]["main"])
+                daily_forecasts[date_key]["precipitation"] += forecast_item["precipitation"]
+                daily_forecasts[date_key]["humidity"].append(item["main"]["humidity"])
+            
+            # Calculate daily summaries
+            daily_summaries = []
+            for date_key, day_data in daily_forecasts.items():
+                daily_summary = {
+                    "date": date_key,
+                    "day_name": day_data["day_name"],
+                    "temp_min": round(min(day_data["temps"]), 1),
+                    "temp_max": round(max(day_data["temps"]), 1),
+                    "condition": max(set(day_data["conditions"]), key=day_data["conditions"].count),
+                    "precipitation": round(day_data["precipitation"], 1),
+                    "avg_humidity": round(sum(day_data["humidity"]) / len(day_data["humidity"]), 1)
+                }
+                daily_summaries.append(daily_summary)
+            
+            return {
+                "location": location_name or f"{data['city']['name']}, {data['city']['country']}",
+                "hourly_forecasts": forecasts,
+                "daily_summaries": daily_summaries[:5],  # Limit to 5 days
+                "updated": datetime.now().isoformat()
+            }
+            
+        except (KeyError, IndexError, TypeError) as e:
+            # Raised, not returned, so hedging and the circuit breaker see the failure
+            raise ValueError(f"Unexpected forecast response format: {e!r}")
+    
+    def _parse_onecall_current(self, data: Dict[str, Any], location_name: str) -> WeatherResponse:
+        """Parse the current block of a One Call response into WeatherResponse model."""
+        try:
+            current = data["current"]
+            today = data["daily"][0]["temp"] if data.get("daily") else None
+            
+            temperature = Temperature(
+                current=round(current["temp"], 1),
+                feels_like=round(current["feels_like"], 1),
+                min=round(today["min"] if today else current["temp"], 1),
+                max=round(today["max"] if today else current["temp"], 1),
+                unit=self._temperature_unit()
+            )
+            
+            weather_info = current["weather"][0]
+            condition = WeatherCondition(
+                main=weather_info["main"],
+                description=weather_info["description"].title(),
+                icon=weather_info["icon"]
+            )
+            
+            return WeatherResponse(
+                location=location_name,
+                timestamp=datetime.now(),
+                temperature=temperature,
+                condition=condition,
+                humidity=current["humidity"],
+                pressure=current["pressure"],
+                wind_speed=round(current.get("wind_speed", 0), 1),
+                wind_direction=current.get("wind_deg", 0),
+                visibility=round(current.get("visibility", 0) / 1000, 1),  # Convert m to km
+                uv_index=current.get("uvi")
+            )
+            
+        except KeyError as e:
+            raise ValueError(f"Unexpected One Call response format: missing {e}")
+    
+    def _parse_onecall_forecast(self, data: Dict[str, Any], location_name: str) -> Dict[str, Any]:
+        """Parse One Call hourly/daily blocks into the same shape as _parse_forecast_data."""
+        try:
+            forecasts = []
+            for item in data.get("hourly", []):
+                dt = datetime.fromtimestamp(item["dt"])
+                forecasts.append({
+                    "datetime": dt.isoformat(),
+                    "date": dt.strftime("%Y-%m-%d"),
+                    "time": dt.strftime("%H:%M"),
+                    "temperature": round(item["temp"], 1),
+                    "feels_like": round(item["feels_like"], 1),
+                    "humidity": item["humidity"],
+                    "condition": item["weather"][0]["main"],
+                    "description": item["weather"][0]["description"].title(),
+                    "icon": item["weather"][0]["icon"],
+                    "wind_speed": item.get("wind_speed", 0),
+                    "precipitation": item.get("rain", {}).get("1h", 0) + item.get("snow", {}).get("1h", 0)
+                })
+            
+            daily_summaries = []
+            for item in data.get("daily", []):
+                dt = datetime.fromtimestamp(item["dt"])
+                daily_summaries.append({
+                    "date": dt.strftime("%Y-%m-%d"),
+                    "day_name": dt.strftime("%A"),
+                    "temp_min": round(item["temp"]["min"], 1),
+                    "temp_max": round(item["temp"]["max"], 1),
+                    "condition": item["weather"][0]["main"],
+                    "precipitation": round(item.get("rain", 0) + item.get("snow", 0), 1),
+                    "avg_humidity": round(float(item["humidity"]), 1)
+                })
+            
+            return {
+                "location": location_name,
+                "hourly_forecasts": forecasts,
+                "daily_summaries": daily_summaries[:5],  # Limit to 5 days
+                "updated": datetime.now().isoformat()
+            }
+            
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Unexpected One Call response format: missing {e}")
+    
+
+# WMO weather interpretation codes -> (main, description, icon) in OpenWeatherMap terms
+WMO_CONDITIONS = {
+    0: ("Clear", "clear sky", "01d"),
+    1: ("Clear", "mainly clear", "02d"),
+    2: ("Clouds", "partly cloudy", "03d"),
+    3: ("Clouds", "overcast", "04d"),
+    45: ("Fog", "fog", "50d"),
+    48: ("Fog", "depositing rime fog", "50d"),
+    51: ("Drizzle", "light drizzle", "09d"),
+    53: ("Drizzle", "drizzle", "09d"),
+    55: ("Drizzle", "dense drizzle", "09d"),
+    56: ("Drizzle", "freezing drizzle", "09d"),
+    57: ("Drizzle", "dense freezing drizzle", "09d"),
+    61: ("Rain", "light rain", "10d"),
+    63: ("Rain", "moderate rain", "10d"),
+    65: ("Rain", "heavy rain", "10d"),
+    66: ("Rain", "freezing rain", "13d"),
+    67: ("Rain", "heavy freezing rain", "13d"),
+    71: ("Snow", "light snow", "13d"),
+    73: ("Snow", "snow", "13d"),
+    75: ("Snow", "heavy snow", "13d"),
+    77: ("Snow", "snow grains", "13d"),
+    80: ("Rain", "light rain showers", "09d"),
+    81: ("Rain", "rain showers", "09d"),
+    82: ("Rain", "violent rain showers", "09d"),
+    85: ("Snow", "snow showers", "13d"),
+    86: ("Snow", "heavy snow showers", "13d"),
+    95: ("Thunderstorm", "thunderstorm", "11d"),
+    96: ("Thunderstorm", "thunderstorm with hail", "11d"),
+    99: ("Thunderstorm", "thunderstorm with heavy hail", "11d"),
+}
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """Open-Meteo provider (no API key, current + hourly + daily in one request)."""
+    
+    name = "openmeteo"
+    
+    def supports(self, location: WeatherLocation) -> bool:
+        # Open-Meteo has no city-name lookup on the forecast endpoint
+        return location.lat is not None and location.lon is not None
+    
+    def includes_forecast(self, location: WeatherLocation) -> bool:
+        return True
+    
+    async def fetch_current(self, location: WeatherLocation) -> Snapshot:
+        data = await self._request_json(location)
+        return self._parse_current(data, location.name), self._parse_forecast(data, location.name)
+    
+    async def fetch_forecast(self, location: WeatherLocation, days: int) -> Dict[str, Any]:
+        return self._parse_forecast(await self._request_json(location), location.name)
+    
+    async def _request_json(self, location: WeatherLocation) -> Dict[str, Any]:
+        """Fetch the combined forecast document for a location."""
+        if not self.supports(location):
+            raise ValueError(f"Open-Meteo needs coordinates for '{location.name}'")
+        
+        imperial = self.config.units == "imperial"
+        params = {
+            "latitude": location.lat,
+            "longitude": location.lon,
+            "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,"
+                       "surface_pressure,wind_speed_10m,wind_direction_10m",
+            "hourly": "temperature_2m,apparent_temperature,relative_humidity_2m,weather_code,"
+                      "wind_speed_10m,precipitation",
+            "daily": "weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum,"
+                     "relative_humidity_2m_mean",
+            "temperature_unit": "fahrenheit" if imperial else "celsius",
+            "wind_speed_unit": "mph" if imperial else "ms",
+            "timeformat": "unixtime",
+            "timezone": "auto",
+            "forecast_days": 6
+        }
+        
+        url = f"{self.config.openmeteo_base_url.rstrip('/')}/v1/forecast"
+        async with self._get_session().get(url, params=params) as response:
+            if response.status != 200:
+                raise ValueError(f"Open-Meteo request failed with status {response.status}")
+            return await response.json()
+    
+    def _condition(self, code: int) -> WeatherCondition:
+        main, description, icon = WMO_CONDITIONS.get(int(code), ("Unknown", "unknown", "01d"))
+        return WeatherCondition(main=main, description=description.title(), icon=icon)
+    
+    def _parse_current(self, data: Dict[str, Any], location_name: str) -> WeatherResponse:
+        """Parse the current block of an Open-Meteo response into WeatherResponse model."""
+        try:
+            current = data["current"]
+            daily = data.get("daily", {})
+            temp = current["temperature_2m"]
+            
+            return WeatherResponse(
+                location=location_name,
+                timestamp=datetime.now(),
+                temperature=Temperature(
+                    current=round(temp, 1),
+                    feels_like=round(current["apparent_temperature"], 1),
+                    min=round(daily["temperature_2m_min"][0] if daily else temp, 1),
+                    max=round(daily["temperature_2m_max"][0] if daily else temp, 1),
+                    unit=self._temperature_unit()
+                ),
+                condition=self._condition(current["weather_code"]),
+                humidity=int(current["relative_humidity_2m"]),
+                pressure=current["surface_pressure"],
+                wind_speed=round(current.get("wind_speed_10m", 0), 1),
+                wind_direction=int(current.get("wind_direction_10m", 0))
+            )
+            
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Unexpected Open-Meteo response format: missing {e}")
+    
+    def _parse_forecast(self, data: Dict[str, Any], location_name: str) -> Dict[str, Any]:
+        """Parse Open-Meteo hourly/daily arrays into the shared forecast shape."""
+        try:
+            hourly = data["hourly"]
+            now = datetime.now().timestamp()
+            forecasts = []
+            for i, timestamp in enumerate(hourly["time"]):
+                if timestamp < now - 3600:
+                    continue  # Hourly data starts at local midnight
+                dt = datetime.fromtimestamp(timestamp)
+                condition = self._condition(hourly["weather_code"][i])
+                forecasts.append({
+                    "datetime": dt.isoformat(),
+                    "date": dt.strftime("%Y-%m-%d"),
+                    "time": dt.strftime("%H:%M"),
+                    "temperature": round(hourly["temperature_2m"][i], 1),
+                    "feels_like": round(hourly["apparent_temperature"][i], 1),
+                    "humidity": int(hourly["relative_humidity_2m"][i]),
+                    "condition": condition.main,
+                    "description": condition.description,
+                    "icon": condition.icon,
+                    "wind_speed": hourly["wind_speed_10m"][i],
+                    "precipitation": hourly["precipitation"][i] or 0
+                })
+                if len(forecasts) == 48:
+                    break
+            
+            daily = data["daily"]
+            daily_summaries = []
+            for i, timestamp in enumerate(daily["time"]):
+                dt = datetime.fromtimestamp(timestamp)
+                daily_summaries.append({
+                    "date": dt.strftime("%Y-%m-%d"),
+                    "day_name": dt.strftime("%A"),
+                    "temp_min": round(daily["temperature_2m_min"][i], 1),
+                    "temp_max": round(daily["temperature_2m_max"][i], 1),
+                    "condition": self._condition(daily["weather_code"][i]).main,
+                    "precipitation": round(daily["precipitation_sum"][i] or 0, 1),
+                    "avg_humidity": round(float(daily["relative_humidity_2m_mean"][i] or 0), 1)
+                })
+            
+            return {
+                "location": location_name,
+                "hourly_forecasts": forecasts,
+                "daily_summaries": daily_summaries[:5],  # Limit to 5 days
+                "updated": datetime.now().isoformat()
+            }
+            
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Unexpected Open-Meteo response format: missing {e}")
+
+
+class StubProvider(WeatherProvider):
+    """Offline provider returning canned data, for development and tests.
+    
+    latency and fail can be set on an instance to simulate a slow or broken upstream.
+    """
+    
+    name = "stub"
+    
+    def __init__(self, config: WeatherConfig, get_session: Callable[[], aiohttp.ClientSession]):
+        super().__init__(config, get_session)
+        self.latency = 0.0
+        self.fail = False
+        self.calls = 0
+    
+    def includes_forecast(self, location: WeatherLocation) -> bool:
+        return True
+    
+    async def fetch_current(self, location: WeatherLocation) -> Snapshot:
+        await self._simulate()
+        weather = WeatherResponse(
+            location=location.name,
+            timestamp=datetime.now(),
+            temperature=Temperature(current=20.0, feels_like=19.0, min=15.0, max=24.0,
+                                    unit=self._temperature_unit()),
+            condition=WeatherCondition(main="Clear", description="Clear Sky", icon="01d"),
+            humidity=50,
+            pressure=1013.0,
+            wind_speed=2.0,
+            wind_direction=180
+        )
+        return weather, self._forecast(location.name)
+    
+    async def fetch_forecast(self, location: WeatherLocation, days: int) -> Dict[str, Any]:
+        await self._simulate()
+        return self._forecast(location.name)
+    
+    async def _simulate(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise ValueError("Stub provider failure")
+    
+    def _forecast(self, location_name: str) -> Dict[str, Any]:
+        now = datetime.now().replace(minute=0, second=0, microsecond=0)
+        hours = [now.timestamp() + i * 3600 for i in range(48)]
+        return {
+            "location": location_name,
+            "hourly_forecasts": [{
+                "datetime": datetime.fromtimestamp(ts).isoformat(),
+                "date": datetime.fromtimestamp(ts).strftime("%Y-%m-%d"),
+                "time": datetime.fromtimestamp(ts).strftime("%H:%M"),
+                "temperature": 20.0,
+                "feels_like": 19.0,
+                "humidity": 50,
+                "condition": "Clear",
+                "description": "Clear Sky",
+                "icon": "01d",
+                "wind_speed": 2.0,
+                "precipitation": 0
+            } for ts in hours],
+            "daily_summaries": [{
+                "date": datetime.fromtimestamp(ts).strftime("%Y-%m-%d"),
+                "day_name": datetime.fromtimestamp(ts).strftime("%A"),
+                "temp_min": 15.0,
+                "temp_max": 24.0,
+                "condition": "Clear",
+                "precipitation": 0,
+                "avg_humidity": 50.0
+            } for ts in (now.timestamp() + day * 86400 for day in range(5))],
+            "updated": datetime.now().isoformat()
+        }
+
+
+PROVIDERS = {
+    provider.name: provider
+    for provider in (OpenWeatherMapProvider, OpenMeteoProvider, StubProvider)
+}
+
+
+def create_provider(name: str, config: WeatherConfig,
+                    get_session: Callable[[], aiohttp.ClientSession]) -> WeatherProvider:
+    """Instantiate a provider by its configured name."""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown weather provider '{name}'")
+    return PROVIDERS[name](config, get_session)
@@ -0,0 +1,80 @@
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker.
+    
+    closed    - requests flow normally
+    open      - provider skipped until reset_timeout has passed
+    half_open - a single trial request is allowed; success closes, failure re-opens
+    """
+    
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+    
+    def allow_request(self) -> bool:
+        """Check if a request may be sent to the provider."""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self._trial_in_flight = False
+        
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        
+        return True
+    
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+    
+    def release(self) -> None:
+        """Give back a half-open trial that was cancelled before it finished."""
+        self._trial_in_flight = False
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures}
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies for one provider."""
+    
+    def __init__(self, window: int = 50):
+        self.samples: Deque[float] = deque(maxlen=window)
+    
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+    
+    def percentile(self, percent: float) -> Optional[float]:
+        """Latency at the given percentile, or None with too few samples."""
+        if len(self.samples) < 5:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
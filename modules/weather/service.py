@@ -1,41 +1,174 @@
 import asyncio
 import aiohttp
+import hashlib
+import json
 import os
+import time
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
-from .models import WeatherResponse, WeatherConfig, WeatherCondition, Temperature, WeatherStatus
+from email.utils import format_datetime
+from typing import Awaitable, Callable, Dict, Any, List, NamedTuple, Optional
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from .models import WeatherResponse, WeatherConfig, WeatherCondition, WeatherLocation, Temperature, WeatherStatus
+from .alerts import WeatherAlertMonitor
 from .config import WeatherConfigManager
+from .history import WeatherHistoryStore
+from .providers import WeatherProvider, create_provider
+from .resilience import CircuitBreaker, LatencyTracker
+from .solar import SolarCalculator
+from ..common.shared_state import shared_state
+from ..common.versioning import versions
 
 logger = logging.getLogger(__name__)
 
+
+class EncodedPayload(NamedTuple):
+    """JSON body serialized once per upstream snapshot, with its validators."""
+    body: bytes
+    etag: str
+    last_modified: str
+
+
+def encode_payload(data: Any, modified: Optional[datetime]) -> EncodedPayload:
+    """Serialize like FastAPI's JSONResponse and derive ETag/Last-Modified."""
+    body = json.dumps(
+        jsonable_encoder(data), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    modified = (modified or datetime.now()).astimezone(timezone.utc)
+    return EncodedPayload(body, etag, format_datetime(modified, usegmt=True))
+
+
+class LocationCache:
+    """Cached upstream snapshot for a single configured location."""
+    
+    def __init__(self, location: WeatherLocation, ttl: float):
+        self.location = location
+        self.ttl = ttl  # seconds; staggered per location so refreshes don't line up
+        self.weather: Optional[WeatherResponse] = None
+        self.forecast: Optional[Dict[str, Any]] = None
+        self.last_update: Optional[datetime] = None
+        self.lock = asyncio.Lock()
+        # Serialized responses for the current snapshot, keyed by endpoint
+        self.encoded: Dict[str, EncodedPayload] = {}
+    
+    def is_valid(self) -> bool:
+        """Check if the cached snapshot is still fresh."""
+        if not self.weather or not self.last_update:
+            return False
+        
+        cache_age = datetime.now() - self.last_update
+        return cache_age.total_seconds() < self.ttl
+
+
 class WeatherService:
     """Weather service for fetching and managing weather data."""
     
     def __init__(self):
         self.config_manager = WeatherConfigManager()
         self.config = self.config_manager.load_config()
-        self.last_update: Optional[datetime] = None
-        self.cached_weather: Optional[WeatherResponse] = None
         self.api_calls_today = 0
         self.error_count = 0
         self.last_error: Optional[str] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.solar = SolarCalculator()
+        self._config_version = versions.snapshot(("weather_config",))
+        self._init_locations()
+        self._init_providers()
+        self._init_alerts()
+        
+        try:
+            self.history: Optional[WeatherHistoryStore] = WeatherHistoryStore()
+        except Exception as e:
+            logger.error(f"Weather history disabled: {e}")
+            self.history = None
+    
+    def _init_locations(self) -> None:
+        """Build per-location caches and the shared upstream concurrency limit."""
+        count = len(self.config.locations)
+        self.location_caches: Dict[str, LocationCache] = {}
+        for index, location in enumerate(self.config.locations):
+            # Spread expiry over a quarter of the interval so one batch request
+            # doesn't trigger a refresh of every location at once
+            stagger = self.config.update_interval * 0.25 * index / count
+            self.location_caches[location.name] = LocationCache(location, self.config.update_interval + stagger)
+        self._fetch_semaphore = asyncio.Semaphore(max(1, self.config.max_concurrent_fetches))
+    
+    def _init_providers(self) -> None:
+        """Instantiate the primary and backup providers with their breakers."""
+        self.providers: Dict[str, WeatherProvider] = {}
+        for name in [self.config.provider, *self.config.backup_providers]:
+            if name in self.providers:
+                continue
+            try:
+                self.providers[name] = create_provider(name, self.config, self._get_session)
+            except ValueError as e:
+                logger.error(f"Skipping weather provider: {e}")
+        
+        self.breakers = {
+            name: CircuitBreaker(name, self.config.circuit_failure_threshold, self.config.circuit_reset_timeout)
+            for name in self.providers
+        }
+        self.latencies = {name: LatencyTracker() for name in self.providers}
+    
+    def _init_alerts(self) -> None:
+        """Create the alert monitor (polling starts with start_alerts)."""
+        self.alerts: Optional[WeatherAlertMonitor] = None
+        if not self.config.alerts_enabled:
+            return
+        try:
+            self.alerts = WeatherAlertMonitor(self.config, self._get_session)
+        except ValueError as e:
+            logger.error(f"Weather alerts disabled: {e}")
+    
+    def start_alerts(self) -> None:
+        """Start background alert polling; needs a running event loop."""
+        if self.alerts:
+            self.alerts.start()
+    
+    @property
+    def primary_cache(self) -> LocationCache:
+        """Cache for the first configured location."""
+        return self.location_caches[self.config.locations[0].name]
+    
+    @property
+    def cached_weather(self) -> Optional[WeatherResponse]:
+        return self.primary_cache.weather
+    
+    @property
+    def cached_forecast(self) -> Optional[Dict[str, Any]]:
+        return self.primary_cache.forecast
+    
+    @property
+    def last_update(self) -> Optional[datetime]:
+        return self.primary_cache.last_update
+    
+    @last_update.setter
+    def last_update(self, value: Optional[datetime]) -> None:
+        self.primary_cache.last_update = value
+    
+    def has_location(self, name: str) -> bool:
+        """Check if a location name is configured."""
+        self._sync_config()
+        return name in self.location_caches
+    
+    def _get_cache(self, location: Optional[str]) -> LocationCache:
+        self._sync_config()
+        if location is None:
+            return self.primary_cache
+        return self.location_caches[location]
         
-    async def get_current_weather(self) -> WeatherResponse:
+    async def get_current_weather(self, location: Optional[str] = None) -> WeatherResponse:
         """Get current weather data with caching."""
+        cache = self._get_cache(location)
         try:
             # Check if cached data is still fresh
-            if self._is_cache_valid():
+            if cache.is_valid():
                 logger.info("Returning cached weather data")
-                return self.cached_weather
+                return cache.weather
             
             # Fetch fresh weather data
-            weather_data = await self._fetch_weather_data()
-            
-            # Cache the result
-            self.cached_weather = weather_data
-            self.last_update = datetime.now()
-            self.api_calls_today += 1
+            weather_data = await self._refresh_snapshot(cache)
             
             logger.info(f"Fetched fresh weather data for {weather_data.location}")
             return weather_data
@@ -46,177 +179,309 @@ class WeatherService:
             logger.error(f"Failed to get weather data: {e}")
             
             # Return cached data if available, even if stale
-            if self.cached_weather:
+            if cache.weather:
                 logger.warning("Returning stale cached weather data due to error")
+                return cache.weather
+            raise
                 
-    async def get_forecast(self, days: int = 5) -> Dict[str, Any]:
+    async def get_forecast(self, days: int = 5, location: Optional[str] = None) -> Dict[str, Any]:
         """Get weather forecast data."""
+        cache = self._get_cache(location)
         try:
-            url = "http://api.openweathermap.org/data/2.5/forecast"
-            # Use specific coordinates for Medford, NJ to avoid confusion with Medford, OR
-            params = {
-                'lat': 39.9009,
-                'lon': -74.8234,
-                'appid': self.config.api_key,
-                'units': self.config.units,
-                'cnt': min(days * 8, 40)  # 8 forecasts per day (3-hour intervals), max 40
-            }
+            if self._includes_forecast(cache.location):
+                # Current conditions and forecast share one upstream snapshot
+                if not cache.is_valid() or cache.forecast is None:
+                    await self._refresh_snapshot(cache)
+                
+                # The refresh may have fallen back to split mode
+                if cache.forecast is not None:
+                    return self._limit_forecast(cache.forecast, days)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 401:
-                        raise ValueError("Invalid API key")
-                    elif response.status == 404:
-                        raise ValueError(f"Location '{self.config.location}' not found")
-                    elif response.status != 200:
-                        raise ValueError(f"Forecast API request failed with status {response.status}")
-                    
-                    data = await response.json()
-                    return self._parse_forecast_data(data)
+            async with self._fetch_semaphore:
+                return await self._fetch_with_hedging(
+                    cache.location, lambda provider: provider.fetch_forecast(cache.location, days)
+                )
                     
         except Exception as e:
             logger.error(f"Failed to get forecast data: {e}")
+            if cache.forecast is not None:
+                logger.warning("Returning stale cached forecast data due to error")
+                return self._limit_forecast(cache.forecast, days)
             return {"error": str(e), "forecasts": []}
     
-    def _parse_forecast_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Parse OpenWeatherMap forecast API response."""
+    async def get_current_weather_encoded(self, location: Optional[str] = None) -> EncodedPayload:
+        """Current weather as JSON bytes, serialized once per upstream snapshot."""
+        cache = self._get_cache(location)
+        weather_data = await self.get_current_weather(location)
+        
+        payload = cache.encoded.get("current")
+        if payload is None or weather_data is not cache.weather:
+            payload = encode_payload(weather_data, cache.last_update)
+            if weather_data is cache.weather:
+                cache.encoded["current"] = payload
+        return payload
+    
+    async def get_forecast_encoded(self, days: int = 5, location: Optional[str] = None) -> EncodedPayload:
+        """Forecast as JSON bytes; snapshot-backed forecasts are serialized once per snapshot and length."""
+        cache = self._get_cache(location)
+        key = f"forecast:{days}"
+        forecast_data = await self.get_forecast(days, location)
+        
+        # No await since get_forecast returned, so cache.forecast is still the
+        # snapshot the result was trimmed from
+        from_snapshot = (self._includes_forecast(cache.location) and cache.forecast is not None
+                         and "error" not in forecast_data)
+        if from_snapshot and key in cache.encoded:
+            return cache.encoded[key]
+        
+        payload = encode_payload(forecast_data, cache.last_update if from_snapshot else None)
+        if from_snapshot:
+            cache.encoded[key] = payload
+        return payload
+    
+    def get_cached_state(self, days: int = 5) -> Dict[str, Any]:
+        """Primary location's cached weather, forecast and sun schedule, without upstream calls.
+        
+        Entries are None when nothing has been fetched yet (stale data is returned as is).
+        """
+        cache = self.primary_cache
         try:
-            forecasts = []
-            daily_forecasts = {}
-            
-            for item in data["list"]:
-                # Parse each 3-hour forecast item
-                dt = datetime.fromtimestamp(item["dt"])
-                date_key = dt.strftime("%Y-%m-%d")
-                
-                forecast_item = {
-                    "datetime": dt.isoformat(),
-                    "date": date_key,
-                    "time": dt.strftime("%H:%M"),
-                    "temperature": round(item["main"]["temp"], 1),
-                    "feels_like": round(item["main"]["feels_like"], 1),
-                    "humidity": item["main"]["humidity"],
-                    "condition": item["weather"][0]["main"],
-                    "description": item["weather"][0]["description"].title(),
-                    "icon": item["weather"][0]["icon"],
-                    "wind_speed": item.get("wind", {}).get("speed", 0),
-                    "precipitation": item.get("rain", {}).get("3h", 0) + item.get("snow", {}).get("3h", 0)
-                }
-                
-                forecasts.append(forecast_item)
-                
-                # Group by day for daily summaries
-                if date_key not in daily_forecasts:
-                    daily_forecasts[date_key] = {
-                        "date": date_key,
-                        "day_name": dt.strftime("%A"),
-                        "temps": [],
-                        "conditions": [],
-                        "precipitation": 0,
-                        "humidity": []
-                    }
-                
-                daily_forecasts[date_key]["temps"].append(item["main"]["temp"])
-                daily_forecasts[date_key]["conditions"].append(item["weather"][0]["main"])
-                daily_forecasts[date_key]["precipitation"] += forecast_item["precipitation"]
-                daily_forecasts[date_key]["humidity"].append(item["main"]["humidity"])
-            
-            # Calculate daily summaries
-            daily_summaries = []
-            for date_key, day_data in daily_forecasts.items():
-                daily_summary = {
-                    "date": date_key,
-                    "day_name": day_data["day_name"],
-                    "temp_min": round(min(day_data["temps"]), 1),
-                    "temp_max": round(max(day_data["temps"]), 1),
-                    "condition": max(set(day_data["conditions"]), key=day_data["conditions"].count),
-                    "precipitation": round(day_data["precipitation"], 1),
-                    "avg_humidity": round(sum(day_data["humidity"]) / len(day_data["humidity"]), 1)
-                }
-                daily_summaries.append(daily_summary)
-            
-            return {
-                "location": f"{data['city']['name']}, {data['city']['country']}",
-                "hourly_forecasts": forecasts,
-                "daily_summaries": daily_summaries[:5],  # Limit to 5 days
-                "updated": datetime.now().isoformat()
+            sun = self.get_sun_schedule()
+        except ValueError:
+            sun = None
+        return {
+            "weather": cache.weather,
+            "forecast": self._limit_forecast(cache.forecast, days) if cache.forecast is not None else None,
+            "sun": sun
+        }
+    
+    async def get_weather_batch(self) -> Dict[str, Any]:
+        """Get current weather for every configured location."""
+        self._sync_config()
+        names = list(self.location_caches)
+        # Upstream concurrency is bounded by the shared semaphore in _refresh_snapshot
+        results = await asyncio.gather(
+            *(self.get_current_weather(name) for name in names),
+            return_exceptions=True
+        )
+        
+        locations = []
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                locations.append({"name": name, "weather": None, "error": str(result)})
+            else:
+                locations.append({"name": name, "weather": result, "error": None})
+        
+        return {"locations": locations, "updated": datetime.now().isoformat()}
+    
+    async def get_trends(self, days: int = 7, resolution: str = "hourly",
+                         location: Optional[str] = None) -> Dict[str, Any]:
+        """Get temperature trends from recorded history (queried in a thread, off the event loop)."""
+        if not self.history:
+            raise ValueError("Weather history is not available")
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.history.get_trends, self._get_cache(location).location.name, days, resolution
+        )
+    
+    def get_sun_schedule(self, days: int = 1, location: Optional[str] = None) -> Dict[str, Any]:
+        """Get locally computed sun events and the kiosk night-mode window."""
+        target = self._get_cache(location).location
+        if target.lat is None or target.lon is None:
+            raise ValueError(f"Location '{target.name}' has no coordinates")
+        
+        schedule = self.solar.get_schedule(target.lat, target.lon, days)
+        return {
+            "location": target.name,
+            **schedule,
+            "night_mode": {
+                "enabled": self.config.night_mode,
+                "brightness": self.config.night_brightness
             }
+        }
+    
+    def get_locations(self) -> List[WeatherLocation]:
+        """Get configured weather locations."""
+        self._sync_config()
+        return list(self.config.locations)
+    
+    def _includes_forecast(self, location: WeatherLocation) -> bool:
+        """Check if the primary provider returns the forecast with current conditions."""
+        primary = self.providers.get(self.config.provider)
+        return primary is not None and primary.includes_forecast(location)
+    
+    async def _refresh_snapshot(self, cache: LocationCache) -> WeatherResponse:
+        """Refresh cached weather (and forecast when available) from upstream."""
+        async with cache.lock:
+            # Another request may have refreshed while we were waiting
+            if cache.is_valid() and (cache.forecast is not None or not self._includes_forecast(cache.location)):
+                return cache.weather
             
-        except Exception as e:
-            logger.error(f"Failed to parse forecast data: {e}")
-            return {"error": str(e), "forecasts": []}
+            if shared_state:
+                return await self._refresh_shared(cache)
+            
+            async with self._fetch_semaphore:
+                weather_data, forecast_data = await self._fetch_with_hedging(
+                    cache.location, lambda provider: provider.fetch_current(cache.location)
+                )
+            await self._store_snapshot(cache, weather_data, forecast_data)
+            return weather_data
     
-    async def _fetch_weather_data(self) -> WeatherResponse:
-        """Fetch weather data from OpenWeatherMap API."""
-        if not self.config.api_key:
-            raise ValueError("OpenWeatherMap API key not configured")
+    async def _refresh_shared(self, cache: LocationCache) -> WeatherResponse:
+        """Refresh through the shared store, so one worker calls upstream per interval."""
+        location = cache.location
         
-        url = "https://api.openweathermap.org/data/2.5/weather"
-        # Use specific coordinates for Medford, NJ to avoid confusion with Medford, OR
-        params = {
-            "lat": 39.9009,
-            "lon": -74.8234,
-            "appid": self.config.api_key,
-            "units": self.config.units
-        }
+        async def fetch() -> Dict[str, Any]:
+            async with self._fetch_semaphore:
+                weather_data, forecast_data = await self._fetch_with_hedging(
+                    location, lambda provider: provider.fetch_current(location)
+                )
+            await self._store_snapshot(cache, weather_data, forecast_data)
+            return {"weather": jsonable_encoder(cache.weather), "forecast": jsonable_encoder(cache.forecast)}
         
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 401:
-                    raise ValueError("Invalid API key")
-                elif response.status == 404:
-                    raise ValueError(f"Location '{self.config.location}' not found")
-                elif response.status != 200:
-                    raise ValueError(f"API request failed with status {response.status}")
-                
-                data = await response.json()
-                return self._parse_weather_data(data)
+        key = f"weather:{location.name}:{location.lat}:{location.lon}:{self.config.provider}"
+        value, updated, fetched_here = await shared_state.single_flight(key, cache.ttl, fetch)
+        modified = datetime.fromtimestamp(updated)
+        if fetched_here:
+            cache.last_update = modified
+        elif cache.last_update != modified:
+            # Another worker fetched it; history was recorded there
+            cache.weather = WeatherResponse(**value["weather"])
+            cache.forecast = value["forecast"]
+            cache.last_update = modified
+            cache.encoded = {}
+        return cache.weather
+    
+    def _hedge_delay(self, name: str) -> float:
+        """Time to wait on a provider before firing a backup request."""
+        observed = self.latencies[name].percentile(self.config.hedge_percentile)
+        if observed is None:
+            return self.config.hedge_delay
+        # Never hedge sooner than 100ms or later than the initial delay
+        return min(max(observed, 0.1), self.config.hedge_delay)
     
-    def _parse_weather_data(self, data: Dict[str, Any]) -> WeatherResponse:
-        """Parse OpenWeatherMap API response into WeatherResponse model."""
+    async def _call_provider(self, name: str, operation: Callable[[WeatherProvider], Awaitable[Any]]) -> Any:
+        """Run one provider request, feeding its latency tracker and circuit breaker."""
+        breaker = self.breakers[name]
+        start = time.monotonic()
+        self.api_calls_today += 1
         try:
-            # Extract temperature data
-            temp_data = data["main"]
-            temperature = Temperature(
-                current=round(temp_data["temp"], 1),
-                feels_like=round(temp_data["feels_like"], 1),
-                min=round(temp_data["temp_min"], 1),
-                max=round(temp_data["temp_max"], 1),
-                unit="F" if self.config.units == "imperial" else "C"
-            )
-            
-            # Extract weather condition
-            weather_info = data["weather"][0]
-            condition = WeatherCondition(
-                main=weather_info["main"],
-                description=weather_info["description"].title(),
-                icon=weather_info["icon"]
-            )
-            
-            # Extract other data
-            wind_data = data.get("wind", {})
-            
-            return WeatherResponse(
-                location=f"{data['name']}, {data['sys']['country']}",
-                timestamp=datetime.now(),
-                temperature=temperature,
-                condition=condition,
-                humidity=temp_data["humidity"],
-                pressure=temp_data["pressure"],
-                wind_speed=round(wind_data.get("speed", 0), 1),
-                wind_direction=wind_data.get("deg", 0),
-                visibility=round(data.get("visibility", 0) / 1000, 1),  # Convert m to km
-                uv_index=None  # Would need separate UV API call
+            result = await operation(self.providers[name])
+        except asyncio.CancelledError:
+            # Lost a hedge race, not a provider failure
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        
+        self.latencies[name].record(time.monotonic() - start)
+        breaker.record_success()
+        return result
+    
+    async def _fetch_with_hedging(self, location: WeatherLocation,
+                                  operation: Callable[[WeatherProvider], Awaitable[Any]]) -> Any:
+        """Run an operation against the primary provider, hedging with backups.
+        
+        If the primary hasn't answered within its latency percentile (or fails),
+        the next provider is started too; the first successful answer wins and
+        the remaining requests are cancelled. Providers with an open circuit are
+        skipped entirely.
+        """
+        order = [self.config.provider, *self.config.backup_providers]
+        candidates = [
+            name for name in dict.fromkeys(order)
+            if name in self.providers and self.providers[name].supports(location)
+        ]
+        
+        pending: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+        
+        def launch_next() -> Optional[str]:
+            while candidates:
+                name = candidates.pop(0)
+                if self.breakers[name].allow_request():
+                    pending[asyncio.create_task(self._call_provider(name, operation))] = name
+                    return name
+                errors.append(f"{name}: circuit open")
+            return None
+        
+        last_launched = launch_next()
+        try:
+            while pending:
+                timeout = self._hedge_delay(last_launched) if candidates else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    logger.info(f"Weather provider {last_launched} slow, hedging with backup")
+                    last_launched = launch_next() or last_launched
+                    continue
+                
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(f"{name}: {task.exception()}")
+                
+                # Fail over immediately instead of waiting out the hedge delay
+                if not pending:
+                    last_launched = launch_next() or last_launched
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        raise ValueError("All weather providers failed: " + "; ".join(errors or ["none configured"]))
+    
+    async def _store_snapshot(self, cache: LocationCache, weather_data: WeatherResponse,
+                              forecast_data: Optional[Dict[str, Any]]) -> None:
+        """Cache a freshly fetched upstream snapshot and record it in the history (in a thread)."""
+        location = cache.location
+        if location.lat is not None and location.lon is not None:
+            # Sun events come from the precomputed table, not the upstream payload
+            weather_data.sun = self.solar.get_day(
+                location.lat, location.lon, self.solar.today(location.lat, location.lon)
             )
-            
-        except KeyError as e:
-            raise ValueError(f"Unexpected API response format: missing {e}")
+        
+        cache.weather = weather_data
+        cache.forecast = forecast_data
+        cache.last_update = datetime.now()
+        cache.encoded = {}
+        
+        if self.history:
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.history.record, cache.location.name, weather_data
+                )
+            except Exception as e:
+                logger.warning(f"Failed to record weather history: {e}")
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session so keep-alive connections are reused across locations."""
+        if self._session is None or self._session.closed:
+            timeout = aiohttp.ClientTimeout(total=10)
+            connector = aiohttp.TCPConnector(limit=max(1, self.config.max_concurrent_fetches))
+            self._session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+        return self._session
+    
+    async def close(self) -> None:
+        """Stop alert polling and close the shared HTTP session."""
+        if self.alerts:
+            await self.alerts.stop()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _limit_forecast(self, forecast_data: Dict[str, Any], days: int) -> Dict[str, Any]:
+        """Trim a cached forecast to the requested number of days."""
+        return {
+            **forecast_data,
+            "hourly_forecasts": forecast_data["hourly_forecasts"][:days * 24],
+            "daily_summaries": forecast_data["daily_summaries"][:days]
+        }
     
     def _get_fallback_weather(self) -> WeatherResponse:
         """Return fallback weather data when API is unavailable."""
         return WeatherResponse(
-            location=self.config.location,
+            location=self.config.locations[0].name,
             timestamp=datetime.now(),
             temperature=Temperature(
                 current=20.0,
@@ -236,31 +501,54 @@ class WeatherService:
         )
     
     def _is_cache_valid(self) -> bool:
-        """Check if cached weather data is still valid."""
-        if not self.cached_weather or not self.last_update:
-            return False
-        
-        cache_age = datetime.now() - self.last_update
-        return cache_age.total_seconds() < self.config.update_interval
+        """Check if cached weather data for the primary location is still valid."""
+        return self.primary_cache.is_valid()
     
     
     def get_config(self) -> WeatherConfig:
         """Get current weather configuration."""
+        self._sync_config()
         return self.config
     
     def update_config(self, new_config: WeatherConfig) -> None:
         """Update weather configuration."""
-        self.config = new_config
         self.config_manager.save_config(new_config)
+        versions.bump("weather_config")
+        self._apply_config(new_config)
+        logger.info("Weather configuration updated")
+    
+    def _sync_config(self) -> None:
+        """With shared state, apply a configuration another worker saved."""
+        if shared_state is None:
+            return
+        if versions.snapshot(("weather_config",)) != self._config_version:
+            self._apply_config(self.config_manager.load_config())
+    
+    def _apply_config(self, new_config: WeatherConfig) -> None:
+        self.config = new_config
+        self._config_version = versions.snapshot(("weather_config",))
         
         # Clear cache to force refresh with new settings
-        self.cached_weather = None
-        self.last_update = None
+        self._init_locations()
+        self._init_providers()
         
-        logger.info("Weather configuration updated")
+        # Reconfigured in place so /alerts/stream clients stay subscribed
+        if self.alerts and self.config.alerts_enabled:
+            try:
+                self.alerts.configure(new_config)
+                return
+            except ValueError as e:
+                logger.error(f"Weather alerts disabled: {e}")
+        was_polling = self.alerts is not None and self.alerts.get_status()["running"]
+        if self.alerts:
+            asyncio.create_task(self.alerts.stop())  # Ends the old monitor's streams
+        self._init_alerts()
+        if was_polling:
+            self.start_alerts()
     
     async def get_status(self) -> Dict[str, Any]:
         """Get weather service status."""
+        self._sync_config()
         next_update = None
         if self.last_update:
             next_update = self.last_update + timedelta(seconds=self.config.update_interval)
@@ -274,6 +562,19 @@ class WeatherService:
             "error_count": self.error_count,
             "last_error": self.last_error,
             "cache_valid": self._is_cache_valid(),
-            "location": self.config.location,
-            "update_interval": self.config.update_interval
+            "location": self.config.locations[0].name,
+            "locations": {
+                name: cache.last_update.isoformat() if cache.last_update else None
+                for name, cache in self.location_caches.items()
+            },
+            "update_interval": self.config.update_interval,
+            "fetch_mode": "combined" if self._includes_forecast(self.config.locations[0]) else "split",
+            "alerts": self.alerts.get_status() if self.alerts else None,
+            "providers": {
+                name: {
+                    **self.breakers[name].get_status(),
+                    "p95_latency": self.latencies[name].percentile(95)
+                }
+                for name in self.providers
+            }
         }
\ No newline at end of file
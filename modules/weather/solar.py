@@ -0,0 +1,147 @@
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .models import SunTimes
+
+logger = logging.getLogger(__name__)
+
+# Sun altitude (degrees) at each event; -0.833 accounts for refraction and the solar disc
+SUNRISE_ALTITUDE = -0.833
+CIVIL_ALTITUDE = -6.0
+
+J2000 = 2451545.0  # Julian date of 2000-01-01 12:00 UTC
+UNIX_EPOCH_JD = 2440587.5
+AXIAL_TILT = np.radians(23.4397)
+
+
+def _hour_angle(lat: float, declination: np.ndarray, altitude: float) -> np.ndarray:
+    """Half the arc (in days) the sun spends above an altitude; NaN when it never crosses."""
+    phi = np.radians(lat)
+    cos_omega = (np.sin(np.radians(altitude)) - np.sin(phi) * np.sin(declination)) / (np.cos(phi) * np.cos(declination))
+    with np.errstate(invalid="ignore"):
+        return np.degrees(np.arccos(cos_omega)) / 360
+
+
+def _to_unix(julian: np.ndarray) -> np.ndarray:
+    return (julian - UNIX_EPOCH_JD) * 86400
+
+
+class SolarTable:
+    """Year-long sunrise/sunset/twilight table for one pair of coordinates.
+
+    Every day of the year is computed at once with the NOAA sunrise equation
+    as NumPy arrays of UTC epoch seconds, so a lookup is just an index. Days
+    where the sun never crosses an altitude (polar day/night) are NaN.
+    Days are the location's mean-solar calendar days, which keeps the
+    sunrise and sunset of one row on the same local date without timezone data.
+    """
+
+    def __init__(self, lat: float, lon: float, year: int):
+        self.lat = lat
+        self.lon = lon
+        self.year = year
+        self.start = date(year, 1, 1)
+        days = (date(year + 1, 1, 1) - self.start).days
+
+        # Mean solar noon at the location for each day, in days since J2000
+        n = (self.start - date(2000, 1, 1)).days + np.arange(days, dtype=np.float64)
+        mean_noon = n - lon / 360
+
+        anomaly = np.radians((357.5291 + 0.98560028 * mean_noon) % 360)
+        center = (1.9148 * np.sin(anomaly) + 0.0200 * np.sin(2 * anomaly)
+                  + 0.0003 * np.sin(3 * anomaly))
+        ecliptic = np.radians((np.degrees(anomaly) + center + 180 + 102.9372) % 360)
+        transit = J2000 + mean_noon + 0.0053 * np.sin(anomaly) - 0.0069 * np.sin(2 * ecliptic)
+        declination = np.arcsin(np.sin(ecliptic) * np.sin(AXIAL_TILT))
+
+        sun = _hour_angle(lat, declination, SUNRISE_ALTITUDE)
+        civil = _hour_angle(lat, declination, CIVIL_ALTITUDE)
+
+        self.solar_noon = _to_unix(transit)
+        self.sunrise = _to_unix(transit - sun)
+        self.sunset = _to_unix(transit + sun)
+        self.civil_dawn = _to_unix(transit - civil)
+        self.civil_dusk = _to_unix(transit + civil)
+        # Polar day: sun never sets (declination on the same side as the latitude)
+        self.polar_day = np.isnan(sun) & (np.sign(declination) == np.sign(lat))
+        self.day_length = np.where(np.isnan(sun), np.where(self.polar_day, 86400.0, 0.0), sun * 2 * 86400)
+
+    def local_date(self, moment: datetime) -> date:
+        """Calendar date at the location in mean solar time."""
+        if moment.tzinfo is None:
+            moment = moment.astimezone()
+        return (moment.astimezone(timezone.utc) + timedelta(hours=self.lon / 15)).date()
+
+    def get_day(self, day: date) -> SunTimes:
+        """Sun events for one day of this table's year."""
+        index = (day - self.start).days
+
+        def at(values: np.ndarray) -> Optional[datetime]:
+            value = values[index]
+            return None if np.isnan(value) else datetime.fromtimestamp(round(float(value)), tz=timezone.utc)
+
+        return SunTimes(
+            date=day.isoformat(),
+            civil_dawn=at(self.civil_dawn),
+            sunrise=at(self.sunrise),
+            solar_noon=at(self.solar_noon),
+            sunset=at(self.sunset),
+            civil_dusk=at(self.civil_dusk),
+            day_length=int(self.day_length[index]),
+            polar_day=bool(self.polar_day[index]),
+            polar_night=bool(self.day_length[index] == 0)
+        )
+
+
+class SolarCalculator:
+    """Caches one SolarTable per (coordinates, year)."""
+
+    def __init__(self):
+        self._tables: Dict[Tuple[float, float, int], SolarTable] = {}
+
+    def get_table(self, lat: float, lon: float, year: int) -> SolarTable:
+        key = (round(lat, 4), round(lon, 4), year)
+        if key not in self._tables:
+            self._tables[key] = SolarTable(lat, lon, year)
+            logger.info(f"Computed solar table for {lat},{lon} ({year})")
+        return self._tables[key]
+
+    def get_day(self, lat: float, lon: float, day: date) -> SunTimes:
+        return self.get_table(lat, lon, day.year).get_day(day)
+
+    def today(self, lat: float, lon: float, now: Optional[datetime] = None) -> date:
+        """The location's current mean-solar date."""
+        now = now or datetime.now(timezone.utc)
+        return self.get_table(lat, lon, now.year).local_date(now)
+
+    def get_schedule(self, lat: float, lon: float, days: int = 1,
+                     now: Optional[datetime] = None) -> Dict[str, object]:
+        """Sun events for upcoming days plus the night window that is current or next.
+
+        The night window runs from civil dusk to the following civil dawn,
+        falling back to sunset/sunrise at high latitudes. Its ends are None
+        when neither happens; the day's polar_day/polar_night flags decide then.
+        """
+        now = now or datetime.now(timezone.utc)
+        today = self.today(lat, lon, now)
+        yesterday, tomorrow = (self.get_day(lat, lon, today + timedelta(days=offset)) for offset in (-1, 1))
+        current = self.get_day(lat, lon, today)
+
+        def dusk(sun: SunTimes) -> Optional[datetime]:
+            return sun.civil_dusk or sun.sunset
+
+        def dawn(sun: SunTimes) -> Optional[datetime]:
+            return sun.civil_dawn or sun.sunrise
+
+        if dawn(current) and now < dawn(current):
+            night = (dusk(yesterday), dawn(current))
+        else:
+            night = (dusk(current), dawn(tomorrow))
+
+        return {
+            "lat": lat,
+            "lon": lon,
+            "days": [self.get_day(lat, lon, today + timedelta(days=offset)) for offset in range(days)],
+            "night": {"start": night[0], "end": night[1]}
+        }
@@ -0,0 +1,53 @@
+"""Minimal ASGI client for middleware tests."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict
+
+from starlette.datastructures import Headers
+
+
+@dataclass
+class Result:
+    status: int
+    headers: Headers
+    body: bytes
+
+
+def request(app, url: str, headers: Dict[str, str] = None, method: str = "GET") -> Result:
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query.encode("latin-1"),
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in (headers or {}).items()]
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return Result(messages[0]["status"], Headers(raw=messages[0]["headers"]),
+                  b"".join(message.get("body", b"") for message in messages[1:]))
+
+
+def endpoint(body: bytes = b"hello", status: int = 200, content_type: str = "text/plain", headers=(), on_call=None):
+    """ASGI app answering every request with body; on_call(scope) runs first and is counted."""
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        if on_call:
+            on_call(scope)
+        raw = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+        raw += [(name.lower().encode(), value.encode()) for name, value in headers]
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        await send({"type": "http.response.body", "body": body})
+
+    app.calls = calls
+    return app
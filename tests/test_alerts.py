@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from modules.weather.alerts import SUBSCRIBER_QUEUE_SIZE, AlertSource, WeatherAlertMonitor
+from modules.weather.models import WeatherAlert, WeatherConfig, WeatherLocation
+
+NOW = datetime.now(timezone.utc)
+HOME = WeatherLocation(name="Home", lat=39.9, lon=-74.8)
+
+
+class FakeSource(AlertSource):
+    name = "fake"
+
+    def __init__(self):
+        self.alerts = []
+        self.error = None
+
+    async def fetch_alerts(self, location):
+        if self.error:
+            raise self.error
+        return list(self.alerts)
+
+
+def alert(key, severity="moderate", title=None, hours=2):
+    return WeatherAlert(id=key, title=title or f"Alert {key}", description="", severity=severity,
+                        start_time=NOW - timedelta(hours=1), end_time=NOW + timedelta(hours=hours), areas=["Here"])
+
+
+def monitor():
+    config = WeatherConfig(locations=[HOME, WeatherLocation(name="Nowhere")])  # No coordinates: not polled
+    alerts = WeatherAlertMonitor(config, get_session=lambda: None, shared=None)
+    alerts.source = FakeSource()
+    return alerts
+
+
+def poll(alerts):
+    return [(event["id"], event["type"], event["alert"].id) for event in asyncio.run(alerts.poll())]
+
+
+def test_poll_reports_only_differences():
+    alerts = monitor()
+    alerts.source.alerts = [alert("a"), alert("b")]
+    assert poll(alerts) == [(1, "new", "a"), (2, "new", "b")]
+    assert poll(alerts) == []
+
+    alerts.source.alerts = [alert("a", title="Alert a, extended"), alert("c")]
+    assert poll(alerts) == [(3, "changed", "a"), (4, "new", "c"), (5, "expired", "b")]
+    assert [a.id for a in alerts.get_active_alerts("Home")] == ["a", "c"]
+    assert "Nowhere" not in alerts.active
+
+
+def test_alerts_past_their_end_time_expire_while_still_listed():
+    alerts = monitor()
+    alerts.source.alerts = [alert("a")]
+    poll(alerts)
+    alerts.active["Home"]["a"] = alert("a", hours=-1)
+    alerts.source.alerts = []
+    assert poll(alerts) == [(2, "expired", "a")]
+
+    alerts.source.alerts = [alert("old", hours=-1)]
+    assert poll(alerts) == []
+
+
+def test_failed_poll_keeps_the_active_set_and_backs_off():
+    alerts = monitor()
+    alerts.source.alerts = [alert("a")]
+    poll(alerts)
+    alerts.source.error = RuntimeError("feed down")
+    assert poll(alerts) == [] and poll(alerts) == []
+    assert alerts.consecutive_errors == 2
+    assert alerts.last_error == "feed down"
+    assert [a.id for a in alerts.get_active_alerts()] == ["a"]
+    assert alerts.next_interval() == alerts.config.alerts_active_interval * 2
+
+
+def test_interval_follows_severity_and_next_expiry():
+    alerts = monitor()
+    config = alerts.config
+    poll(alerts)
+    assert alerts.next_interval() == config.alerts_idle_interval
+    alerts.source.alerts = [alert("a")]
+    poll(alerts)
+    assert alerts.next_interval() == config.alerts_active_interval
+    alerts.source.alerts = [alert("a"), alert("b", severity="extreme")]
+    poll(alerts)
+    assert alerts.next_interval() == config.alerts_severe_interval
+    assert [a.id for a in alerts.get_active_alerts()] == ["b", "a"]
+    alerts.source.alerts = [alert("a", hours=0.01)]
+    poll(alerts)
+    assert 30 <= alerts.next_interval() <= 37
+
+
+def test_events_since_replays_or_reports_a_gap():
+    alerts = WeatherAlertMonitor(WeatherConfig(locations=[HOME]), get_session=lambda: None, history_size=2, shared=None)
+    alerts.source = FakeSource()
+    for key in "abc":
+        alerts.source.alerts = [alert(key)]
+        poll(alerts)
+    assert alerts.sequence == 5  # new a, new b, expired a, new c, expired b
+    assert [event["id"] for event in alerts.get_events_since(3)] == [4, 5]
+    assert alerts.get_events_since(5) == []
+    assert alerts.get_events_since(2) is None  # Event 3 is gone
+    assert alerts.get_events_since(6) is None
+
+
+def test_slow_subscriber_is_dropped():
+    async def run():
+        alerts = monitor()
+        fast, slow = alerts.subscribe(), alerts.subscribe()
+        for i in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            alerts.source.alerts = [alert(str(i))]
+            await alerts.poll()
+            while not fast.empty():
+                assert fast.get_nowait() is not None
+        return alerts, fast, slow
+
+    alerts, fast, slow = asyncio.run(run())
+    assert slow.get_nowait() is None and slow.empty()
+    assert alerts._subscribers == {fast}
+
+
+def test_reconfiguring_keeps_subscribers_and_expires_removed_locations():
+    async def run():
+        alerts = monitor()
+        queue = alerts.subscribe()
+        alerts.source.alerts = [alert("a")]
+        await alerts.poll()
+        alerts.start()
+        task = alerts._task
+
+        alerts.configure(WeatherConfig(locations=[WeatherLocation(name="Away", lat=40.7, lon=-74.0)]))
+        alerts.source = FakeSource()
+        restarted = alerts._task is not task and not alerts._task.done()
+        events = await alerts.poll()
+        received = [queue.get_nowait()["type"] for _ in range(queue.qsize())]
+        await alerts.stop()
+        return alerts, queue, restarted, events, received
+
+    alerts, queue, restarted, events, received = asyncio.run(run())
+    assert restarted
+    assert [(event["id"], event["type"], event["location"]) for event in events] == [(2, "expired", "Home")]
+    assert received == ["new", "expired"]
+    assert queue.get_nowait() is None  # stop() ends the stream
+    assert not alerts._subscribers
+
+
+def test_config_reload_keeps_alert_streams_on_the_same_monitor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WEATHER_HISTORY_DB", str(tmp_path / "history.db"))
+    from modules.weather.service import WeatherService
+
+    async def run():
+        weather = WeatherService()
+        alerts = weather.alerts
+        queue = alerts.subscribe()
+        weather._apply_config(weather.config.model_copy(update={"alerts_idle_interval": 600}))
+        same = weather.alerts is alerts and alerts.config.alerts_idle_interval == 600
+
+        weather._apply_config(weather.config.model_copy(update={"alerts_enabled": False}))
+        await asyncio.sleep(0)  # Let the stop task run
+        return weather, same, queue
+
+    weather, same, queue = asyncio.run(run())
+    assert same
+    assert weather.alerts is None
+    assert queue.get_nowait() is None
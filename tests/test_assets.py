@@ -0,0 +1,94 @@
+import asyncio
+import gzip
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+
+import pytest
+from starlette.requests import Request
+
+from backend import assets
+from backend.assets import AssetPipeline, minify_css, minify_js
+
+FRONTEND = Path(__file__).resolve().parent.parent / "frontend"
+TEMPLATE = """
+        const banner = `
+            // not a comment
+            ${items.map(item => `<li>${item} // also kept</li>`).join('')}
+        `;
+        // a real comment
+        const ratio = width / height / 2;
+"""
+STYLE = """
+        .quoted::before { content: "a  //  b"; background: url("x  y.png"); }
+"""
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    html = (FRONTEND / "index.html").read_text()
+    html = html.replace("<script>", "<script>" + TEMPLATE, 1).replace("<style>", "<style>" + STYLE, 1)
+    (tmp_path / "index.html").write_text(html)
+    pipeline = AssetPipeline(tmp_path)
+    pipeline.build()
+    return pipeline
+
+
+def asset(pipeline, suffix):
+    [body] = [asset.body.decode() for name, asset in pipeline.assets.items() if name.endswith(suffix)]
+    return body
+
+
+def page_request(accept_encoding=""):
+    headers = [(b"accept-encoding", accept_encoding.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": headers})
+
+
+def test_template_literals_survive_the_dashboard_round_trip(pipeline):
+    script = asset(pipeline, ".js")
+    assert "`\n            // not a comment\n            ${items.map(" in script
+    assert "<li>${item} // also kept</li>" in script
+    assert "a real comment" not in script
+    assert "const ratio = width / height / 2;" in script
+
+    style = asset(pipeline, ".css")
+    assert 'content: "a  //  b";background: url("x  y.png")}' in style
+    assert "\n" not in style
+
+    page = pipeline.pages["index"].body.decode()
+    assert "<script>" not in page and "<style>" not in page
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_minified_dashboard_script_still_parses(tmp_path, pipeline):
+    path = tmp_path / "dashboard.js"
+    path.write_text(asset(pipeline, ".js"))
+    subprocess.run(["node", "--check", str(path)], check=True)
+
+
+def test_minifiers_leave_strings_and_regexes_alone():
+    assert minify_js('  const s = "a // b";\n  // gone\n  const r = /\\/\\/[/]x/g;\n') == \
+        'const s = "a // b";\nconst r = /\\/\\/[/]x/g;'
+    assert minify_js("/* one\n   // two */\nx = 1;") == "/* one\n// two */\nx = 1;"
+    assert minify_css("a { b: url( c.png ) }  /* d */  e { f: 'g  h' }") == "a{b: url( c.png )}e{f: 'g  h'}"
+
+
+def test_pages_with_state_are_compressed_off_the_event_loop(pipeline, monkeypatch):
+    threads = []
+    build = assets.Asset.build
+
+    def recording_build(*args):
+        threads.append(threading.current_thread())
+        return build(*args)
+
+    monkeypatch.setattr(assets.Asset, "build", recording_build)
+    response = asyncio.run(pipeline.serve_page(page_request("gzip"), state=b'{"note":"</script>"}'))
+    body = gzip.decompress(response.body)
+    assert b'<script id="initialState" type="application/json">{"note":"\\u003c/script>"}</script>' in body
+    assert response.headers["cache-control"] == "no-cache"
+    assert threads and threading.main_thread() not in threads
+
+    # The same state reuses the rendered page
+    asyncio.run(pipeline.serve_page(page_request(), state=b'{"note":"</script>"}'))
+    assert len(threads) == 1
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+
+from modules.photos.catalog import SHOWN, SHOWN_ORDER, PhotoCatalog
+from modules.photos.models import PhotoInfo
+from modules.photos.scanner import FileStat
+
+
+def photo(photo_id, path, taken=None, added="2024-01-01", **fields):
+    return PhotoInfo(id=photo_id, filename=path.rsplit("/", 1)[-1], file_path=path, file_size=100, width=4,
+                     height=3, format="JPEG", taken_date=datetime.fromisoformat(taken) if taken else None,
+                     added_date=datetime.fromisoformat(added), **fields)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return PhotoCatalog(str(tmp_path / "photos.db"))
+
+
+def test_schema_and_shown_order_index(catalog):
+    conn = catalog._connect()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(photos)")}
+    assert {"inode", "mtime", "extra", "content_hash", "phash", "duplicate_of", "similar_to"} <= columns
+    indexes = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"))
+    assert indexes["photos_shown_order"].endswith("WHERE duplicate_of IS NULL")
+
+    plan = " ".join(row[-1] for row in conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT id FROM photos WHERE {SHOWN} ORDER BY {SHOWN_ORDER}"
+    ))
+    assert "photos_shown_order" in plan and "TEMP B-TREE" not in plan
+
+    PhotoCatalog(catalog.db_path)  # Opening an existing catalog again is harmless
+
+
+def test_add_round_trips_every_field_and_skips_known_files(catalog):
+    stat = FileStat("/p/a.jpg", inode=7, mtime=123, size=100)
+    original = photo("a", "/p/a.jpg", taken="2023-05-01T10:00:00", tags=["beach"], title="Sunset",
+                     camera_info={"camera_make": "Pi"}, content_hash="ab" * 16)
+    assert catalog.add(original, stat)
+    assert not catalog.add(photo("other", "/p/a.jpg"))
+
+    assert catalog.get("a") == original
+    assert catalog.count() == 1 and catalog.total_size() == 100
+    assert catalog.file_index() == {"/p/a.jpg": ("a", 7, 123, 100)}
+    assert catalog.get("missing") is None
+
+
+def test_file_index_limits_to_paths_and_their_subtrees(catalog):
+    catalog.add_many([photo("a", "/p/a.jpg"), photo("b", "/p/album/b.jpg"), photo("c", "/p/album2/c.jpg")])
+    assert set(catalog.file_index(["/p/album/"])) == {"/p/album/b.jpg"}
+    assert set(catalog.file_index(["/p/a.jpg", "/p/album2"])) == {"/p/a.jpg", "/p/album2/c.jpg"}
+
+
+def test_moves_keep_the_photo(catalog):
+    catalog.add(photo("a", "/p/a.jpg"), FileStat("/p/a.jpg", 7, 123, 100))
+    catalog.update_files([("a", FileStat("/p/album/a.jpg", 7, 123, 100))])
+    assert catalog.get("a").file_path == "/p/album/a.jpg"
+    assert catalog.file_index() == {"/p/album/a.jpg": ("a", 7, 123, 100)}
+
+
+def test_shown_ids_skip_copies_and_order_by_taken_then_added(catalog):
+    catalog.add_many([
+        photo("old", "/p/old.jpg", taken="2020-01-01", added="2024-03-01"),
+        photo("new", "/p/new.jpg", taken="2024-02-01"),
+        photo("undated", "/p/undated.jpg", added="2023-01-01"),
+        photo("copy", "/p/copy.jpg", taken="2025-01-01", duplicate_of="new")
+    ])
+    assert catalog.shown_ids() == ["new", "undated", "old"]
+    assert catalog.duplicates() == [("new", "copy")]
+    assert catalog.copy_paths("new") == ["/p/copy.jpg"]
+
+
+def test_remove_many_returns_renditions_and_drops_copies(catalog):
+    catalog.add_many([
+        photo("a", "/p/a.jpg", thumbnail_path="/t/a.jpg", display_path="/t/a_display.jpg", content_hash="h"),
+        photo("a-copy", "/p/a (1).jpg", duplicate_of="a", content_hash="h"),
+        photo("b", "/p/b.jpg", thumbnail_path="/t/b.jpg")
+    ])
+    assert catalog.find_by_hash("h") == "a"
+
+    assert catalog.remove_many(["a", "gone"]) == ["/t/a.jpg", "/t/a_display.jpg"]
+    assert [p.id for p in catalog.get_many(["a", "a-copy", "b"])] == ["b"]
+    assert catalog.find_by_hash("h") is None
+    assert catalog.remove("b") and not catalog.remove("b")
+    assert catalog.is_empty()
@@ -0,0 +1,53 @@
+import gzip
+import json
+import threading
+
+from asgi import endpoint, request
+
+from backend import compression
+from backend.compression import CompressionMiddleware, accepted_encodings, compress, negotiate_encoding
+
+BODY = json.dumps([{"id": i, "path": f"/home/pi/Photos/{i}.jpg"} for i in range(2000)]).encode()
+
+
+def test_accept_encoding_parsing_and_negotiation():
+    assert accepted_encodings("gzip, BR;q=0.5, identity;q=0") == {"gzip": 1.0, "br": 0.5, "identity": 0.0}
+    assert negotiate_encoding("gzip, br", ("br", "gzip")) == "br"
+    assert negotiate_encoding("br;q=0, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("*", ("br", "gzip")) == "br"
+    assert negotiate_encoding("identity", ("br", "gzip")) is None
+
+
+def test_large_bodies_are_compressed_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def recording_compress(body, coding, level):
+        threads.append(threading.current_thread())
+        return compress(body, coding, level)
+
+    monkeypatch.setattr(compression, "compress", recording_compress)
+    app = endpoint(BODY, content_type="application/json", headers=[("ETag", '"abc"')])
+    middleware = CompressionMiddleware(app, offload_size=16 * 1024)
+    middleware.codings = ("gzip",)
+    result = request(middleware, "/api/photos/list", {"Accept-Encoding": "gzip"})
+    assert gzip.decompress(result.body) == BODY
+    assert result.headers["content-encoding"] == "gzip"
+    assert result.headers["content-length"] == str(len(result.body))
+    assert result.headers["etag"] == 'W/"abc"'
+    assert result.headers["vary"] == "Accept-Encoding"
+
+    small = request(CompressionMiddleware(endpoint(BODY[:4096], content_type="application/json")), "/",
+                    {"Accept-Encoding": "gzip"})
+    assert gzip.decompress(small.body) == BODY[:4096]
+    assert threads[0] is not threading.main_thread()  # Over offload_size
+    assert threads[1] is threading.main_thread()
+
+
+def test_small_binary_and_unaccepted_responses_pass_through():
+    small = request(CompressionMiddleware(endpoint(b"x" * 100)), "/", {"Accept-Encoding": "gzip"})
+    assert small.body == b"x" * 100 and "content-encoding" not in small.headers
+    image = request(CompressionMiddleware(endpoint(BODY, content_type="image/jpeg")), "/",
+                    {"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in image.headers
+    plain = request(CompressionMiddleware(endpoint(BODY)), "/")
+    assert plain.body == BODY
@@ -0,0 +1,83 @@
+from asgi import endpoint, request
+
+from backend.conditional import ConditionalGetMiddleware, etag_matches
+from modules.common.versioning import VersionRegistry
+
+
+def setup(**endpoint_args):
+    registry = VersionRegistry()
+    registry.register("/api/todos", "todos")
+    registry.register("/api/todos/{user_id}", lambda user_id: registry.version(f"todos.{user_id}"))
+    app = endpoint(**endpoint_args)
+    return registry, app, ConditionalGetMiddleware(app, registry)
+
+
+def test_etag_matches_weakly():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', 'W/"abc"')
+    assert etag_matches(" * ", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+
+
+def test_matching_if_none_match_is_answered_without_running_the_endpoint():
+    registry, app, middleware = setup()
+    first = request(middleware, "/api/todos")
+    assert first.status == 200 and first.body == b"hello"
+    assert first.headers["cache-control"] == "no-cache"
+    etag = first.headers["etag"]
+
+    again = request(middleware, "/api/todos", {"If-None-Match": f"W/{etag}"})
+    assert again.status == 304 and again.body == b""
+    assert again.headers["etag"] == etag
+    assert "content-type" not in again.headers
+    assert len(app.calls) == 1
+
+    registry.bump("todos")
+    changed = request(middleware, "/api/todos", {"If-None-Match": etag})
+    assert changed.status == 200 and changed.headers["etag"] != etag
+
+
+def test_etag_depends_on_query_and_path_parameters():
+    registry, _, middleware = setup()
+    etags = {url: request(middleware, url).headers["etag"]
+             for url in ("/api/todos", "/api/todos?done=1", "/api/todos/alice", "/api/todos/bob")}
+    assert len(set(etags.values())) == 4
+
+    registry.bump("todos.alice")
+    assert request(middleware, "/api/todos/alice").headers["etag"] != etags["/api/todos/alice"]
+    assert request(middleware, "/api/todos/bob").headers["etag"] == etags["/api/todos/bob"]
+
+
+def test_change_while_rendering_gets_no_etag():
+    registry = VersionRegistry()
+    registry.register("/api/todos", "todos")
+    middleware = ConditionalGetMiddleware(endpoint(on_call=lambda scope: registry.bump("todos")), registry)
+    result = request(middleware, "/api/todos")
+    assert result.status == 200 and "etag" not in result.headers
+
+
+def test_token_unknown_before_the_endpoint_ran_is_checked_after():
+    registry = VersionRegistry()
+    state = {"token": None}
+    registry.register("/api/weather/current", lambda: state["token"])
+
+    def refresh(scope):
+        state["token"] = "fresh"
+
+    app = endpoint(on_call=refresh)
+    middleware = ConditionalGetMiddleware(app, registry)
+    etag = request(middleware, "/api/weather/current").headers["etag"]
+
+    state["token"] = None  # Due for a refresh again; the refresh produced the same state
+    result = request(middleware, "/api/weather/current", {"If-None-Match": etag})
+    assert result.status == 304 and result.body == b""
+    assert len(app.calls) == 2
+
+
+def test_unregistered_routes_own_etags_and_other_methods_pass_through():
+    _, app, middleware = setup(headers=[("ETag", '"own"')])
+    assert "etag" not in request(ConditionalGetMiddleware(endpoint(), VersionRegistry()), "/api/todos").headers
+    assert request(middleware, "/api/todos").headers["etag"] == '"own"'
+    assert request(middleware, "/api/todos", {"If-None-Match": "*"}, method="POST").status == 200
+    assert len(app.calls) == 2
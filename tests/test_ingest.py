@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from modules.photos.ingest import IngestPipeline, process_image
+
+
+@pytest.fixture
+def photo(tmp_path):
+    """A 200x100 JPEG taken sideways: EXIF orientation 6 shows it as 100x200."""
+    image = Image.new("RGB", (200, 100), (30, 120, 200))
+    image.paste((250, 250, 250), (0, 0, 100, 100))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation
+    exif[0x0132] = "2024:06:01 12:30:00"  # DateTime
+    exif[0x010F] = "Raspberry"  # Make
+    path = tmp_path / "sideways.jpg"
+    image.save(path, "JPEG", exif=exif)
+    return path
+
+
+def test_process_image_runs_in_the_pool(photo, tmp_path):
+    pipeline = IngestPipeline(workers=1, temperature=lambda: None)
+    display, thumbnail = str(tmp_path / "display.jpg"), str(tmp_path / "thumb.jpg")
+    try:
+        info = asyncio.run(pipeline.run(process_image, str(photo), [(thumbnail, (40, 40)), (display, (80, 80))]))
+    finally:
+        pipeline.shutdown()
+
+    assert (info["width"], info["height"], info["format"]) == (200, 100, "JPEG")
+    assert info["metadata"]["taken_date"].isoformat() == "2024-06-01T12:30:00"
+    assert info["metadata"]["camera_make"] == "Raspberry"
+    assert info["file_size"] == photo.stat().st_size
+    assert info["written"] == [display, thumbnail] and info["errors"] == {}
+    with Image.open(display) as image:
+        assert image.size == (40, 80)  # Turned upright
+    with Image.open(thumbnail) as image:
+        assert image.size == (20, 40)
+    assert len(info["phash"]) == 16
+    assert pipeline.status()["completed"] == 1
+
+
+def test_hot_cpu_throttles_then_pauses_ingestion():
+    readings = iter([60.0, 72.0, 85.0, 78.0, 74.0])
+    pipeline = IngestPipeline(workers=3, throttle_temp=70.0, pause_temp=80.0, check_interval=0,
+                              temperature=lambda: next(readings))
+
+    assert pipeline.limit() == 3
+    assert pipeline.limit() == 1 and pipeline.status()["throttle"] == "reduced"
+    assert pipeline.limit() == 0 and pipeline.paused
+    assert pipeline.limit() == 0  # Not yet RESUME_MARGIN below pause_temp
+    assert pipeline.limit() == 1 and not pipeline.paused
+
+
+def test_throttled_pipeline_runs_one_job_at_a_time():
+    pipeline = IngestPipeline(workers=3, throttle_temp=70.0, check_interval=0.01, temperature=lambda: 75.0)
+
+    async def run():
+        await pipeline._acquire()
+        second = asyncio.create_task(pipeline._acquire())
+        await asyncio.sleep(0.05)
+        waited = not second.done()
+        urgent = asyncio.create_task(pipeline._acquire(urgent=True))
+        await asyncio.wait_for(urgent, 1)  # Urgent work may take one slot beyond the limit
+
+        await pipeline._release()
+        await pipeline._release()
+        await asyncio.wait_for(second, 1)
+        return waited
+
+    assert asyncio.run(run())
+    assert pipeline._active == 1
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import shutil
+
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def photos(tmp_path, monkeypatch):
+    """PhotoService over an empty photo directory in tmp_path."""
+    monkeypatch.setenv("PHOTOS_DIRECTORY", str(tmp_path / "photos"))
+    monkeypatch.setenv("THUMBNAILS_DIRECTORY", str(tmp_path / "thumbnails"))
+    monkeypatch.setenv("PHOTO_INGEST_WORKERS", "1")
+    from modules.photos.service import PhotoService
+
+    service = PhotoService()
+    service._loaded = True
+    yield service
+    service.ingest.shutdown()
+
+
+def write_jpeg(path, color=(200, 40, 40)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("RGB", (64, 48), color).save(path, "JPEG")
+    return str(path)
+
+
+def test_deleted_photo_stays_gone_after_a_rescan(photos, tmp_path):
+    original = write_jpeg(tmp_path / "photos" / "beach.jpg")
+    copy = tmp_path / "photos" / "backup" / "beach (1).jpg"
+    os.makedirs(copy.parent)
+    shutil.copy2(original, copy)
+
+    result = asyncio.run(photos.scan_directory())
+    assert photos.catalog.count() == 2 and len(photos.catalog.duplicates()) == 1
+    [photo_id] = photos.catalog.shown_ids()
+    assert (result.added, result.duplicates) == (1, 1)
+
+    asyncio.run(photos.delete_photo(photo_id))
+    assert not os.path.exists(original) and not copy.exists()
+
+    asyncio.run(photos.scan_directory())
+    assert photos.catalog.count() == 0
+    assert photos.catalog.shown_ids() == []
+
+
+def test_variant_is_made_again_after_its_photo_changes(photos, tmp_path):
+    path = write_jpeg(tmp_path / "photos" / "garden.jpg")
+    asyncio.run(photos.scan_directory())
+    [photo_id] = photos.catalog.shown_ids()
+
+    variant, _ = asyncio.run(photos.get_variant(photo_id, width=32))
+    with Image.open(variant) as image:
+        assert image.getpixel((0, 0))[0] > 150
+
+    write_jpeg(tmp_path / "photos" / "garden.jpg", color=(20, 40, 200))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    asyncio.run(photos.scan_directory(paths=[path]))  # As the watcher does for a changed file
+
+    assert asyncio.run(photos.get_variant(photo_id, width=32))[0] == variant
+    with Image.open(variant) as image:
+        assert image.getpixel((0, 0))[0] < 100
+    assert photos.variants.stats()["misses"] == 2
+
+
+def test_photo_removed_from_disk_leaves_the_rotation_without_a_rescan(photos, tmp_path, monkeypatch):
+    paths = [write_jpeg(tmp_path / "photos" / f"{name}.jpg", color) for name, color in
+             (("red", (200, 0, 0)), ("green", (0, 200, 0)), ("blue", (0, 0, 200)))]
+    asyncio.run(photos.scan_directory())
+    assert len(asyncio.run(photos.get_slideshow_photos())) == 3
+
+    reads = []
+    shown_ids = photos.catalog.shown_ids
+    monkeypatch.setattr(photos.catalog, "shown_ids", lambda: reads.append(1) or shown_ids())
+    os.remove(paths[1])
+
+    shown = asyncio.run(photos.get_slideshow_photos())
+    assert sorted(photo.file_path for photo in shown) == sorted([paths[0], paths[2]])
+    [missing] = photos._missing
+    assert photos.catalog.get(missing).file_path == paths[1]
+    for _ in range(20):
+        assert asyncio.run(photos.get_random_photo()).id != missing
+    assert len(asyncio.run(photos.get_slideshow_photos())) == 2
+    assert reads == []  # Served from the cached order; nothing rescanned or re-read
+
+    asyncio.run(photos.scan_directory())  # The next change to the catalog starts afresh
+    assert len(asyncio.run(photos.get_slideshow_photos())) == 2
+    assert photos._missing == set() and reads == [1]
@@ -0,0 +1,81 @@
+from asgi import endpoint, request
+
+from backend.route_cache import ResponseCacheMiddleware
+from modules.common.response_cache import ResponseCache
+from modules.common.versioning import VersionRegistry
+
+
+def setup(ttl=60, max_bytes=64 * 1024, **endpoint_args):
+    registry = VersionRegistry()
+    cache = ResponseCache(max_bytes=max_bytes, registry=registry)
+    cache.register("/api/config", ttl=ttl, scopes=("config",))
+    app = endpoint(**endpoint_args)
+    return registry, cache, app, ResponseCacheMiddleware(app, cache)
+
+
+def test_repeat_requests_are_served_from_the_cache():
+    _, cache, app, middleware = setup()
+    first = request(middleware, "/api/config?b=2&a=1")
+    again = request(middleware, "/api/config?a=1&b=2")  # Same parameters, other order
+    assert first.status == again.status == 200 and first.body == again.body == b"hello"
+    assert again.headers["content-type"] == "text/plain"
+    assert len(app.calls) == 1
+
+    request(middleware, "/api/config?a=2")
+    assert len(app.calls) == 2
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_bump_drops_cached_responses():
+    registry, cache, app, middleware = setup()
+    request(middleware, "/api/config")
+    registry.bump("other")
+    request(middleware, "/api/config")
+    assert len(app.calls) == 1
+    registry.bump("config")
+    assert cache.entries == {} and cache.invalidations == 1
+    request(middleware, "/api/config")
+    assert len(app.calls) == 2
+
+
+def test_expired_entries_are_refetched():
+    _, _, app, middleware = setup(ttl=0)
+    request(middleware, "/api/config")
+    request(middleware, "/api/config")
+    assert len(app.calls) == 2
+
+
+def test_bump_while_rendering_is_not_stored():
+    registry = VersionRegistry()
+    cache = ResponseCache(registry=registry)
+    cache.register("/api/config", ttl=60, scopes=("config",))
+    request(ResponseCacheMiddleware(endpoint(on_call=lambda scope: registry.bump("config")), cache), "/api/config")
+    assert cache.entries == {}
+
+
+def test_only_complete_200_gets_on_registered_routes_are_cached():
+    _, cache, app, middleware = setup(status=404)
+    request(middleware, "/api/config")
+    assert cache.entries == {}
+
+    _, cache, app, middleware = setup()
+    request(middleware, "/api/config", method="POST")
+    request(middleware, "/api/other")
+    assert cache.entries == {} and len(app.calls) == 2
+
+
+def test_least_recently_used_entries_are_evicted_past_the_byte_budget():
+    _, cache, app, middleware = setup(max_bytes=1000, body=b"x" * 200)
+    for query in ("a", "b", "c", "d"):
+        request(middleware, f"/api/config?{query}")
+    request(middleware, "/api/config?a")  # Keeps a the most recently used
+    request(middleware, "/api/config?e")
+    assert list(cache.entries) == ["/api/config?c=", "/api/config?d=", "/api/config?a=", "/api/config?e="]
+    assert cache.evictions == 1 and cache.size <= cache.max_bytes
+
+
+def test_oversized_responses_are_not_stored():
+    _, cache, _, middleware = setup(max_bytes=1000, body=b"x" * 400)
+    request(middleware, "/api/config")
+    assert cache.entries == {}
@@ -0,0 +1,73 @@
+import os
+
+from modules.photos.scanner import FileStat, plan_scan, stat_paths, walk_photos
+
+
+def test_plan_scan_unchanged_changed_and_new():
+    index = {
+        "/p/a.jpg": ("a", 1, 100, 10),
+        "/p/b.jpg": ("b", 2, 100, 10),
+    }
+    files = [
+        FileStat("/p/a.jpg", 1, 100, 10),
+        FileStat("/p/b.jpg", 2, 200, 12),  # Edited in place
+        FileStat("/p/c.jpg", 3, 100, 10),
+    ]
+    plan = plan_scan(index, files)
+    assert plan.unchanged == 1
+    assert plan.changed == [("b", files[1])]
+    assert plan.new == [files[2]]
+    assert plan.moved == plan.adopted == plan.deleted == []
+
+
+def test_plan_scan_moved_keeps_the_photo_id():
+    index = {"/p/a.jpg": ("a", 1, 100, 10)}
+    moved = FileStat("/p/sub/renamed.jpg", 1, 100, 10)
+    plan = plan_scan(index, [moved])
+    assert plan.moved == [("a", moved)]
+    assert plan.new == [] and plan.deleted == []
+
+
+def test_plan_scan_deleted():
+    index = {"/p/a.jpg": ("a", 1, 100, 10), "/p/b.jpg": ("b", 2, 100, 10)}
+    plan = plan_scan(index, [FileStat("/p/a.jpg", 1, 100, 10)])
+    assert plan.deleted == ["b"]
+
+
+def test_plan_scan_new_file_with_another_inode_is_not_a_move():
+    index = {"/p/a.jpg": ("a", 1, 100, 10)}
+    other = FileStat("/p/b.jpg", 2, 100, 10)
+    plan = plan_scan(index, [other])
+    assert plan.new == [other]
+    assert plan.deleted == ["a"]
+
+
+def test_plan_scan_untracked_rows_are_adopted_by_size():
+    index = {"/p/a.jpg": ("a", None, None, 10), "/p/b.jpg": ("b", None, None, 10)}
+    same = FileStat("/p/a.jpg", 1, 100, 10)
+    resized = FileStat("/p/b.jpg", 2, 100, 11)
+    plan = plan_scan(index, [same, resized])
+    assert plan.adopted == [("a", same)]
+    assert plan.changed == [("b", resized)]
+
+
+def test_walk_photos_skips_hidden_excluded_and_other_files(tmp_path):
+    for path in ("a.jpg", "b.PNG", "notes.txt", ".hidden/c.jpg", "thumbs/d.jpg", "sub/e.jpeg"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(b"x")
+    os.symlink(tmp_path / "sub", tmp_path / "link")
+
+    found = sorted(os.path.relpath(file.path, tmp_path)
+                   for file in walk_photos(str(tmp_path), exclude=[str(tmp_path / "thumbs")]))
+    assert found == ["a.jpg", "b.PNG", "sub/e.jpeg"]
+    top = sorted(os.path.basename(file.path) for file in walk_photos(str(tmp_path), recursive=False))
+    assert top == ["a.jpg", "b.PNG"]
+
+
+def test_stat_paths_walks_directories_once_and_skips_missing(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.jpg").write_bytes(b"xy")
+    paths = [str(tmp_path / "sub"), str(tmp_path / "sub" / "a.jpg"), str(tmp_path / "gone.jpg")]
+    files = list(stat_paths(paths))
+    assert [file.path for file in files] == [str(tmp_path / "sub" / "a.jpg")]
+    assert files[0].size == 2
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules.common.shared_state import SharedState
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two stores on one database, as two worker processes would open it."""
+    path = str(tmp_path / "state.db")
+    return SharedState(path), SharedState(path)
+
+
+def test_documents_and_counters_are_shared(workers):
+    a, b = workers
+    assert a.boot == b.boot and a.owner != b.owner
+    assert b.get("timers") is None and b.version("timers") == 0
+
+    assert a.set("timers", {"running": [1]}) == 1
+    assert b.set("timers", {"running": []}) == 2
+    value, version, updated = a.get("timers")
+    assert value == {"running": []} and version == a.version("timers") == 2
+    assert updated <= time.time()
+
+    assert [a.increment("photos"), b.increment("photos"), a.increment("weather")] == [1, 2, 1]
+    assert b.counter("photos") == 2 and b.counter("missing") == 0
+
+
+def test_lease_is_held_by_one_worker_until_released_or_expired(workers):
+    a, b = workers
+    assert a.acquire_lease("alerts", ttl=60)
+    assert not b.acquire_lease("alerts", ttl=60)
+    assert a.acquire_lease("alerts", ttl=60)  # Renewal
+    a.release_lease("alerts")
+    assert b.acquire_lease("alerts", ttl=-1)  # Taken, but already expired
+    assert a.acquire_lease("alerts", ttl=60)
+    b.release_lease("alerts")  # Not b's any more: no effect
+    assert not b.acquire_lease("alerts", ttl=60)
+
+
+def test_single_flight_fetches_once_across_workers(workers):
+    a, b = workers
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return {"temp": 21}
+
+    async def run():
+        return await asyncio.gather(a.single_flight("weather", 60, fetch), b.single_flight("weather", 60, fetch))
+
+    first, second = asyncio.run(run())
+    assert len(calls) == 1
+    assert first[0] == second[0] == {"temp": 21}
+    assert first[1] == second[1] == a.get("weather")[2]  # Same Last-Modified in both workers
+    assert sorted([first[2], second[2]]) == [False, True]
+
+    cached = asyncio.run(b.single_flight("weather", 60, fetch))
+    assert cached == (first[0], first[1], False) and len(calls) == 1
+    asyncio.run(b.single_flight("weather", 0, fetch))  # Too old
+    assert len(calls) == 2
+
+
+def test_single_flight_fetches_itself_when_the_leader_stalls(workers):
+    a, b = workers
+    assert a.acquire_lease("fetch:weather", ttl=60)  # A leader that never stores a result
+
+    async def fetch():
+        return "fallback"
+
+    value, _, fetched = asyncio.run(b.single_flight("weather", 60, fetch, wait=0.3))
+    assert (value, fetched) == ("fallback", True)
+
+
+def test_async_lock_waits_for_another_worker_without_blocking_the_loop(workers):
+    a, b = workers
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with a.lock("timers"):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        asyncio.get_running_loop().call_later(0.2, release.set)
+        start = time.monotonic()
+        async with b.locked("timers"):
+            waited = time.monotonic() - start
+        ticker.cancel()
+        return waited, ticks
+
+    waited, ticks = asyncio.run(run())
+    thread.join()
+    assert waited >= 0.15
+    assert ticks >= 5  # The loop kept running while the lock was held elsewhere
+    assert asyncio.run(b.run(b.increment, "timers")) == 1
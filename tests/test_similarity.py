@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from modules.photos.similarity import HASH_BITS, HammingIndex, hamming
+
+
+def flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def brute_force(items, value, radius):
+    return sorted((hamming(value, other), key) for other, key in items if hamming(value, other) <= radius)
+
+
+@pytest.mark.parametrize("radius", [0, 1, 6, 10, 63, 80])
+def test_search_matches_brute_force(radius):
+    rng = random.Random(radius)
+    base = [rng.getrandbits(HASH_BITS) for _ in range(50)]
+    # Random hashes and near copies of them at every distance up to a little past the radius
+    items = [(value, f"r{i}") for i, value in enumerate(base)]
+    items += [(flip(value, rng.sample(range(HASH_BITS), min(i % (radius + 3), HASH_BITS))), f"n{i}")
+              for i, value in enumerate(base)]
+    index = HammingIndex(radius, items)
+    assert len(index) == len(items)
+    for value, _ in items[:60]:
+        assert index.search(value) == brute_force(items, value, radius)
+
+
+def test_hamming():
+    assert hamming(0, 0) == 0
+    assert hamming(0b1011, 0b0001) == 2
+    assert hamming(0, (1 << HASH_BITS) - 1) == HASH_BITS
+
+
+def test_add_replaces_and_discard_removes():
+    index = HammingIndex(2)
+    index.add(0b1111, "a")
+    index.add(0b1110, "b")
+    assert index.search(0b1111) == [(0, "a"), (1, "b")]
+
+    index.add(1 << 40, "a")  # Re-added with a new hash
+    assert len(index) == 2
+    assert index.search(0b1111) == [(1, "b")]
+    assert index.search(1 << 40) == [(0, "a")]
+
+    index.discard("b")
+    index.discard("missing")
+    assert index.search(0b1111) == []
+    assert len(index) == 1
@@ -0,0 +1,69 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from modules.weather.solar import SolarCalculator, SolarTable
+
+UTC = timezone.utc
+MEDFORD = (39.9, -74.82)
+
+
+def near(actual, expected, minutes=2):
+    return abs(actual - expected) <= timedelta(minutes=minutes)
+
+
+@pytest.mark.parametrize("lat, lon, day, sunrise, sunset", [
+    # Published almanac times, in UTC
+    (51.4779, 0.0, date(2024, 6, 21), datetime(2024, 6, 21, 3, 43, tzinfo=UTC), datetime(2024, 6, 21, 20, 21, tzinfo=UTC)),
+    (*MEDFORD, date(2024, 12, 21), datetime(2024, 12, 21, 12, 17, tzinfo=UTC), datetime(2024, 12, 21, 21, 38, tzinfo=UTC)),
+    (-33.87, 151.21, date(2024, 6, 21), datetime(2024, 6, 20, 21, 0, tzinfo=UTC), datetime(2024, 6, 21, 6, 54, tzinfo=UTC)),
+])
+def test_sunrise_and_sunset_match_the_almanac(lat, lon, day, sunrise, sunset):
+    sun = SolarCalculator().get_day(lat, lon, day)
+    assert near(sun.sunrise, sunrise) and near(sun.sunset, sunset)
+    assert sun.civil_dawn < sun.sunrise < sun.solar_noon < sun.sunset < sun.civil_dusk
+    assert abs(sun.day_length - (sun.sunset - sun.sunrise).total_seconds()) <= 1
+
+
+def test_equinox_day_is_about_twelve_hours():
+    sun = SolarCalculator().get_day(0.0, 0.0, date(2024, 3, 20))
+    assert 12 * 3600 <= sun.day_length <= 12 * 3600 + 10 * 60
+
+
+def test_polar_day_and_night():
+    calculator = SolarCalculator()
+    summer = calculator.get_day(69.65, 18.96, date(2024, 6, 21))
+    assert summer.polar_day and not summer.polar_night
+    assert summer.sunrise is None and summer.sunset is None and summer.day_length == 86400
+
+    winter = calculator.get_day(69.65, 18.96, date(2024, 12, 21))
+    assert winter.polar_night and not winter.polar_day
+    assert winter.sunrise is None and winter.day_length == 0
+    assert winter.civil_dawn is not None  # Still twilight at noon
+
+
+def test_sunset_after_utc_midnight_stays_on_the_local_day():
+    sun = SolarCalculator().get_day(*MEDFORD, date(2024, 6, 21))
+    assert sun.date == "2024-06-21"
+    assert sun.sunset.date() == date(2024, 6, 22)  # 8:31 pm EDT
+    assert SolarTable(*MEDFORD, 2024).local_date(datetime(2024, 6, 22, 2, 0, tzinfo=UTC)) == date(2024, 6, 21)
+
+
+def test_tables_are_cached_per_location_and_year():
+    calculator = SolarCalculator()
+    table = calculator.get_table(*MEDFORD, 2024)
+    assert calculator.get_table(MEDFORD[0] + 1e-6, MEDFORD[1], 2024) is table
+    assert calculator.get_table(*MEDFORD, 2025) is not table
+
+
+def test_night_window_is_the_current_or_next_night():
+    calculator = SolarCalculator()
+    day = date(2024, 6, 21)
+    yesterday, today, tomorrow = (calculator.get_day(*MEDFORD, day + timedelta(days=offset)) for offset in (-1, 0, 1))
+
+    before_dawn = calculator.get_schedule(*MEDFORD, now=datetime(2024, 6, 21, 7, 0, tzinfo=UTC))
+    assert before_dawn["night"] == {"start": yesterday.civil_dusk, "end": today.civil_dawn}
+
+    midday = calculator.get_schedule(*MEDFORD, days=3, now=datetime(2024, 6, 21, 17, 0, tzinfo=UTC))
+    assert midday["night"] == {"start": today.civil_dusk, "end": tomorrow.civil_dawn}
+    assert [sun.date for sun in midday["days"]] == ["2024-06-21", "2024-06-22", "2024-06-23"]
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules.common.shared_state import SharedState
+from modules.timer import service as timer_service
+from modules.timer.models import TimerStatus
+from modules.timer.service import TimerService
+
+
+def test_timer_lifecycle_in_one_worker():
+    async def run():
+        timers = TimerService()
+        timer = await timers.create_timer("Tea", 180, auto_start=True)
+        running = timer.status, timer.id in timers.running_tasks
+
+        await timers.pause_timer(timer.id)
+        paused = timer.status, timer.id in timers.running_tasks
+        await timers.resume_timer(timer.id)
+        resumed = timer.status
+        await timers.stop_timer(timer.id)
+        stopped = timer.status, timer.remaining_seconds
+
+        await timers.delete_timer(timer.id)
+        with pytest.raises(ValueError):
+            await timers.start_timer(timer.id)
+        return running, paused, resumed, stopped, timers.get_all_timers()
+
+    running, paused, resumed, stopped, remaining = asyncio.run(run())
+    assert running == (TimerStatus.RUNNING, True)
+    assert paused == (TimerStatus.PAUSED, False)
+    assert resumed == TimerStatus.RUNNING
+    assert stopped == (TimerStatus.STOPPED, 180)
+    assert remaining == []
+
+
+def test_shared_updates_wait_and_write_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "state.db")
+    store, other_worker = SharedState(path), SharedState(path)
+    monkeypatch.setattr(timer_service, "shared_state", store)
+    writers = []
+    set_document = store.set
+
+    def recording_set(key, value):
+        writers.append(threading.current_thread())
+        return set_document(key, value)
+
+    store.set = recording_set
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with other_worker.lock("timers"):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+
+    async def run():
+        timers = TimerService()
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        asyncio.get_running_loop().call_later(0.2, release.set)
+        start = time.monotonic()
+        timer = await timers.create_timer("Pasta", 600, auto_start=True)
+        waited = time.monotonic() - start
+        ticker.cancel()
+        return timer, waited, ticks, timers.running_tasks
+
+    timer, waited, ticks, running_tasks = asyncio.run(run())
+    thread.join()
+    assert waited >= 0.15
+    assert ticks >= 5  # The loop kept serving while another worker held the lock
+    assert writers and threading.main_thread() not in writers
+
+    document, _, _ = other_worker.get("timers")
+    assert document[timer.id]["status"] == TimerStatus.RUNNING
+    assert not running_tasks  # The leader's tick loop runs shared timers
@@ -0,0 +1,43 @@
+import builtins
+import json
+import threading
+
+from backend import traffic_recorder
+from backend.traffic_recorder import TrafficLog, anonymize_query
+
+
+def test_credentials_in_the_query_are_redacted():
+    assert anonymize_query(b"size=large&api_key=abc&code=123") == "size=large&api_key=redacted&code=redacted"
+    assert anonymize_query(b"") == ""
+
+
+def test_records_are_written_by_the_writer_thread(tmp_path, monkeypatch):
+    writers = []
+    real_open = builtins.open
+
+    def tracking_open(*args, **kwargs):
+        writers.append(threading.current_thread().name)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(traffic_recorder, "open", tracking_open, raising=False)
+    log = TrafficLog(str(tmp_path / "traffic.{pid}.jsonl"), buffer_records=2, flush_interval=60)
+    for index in range(5):
+        log.write({"p": f"/api/{index}"})
+    log.close()
+
+    with open(log.path) as f:
+        assert [json.loads(line)["p"] for line in f] == [f"/api/{index}" for index in range(5)]
+    assert writers and set(writers) == {"traffic-log"}
+    assert log.records == 5 and "{pid}" not in log.path
+
+
+def test_log_rolls_over_at_max_bytes(tmp_path):
+    log = TrafficLog(str(tmp_path / "traffic.jsonl"), max_bytes=10, backups=2, buffer_records=1)
+    for index in range(4):
+        log.write({"p": index})
+    log.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["traffic.jsonl.1", "traffic.jsonl.2"]
+    # Every second record takes the log past 10 bytes
+    assert (tmp_path / "traffic.jsonl.2").read_text() == '{"p":0}\n{"p":1}\n'
+    assert (tmp_path / "traffic.jsonl.1").read_text() == '{"p":2}\n{"p":3}\n'
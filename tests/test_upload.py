@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from modules.photos.upload import UploadTooLarge, receive_uploads
+
+BOUNDARY = "testboundary"
+HEADERS = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+
+def multipart_body(*parts):
+    """parts: (field, filename or None, content type, data)."""
+    body = b""
+    for field, filename, content_type, data in parts:
+        disposition = f'form-data; name="{field}"' + (f'; filename="{filename}"' if filename else "")
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+                 f"Content-Type: {content_type}\r\n\r\n").encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+async def chunked(body, size=1000, fail_after=None):
+    for offset in range(0, len(body), size):
+        if fail_after is not None and offset >= fail_after:
+            raise ConnectionResetError("client went away")
+        yield body[offset:offset + size]
+
+
+def receive(directory, body, max_bytes=10_000, max_files=5, headers=HEADERS, **stream):
+    return asyncio.run(receive_uploads(headers, chunked(body, **stream), str(directory), max_bytes, max_files))
+
+
+def leftovers(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_files_are_written_to_hidden_temp_files_and_hashed(tmp_path):
+    data = os.urandom(5000)
+    files = receive(tmp_path, multipart_body(("note", None, "text/plain", b"ignored"),
+                                             ("files", "Beach.JPG", "image/jpeg", data)))
+    assert len(files) == 1
+    upload = files[0]
+    assert upload.error is None
+    assert (upload.filename, upload.extension, upload.size) == ("Beach.JPG", ".jpg", 5000)
+    assert os.path.basename(upload.temp_path).startswith(".upload-")
+    with open(upload.temp_path, "rb") as f:
+        assert f.read() == data
+    assert upload.content_hash == hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def test_file_over_the_limit_is_cut_off_and_removed(tmp_path):
+    small = os.urandom(2000)
+    files = receive(tmp_path, multipart_body(("files", "big.jpg", "image/jpeg", os.urandom(25_000)),
+                                             ("files", "small.png", "image/png", small)))
+    big, kept = files
+    assert isinstance(big.error, UploadTooLarge)
+    assert big.temp_path is None
+    assert kept.error is None and kept.size == len(small)
+    assert leftovers(tmp_path) == [os.path.basename(kept.temp_path)]
+
+
+def test_content_length_over_the_limit_is_rejected_before_reading(tmp_path):
+    async def unread():
+        raise AssertionError("body was read")
+        yield b""
+
+    headers = dict(HEADERS, **{"content-length": str(10 ** 9)})
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(receive_uploads(headers, unread(), str(tmp_path), 10_000, 1))
+
+
+def test_non_images_are_rejected_without_temp_files(tmp_path):
+    files = receive(tmp_path, multipart_body(("files", "notes.txt", "text/plain", b"hello"),
+                                             ("files", "photo.tiff", "image/tiff", b"II*")))
+    assert [str(upload.error) for upload in files] == ["File must be an image", "Unsupported photo type .tiff"]
+    assert leftovers(tmp_path) == []
+
+
+def test_disconnect_removes_every_temp_file(tmp_path):
+    body = multipart_body(("files", "a.jpg", "image/jpeg", os.urandom(3000)),
+                          ("files", "b.jpg", "image/jpeg", os.urandom(3000)))
+    with pytest.raises(ConnectionResetError):
+        receive(tmp_path, body, fail_after=4000)
+    assert leftovers(tmp_path) == []
+
+
+def test_too_many_files_removes_every_temp_file(tmp_path):
+    body = multipart_body(*[("files", f"{i}.jpg", "image/jpeg", b"x" * 100) for i in range(3)])
+    with pytest.raises(ValueError, match="At most 2"):
+        receive(tmp_path, body, max_files=2)
+    assert leftovers(tmp_path) == []
+
+
+def test_truncated_body_marks_the_part_incomplete(tmp_path):
+    body = multipart_body(("files", "a.jpg", "image/jpeg", os.urandom(3000)))
+    files = receive(tmp_path, body[:2000])
+    assert str(files[0].error) == "Upload incomplete"
+    assert files[0].temp_path is None
+    assert leftovers(tmp_path) == []
+
+
+def test_not_multipart_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="multipart"):
+        receive(tmp_path, b"{}", headers={"content-type": "application/json"})
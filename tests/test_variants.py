@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from modules.photos.variants import VariantCache, variant_width
+
+
+def maker(size, calls, delay=0.0):
+    async def make(temp_path):
+        calls.append(temp_path)
+        await asyncio.sleep(delay)
+        with open(temp_path, "wb") as f:
+            f.write(b"x" * size)
+    return make
+
+
+def test_variant_widths_round_up_but_never_exceed_the_photo():
+    assert variant_width(300, 4000) == 320
+    assert variant_width(320, 4000) == 320
+    assert variant_width(5000, 8000) == 3840
+    assert variant_width(1000, 900) == 900
+
+
+def test_eviction_keeps_the_cache_within_its_size_by_recency(tmp_path):
+    cache = VariantCache(str(tmp_path), max_bytes=1000)
+    calls = []
+    a = asyncio.run(cache.get("a_w320_q85.jpg", maker(400, calls)))
+    b = asyncio.run(cache.get("b_w320_q85.jpg", maker(400, calls)))
+    # Made a while ago, a before b; a hit then refreshes a's mtime, the LRU clock workers share
+    os.utime(a, (time.time() - 600, time.time() - 600))
+    os.utime(b, (time.time() - 300, time.time() - 300))
+    assert asyncio.run(cache.get("a_w320_q85.jpg", maker(400, calls))) == a
+
+    asyncio.run(cache.get("c_w320_q85.jpg", maker(400, calls)))
+    assert sorted(os.listdir(tmp_path)) == ["a_w320_q85.jpg", "c_w320_q85.jpg"]
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"]) == (2, 800)
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["evicted_bytes"]) == (1, 3, 1, 400)
+    assert len(calls) == 3
+
+    # Another worker's index sees the same directory
+    assert VariantCache(str(tmp_path), max_bytes=1000).bytes == 800
+
+
+def test_concurrent_requests_share_one_render(tmp_path):
+    cache = VariantCache(str(tmp_path), max_bytes=10_000)
+    calls = []
+
+    async def run():
+        make = maker(100, calls, delay=0.05)
+        return await asyncio.gather(*(cache.get("a_w640_q85.webp", make) for _ in range(5)))
+
+    paths = asyncio.run(run())
+    assert len(set(paths)) == 1 and os.path.getsize(paths[0]) == 100
+    assert len(calls) == 1
+    assert (cache.misses, cache.joined) == (1, 4)
+    assert not cache._pending
+    assert os.listdir(tmp_path) == ["a_w640_q85.webp"]  # The temp file was renamed into place
+
+
+def test_failed_render_leaves_nothing_behind_and_is_retried(tmp_path):
+    cache = VariantCache(str(tmp_path), max_bytes=10_000)
+
+    async def broken(temp_path):
+        with open(temp_path, "wb") as f:
+            f.write(b"partial")
+        raise OSError("decoder crashed")
+
+    with pytest.raises(OSError, match="decoder crashed"):
+        asyncio.run(cache.get("a_w320_q85.jpg", broken))
+    assert os.listdir(tmp_path) == []
+
+    calls = []
+    asyncio.run(cache.get("a_w320_q85.jpg", maker(10, calls)))
+    assert len(calls) == 1 and cache.misses == 2
+
+
+def test_discard_removes_every_variant_of_a_photo(tmp_path):
+    cache = VariantCache(str(tmp_path), max_bytes=10_000)
+    for name in ("a_w320_q85.jpg", "a_w640_q85.webp", "ab_w320_q85.jpg"):
+        asyncio.run(cache.get(name, maker(10, [])))
+    cache.discard(["a"])
+    assert os.listdir(tmp_path) == ["ab_w320_q85.jpg"]
+    assert cache.bytes == 10
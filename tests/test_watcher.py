@@ -0,0 +1,128 @@
+import asyncio
+import os
+
+import pytest
+
+from modules.photos import watcher as watcher_module
+from modules.photos.watcher import IN_CLOSE_WRITE, IN_CREATE, IN_ISDIR, IN_Q_OVERFLOW, PhotoWatcher
+
+
+def no_inotify():
+    raise OSError("inotify not available")
+
+
+async def wait_for(condition, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def polling(monkeypatch):
+    monkeypatch.setattr(watcher_module, "Inotify", no_inotify)
+    monkeypatch.setattr(watcher_module, "POLL_INTERVAL", 0.02)
+
+
+def test_polling_reports_the_directory_of_a_new_photo(tmp_path, polling):
+    album = tmp_path / "album"
+    album.mkdir()
+    calls = []
+
+    async def on_change(paths):
+        calls.append(paths)
+        return []
+
+    async def run():
+        watcher = PhotoWatcher(str(tmp_path), on_change, shared=None, settle=0.05)
+        watcher.start()
+        await wait_for(lambda: calls == [None])  # Catch-up scan on start
+        assert watcher.status()["backend"] == "polling"
+
+        (album / "new.jpg").write_bytes(b"jpeg")
+        await wait_for(lambda: len(calls) == 2)
+        await watcher.stop()
+        return watcher
+
+    watcher = asyncio.run(run())
+    assert calls == [None, [str(album)]]
+    assert watcher.status()["scans"] == 2 and watcher.backend is None
+
+
+def test_paths_still_being_written_are_retried(tmp_path, polling):
+    calls = []
+
+    async def on_change(paths):
+        calls.append(paths)
+        # The first scan of the directory finds a copy in progress
+        return paths if paths and len(calls) == 2 else []
+
+    async def run():
+        watcher = PhotoWatcher(str(tmp_path), on_change, shared=None, settle=0.05)
+        watcher.start()
+        await wait_for(lambda: calls == [None])
+        (tmp_path / "copying.jpg").write_bytes(b"jpeg")
+        await wait_for(lambda: len(calls) == 3)
+        pending = watcher.status()["pending"]
+        await watcher.stop()
+        return pending
+
+    assert asyncio.run(run()) == 0
+    assert calls == [None, [str(tmp_path)], [str(tmp_path)]]
+
+
+class FakeInotify:
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.watched = []
+
+    def read(self):
+        return self.batches.pop(0) if self.batches else []
+
+    def add_watch(self, path, mask):
+        self.watched.append(path)
+        return 100 + len(self.watched)
+
+
+def test_overflow_drops_queued_paths_but_keeps_watching_new_directories(tmp_path):
+    (tmp_path / "lost").mkdir()  # Created while the queue overflowed
+    (tmp_path / "later").mkdir()
+    watcher = PhotoWatcher(str(tmp_path), lambda paths: None, shared=None)
+    watcher._wakeup = asyncio.Event()
+    watcher._inotify = FakeInotify(
+        [(1, IN_CLOSE_WRITE, "before.jpg"), (-1, IN_Q_OVERFLOW, ""), (1, IN_CLOSE_WRITE, "after.jpg")],
+        [(1, IN_CREATE | IN_ISDIR, "later"), (1, IN_CLOSE_WRITE, "last.jpg")]
+    )
+    watcher._watches = {1: str(tmp_path)}
+
+    watcher._read_events()
+    assert watcher._pending == {}
+    assert watcher._full_scan and watcher._wakeup.is_set()
+    assert sorted(watcher._inotify.watched) == [str(tmp_path / "later"), str(tmp_path / "lost")]
+    assert watcher.events == 5
+
+
+@pytest.mark.skipif(not hasattr(os, "uname") or os.uname().sysname != "Linux", reason="inotify is Linux only")
+def test_inotify_reports_a_new_photo(tmp_path):
+    calls = []
+
+    async def on_change(paths):
+        calls.append(paths)
+        return []
+
+    async def run():
+        watcher = PhotoWatcher(str(tmp_path), on_change, shared=None, settle=0.05)
+        watcher.start()
+        await wait_for(lambda: calls == [None])
+        backend = watcher.backend
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "a.jpg").write_bytes(b"jpeg")
+        await wait_for(lambda: len(calls) >= 2)
+        await watcher.stop()
+        return backend
+
+    if asyncio.run(run()) != "inotify":
+        pytest.skip("inotify unavailable here")
+    # The new directory, and the photo too if its watch was in place before the write
+    assert str(tmp_path / "sub") in calls[1]
+    assert all(path.startswith(str(tmp_path / "sub")) for paths in calls[1:] for path in paths)
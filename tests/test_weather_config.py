@@ -0,0 +1,76 @@
+import json
+import logging
+
+import pytest
+from pydantic import ValidationError
+
+from modules.weather.config import WeatherConfigManager
+from modules.weather.models import WeatherConfig, WeatherLocation
+
+ENV = ("WEATHER_LOCATION", "WEATHER_LOCATIONS", "OPENWEATHER_API_KEY")
+
+
+@pytest.fixture
+def load(monkeypatch):
+    for name in ENV:
+        monkeypatch.delenv(name, raising=False)
+
+    def load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return WeatherConfigManager("no_such_config.json").load_config()
+
+    return load
+
+
+def test_weather_locations_with_and_without_coordinates(load):
+    config = load(WEATHER_LOCATIONS="Home=39.9009,-74.8234; School=39.91,-74.80 ;Boston,MA;Bad=north;")
+    assert [(location.name, location.lat, location.lon) for location in config.locations] == [
+        ("Home", 39.9009, -74.8234), ("School", 39.91, -74.80), ("Boston,MA", None, None)
+    ]
+
+
+def test_repeated_names_keep_the_first(load, caplog):
+    config = load(WEATHER_LOCATIONS="Home=39.9,-74.8;Home=40.0,-75.0")
+    assert [(location.name, location.lat) for location in config.locations] == [("Home", 39.9)]
+    assert "repeated weather location: Home" in caplog.text
+
+
+@pytest.mark.parametrize("name", ["Medford,NJ,US", "medford, nj"])
+def test_weather_location_keeps_the_default_coordinates(load, caplog, name):
+    with caplog.at_level(logging.WARNING):
+        config = load(WEATHER_LOCATION=name)
+    assert config.locations == WeatherConfig().locations
+    assert config.locations[0].lat is not None
+    assert "has no coordinates" not in caplog.text
+
+
+def test_other_weather_location_becomes_the_only_location(load, caplog):
+    with caplog.at_level(logging.WARNING):
+        config = load(WEATHER_LOCATION="Boston,MA")
+    assert config.locations == [WeatherLocation(name="Boston,MA")]
+    assert "WEATHER_LOCATION=Boston,MA has no coordinates" in caplog.text
+    assert not hasattr(config, "location")
+
+
+def test_weather_location_yields_to_configured_locations(load, tmp_path, monkeypatch):
+    assert load(WEATHER_LOCATION="Boston,MA", WEATHER_LOCATIONS="Home=39.9,-74.8").locations[0].name == "Home"
+    monkeypatch.delenv("WEATHER_LOCATION")
+    monkeypatch.delenv("WEATHER_LOCATIONS")
+
+    path = tmp_path / "weather_config.json"
+    path.write_text(json.dumps({"location": "Boston,MA"}))  # Written before locations existed
+    manager = WeatherConfigManager()
+    manager.config_path = str(path)
+    assert manager.load_config().locations == [WeatherLocation(name="Boston,MA")]
+
+    path.write_text(json.dumps({"locations": [{"name": "Cabin", "lat": 44.0, "lon": -71.0}]}))
+    monkeypatch.setenv("WEATHER_LOCATION", "Boston,MA")
+    assert manager.load_config().locations[0].name == "Cabin"
+
+
+def test_locations_must_be_present_and_uniquely_named():
+    with pytest.raises(ValidationError, match="at least one location"):
+        WeatherConfig(locations=[])
+    with pytest.raises(ValidationError, match="must be unique: Home"):
+        WeatherConfig(locations=[WeatherLocation(name="Home"), WeatherLocation(name="Home", lat=1, lon=2)])
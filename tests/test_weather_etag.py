@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+from modules.weather.service import encode_payload
+
+SNAPSHOT = datetime(2024, 6, 21, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    # The route module builds the weather service on import; keep its history database out of the tree
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WEATHER_HISTORY_DB", str(tmp_path / "history.db"))
+    from modules.weather import api
+    return api
+
+
+def get(headers=None):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/api/weather/current", "headers": raw})
+
+
+def test_payload_is_encoded_once_with_stable_validators():
+    payload = encode_payload({"temp": 21.5, "city": "Medford"}, SNAPSHOT)
+    assert payload.body == b'{"temp":21.5,"city":"Medford"}'
+    assert payload.etag.startswith('"') and payload.etag.endswith('"')
+    assert payload.last_modified == "Fri, 21 Jun 2024 12:00:00 GMT"
+    assert encode_payload({"temp": 21.5, "city": "Medford"}, SNAPSHOT).etag == payload.etag
+    assert encode_payload({"temp": 22.0, "city": "Medford"}, SNAPSHOT).etag != payload.etag
+
+
+def test_if_none_match_takes_precedence(api):
+    payload = encode_payload({"temp": 21.5}, SNAPSHOT)
+    assert api._not_modified(get({"If-None-Match": payload.etag}), payload)
+    assert api._not_modified(get({"If-None-Match": f'"other", W/{payload.etag}'}), payload)  # After compression
+    assert api._not_modified(get({"If-None-Match": "*"}), payload)
+    assert not api._not_modified(get({"If-None-Match": '"other"',
+                                      "If-Modified-Since": "Sat, 22 Jun 2024 00:00:00 GMT"}), payload)
+
+
+def test_if_modified_since(api):
+    payload = encode_payload({"temp": 21.5}, SNAPSHOT)
+    assert api._not_modified(get({"If-Modified-Since": payload.last_modified}), payload)
+    assert not api._not_modified(get({"If-Modified-Since": "Fri, 21 Jun 2024 11:59:59 GMT"}), payload)
+    assert not api._not_modified(get({"If-Modified-Since": "yesterday"}), payload)
+    assert not api._not_modified(get(), payload)
+
+
+def test_encoded_response_is_full_or_empty_304(api):
+    payload = encode_payload({"temp": 21.5}, SNAPSHOT)
+    full = api._encoded_response(get(), payload)
+    assert full.status_code == 200 and full.body == payload.body
+    assert full.headers["etag"] == payload.etag and full.headers["cache-control"] == "no-cache"
+    assert full.headers["content-type"] == "application/json"
+
+    cached = api._encoded_response(get({"If-None-Match": payload.etag}), payload)
+    assert cached.status_code == 304 and cached.body == b""
+    assert cached.headers["last-modified"] == payload.last_modified
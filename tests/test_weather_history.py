@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from modules.weather.history import WeatherHistoryStore
+from modules.weather.models import Temperature, WeatherCondition, WeatherResponse
+
+
+def observation(temp, timestamp, humidity=50):
+    return WeatherResponse(location="Home", timestamp=timestamp,
+                           temperature=Temperature(current=temp, feels_like=temp, min=temp, max=temp),
+                           condition=WeatherCondition(main="Clear", description="clear sky", icon="01d"),
+                           humidity=humidity, pressure=1013.2, wind_speed=3.4, wind_direction=180)
+
+
+def test_trends_from_rollups(tmp_path):
+    store = WeatherHistoryStore(str(tmp_path / "history.db"))
+    hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+    for minutes, temp in ((1, 10.0), (20, 14.0), (40, 12.0)):
+        store.record("Home", observation(temp, hour + timedelta(minutes=minutes) - timedelta(hours=1)))
+
+    trends = store.get_trends("Home", days=1)
+    assert trends["summary"] == {"min": 10.0, "max": 14.0, "mean": 12.0, "samples": 3}
+    assert [(point["min"], point["max"], point["mean"], point["samples"]) for point in trends["series"]] == [
+        (10.0, 14.0, 12.0, 3)
+    ]
+    assert store.get_trends("Elsewhere")["summary"] is None
+
+
+def test_same_observation_recorded_twice_is_counted_once(tmp_path):
+    store = WeatherHistoryStore(str(tmp_path / "history.db"))
+    other = WeatherHistoryStore(str(tmp_path / "history.db"))  # Another worker
+    snapshot = observation(20.0, datetime.now() - timedelta(minutes=5))
+    store.record("Home", snapshot)
+    store.record("Home", snapshot)
+    other.record("Home", snapshot)
+
+    assert store.get_stats() == {"weather_raw": 1, "weather_hourly": 1, "weather_daily": 1}
+    assert store.get_trends("Home", days=1)["summary"]["samples"] == 1
+    assert store.get_trends("Home", days=1, resolution="daily")["summary"]["samples"] == 1
@@ -0,0 +1,57 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from benchmarks.fixtures.weather_server import start_fixture_server
+from modules.weather.models import WeatherConfig, WeatherLocation
+from modules.weather.providers import ONECALL_RETRY_SECONDS, OpenWeatherMapProvider
+
+HOME = WeatherLocation(name="Home", lat=39.9, lon=-74.8)
+
+
+def run_against_fixture(scenario, **server_options):
+    """Run scenario(provider, app) with a provider pointed at a local fixture server."""
+    async def run():
+        runner, base_url = await start_fixture_server(**server_options)
+        try:
+            async with aiohttp.ClientSession() as session:
+                config = WeatherConfig(api_key="test", api_base_url=base_url, units="imperial", locations=[HOME])
+                return await scenario(OpenWeatherMapProvider(config, lambda: session), runner.app)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_onecall_returns_current_and_forecast_in_one_request():
+    async def scenario(provider, app):
+        assert provider.includes_forecast(HOME)
+        current, forecast = await provider.fetch_current(HOME)
+        return current, forecast, dict(app["stats"])
+
+    current, forecast, stats = run_against_fixture(scenario)
+    assert current.location == "Home" and current.temperature.current == 62.3
+    assert forecast["location"] == "Home" and len(forecast["daily_summaries"]) == 5 and forecast["hourly_forecasts"]
+    assert stats == {"/data/3.0/onecall": 1}
+
+
+def test_rejected_onecall_falls_back_then_retries_after_the_cool_down():
+    async def scenario(provider, app):
+        first = await provider.fetch_current(HOME)
+        assert not provider.onecall_available and not provider.includes_forecast(HOME)
+        second = await provider.fetch_current(HOME)  # Straight to split requests
+        stats = dict(app["stats"])
+
+        app["options"]["onecall"] = True  # The subscription went through
+        provider._onecall_retry_at -= ONECALL_RETRY_SECONDS
+        assert provider.includes_forecast(HOME)
+        _, forecast = await provider.fetch_current(HOME)
+        return first, second, stats, forecast, dict(app["stats"])
+
+    first, second, stats, forecast, final = run_against_fixture(scenario, onecall=False)
+    assert first[0].location == second[0].location == "Home"
+    assert first[1] is None and second[1] is None
+    assert stats == {"/data/3.0/onecall": 1, "/data/2.5/weather": 2}
+    assert forecast is not None and final["/data/3.0/onecall"] == 2
+
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from modules.weather.models import WeatherLocation
+from modules.weather.providers import OpenWeatherMapProvider, StubProvider
+from modules.weather.resilience import CircuitBreaker, LatencyTracker
+
+HOME = WeatherLocation(name="Home", lat=39.9, lon=-74.8)
+
+
+def expire(breaker):
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_breaker_opens_after_the_threshold_and_recovers_through_one_trial():
+    breaker = CircuitBreaker("primary", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow_request()
+
+    expire(breaker)
+    assert breaker.allow_request() and breaker.state == "half_open"
+    assert not breaker.allow_request()  # One trial at a time
+    breaker.record_success()
+    assert breaker.get_status() == {"state": "closed", "failures": 0}
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_failed_trial_reopens_and_cancelled_trial_is_given_back():
+    breaker = CircuitBreaker("primary", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow_request()
+
+    expire(breaker)
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == "half_open" and breaker.allow_request()
+
+
+def test_latency_percentile_needs_enough_samples():
+    tracker = LatencyTracker(window=10)
+    for seconds in (0.4, 0.1, 0.3, 0.2):
+        tracker.record(seconds)
+    assert tracker.percentile(95) is None
+    tracker.record(0.5)
+    assert tracker.percentile(0) == 0.1 and tracker.percentile(50) == 0.3 and tracker.percentile(95) == 0.5
+    for _ in range(10):
+        tracker.record(1.0)  # The window only keeps the latest samples
+    assert tracker.percentile(0) == 1.0
+
+
+def parse_malformed_forecast():
+    provider = OpenWeatherMapProvider.__new__(OpenWeatherMapProvider)
+    return provider._parse_forecast_data({"list": [{"dt": 0}]}, "Home")
+
+
+def test_malformed_forecast_raises():
+    with pytest.raises(ValueError, match="Unexpected forecast response format"):
+        parse_malformed_forecast()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """WeatherService with two stub providers, "primary" and "backup"."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WEATHER_HISTORY_DB", str(tmp_path / "history.db"))
+    from modules.weather.service import WeatherService
+
+    weather = WeatherService()
+    weather.config.provider, weather.config.backup_providers = "primary", ["backup"]
+    weather.config.hedge_delay = 0.05
+    weather.providers = {name: StubProvider(weather.config, weather._get_session) for name in ("primary", "backup")}
+    weather.breakers = {name: CircuitBreaker(name, 2, 60) for name in weather.providers}
+    weather.latencies = {name: LatencyTracker() for name in weather.providers}
+    return weather
+
+
+def fetch(service):
+    async def run():
+        return await service._fetch_with_hedging(HOME, lambda provider: provider.fetch_forecast(HOME, 3))
+    return asyncio.run(run())
+
+
+def test_slow_primary_is_hedged_and_cancelled_without_a_failure(service):
+    primary, backup = service.providers["primary"], service.providers["backup"]
+    primary.latency = 1.0
+    assert fetch(service)["location"] == "Home"
+    assert (primary.calls, backup.calls) == (1, 1)
+    assert len(service.latencies["backup"].samples) == 1 and not service.latencies["primary"].samples
+    assert service.breakers["primary"].get_status() == {"state": "closed", "failures": 0}
+
+
+def test_fast_primary_is_not_hedged(service):
+    fetch(service)
+    assert (service.providers["primary"].calls, service.providers["backup"].calls) == (1, 0)
+
+
+def test_failing_primary_fails_over_and_opens_its_circuit(service):
+    primary, backup = service.providers["primary"], service.providers["backup"]
+    primary.fail = True
+    fetch(service)
+    fetch(service)
+    assert service.breakers["primary"].state == "open"
+    fetch(service)
+    assert (primary.calls, backup.calls) == (2, 3)  # Skipped while its circuit is open
+
+
+def test_all_providers_failing_raises(service):
+    for provider in service.providers.values():
+        provider.fail = True
+    with pytest.raises(ValueError, match="All weather providers failed: primary: .*; backup: "):
+        fetch(service)
+
+
+def test_malformed_forecast_counts_as_a_failure_and_fails_over(service):
+    async def malformed(location, days):
+        return parse_malformed_forecast()
+
+    service.providers["primary"].fetch_forecast = malformed
+    assert "daily_summaries" in fetch(service)
+    assert service.breakers["primary"].failures == 1
+    assert service.providers["backup"].calls == 1